@@ -66,6 +66,10 @@
         # LMS Data
         'data/lms_default_data.xml',
         'data/lms_system_parameters.xml',
+        # KPI snapshot
+        'data/kpi_snapshot_data.xml',
+        # Inventory age
+        'data/cron_jobs.xml',
 
         'report/ir_actions_report_templates.xml',
         'report/ir_actions_report.xml',
@@ -102,6 +106,7 @@
         'views/res_partner_car.xml',
         'views/res_partner.xml',
         'views/sale_order.xml',
+        'views/lead_time_recompute_views.xml',
         'views/stall_views.xml',
         'views/sale_order_template.xml',
         'views/service_booking_views.xml',
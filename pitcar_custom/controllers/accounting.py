@@ -5,18 +5,45 @@ Following campaign API pattern - no API key required, auth='user'
 Same endpoint URLs as before
 """
 
-from odoo import http, fields
+import odoo
+from odoo import http, fields, api
 from odoo.http import request, Response
+from odoo.tools import split_every
 import logging
 import json
 import math
 from datetime import datetime, timedelta
 from io import StringIO
+from itertools import groupby
 import csv
 from odoo.exceptions import ValidationError, AccessError
 
 _logger = logging.getLogger(__name__)
 
+# Jumlah move per batch export; cache ORM dikosongkan setiap batch
+EXPORT_BATCH_SIZE = 500
+
+CSV_EXPORT_HEADERS = [
+    'Number', 'Date', 'Reference', 'Partner', 'Type', 'State',
+    'Amount Total', 'Amount Tax', 'Car Plate', 'Car Brand',
+    'Service Advisors', 'Mechanics', 'Vendor', 'Is Audit',
+    'Created Date'
+]
+
+# Kolom account.move yang dibaca untuk export (_serialize_move level standard/full)
+EXPORT_MOVE_FIELDS = [
+    'name', 'ref', 'date', 'move_type', 'state', 'amount_total', 'amount_untaxed', 'amount_tax',
+    'invoice_origin', 'create_date', 'write_date', 'partner_id', 'vendor_id', 'partner_car_id',
+    'partner_car_brand', 'partner_car_brand_type', 'partner_car_year', 'partner_car_odometer',
+    'service_advisor_id', 'car_mechanic_id_new', 'generated_mechanic_team', 'is_stock_audit',
+    'audit_type', 'audit_difference', 'is_within_tolerance', 'date_sale_completed',
+    'date_sale_quotation', 'car_arrival_time'
+]
+EXPORT_LINE_FIELDS = [
+    'name', 'account_id', 'debit', 'credit', 'balance', 'partner_id', 'vendor_id',
+    'customer_phone', 'customer_source', 'is_loyal_customer'
+]
+
 class WorkshopAccountingAPI(http.Controller):
     
     @http.route('/web/accounting/query', type='json', auth='user', methods=['POST'], csrf=False)
@@ -133,6 +160,83 @@ class WorkshopAccountingAPI(http.Controller):
                 'timestamp': datetime.now().isoformat()
             }
 
+    @http.route('/web/accounting/export', type='http', auth='user', methods=['GET', 'POST'], csrf=False)
+    def accounting_export_stream(self, **kw):
+        """
+        Export streaming (chunked) account.move sebagai CSV atau NDJSON.
+
+        Parameter (query string atau body JSON):
+            format: 'csv' (default) atau 'ndjson'
+            include_lines: sertakan journal item (hanya ndjson)
+            filters: filter yang sama dengan operation=export (JSON string di query string)
+        """
+        data = dict(kw)
+        if request.httprequest.mimetype == 'application/json':
+            try:
+                data.update(json.loads(request.httprequest.get_data(as_text=True) or '{}'))
+            except ValueError:
+                return Response(json.dumps({'status': 'error', 'message': 'Invalid JSON body'}),
+                                status=400, content_type='application/json')
+        filters = data.pop('filters', None) or {}
+        if isinstance(filters, str):
+            try:
+                filters = json.loads(filters)
+            except ValueError:
+                return Response(json.dumps({'status': 'error', 'message': 'Invalid filters'}),
+                                status=400, content_type='application/json')
+        data.update(filters)
+
+        export_format = data.get('format', 'csv')
+        if export_format not in ('csv', 'ndjson'):
+            return Response(json.dumps({'status': 'error', 'message': 'Format must be csv or ndjson'}),
+                            status=400, content_type='application/json')
+        include_lines = str(data.get('include_lines', '')).lower() in ('1', 'true', 'yes')
+        domain = self._build_search_domain(data)
+
+        filename = 'accounting_export_%s.%s' % (datetime.now().strftime('%Y%m%d_%H%M%S'), export_format)
+        headers = [
+            ('Content-Type', 'text/csv; charset=utf-8' if export_format == 'csv' else 'application/x-ndjson'),
+            ('Content-Disposition', 'attachment; filename="%s"' % filename),
+            ('Cache-Control', 'no-cache'),
+            ('X-Accel-Buffering', 'no')
+        ]
+        stream = self._stream_export(
+            request.db, request.env.uid, dict(request.env.context), domain, export_format, include_lines
+        )
+        return Response(stream, headers=headers, direct_passthrough=True)
+
+    def _stream_export(self, dbname, uid, context, domain, export_format, include_lines):
+        """
+        Generator export per batch.
+
+        Dijalankan setelah controller selesai (cursor request sudah ditutup),
+        sehingga memakai cursor sendiri. Setiap batch hanya membaca kolom yang
+        diekspor lalu cache dikosongkan, jadi memori tetap terbatas.
+        """
+        with odoo.registry(dbname).cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            try:
+                if export_format == 'csv':
+                    buffer = StringIO()
+                    writer = csv.writer(buffer)
+                    writer.writerow(CSV_EXPORT_HEADERS)
+                    yield buffer.getvalue().encode('utf-8')
+                for moves in self._iter_export_batches(env, domain, include_lines):
+                    buffer = StringIO()
+                    if export_format == 'csv':
+                        writer = csv.writer(buffer)
+                        writer.writerows(self._csv_export_row(move) for move in moves)
+                    else:
+                        detail_level = 'full' if include_lines else 'standard'
+                        for move in moves:
+                            buffer.write(json.dumps(self._serialize_move(move, detail_level), default=str))
+                            buffer.write('\n')
+                    yield buffer.getvalue().encode('utf-8')
+            except Exception:
+                # Header sudah terkirim; hentikan stream dan catat error
+                _logger.exception('Error streaming accounting export')
+                raise
+
     # =====================================
     # QUERY OPERATION HANDLERS
     # =====================================
@@ -206,10 +310,10 @@ class WorkshopAccountingAPI(http.Controller):
             # Build domain
             domain = self._build_search_domain(data)
             
-            # Get moves for analysis
-            moves = request.env['account.move'].search(domain)
+            # Overview dihitung lebih dulu untuk cek data kosong dan rentang tanggal
+            overview = request.env['pitcar.accounting.stats'].get_overview(domain)
             
-            if not moves:
+            if not overview['total_moves']:
                 return {
                     'status': 'success',
                     'operation': 'statistics',
@@ -217,7 +321,7 @@ class WorkshopAccountingAPI(http.Controller):
                 }
             
             # Calculate statistics
-            stats = self._calculate_comprehensive_stats(moves, data)
+            stats = self._calculate_comprehensive_stats(domain, data, overview)
             
             return {
                 'status': 'success',
@@ -225,10 +329,10 @@ class WorkshopAccountingAPI(http.Controller):
                 'data': stats,
                 'meta': {
                     'generated_at': datetime.now().isoformat(),
-                    'total_moves_analyzed': len(moves),
+                    'total_moves_analyzed': overview['total_moves'],
                     'date_range': {
-                        'from': min(moves.mapped('date')).isoformat() if moves.mapped('date') else None,
-                        'to': max(moves.mapped('date')).isoformat() if moves.mapped('date') else None
+                        'from': overview['date_from'].isoformat() if overview['date_from'] else None,
+                        'to': overview['date_to'].isoformat() if overview['date_to'] else None
                     }
                 }
             }
@@ -245,9 +349,9 @@ class WorkshopAccountingAPI(http.Controller):
         try:
             # Build domain
             domain = self._build_search_domain(data)
-            moves = request.env['account.move'].search(domain, order='date desc')
+            overview = request.env['pitcar.accounting.stats'].get_overview(domain)
             
-            if not moves:
+            if not overview['total_moves']:
                 return {
                     'status': 'success',
                     'operation': 'export',
@@ -258,9 +362,9 @@ class WorkshopAccountingAPI(http.Controller):
             include_lines = data.get('include_lines', False)
             
             if export_format == 'csv_ready':
-                return self._export_csv_format(moves)
+                return self._export_csv_format(domain)
             else:
-                return self._export_structured_format(moves, include_lines)
+                return self._export_structured_format(domain, include_lines, overview)
                 
         except Exception as e:
             _logger.error('Error exporting data: %s', str(e))
@@ -269,6 +373,35 @@ class WorkshopAccountingAPI(http.Controller):
                 'message': f'Error exporting data: {str(e)}'
             }
 
+    def _iter_export_batches(self, env, domain, include_lines=False):
+        """
+        Move hasil domain per batch (urut tanggal terbaru), dengan kolom export
+        dibaca lewat read() dan cache dikosongkan setelah setiap batch.
+        """
+        Move = env['account.move']
+        move_ids = Move.search(domain, order='date desc, id desc').ids
+        for batch_ids in split_every(EXPORT_BATCH_SIZE, move_ids):
+            moves = Move.browse(batch_ids)
+            self._prefetch_export_fields(moves, include_lines)
+            yield moves
+            env.invalidate_all()
+
+    def _prefetch_export_fields(self, moves, include_lines=False):
+        """Isi cache hanya dengan kolom yang dipakai _serialize_move/_csv_export_row"""
+        moves.read(EXPORT_MOVE_FIELDS, load=None)
+        moves.partner_id.read(['name', 'phone', 'mobile', 'email'], load=None)
+        moves.vendor_id.read(['name'], load=None)
+        moves.partner_car_id.read(['number_plate'], load=None)
+        moves.partner_car_brand.read(['name'], load=None)
+        moves.partner_car_brand_type.read(['name'], load=None)
+        moves.service_advisor_id.read(['name'], load=None)
+        moves.car_mechanic_id_new.read(['name'], load=None)
+        if include_lines:
+            lines = moves.line_ids
+            lines.read(EXPORT_LINE_FIELDS, load=None)
+            lines.account_id.read(['code', 'name'], load=None)
+            (lines.partner_id | lines.vendor_id).read(['name'], load=None)
+
     def _get_related_data(self, data):
         """Get related data (partners, cars, employees, etc.)"""
         try:
@@ -468,23 +601,17 @@ class WorkshopAccountingAPI(http.Controller):
                     'message': 'No draft moves found to post'
                 }
             
-            posted_moves = []
-            failed_moves = []
-            
-            for move in draft_moves:
-                try:
-                    move.action_post()
-                    posted_moves.append({
-                        'id': move.id,
-                        'name': move.name,
-                        'status': 'posted'
-                    })
-                except Exception as e:
-                    failed_moves.append({
-                        'id': move.id,
-                        'name': move.name,
-                        'error': str(e)
-                    })
+            posted, failures = self._run_move_action(draft_moves, 'action_post')
+            posted_moves = [{
+                'id': move.id,
+                'name': move.name,
+                'status': 'posted'
+            } for move in posted]
+            failed_moves = [{
+                'id': move.id,
+                'name': move.name,
+                'error': failures[move.id]
+            } for move in draft_moves if move.id in failures]
             
             return {
                 'status': 'partial_success' if failed_moves else 'success',
@@ -518,23 +645,17 @@ class WorkshopAccountingAPI(http.Controller):
             moves = request.env['account.move'].browse(move_ids)
             cancelable_moves = moves.filtered(lambda m: m.state in ['draft', 'posted'])
             
-            canceled_moves = []
-            failed_moves = []
-            
-            for move in cancelable_moves:
-                try:
-                    move.button_cancel()
-                    canceled_moves.append({
-                        'id': move.id,
-                        'name': move.name,
-                        'status': 'canceled'
-                    })
-                except Exception as e:
-                    failed_moves.append({
-                        'id': move.id,
-                        'name': move.name,
-                        'error': str(e)
-                    })
+            canceled, failures = self._run_move_action(cancelable_moves, 'button_cancel')
+            canceled_moves = [{
+                'id': move.id,
+                'name': move.name,
+                'status': 'canceled'
+            } for move in canceled]
+            failed_moves = [{
+                'id': move.id,
+                'name': move.name,
+                'error': failures[move.id]
+            } for move in cancelable_moves if move.id in failures]
             
             return {
                 'status': 'partial_success' if failed_moves else 'success',
@@ -556,7 +677,15 @@ class WorkshopAccountingAPI(http.Controller):
             }
 
     def _bulk_operations(self, data):
-        """Execute bulk operations in sequence"""
+        """
+        Execute bulk operations.
+
+        Operasi berurutan dengan tipe sama dijalankan sebagai satu batch:
+        referensi di-prefetch sekali, create memakai satu create multi-record,
+        post/cancel memakai satu action_post/button_cancel. Jika batch gagal,
+        batch diulang per item dengan savepoint sehingga hanya item bermasalah
+        yang gagal. Urutan antar kelompok operasi tetap sama dengan request.
+        """
         try:
             operations = data.get('operations', [])
             if not operations:
@@ -567,49 +696,41 @@ class WorkshopAccountingAPI(http.Controller):
             
             results = []
             stop_on_error = data.get('stop_on_error', False)
+            handlers = {
+                'create': self._bulk_create,
+                'update': self._bulk_update,
+                'post': self._bulk_post,
+                'cancel': self._bulk_cancel,
+            }
             
-            for i, op in enumerate(operations):
-                op_type = op.get('operation')
-                op_data = op.get('data', {})
+            for op_type, group in groupby(enumerate(operations), key=lambda item: item[1].get('operation')):
+                items = [(i, op.get('data', {})) for i, op in group]
+                handler = handlers.get(op_type)
+                if handler:
+                    group_results = handler(items, stop_on_error)
+                else:
+                    group_results = {i: {
+                        'status': 'error',
+                        'message': f'Unknown operation: {op_type}'
+                    } for i, _ in items}
                 
-                try:
-                    if op_type == 'create':
-                        result = self._create_move(op_data)
-                    elif op_type == 'update':
-                        result = self._update_move(op_data)
-                    elif op_type == 'post':
-                        result = self._post_moves(op_data)
-                    elif op_type == 'cancel':
-                        result = self._cancel_moves(op_data)
-                    else:
-                        result = {
-                            'status': 'error',
-                            'message': f'Unknown operation: {op_type}'
-                        }
-                    
+                stopped = False
+                for i, _ in items:
+                    if i not in group_results:
+                        # Item tidak dijalankan karena stop_on_error
+                        stopped = True
+                        break
                     results.append({
                         'index': i,
                         'operation': op_type,
-                        'result': result
+                        'result': group_results[i]
                     })
-                    
                     # Stop on first error if requested
-                    if result.get('status') == 'error' and stop_on_error:
-                        break
-                        
-                except Exception as e:
-                    error_result = {
-                        'index': i,
-                        'operation': op_type,
-                        'result': {
-                            'status': 'error',
-                            'message': str(e)
-                        }
-                    }
-                    results.append(error_result)
-                    
-                    if stop_on_error:
+                    if group_results[i].get('status') == 'error' and stop_on_error:
+                        stopped = True
                         break
+                if stopped:
+                    break
             
             successful = len([r for r in results if r['result'].get('status') == 'success'])
             failed = len([r for r in results if r['result'].get('status') == 'error'])
@@ -635,6 +756,277 @@ class WorkshopAccountingAPI(http.Controller):
                 'message': f'Error in bulk operations: {str(e)}'
             }
 
+    def _bulk_create(self, items, stop_on_error=False):
+        """
+        Create banyak move sekaligus.
+
+        Returns:
+            dict: {index: result} (item setelah error pertama tidak ada jika stop_on_error)
+        """
+        env = request.env
+        results = {}
+        prepared = []
+        for index, op_data in items:
+            missing_fields = [field for field in ['move_type', 'partner_id'] if not op_data.get(field)]
+            if missing_fields:
+                prepared.append((index, op_data, None, f'Missing required fields: {", ".join(missing_fields)}'))
+                continue
+            try:
+                prepared.append((index, op_data, self._prepare_move_values(op_data), None))
+            except (ValueError, TypeError) as e:
+                prepared.append((index, op_data, None, f'Error creating move: {str(e)}'))
+
+        missing_refs = self._get_missing_references([values for _, _, values, _ in prepared if values])
+
+        to_create = []
+        for index, op_data, values, error in prepared:
+            if not error:
+                missing = [label for field, (label, missing_ids) in missing_refs.items()
+                           if self._referenced_ids(values, field) & missing_ids]
+                if missing:
+                    error = 'Error creating move: %s not found' % ', '.join(missing)
+            if error:
+                results[index] = {'status': 'error', 'message': error}
+                if stop_on_error:
+                    break
+                continue
+            to_create.append((index, op_data, values))
+
+        if not to_create:
+            return results
+
+        Move = env['account.move']
+        created = {}
+        try:
+            with env.cr.savepoint():
+                moves = Move.create([values for _, _, values in to_create])
+                to_post = Move.browse([
+                    move.id for move, (_, op_data, _) in zip(moves, to_create) if op_data.get('auto_post', False)
+                ])
+                to_post.filtered(lambda m: m.state == 'draft').action_post()
+            created = dict(zip([index for index, _, _ in to_create], moves))
+        except Exception as e:
+            # Ulangi per item supaya hanya item yang bermasalah yang gagal
+            _logger.info('Bulk move create failed, retrying per item: %s', str(e))
+            env.clear()
+            for index, op_data, values in to_create:
+                try:
+                    with env.cr.savepoint():
+                        move = Move.create(values)
+                        if op_data.get('auto_post', False) and move.state == 'draft':
+                            move.action_post()
+                    created[index] = move
+                except Exception as item_error:
+                    env.clear()
+                    if isinstance(item_error, ValidationError):
+                        message = f'Validation error: {str(item_error)}'
+                    else:
+                        message = f'Error creating move: {str(item_error)}'
+                    results[index] = {'status': 'error', 'message': message}
+                    if stop_on_error:
+                        # Hasil validasi untuk item setelahnya tidak berlaku lagi
+                        results = {i: r for i, r in results.items() if i <= index}
+                        break
+
+        if created:
+            self._prefetch_export_fields(Move.browse([move.id for move in created.values()]))
+        for index, move in created.items():
+            results[index] = {
+                'status': 'success',
+                'operation': 'create',
+                'data': self._serialize_move(move, 'standard'),
+                'message': f'Account move "{move.name}" created successfully'
+            }
+        return results
+
+    def _get_missing_references(self, values_list):
+        """
+        Prefetch semua record yang direferensikan values create sekaligus.
+
+        Returns:
+            dict: {field: (label, set id yang tidak ditemukan)} hanya untuk field dengan id hilang
+        """
+        references = {
+            'partner_id': ('Partner', 'res.partner'),
+            'vendor_id': ('Vendor', 'res.partner'),
+            'partner_car_id': ('Car', 'res.partner.car'),
+            'service_advisor_id': ('Service advisor', 'pitcar.service.advisor'),
+            'car_mechanic_id_new': ('Mechanic', 'pitcar.mechanic.new'),
+        }
+        missing_refs = {}
+        for field, (label, model) in references.items():
+            ids = set()
+            for values in values_list:
+                ids |= self._referenced_ids(values, field)
+            if not ids:
+                continue
+            missing = ids - set(request.env[model].browse(list(ids)).exists().ids)
+            if missing:
+                missing_refs[field] = (label, missing)
+        return missing_refs
+
+    def _referenced_ids(self, values, field):
+        """Id record yang direferensikan field many2one/many2many (perintah (6, 0, ids)) di values"""
+        value = values.get(field)
+        if not value:
+            return set()
+        if isinstance(value, list):
+            return {int(record_id) for command in value for record_id in command[2]}
+        return {int(value)}
+
+    def _bulk_update(self, items, stop_on_error=False):
+        """Update banyak move; move di-prefetch sekali, write per item dengan savepoint"""
+        env = request.env
+        results = {}
+        move_ids = set()
+        for _, op_data in items:
+            move_id = op_data.get('move_id') or op_data.get('id')
+            if move_id:
+                move_ids.add(int(move_id))
+        moves = env['account.move'].browse(list(move_ids)).exists()
+        moves.read(['name', 'state'])
+        existing = {move.id: move for move in moves}
+
+        updated = env['account.move']
+        for index, op_data in items:
+            move_id = op_data.get('move_id') or op_data.get('id')
+            move = existing.get(int(move_id)) if move_id else None
+            if not move_id:
+                result = {'status': 'error', 'message': 'move_id or id is required'}
+            elif not move:
+                result = {'status': 'error', 'message': 'Account move not found'}
+            elif move.state == 'posted' and not op_data.get('allow_posted_edit', False):
+                result = {'status': 'error', 'message': 'Cannot update posted moves unless allow_posted_edit is True'}
+            else:
+                update_values = self._prepare_update_values(op_data)
+                if not update_values:
+                    result = {'status': 'error', 'message': 'No valid fields to update'}
+                else:
+                    try:
+                        with env.cr.savepoint():
+                            move.write(update_values)
+                        updated |= move
+                        result = {'status': 'success', 'operation': 'update', 'move': move}
+                    except Exception as e:
+                        env.clear()
+                        result = {'status': 'error', 'message': f'Error updating move: {str(e)}'}
+            results[index] = result
+            if result['status'] == 'error' and stop_on_error:
+                break
+
+        if updated:
+            self._prefetch_export_fields(updated)
+        for result in results.values():
+            move = result.pop('move', None)
+            if move:
+                result['data'] = self._serialize_move(move, 'standard')
+                result['message'] = f'Account move "{move.name}" updated successfully'
+        return results
+
+    def _bulk_post(self, items, stop_on_error=False):
+        """Post move dari beberapa operasi post dengan satu action_post"""
+        return self._bulk_move_action(items, stop_on_error, 'post')
+
+    def _bulk_cancel(self, items, stop_on_error=False):
+        """Cancel move dari beberapa operasi cancel dengan satu button_cancel"""
+        return self._bulk_move_action(items, stop_on_error, 'cancel')
+
+    def _bulk_move_action(self, items, stop_on_error, operation):
+        """
+        Jalankan post/cancel untuk beberapa operasi sekaligus. Move yang sudah
+        diambil operasi sebelumnya dalam kelompok yang sama tidak diproses ulang,
+        sama seperti eksekusi berurutan.
+        """
+        env = request.env
+        if operation == 'post':
+            method, allowed_states, done_key, done_status = 'action_post', ('draft',), 'posted_moves', 'posted'
+        else:
+            method, allowed_states, done_key, done_status = 'button_cancel', ('draft', 'posted'), 'canceled_moves', 'canceled'
+
+        all_ids = {int(move_id) for _, op_data in items for move_id in (op_data.get('move_ids') or [])}
+        moves = env['account.move'].browse(list(all_ids)).exists()
+        moves.read(['name', 'state'])
+        states = {move.id: move.state for move in moves}
+
+        results = {}
+        planned = []
+        claimed = set()
+        for index, op_data in items:
+            move_ids = op_data.get('move_ids', [])
+            if not move_ids:
+                results[index] = {'status': 'error', 'message': 'move_ids is required and must be a list'}
+            else:
+                targets = env['account.move'].browse([
+                    int(move_id) for move_id in move_ids
+                    if states.get(int(move_id)) in allowed_states and int(move_id) not in claimed
+                ])
+                claimed.update(targets.ids)
+                if operation == 'post' and not targets:
+                    results[index] = {'status': 'error', 'message': 'No draft moves found to post'}
+                else:
+                    planned.append((index, targets))
+            if index in results and stop_on_error:
+                break
+
+        done, failures = self._run_move_action(
+            env['account.move'].browse(list(claimed)), method
+        )
+        done_ids = set(done.ids)
+        for index, targets in planned:
+            done_moves = [{
+                'id': move.id,
+                'name': move.name,
+                'status': done_status
+            } for move in targets if move.id in done_ids]
+            failed_moves = [{
+                'id': move.id,
+                'name': move.name,
+                'error': failures[move.id]
+            } for move in targets if move.id in failures]
+            results[index] = {
+                'status': 'partial_success' if failed_moves else 'success',
+                'operation': operation,
+                'data': {
+                    done_key: done_moves,
+                    'failed_moves': failed_moves,
+                    'total_%s' % done_status: len(done_moves),
+                    'total_failed': len(failed_moves)
+                },
+                'message': f'{done_status.capitalize()} {len(done_moves)} moves, {len(failed_moves)} failed'
+            }
+        return results
+
+    def _run_move_action(self, moves, method):
+        """
+        Panggil `method` (action_post/button_cancel) untuk semua move sekaligus;
+        jika gagal, ulangi per move dengan savepoint.
+
+        Returns:
+            tuple: (recordset move yang berhasil, {move_id: pesan error})
+        """
+        if not moves:
+            return moves, {}
+        env = request.env
+        try:
+            with env.cr.savepoint():
+                getattr(moves, method)()
+            return moves, {}
+        except Exception as e:
+            _logger.info('Bulk %s failed, retrying per move: %s', method, str(e))
+            env.clear()
+
+        done = moves.browse()
+        failures = {}
+        for move in moves:
+            try:
+                with env.cr.savepoint():
+                    getattr(move, method)()
+                done |= move
+            except Exception as e:
+                env.clear()
+                failures[move.id] = str(e)
+        return done, failures
+
     # =====================================
     # UTILITY METHODS
     # =====================================
@@ -901,188 +1293,109 @@ class WorkshopAccountingAPI(http.Controller):
 
     def _calculate_quick_stats(self, domain):
         """Calculate quick statistics for search results"""
-        moves = request.env['account.move'].search(domain)
+        Stats = request.env['pitcar.accounting.stats']
+        overview = Stats.get_overview(domain)
+        by_state, by_type = Stats.get_state_type_breakdown(domain)
         
-        stats = {
-            'total_count': len(moves),
-            'total_amount': sum(moves.mapped('amount_total')),
-            'avg_amount': sum(moves.mapped('amount_total')) / len(moves) if moves else 0,
-            'by_state': {},
-            'by_type': {}
+        return {
+            'total_count': overview['total_moves'],
+            'total_amount': overview['total_amount'],
+            'avg_amount': overview['total_amount'] / overview['total_moves'] if overview['total_moves'] else 0,
+            'by_state': {state: values['count'] for state, values in by_state.items()},
+            'by_type': {move_type: values['count'] for move_type, values in by_type.items()}
         }
-        
-        # Count by state
-        for state in ['draft', 'posted', 'cancel']:
-            stats['by_state'][state] = len(moves.filtered(lambda m: m.state == state))
-        
-        # Count by type
-        for move_type in ['entry', 'out_invoice', 'in_invoice', 'out_refund', 'in_refund']:
-            stats['by_type'][move_type] = len(moves.filtered(lambda m: m.move_type == move_type))
-        
-        return stats
 
-    def _calculate_comprehensive_stats(self, moves, options):
+    def _calculate_comprehensive_stats(self, domain, options, overview=None):
         """Calculate comprehensive statistics"""
+        Stats = request.env['pitcar.accounting.stats']
+        if overview is None:
+            overview = Stats.get_overview(domain)
+        by_state, by_type = Stats.get_state_type_breakdown(domain)
+
         stats = {
             'overview': {
-                'total_moves': len(moves),
-                'total_amount': sum(moves.mapped('amount_total')),
-                'average_amount': sum(moves.mapped('amount_total')) / len(moves) if moves else 0,
+                'total_moves': overview['total_moves'],
+                'total_amount': overview['total_amount'],
+                'average_amount': overview['total_amount'] / overview['total_moves'] if overview['total_moves'] else 0,
             },
-            'by_state': {},
-            'by_type': {},
+            'by_state': by_state,
+            'by_type': by_type,
             'workshop_analytics': {
-                'with_cars': len(moves.filtered('partner_car_id')),
-                'with_service_advisors': len(moves.filtered('service_advisor_id')),
-                'with_mechanics': len(moves.filtered('car_mechanic_id_new')),
-                'stock_audits': len(moves.filtered('is_stock_audit')),
-                'within_tolerance': len(moves.filtered('is_within_tolerance'))
+                'with_cars': overview['with_cars'],
+                'with_service_advisors': overview['with_service_advisors'],
+                'with_mechanics': overview['with_mechanics'],
+                'stock_audits': overview['stock_audits'],
+                'within_tolerance': overview['within_tolerance']
             }
         }
         
-        # Count by state
-        for state in ['draft', 'posted', 'cancel']:
-            filtered_moves = moves.filtered(lambda m: m.state == state)
-            stats['by_state'][state] = {
-                'count': len(filtered_moves),
-                'amount': sum(filtered_moves.mapped('amount_total'))
-            }
-        
-        # Count by type
-        for move_type in ['entry', 'out_invoice', 'in_invoice', 'out_refund', 'in_refund']:
-            filtered_moves = moves.filtered(lambda m: m.move_type == move_type)
-            stats['by_type'][move_type] = {
-                'count': len(filtered_moves),
-                'amount': sum(filtered_moves.mapped('amount_total'))
-            }
-        
         # Monthly breakdown if requested
         if options.get('include_monthly', True):
-            monthly_data = {}
-            for move in moves:
-                if move.date:
-                    month_key = move.date.strftime('%Y-%m')
-                    if month_key not in monthly_data:
-                        monthly_data[month_key] = {'count': 0, 'amount': 0}
-                    monthly_data[month_key]['count'] += 1
-                    monthly_data[month_key]['amount'] += move.amount_total
-            
-            stats['by_month'] = monthly_data
+            stats['by_month'] = Stats.get_monthly_breakdown(domain)
         
         # Top analysis if requested
         if options.get('include_top_analysis', True):
-            stats['top_customers'] = self._get_top_partners(moves, 'customer')
-            stats['top_vendors'] = self._get_top_partners(moves, 'vendor')
+            stats['top_customers'] = self._get_top_partners(domain, 'customer')
+            stats['top_vendors'] = self._get_top_partners(domain, 'vendor')
         
         # Customer analysis if requested
         if options.get('include_customer_analysis', True):
-            stats['customer_analysis'] = self._get_customer_analysis(moves)
+            stats['customer_analysis'] = self._get_customer_analysis(domain)
         
         return stats
 
-    def _get_top_partners(self, moves, partner_type='customer'):
+    def _get_top_partners(self, domain, partner_type='customer'):
         """Get top partners by transaction volume"""
-        partner_stats = {}
-        
-        if partner_type == 'customer':
-            partner_moves = moves.filtered('partner_id')
-            partner_field = 'partner_id'
-        else:  # vendor
-            partner_moves = moves.filtered('vendor_id')
-            partner_field = 'vendor_id'
-        
-        for move in partner_moves:
-            partner = getattr(move, partner_field)
-            partner_id = partner.id
-            
-            if partner_id not in partner_stats:
-                partner_stats[partner_id] = {
-                    'id': partner_id,
-                    'name': partner.name,
-                    'count': 0,
-                    'amount': 0
-                }
-            
-            partner_stats[partner_id]['count'] += 1
-            partner_stats[partner_id]['amount'] += move.amount_total
-        
-        # Sort by amount and return top 10
-        return sorted(partner_stats.values(), key=lambda x: x['amount'], reverse=True)[:10]
+        partner_field = 'partner_id' if partner_type == 'customer' else 'vendor_id'
+        return request.env['pitcar.accounting.stats'].get_top_partners(domain, partner_field, limit=10)
 
-    def _get_customer_analysis(self, moves):
+    def _get_customer_analysis(self, domain):
         """Get customer source analysis"""
-        # Get move lines for customer analysis
-        move_ids = moves.ids
-        lines = request.env['account.move.line'].search([
-            ('move_id', 'in', move_ids),
-            ('customer_source', '!=', False)
-        ])
-        
-        source_stats = {}
-        for line in lines:
-            source = line.customer_source
-            if source not in source_stats:
-                source_stats[source] = 0
-            source_stats[source] += 1
-        
-        loyal_count = len(lines.filtered('is_loyal_customer'))
-        total_count = len(lines)
-        
-        return {
-            'customer_sources': source_stats,
-            'loyal_customers': {
-                'count': loyal_count,
-                'percentage': (loyal_count / total_count * 100) if total_count > 0 else 0
-            }
-        }
+        return request.env['pitcar.accounting.stats'].get_customer_analysis(domain)
 
-    def _export_csv_format(self, moves):
-        """Export in CSV-ready format"""
-        headers = [
-            'Number', 'Date', 'Reference', 'Partner', 'Type', 'State',
-            'Amount Total', 'Amount Tax', 'Car Plate', 'Car Brand',
-            'Service Advisors', 'Mechanics', 'Vendor', 'Is Audit',
-            'Created Date'
+    def _csv_export_row(self, move):
+        """Satu baris CSV export"""
+        return [
+            move.name,
+            move.date.strftime('%Y-%m-%d') if move.date else '',
+            move.ref or '',
+            move.partner_id.name if move.partner_id else '',
+            move.move_type,
+            move.state,
+            move.amount_total,
+            move.amount_tax,
+            move.partner_car_id.number_plate if move.partner_car_id else '',
+            move.partner_car_brand.name if move.partner_car_brand else '',
+            ', '.join(move.service_advisor_id.mapped('name')),
+            move.generated_mechanic_team or '',
+            move.vendor_id.name if move.vendor_id else '',
+            'Yes' if move.is_stock_audit else 'No',
+            move.create_date.strftime('%Y-%m-%d %H:%M:%S') if move.create_date else ''
         ]
-        
+
+    def _export_csv_format(self, domain):
+        """Export in CSV-ready format"""
         csv_data = []
-        for move in moves:
-            row = [
-                move.name,
-                move.date.strftime('%Y-%m-%d') if move.date else '',
-                move.ref or '',
-                move.partner_id.name if move.partner_id else '',
-                move.move_type,
-                move.state,
-                move.amount_total,
-                move.amount_tax,
-                move.partner_car_id.number_plate if move.partner_car_id else '',
-                move.partner_car_brand.name if move.partner_car_brand else '',
-                ', '.join(move.service_advisor_id.mapped('name')),
-                move.generated_mechanic_team or '',
-                move.vendor_id.name if move.vendor_id else '',
-                'Yes' if move.is_stock_audit else 'No',
-                move.create_date.strftime('%Y-%m-%d %H:%M:%S') if move.create_date else ''
-            ]
-            csv_data.append(row)
+        for moves in self._iter_export_batches(request.env, domain):
+            csv_data.extend(self._csv_export_row(move) for move in moves)
         
         return {
             'status': 'success',
             'operation': 'export',
             'format': 'csv_ready',
             'data': {
-                'headers': headers,
+                'headers': CSV_EXPORT_HEADERS,
                 'rows': csv_data,
                 'total_rows': len(csv_data)
             }
         }
 
-    def _export_structured_format(self, moves, include_lines):
+    def _export_structured_format(self, domain, include_lines, overview):
         """Export in structured format"""
+        detail_level = 'full' if include_lines else 'standard'
         export_data = []
-        for move in moves:
-            move_data = self._serialize_move(move, 'full' if include_lines else 'standard')
-            export_data.append(move_data)
+        for moves in self._iter_export_batches(request.env, domain, include_lines):
+            export_data.extend(self._serialize_move(move, detail_level) for move in moves)
         
         return {
             'status': 'success',
@@ -1092,10 +1405,10 @@ class WorkshopAccountingAPI(http.Controller):
                 'moves': export_data,
                 'total_count': len(export_data),
                 'summary': {
-                    'total_amount': sum(moves.mapped('amount_total')),
+                    'total_amount': overview['total_amount'],
                     'date_range': {
-                        'from': min(moves.mapped('date')).isoformat() if moves.mapped('date') else None,
-                        'to': max(moves.mapped('date')).isoformat() if moves.mapped('date') else None
+                        'from': overview['date_from'].isoformat() if overview['date_from'] else None,
+                        'to': overview['date_to'].isoformat() if overview['date_to'] else None
                     }
                 }
             }
@@ -698,7 +698,7 @@ class AttendanceAPI(http.Controller):
         """Create new work location"""
         try:
             # Debug logging
-            _logger.info(f"Received kw: {kw}")
+            _logger.debug("Received kw: %s", kw)
             
             # Get params from JSONRPC request
             params = kw
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta, date, time
 import psycopg2  # Tambahkan import ini
 import math
 import pytz
+from odoo.addons.pitcar_custom.models.stall_availability import BOOKING_OPEN_HOUR, BOOKING_CLOSE_HOUR
 
 _logger = logging.getLogger(__name__)
 
@@ -85,70 +86,28 @@ class BookingController(http.Controller):
             # Hitung end_time
             end_time = time + duration
             
-            # Ambil semua stall aktif
+            # Ambil semua stall aktif dan seluruh booking tanggal tersebut sekaligus
             stalls = request.env['pitcar.service.stall'].sudo().search([('active', '=', True)])
+            availability = request.env['pitcar.stall.availability'].get_day_availability(date, stalls)
             
             available_stalls = []
             for stall in stalls:
-                # Cek konflik booking
-                conflicting_bookings = request.env['pitcar.service.booking'].sudo().search([
-                    ('stall_id', '=', stall.id),
-                    ('booking_date', '=', date),
-                    ('state', 'not in', ['cancelled']),
-                    '|',
-                    '&', ('booking_time', '<', time), ('booking_end_time', '>', time),
-                    '&', ('booking_time', '<', end_time), ('booking_end_time', '>', end_time),
-                    '&', ('booking_time', '>=', time), ('booking_time', '<', end_time)
-                ])
-                
-                # Dapatkan semua booking yang ada untuk stall ini pada tanggal tersebut
-                existing_bookings = request.env['pitcar.service.booking'].sudo().search([
-                    ('stall_id', '=', stall.id),
-                    ('booking_date', '=', date),
-                    ('state', 'not in', ['cancelled']),
-                ], order='booking_time')
-                
-                booked_slots = []
-                for booking in existing_bookings:
-                    booked_slots.append({
-                        'start_time': booking.booking_time,
-                        'end_time': booking.booking_end_time,
-                        'customer': booking.partner_id.name,
-                        'service': booking.service_subcategory
-                    })
-                
-                # Tentukan stall_position berdasarkan stall.name
-                stall_position = 'unassigned'
-                if stall.name and "Stall " in stall.name:
-                    try:
-                        stall_number = int(stall.name.replace("Stall ", ""))
-                        if 1 <= stall_number <= 10:
-                            stall_position = f'stall{stall_number}'
-                    except ValueError:
-                        pass
-                
-                # Jika tidak ada konflik, tambahkan ke available stalls
-                if not conflicting_bookings:
-                    available_stalls.append({
-                        'id': stall.id,
-                        'name': stall.name,
-                        'code': stall.code,
-                        'mechanics': [{'id': m.id, 'name': m.name} for m in stall.mechanic_ids],
-                        'booked_slots': booked_slots,
-                        'is_available': True,
-                        'stall_position': stall_position  # Tambahkan informasi ini
-                    })
-                else:
-                    # Optional: Return stall yang sudah terisi juga dengan flag is_available=False
-                    available_stalls.append({
-                        'id': stall.id,
-                        'name': stall.name,
-                        'code': stall.code,
-                        'mechanics': [{'id': m.id, 'name': m.name} for m in stall.mechanic_ids],
-                        'booked_slots': booked_slots,
-                        'is_available': False,
-                        'stall_position': stall_position  # Tambahkan informasi ini
-                    })
+                booked_slots = [{
+                    'start_time': booking['booking_time'],
+                    'end_time': booking['booking_end_time'],
+                    'customer': booking['partner_id'] and booking['partner_id'][1],
+                    'service': booking['service_subcategory']
+                } for booking in availability.bookings_by_stall[stall.id]]
+                
+                available_stalls.append({
+                    'id': stall.id,
+                    'name': stall.name,
+                    'code': stall.code,
+                    'mechanics': [{'id': m.id, 'name': m.name} for m in stall.mechanic_ids],
+                    'booked_slots': booked_slots,
+                    'is_available': availability.is_free(stall.id, time, end_time),
+                    'stall_position': self._get_stall_position(stall)
+                })
             
             return {
                 'status': 'success',
@@ -165,6 +124,89 @@ class BookingController(http.Controller):
             _logger.error(f"Error in check_availability: {str(e)}")
             return {'status': 'error', 'message': str(e)}
 
+    @http.route('/web/v1/booking/suggest-slots', type='json', auth="public", methods=['POST'], csrf=False)
+    def suggest_slots(self, **kw):
+        """Rekomendasi N slot booking terbaik untuk durasi layanan dalam rentang tanggal"""
+        try:
+            date_from = kw.get('date_from') or kw.get('date')
+            if not date_from:
+                return {'status': 'error', 'message': 'date_from is required'}
+            date_from = fields.Date.to_date(date_from)
+            date_to = fields.Date.to_date(kw.get('date_to') or date_from)
+            
+            if date_to < date_from:
+                return {'status': 'error', 'message': 'date_to must be after date_from'}
+            if (date_to - date_from).days > 13:
+                return {'status': 'error', 'message': 'Date range cannot exceed 14 days'}
+            
+            # Durasi dari parameter atau dari template layanan
+            duration = kw.get('duration')
+            if not duration and kw.get('template_id'):
+                template = request.env['sale.order.template'].sudo().browse(int(kw['template_id']))
+                if not template.exists():
+                    return {'status': 'error', 'message': 'Template not found'}
+                duration = self._get_template_duration(template)
+            duration = float(duration or 0)
+            if duration <= 0:
+                return {'status': 'error', 'message': 'Duration or template_id is required'}
+            
+            if duration > BOOKING_CLOSE_HOUR - BOOKING_OPEN_HOUR:
+                return {'status': 'success', 'data': [], 'duration': duration}
+            
+            limit = min(int(kw.get('limit', 5)), 20)
+            step = float(kw.get('step', 0.5))
+            if step <= 0:
+                return {'status': 'error', 'message': 'Step must be greater than 0'}
+            
+            stalls = request.env['pitcar.service.stall'].sudo().search([('active', '=', True)])
+            not_before = datetime.now(pytz.timezone('Asia/Jakarta')).replace(tzinfo=None)
+            suggestions = request.env['pitcar.stall.availability'].suggest_slots(
+                date_from, date_to, duration, limit=limit, step=step,
+                not_before=not_before, stalls=stalls
+            )
+            
+            stall_names = {stall.id: stall.name for stall in stalls}
+            data = [{
+                'date': fields.Date.to_string(suggestion['date']),
+                'start_time': suggestion['start_time'],
+                'end_time': suggestion['end_time'],
+                'stall_id': suggestion['stall_id'],
+                'stall_name': stall_names.get(suggestion['stall_id']),
+                'alternative_stall_ids': suggestion['alternative_stall_ids'],
+            } for suggestion in suggestions]
+            
+            return {'status': 'success', 'data': data, 'duration': duration}
+            
+        except Exception as e:
+            _logger.error(f"Error in suggest_slots: {str(e)}")
+            return {'status': 'error', 'message': str(e)}
+
+    def _get_template_duration(self, template):
+        """Total durasi layanan template (sama dengan total_duration di get-template-details)"""
+        return sum(
+            (line.service_duration or 0) * line.product_uom_qty
+            for line in template.sale_order_template_line_ids
+            if line.product_id and line.product_id.type == 'service'
+        )
+
+    def _get_stall_position(self, stall):
+        """Posisi kanban (stall1..stall10) berdasarkan nama stall"""
+        if stall.name and "Stall " in stall.name:
+            try:
+                stall_number = int(stall.name.replace("Stall ", ""))
+                if 1 <= stall_number <= 10:
+                    return f'stall{stall_number}'
+            except ValueError:
+                pass
+        return 'unassigned'
+
+    def _get_local_hour(self, booking_date):
+        """Jam lokal saat ini (desimal) jika booking_date hari ini, selain itu None"""
+        now = datetime.now(pytz.timezone('Asia/Jakarta'))
+        if fields.Date.to_date(booking_date) != now.date():
+            return None
+        return now.hour + now.minute / 60.0
+
     @http.route('/web/v1/booking/init-stalls', type='json', auth="public", methods=['POST'], csrf=False)
     def init_stalls(self, **kw):
         """Initialize stalls if not exist"""
@@ -202,13 +244,32 @@ class BookingController(http.Controller):
                     })
                 stalls = request.env['pitcar.service.stall'].sudo().search([('active', '=', True)])
             
+            # Opsional: sertakan ketersediaan jika tanggal dikirim
+            booking_date = kw.get('date')
+            availability = None
+            if booking_date:
+                availability = request.env['pitcar.stall.availability'].get_day_availability(booking_date, stalls)
+                start_time = kw.get('time')
+                duration = float(kw.get('duration') or 0)
+                after = self._get_local_hour(booking_date)
+            
             result = []
             for stall in stalls:
-                result.append({
+                values = {
                     'id': stall.id,
                     'name': stall.name,
                     'code': stall.code
-                })
+                }
+                if availability:
+                    if start_time is not None:
+                        values['is_available'] = availability.is_free(
+                            stall.id, float(start_time), float(start_time) + duration
+                        )
+                    values['free_slots'] = [
+                        {'start_time': slot_start, 'end_time': slot_end}
+                        for slot_start, slot_end in availability.free_slots(stall.id, duration, after)
+                    ]
+                result.append(values)
             
             return {'status': 'success', 'data': result}
             
@@ -455,31 +516,38 @@ class BookingController(http.Controller):
             
             stalls = request.env['pitcar.service.stall'].sudo().search([('active', '=', True)])
             
+            availability = request.env['pitcar.stall.availability'].get_day_availability(date, stalls)
+            booking_day = fields.Date.to_date(date)
+            after = self._get_local_hour(booking_day)
+            
             stall_status = []
             for stall in stalls:
-                bookings = request.env['pitcar.service.booking'].sudo().search([
-                    ('stall_id', '=', stall.id),
-                    ('booking_date', '=', date),
-                    ('state', 'not in', ['cancelled']),
-                ], order='booking_time')
-                
-                timeline = []
-                for booking in bookings:
-                    timeline.append({
-                        'booking_id': booking.id,
-                        'customer': booking.partner_id.name,
-                        'car': booking.partner_car_id.name,
-                        'service': booking.service_subcategory,
-                        'start_time': booking.booking_time,
-                        'end_time': booking.booking_end_time,
-                        'status': booking.state,
-                    })
+                timeline = [{
+                    'booking_id': booking['id'],
+                    'customer': booking['partner_id'] and booking['partner_id'][1],
+                    'car': booking['partner_car_id'] and booking['partner_car_id'][1],
+                    'service': booking['service_subcategory'],
+                    'start_time': booking['booking_time'],
+                    'end_time': booking['booking_end_time'],
+                    'status': booking['state'],
+                } for booking in availability.bookings_by_stall[stall.id]]
+                
+                next_free = availability.next_free_time(stall.id, after)
+                next_available = None
+                if next_free is not None:
+                    # Jam lokal Asia/Jakarta -> UTC, format sama dengan field Datetime
+                    local_free = pytz.timezone('Asia/Jakarta').localize(
+                        datetime.combine(booking_day, time.min) + timedelta(hours=next_free)
+                    )
+                    next_available = fields.Datetime.to_string(
+                        local_free.astimezone(pytz.UTC).replace(tzinfo=None)
+                    )
                 
                 stall_status.append({
                     'stall_id': stall.id,
                     'stall_name': stall.name,
                     'timeline': timeline,
-                    'next_available': fields.Datetime.to_string(stall.next_available_time) if stall.next_available_time else None,
+                    'next_available': next_available,
                 })
             
             return {
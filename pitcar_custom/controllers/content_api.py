@@ -1488,118 +1488,28 @@ class ContentManagementAPI(http.Controller):
         """
         Get summary statistics for dashboard
         """
-        # Setup domain filters
-        project_domain = []
-        task_domain = []
-        bau_domain = [
-            ('date', '>=', date_from),
-            ('date', '<=', date_to)
-        ]
-        
-        if filter_project_id:
-            project_domain.append(('id', '=', filter_project_id))
-            task_domain.append(('project_id', '=', filter_project_id))
-            bau_domain.append(('project_id', '=', filter_project_id))
-        
-        if filter_creator_id:
-            task_domain.append(('assigned_to', 'in', [filter_creator_id]))
-            bau_domain.append(('creator_id', '=', filter_creator_id))
-        
+        stats = request.env['content.dashboard.stats'].sudo()
+
         # Get projects statistics
+        project_domain = [('id', '=', filter_project_id)] if filter_project_id else []
         projects = request.env['content.project'].sudo().search(project_domain)
         active_projects = projects.filtered(lambda p: p.state == 'in_progress')
         completed_projects = projects.filtered(lambda p: p.state == 'completed')
         
         # Get tasks statistics
-        all_tasks = request.env['content.task'].sudo().search(task_domain)
-        pending_tasks = all_tasks.filtered(lambda t: t.state in ['draft', 'in_progress', 'review', 'revision'])
-        completed_tasks = all_tasks.filtered(lambda t: t.state == 'done')
-        
-        # Filter tasks in date range
-        tasks_in_period = all_tasks.filtered(
-            lambda t: (t.actual_date_start and t.actual_date_start.date() >= fields.Date.from_string(date_from)) or
-                    (t.planned_date_start and t.planned_date_start.date() >= fields.Date.from_string(date_from))
-        )
+        task_stats = stats.get_task_summary(filter_project_id, filter_creator_id)
         
         # Calculate on-time completion rate
-        on_time_tasks = 0
-        delayed_tasks = 0
-        for task in completed_tasks:
-            if task.planned_date_end and task.actual_date_end:
-                if task.actual_date_end <= task.planned_date_end:
-                    on_time_tasks += 1
-                else:
-                    delayed_tasks += 1
-        
-        on_time_rate = (on_time_tasks / len(completed_tasks) * 100) if completed_tasks else 0
+        on_time_rate = (task_stats['on_time'] / task_stats['completed'] * 100) if task_stats['completed'] else 0
         
         # Get BAU statistics
-        bau_activities = request.env['content.bau'].sudo().search(bau_domain)
-        planned_bau = bau_activities.filtered(lambda b: b.state == 'planned')
-        completed_bau = bau_activities.filtered(lambda b: b.state == 'done')
-        
-        bau_completion_rate = (len(completed_bau) / len(bau_activities) * 100) if bau_activities else 0
+        bau_stats = stats.get_bau_summary(date_from, date_to, filter_project_id, filter_creator_id)
+        bau_completion_rate = (bau_stats['completed'] / bau_stats['total'] * 100) if bau_stats['total'] else 0
         
         # Get time tracking data for tasks
-        total_planned = 0
-        total_actual = 0
-        
-        planned_vs_actual = []
-        for task in all_tasks.filtered(lambda t: t.state == 'done'):
-            if task.planned_hours > 0:
-                planned_vs_actual.append({
-                    'id': task.id,
-                    'name': task.name,
-                    'content_type': task.content_type,
-                    'planned_hours': task.planned_hours,
-                    'actual_hours': task.actual_hours,
-                    'variance': task.actual_hours - task.planned_hours,
-                    'variance_percent': ((task.actual_hours - task.planned_hours) / task.planned_hours * 100) if task.planned_hours else 0
-                })
-                total_planned += task.planned_hours
-                total_actual += task.actual_hours
-        
-        # Sort by variance (highest first)
-        planned_vs_actual.sort(key=lambda x: abs(x['variance']), reverse=True)
-        
-        # Time spent by content type
-        time_by_type = defaultdict(lambda: {'planned': 0, 'actual': 0, 'tasks': 0})
-        
-        for task in all_tasks:
-            if task.content_type:
-                time_by_type[task.content_type]['planned'] += task.planned_hours
-                time_by_type[task.content_type]['actual'] += task.actual_hours
-                time_by_type[task.content_type]['tasks'] += 1
-        
-        type_time_data = []
-        for type_name, data in time_by_type.items():
-            avg_planned = data['planned'] / data['tasks'] if data['tasks'] > 0 else 0
-            avg_actual = data['actual'] / data['tasks'] if data['tasks'] > 0 else 0
-            
-            type_time_data.append({
-                'type': type_name,
-                'total_planned': round(data['planned'], 1),
-                'total_actual': round(data['actual'], 1),
-                'avg_planned': round(avg_planned, 1),
-                'avg_actual': round(avg_actual, 1),
-                'task_count': data['tasks']
-            })
-        
-        # BAU hours by day
-        hours_by_day = defaultdict(float)
-        for bau in bau_activities:
-            day_key = str(bau.date)
-            hours_by_day[day_key] += bau.hours_spent
-        
-        daily_hours = []
-        for day, hours in hours_by_day.items():
-            daily_hours.append({
-                'date': day,
-                'hours': round(hours, 1)
-            })
-        
-        # Sort by date
-        daily_hours.sort(key=lambda x: x['date'])
+        time_tracking = stats.get_time_tracking(filter_project_id, filter_creator_id)
+        total_planned = time_tracking['total_planned']
+        total_actual = time_tracking['total_actual']
         
         # Combine into summary
         summary = {
@@ -1614,28 +1524,28 @@ class ContentManagementAPI(http.Controller):
                 'avg_progress': sum(p.progress for p in projects) / len(projects) if projects else 0,
             },
             'tasks': {
-                'total': len(all_tasks),
-                'pending': len(pending_tasks),
-                'completed': len(completed_tasks),
-                'completion_rate': (len(completed_tasks) / len(all_tasks) * 100) if all_tasks else 0,
+                'total': task_stats['total'],
+                'pending': task_stats['pending'],
+                'completed': task_stats['completed'],
+                'completion_rate': (task_stats['completed'] / task_stats['total'] * 100) if task_stats['total'] else 0,
                 'on_time_rate': on_time_rate
             },
             'bau': {
-                'total': len(bau_activities),
-                'planned': len(planned_bau),
-                'completed': len(completed_bau),
+                'total': bau_stats['total'],
+                'planned': bau_stats['planned'],
+                'completed': bau_stats['completed'],
                 'completion_rate': bau_completion_rate
             },
             'time_tracking': {
-                'planned_vs_actual': planned_vs_actual[:10],  # Top 10 by variance
-                'by_content_type': type_time_data,
-                'bau_daily_hours': daily_hours,
+                'planned_vs_actual': time_tracking['planned_vs_actual'],  # Top 10 by variance
+                'by_content_type': time_tracking['by_content_type'],
+                'bau_daily_hours': bau_stats['daily_hours'],
                 'summary': {
                     'total_planned_hours': round(total_planned, 1),
                     'total_actual_hours': round(total_actual, 1),
                     'variance': round(total_actual - total_planned, 1),
                     'variance_percent': round(((total_actual - total_planned) / total_planned * 100) if total_planned else 0, 1),
-                    'total_bau_hours': round(sum(bau.hours_spent for bau in bau_activities), 1)
+                    'total_bau_hours': round(bau_stats['total_hours'], 1)
                 }
             }
         }
@@ -1646,183 +1556,36 @@ class ContentManagementAPI(http.Controller):
         """
         Get trend data for various metrics over time
         """
+        stats = request.env['content.dashboard.stats'].sudo()
+
         # Convert date strings to date objects
         start_date = fields.Date.from_string(date_from)
         end_date = fields.Date.from_string(date_to)
         
-        # Calculate date range
-        delta = (end_date - start_date).days + 1
-        
         # Determine appropriate grouping (daily, weekly, or monthly)
-        grouping = 'daily'
-        if delta > 60:
-            grouping = 'monthly'
-        elif delta > 14:
-            grouping = 'weekly'
-        
-        # Initialize data structures based on grouping
-        time_periods = []
-        if grouping == 'daily':
-            current = start_date
-            while current <= end_date:
-                time_periods.append(str(current))
-                current += timedelta(days=1)
-        elif grouping == 'weekly':
-            # Get start of week
-            current = start_date - timedelta(days=start_date.weekday())
-            while current <= end_date:
-                week_end = current + timedelta(days=6)
-                time_periods.append(f"{current} to {week_end}")
-                current += timedelta(days=7)
-        else:  # monthly
-            current = start_date.replace(day=1)
-            while current <= end_date:
-                # Get last day of month
-                if current.month == 12:
-                    last_day = current.replace(day=31)
-                else:
-                    last_day = current.replace(month=current.month+1, day=1) - timedelta(days=1)
-                time_periods.append(f"{current.year}-{current.month}")
-                
-                # Move to next month
-                if current.month == 12:
-                    current = current.replace(year=current.year+1, month=1)
-                else:
-                    current = current.replace(month=current.month+1)
-        
+        grouping = stats.get_trend_grouping(start_date, end_date)
+        periods = stats.get_trend_periods(start_date, end_date, grouping)
+        buckets = [bucket for bucket, _label in periods]
+
+        # Hitung semua metrik per bucket di database (date_trunc GROUP BY)
+        counts = stats.get_trend_counts(start_date, end_date, grouping)
+
+        avg_revision_count = []
+        for bucket in buckets:
+            revision_count, task_count = counts['revisions'].get(bucket, (0, 0))
+            avg_revision_count.append(round(revision_count / task_count, 1) if task_count else 0)
+
         # Initialize trend data
         trend_data = {
-            'time_periods': time_periods,
+            'time_periods': [label for _bucket, label in periods],
             'grouping': grouping,
-            'task_completion': [0] * len(time_periods),
-            'task_creation': [0] * len(time_periods),
-            'bau_completion': [0] * len(time_periods),
-            'avg_revision_count': [0] * len(time_periods),
+            'task_completion': [counts['task_completion'].get(bucket, 0) for bucket in buckets],
+            'task_creation': [counts['task_creation'].get(bucket, 0) for bucket in buckets],
+            'bau_completion': [counts['bau_completion'].get(bucket, 0) for bucket in buckets],
+            'avg_revision_count': avg_revision_count,
             'project_progress': []  # Will store project progress over time
         }
         
-        # Get task data
-        tasks = request.env['content.task'].sudo().search([])
-        
-        for task in tasks:
-            # Track task creation and completion
-            if task.create_date:
-                created_date = task.create_date.date()
-                if start_date <= created_date <= end_date:
-                    if grouping == 'daily':
-                        idx = time_periods.index(str(created_date))
-                    elif grouping == 'weekly':
-                        # Find the week
-                        week_start = created_date - timedelta(days=created_date.weekday())
-                        week_end = week_start + timedelta(days=6)
-                        week_str = f"{week_start} to {week_end}"
-                        if week_str in time_periods:
-                            idx = time_periods.index(week_str)
-                        else:
-                            idx = -1
-                    else:  # monthly
-                        month_str = f"{created_date.year}-{created_date.month}"
-                        if month_str in time_periods:
-                            idx = time_periods.index(month_str)
-                        else:
-                            idx = -1
-                    
-                    if idx >= 0:
-                        trend_data['task_creation'][idx] += 1
-            
-            if task.state == 'done' and task.actual_date_end:
-                completed_date = task.actual_date_end.date()
-                if start_date <= completed_date <= end_date:
-                    if grouping == 'daily':
-                        idx = time_periods.index(str(completed_date))
-                    elif grouping == 'weekly':
-                        # Find the week
-                        week_start = completed_date - timedelta(days=completed_date.weekday())
-                        week_end = week_start + timedelta(days=6)
-                        week_str = f"{week_start} to {week_end}"
-                        if week_str in time_periods:
-                            idx = time_periods.index(week_str)
-                        else:
-                            idx = -1
-                    else:  # monthly
-                        month_str = f"{completed_date.year}-{completed_date.month}"
-                        if month_str in time_periods:
-                            idx = time_periods.index(month_str)
-                        else:
-                            idx = -1
-                    
-                    if idx >= 0:
-                        trend_data['task_completion'][idx] += 1
-        
-        # Get BAU data
-        bau_activities = request.env['content.bau'].sudo().search([
-            ('date', '>=', date_from),
-            ('date', '<=', date_to)
-        ])
-        
-        for bau in bau_activities:
-            if bau.state == 'done' and bau.date:
-                completed_date = bau.date
-                if start_date <= completed_date <= end_date:
-                    if grouping == 'daily':
-                        idx = time_periods.index(str(completed_date))
-                    elif grouping == 'weekly':
-                        # Find the week
-                        week_start = completed_date - timedelta(days=completed_date.weekday())
-                        week_end = week_start + timedelta(days=6)
-                        week_str = f"{week_start} to {week_end}"
-                        if week_str in time_periods:
-                            idx = time_periods.index(week_str)
-                        else:
-                            idx = -1
-                    else:  # monthly
-                        month_str = f"{completed_date.year}-{completed_date.month}"
-                        if month_str in time_periods:
-                            idx = time_periods.index(month_str)
-                        else:
-                            idx = -1
-                    
-                    if idx >= 0:
-                        trend_data['bau_completion'][idx] += 1
-        
-        # Get revision data over time
-        revisions = request.env['content.revision'].sudo().search([])
-        
-        # Group revisions by time period
-        revisions_by_period = [[] for _ in range(len(time_periods))]
-        for revision in revisions:
-            if revision.date_requested:
-                revision_date = revision.date_requested.date()
-                if start_date <= revision_date <= end_date:
-                    if grouping == 'daily':
-                        idx = time_periods.index(str(revision_date))
-                    elif grouping == 'weekly':
-                        # Find the week
-                        week_start = revision_date - timedelta(days=revision_date.weekday())
-                        week_end = week_start + timedelta(days=6)
-                        week_str = f"{week_start} to {week_end}"
-                        if week_str in time_periods:
-                            idx = time_periods.index(week_str)
-                        else:
-                            idx = -1
-                    else:  # monthly
-                        month_str = f"{revision_date.year}-{revision_date.month}"
-                        if month_str in time_periods:
-                            idx = time_periods.index(month_str)
-                        else:
-                            idx = -1
-                    
-                    if idx >= 0:
-                        revisions_by_period[idx].append(revision)
-        
-        # Calculate average revision count
-        for i, period_revisions in enumerate(revisions_by_period):
-            if period_revisions:
-                # Count unique tasks with revisions in this period
-                unique_tasks = set(r.task_id.id for r in period_revisions if r.task_id)
-                if unique_tasks:
-                    trend_data['avg_revision_count'][i] = round(len(period_revisions) / len(unique_tasks), 1)
-        
         # Get project progress over time for active projects
         active_projects = request.env['content.project'].sudo().search([
             ('state', '=', 'in_progress')
@@ -2242,22 +2005,14 @@ class ContentManagementAPI(http.Controller):
         """
         Get revision analytics for dashboard
         """
-        domain = []
-        if filter_project_id:
-            domain.append(('project_id', '=', filter_project_id))
-        
-        all_tasks = request.env['content.task'].sudo().search(domain)
-        
-        # Filter by assigned to if needed
-        if filter_creator_id:
-            all_tasks = all_tasks.filtered(lambda t: filter_creator_id in t.assigned_to.ids)
-        
-        # Tasks with high revision counts
-        high_revision_tasks = all_tasks.filtered(lambda t: t.revision_count > 0)
-        high_revision_tasks = sorted(high_revision_tasks, key=lambda t: t.revision_count, reverse=True)
+        revision_stats = request.env['content.dashboard.stats'].sudo().get_revision_stats(
+            filter_project_id, filter_creator_id
+        )
         
+        # Tasks with high revision counts (Top 10)
+        high_revision_tasks = request.env['content.task'].sudo().browse(revision_stats['high_revision_task_ids'])
         high_revision_data = []
-        for task in high_revision_tasks[:10]:  # Top 10
+        for task in high_revision_tasks:
             high_revision_data.append({
                 'id': task.id,
                 'name': task.name,
@@ -2271,58 +2026,28 @@ class ContentManagementAPI(http.Controller):
                 } for member in task.assigned_to]
             })
         
-        # Revision reasons analysis
-        revisions = request.env['content.revision'].sudo().search([('task_id', 'in', all_tasks.ids)])
-        
-        # Count common phrases in feedback
-        feedback_keywords = defaultdict(int)
-        common_phrases = ["quality", "deadline", "format", "incorrect", "missing", "rework", "clarity", "alignment", "brand"]
-        
-        for revision in revisions:
-            feedback_lower = revision.feedback.lower()
-            for phrase in common_phrases:
-                if phrase in feedback_lower:
-                    feedback_keywords[phrase] += 1
-        
-        # Count revisions by requestor
-        revisions_by_requestor = defaultdict(int)
-        for revision in revisions:
-            if revision.requested_by:
-                requestor_id = revision.requested_by.id
-                requestor_name = revision.requested_by.name
-                key = f"{requestor_id}:{requestor_name}"
-                revisions_by_requestor[key] += 1
-        
-        # Format for output
-        feedback_analysis = [{'keyword': k, 'count': v} for k, v in feedback_keywords.items()]
+        # Revision reasons analysis (common phrases in feedback)
+        feedback_analysis = [{'keyword': k, 'count': v} for k, v in revision_stats['feedback_keywords'].items()]
         feedback_analysis.sort(key=lambda x: x['count'], reverse=True)
         
-        requestor_analysis = []
-        for key, count in revisions_by_requestor.items():
-            id_str, name = key.split(':', 1)
-            requestor_analysis.append({
-                'id': int(id_str),
-                'name': name,
-                'count': count
-            })
-        
+        # Count revisions by requestor
+        requestors = request.env['hr.employee'].sudo().browse(list(revision_stats['by_requestor']))
+        requestor_analysis = [{
+            'id': requestor.id,
+            'name': requestor.name,
+            'count': revision_stats['by_requestor'][requestor.id]
+        } for requestor in requestors]
         requestor_analysis.sort(key=lambda x: x['count'], reverse=True)
         
         # Average revisions by content type
-        revisions_by_type = defaultdict(lambda: {'count': 0, 'tasks': 0})
-        for task in all_tasks:
-            if task.content_type:
-                revisions_by_type[task.content_type]['count'] += task.revision_count
-                revisions_by_type[task.content_type]['tasks'] += 1
-        
         type_analysis = []
-        for type_name, data in revisions_by_type.items():
-            avg_revisions = data['count'] / data['tasks'] if data['tasks'] > 0 else 0
+        for row in revision_stats['by_content_type']:
+            avg_revisions = row['count'] / row['tasks'] if row['tasks'] > 0 else 0
             type_analysis.append({
-                'type': type_name,
+                'type': row['content_type'],
                 'avg_revisions': round(avg_revisions, 2),
-                'total_revisions': data['count'],
-                'total_tasks': data['tasks']
+                'total_revisions': row['count'],
+                'total_tasks': row['tasks']
             })
         
         type_analysis.sort(key=lambda x: x['avg_revisions'], reverse=True)
@@ -2333,9 +2058,9 @@ class ContentManagementAPI(http.Controller):
             'by_requestor': requestor_analysis,
             'by_content_type': type_analysis,
             'summary': {
-                'total_revisions': sum(task.revision_count for task in all_tasks),
-                'tasks_with_revisions': len(high_revision_tasks),
-                'excessive_revisions_count': len(all_tasks.filtered(lambda t: t.has_excessive_revisions))
+                'total_revisions': revision_stats['total_revisions'],
+                'tasks_with_revisions': revision_stats['tasks_with_revisions'],
+                'excessive_revisions_count': revision_stats['excessive_revisions_count']
             }
         }
     
@@ -2343,60 +2068,22 @@ class ContentManagementAPI(http.Controller):
         """
         Get time tracking analytics for dashboard
         """
-        domain = []
-        if filter_project_id:
-            domain.append(('project_id', '=', filter_project_id))
-        
-        all_tasks = request.env['content.task'].sudo().search(domain)
-        
-        # Filter by assigned to if needed
-        if filter_creator_id:
-            all_tasks = all_tasks.filtered(lambda t: filter_creator_id in t.assigned_to.ids)
-        
-        # Planned vs. actual hours
-        planned_vs_actual = []
-        total_planned = 0
-        total_actual = 0
-        
-        for task in all_tasks:
-            if task.planned_hours > 0 and task.state == 'done':
-                planned_vs_actual.append({
-                    'id': task.id,
-                    'name': task.name,
-                    'content_type': task.content_type,
-                    'planned_hours': task.planned_hours,
-                    'actual_hours': task.actual_hours,
-                    'variance': task.actual_hours - task.planned_hours,
-                    'variance_percent': ((task.actual_hours - task.planned_hours) / task.planned_hours * 100) if task.planned_hours else 0
-                })
-                total_planned += task.planned_hours
-                total_actual += task.actual_hours
-        
-        # Sort by variance (highest first)
-        planned_vs_actual.sort(key=lambda x: abs(x['variance']), reverse=True)
-        
-        # Time spent by content type
-        time_by_type = defaultdict(lambda: {'planned': 0, 'actual': 0, 'tasks': 0})
-        
-        for task in all_tasks:
-            if task.content_type:
-                time_by_type[task.content_type]['planned'] += task.planned_hours
-                time_by_type[task.content_type]['actual'] += task.actual_hours
-                time_by_type[task.content_type]['tasks'] += 1
-        
-        type_time_data = []
-        for type_name, data in time_by_type.items():
-            avg_planned = data['planned'] / data['tasks'] if data['tasks'] > 0 else 0
-            avg_actual = data['actual'] / data['tasks'] if data['tasks'] > 0 else 0
-            
-            type_time_data.append({
-                'type': type_name,
-                'total_planned': round(data['planned'], 1),
-                'total_actual': round(data['actual'], 1),
-                'avg_planned': round(avg_planned, 1),
-                'avg_actual': round(avg_actual, 1),
-                'task_count': data['tasks']
-            })
+        time_tracking = request.env['content.dashboard.stats'].sudo().get_time_tracking(
+            filter_project_id, filter_creator_id
+        )
+        total_planned = time_tracking['total_planned']
+        total_actual = time_tracking['total_actual']
+
+        return {
+            'planned_vs_actual': time_tracking['planned_vs_actual'],  # Top 10 by variance
+            'by_content_type': time_tracking['by_content_type'],
+            'summary': {
+                'total_planned_hours': round(total_planned, 1),
+                'total_actual_hours': round(total_actual, 1),
+                'variance': round(total_actual - total_planned, 1),
+                'variance_percent': round(((total_actual - total_planned) / total_planned * 100) if total_planned else 0, 1)
+            }
+        }
         
     @http.route('/web/v2/content/dashboard/workload', type='json', auth='user', methods=['POST'], csrf=False)
     def get_workload_analysis(self, **kw):
@@ -2901,174 +2588,13 @@ class ContentManagementAPI(http.Controller):
         try:
             # Get filter parameters
             weeks_ahead = int(kw.get('weeks_ahead', 4))
-            date_from = fields.Date.today()
-            date_to = date_from + timedelta(days=weeks_ahead * 7)
-            
-            # Initialize forecast data
-            forecast_data = {
-                'resource_forecast': [],
-                'delivery_forecast': [],
-                'capacity_planning': {}
-            }
-            
-            # Get all active projects
-            active_projects = request.env['content.project'].sudo().search([
-                ('state', '=', 'in_progress')
-            ])
-            
-            # Get all pending tasks
-            pending_tasks = request.env['content.task'].sudo().search([
-                ('state', 'in', ['draft', 'in_progress', 'review', 'revision']),
-                '|',
-                ('planned_date_end', '>=', date_from),
-                ('planned_date_end', '=', False)
-            ])
-            
-            # Group tasks by planned completion date
-            tasks_by_week = defaultdict(list)
-            for task in pending_tasks:
-                if task.planned_date_end:
-                    week_num = (task.planned_date_end.date() - date_from).days // 7
-                    if 0 <= week_num < weeks_ahead:
-                        week_str = f"Week {week_num+1}"
-                        tasks_by_week[week_str].append(task)
-            
-            # Format delivery forecast by week
-            for week_num in range(weeks_ahead):
-                week_str = f"Week {week_num+1}"
-                week_start = date_from + timedelta(days=week_num * 7)
-                week_end = week_start + timedelta(days=6)
-                
-                week_tasks = tasks_by_week.get(week_str, [])
-                
-                # Count by type
-                video_count = len([t for t in week_tasks if t.content_type == 'video'])
-                design_count = len([t for t in week_tasks if t.content_type == 'design'])
-                
-                forecast_data['delivery_forecast'].append({
-                    'week': week_str,
-                    'date_range': f"{week_start} to {week_end}",
-                    'video_count': video_count,
-                    'design_count': design_count,
-                    'total_tasks': len(week_tasks),
-                    'projects': len(set(t.project_id.id for t in week_tasks if t.project_id))
-                })
-            
-            # Get all employees involved in content tasks
-            employees_domain = []
-            employees = request.env['hr.employee'].sudo().search(employees_domain)
-            
-            # Calculate resource allocation by week
-            employee_allocations = {}
-            for employee in employees:
-                # Get tasks assigned to this employee in forecast period
-                assigned_tasks = request.env['content.task'].sudo().search([
-                    ('assigned_to', 'in', [employee.id]),
-                    ('state', 'in', ['draft', 'in_progress', 'review', 'revision']),
-                    '|',
-                    '&', ('planned_date_start', '>=', date_from), ('planned_date_start', '<=', date_to),
-                    '&', ('planned_date_end', '>=', date_from), ('planned_date_end', '<=', date_to)
-                ])
-                
-                # Skip employees without upcoming tasks
-                if not assigned_tasks:
-                    continue
-                
-                # Initialize allocation data
-                employee_data = {
-                    'id': employee.id,
-                    'name': employee.name,
-                    'position': employee.job_id.name if employee.job_id else '',
-                    'weekly_allocation': []
-                }
-                
-                # Calculate allocation by week
-                for week_num in range(weeks_ahead):
-                    week_start = date_from + timedelta(days=week_num * 7)
-                    week_end = week_start + timedelta(days=6)
-                    week_str = f"Week {week_num+1}"
-                    
-                    # Count tasks active during this week
-                    week_tasks = []
-                    for task in assigned_tasks:
-                        if (task.planned_date_start and task.planned_date_end and
-                            ((task.planned_date_start.date() <= week_end and task.planned_date_end.date() >= week_start) or
-                            (task.planned_date_start.date() >= week_start and task.planned_date_start.date() <= week_end))):
-                            week_tasks.append(task)
-                    
-                    # Calculate allocation percentage (5 tasks = 100% allocation)
-                    allocation_percent = min(len(week_tasks) * 20, 100)
-                    
-                    employee_data['weekly_allocation'].append({
-                        'week': week_str,
-                        'date_range': f"{week_start} to {week_end}",
-                        'task_count': len(week_tasks),
-                        'allocation_percent': allocation_percent,
-                        'task_ids': [t.id for t in week_tasks]
-                    })
-                
-                forecast_data['resource_forecast'].append(employee_data)
-            
-            # Sort by highest allocation
-            forecast_data['resource_forecast'].sort(
-                key=lambda x: sum(w['allocation_percent'] for w in x['weekly_allocation']), 
-                reverse=True
+            include_leveling = bool(kw.get('include_leveling', False))
+
+            forecast_data = request.env['content.resource.forecast'].sudo().get_forecast(
+                weeks_ahead=weeks_ahead,
+                include_leveling=include_leveling
             )
-            
-            # Calculate team capacity planning
-            video_capacity = sum(1 for e in employees if e.job_id and 'video' in e.job_id.name.lower()) * 5  # Assuming 5 videos per video specialist per week
-            design_capacity = sum(1 for e in employees if e.job_id and 'design' in e.job_id.name.lower()) * 5  # Assuming 5 designs per designer per week
-            
-            # If job titles don't include these terms, estimate based on past tasks
-            if video_capacity == 0 or design_capacity == 0:
-                # Get tasks in past 30 days
-                past_tasks = request.env['content.task'].sudo().search([
-                    ('state', '=', 'done'),
-                    ('actual_date_end', '>=', fields.Date.today() - timedelta(days=30))
-                ])
-                
-                # Count by type
-                video_completed = len([t for t in past_tasks if t.content_type == 'video'])
-                design_completed = len([t for t in past_tasks if t.content_type == 'design'])
-                
-                # Estimate weekly capacity
-                if video_capacity == 0:
-                    video_capacity = video_completed // 4  # Divide by 4 weeks
-                if design_capacity == 0:
-                    design_capacity = design_completed // 4  # Divide by 4 weeks
-            
-            # Calculate capacity utilization for each week
-            capacity_utilization = []
-            for week_num in range(weeks_ahead):
-                week_str = f"Week {week_num+1}"
-                week_forecast = next((w for w in forecast_data['delivery_forecast'] if w['week'] == week_str), None)
-                
-                if week_forecast:
-                    video_utilization = (week_forecast['video_count'] / video_capacity * 100) if video_capacity > 0 else 0
-                    design_utilization = (week_forecast['design_count'] / design_capacity * 100) if design_capacity > 0 else 0
-                    
-                    capacity_utilization.append({
-                        'week': week_str,
-                        'video': {
-                            'capacity': video_capacity,
-                            'planned': week_forecast['video_count'],
-                            'utilization_percent': round(video_utilization, 1)
-                        },
-                        'design': {
-                            'capacity': design_capacity,
-                            'planned': week_forecast['design_count'],
-                            'utilization_percent': round(design_utilization, 1)
-                        }
-                    })
-            
-            forecast_data['capacity_planning'] = {
-                'weekly_utilization': capacity_utilization,
-                'team_capacity': {
-                    'video': video_capacity,
-                    'design': design_capacity
-                }
-            }
-            
+
             return {
                 'status': 'success',
                 'data': forecast_data
@@ -403,9 +403,20 @@ class CustomerRatingAPI(Controller):
             - Feedback: {params['feedback']}
             """)
 
-            # Update order with ratings
+            # Update customer satisfaction
+            rating_to_satisfaction = {
+                1: 'very_dissatisfied',
+                2: 'dissatisfied',
+                3: 'neutral',
+                4: 'satisfied',
+                5: 'very_satisfied'
+            }
+            satisfaction = rating_to_satisfaction.get(round(average_rating), 'neutral')
+
+            # Update order with ratings (satu write: counter rating harian dihitung ulang sekali)
             order.write({
                 'is_willing_to_feedback': 'yes',
+                'customer_satisfaction': satisfaction,
                 'customer_rating': str(round(average_rating)),
                 'customer_feedback': params['feedback'],
                 'detailed_ratings': {
@@ -417,18 +428,6 @@ class CustomerRatingAPI(Controller):
                 }
             })
 
-            # Update customer satisfaction
-            rating_to_satisfaction = {
-                1: 'very_dissatisfied',
-                2: 'dissatisfied',
-                3: 'neutral',
-                4: 'satisfied',
-                5: 'very_satisfied'
-            }
-            
-            satisfaction = rating_to_satisfaction.get(round(average_rating), 'neutral')
-            order.write({'customer_satisfaction': satisfaction})
-
             return {
                 'status': 'success', 
                 'message': 'Rating submitted successfully',
@@ -500,164 +499,40 @@ class CustomerRatingAPI(Controller):
             if not dbname:
                 return {'status': 'error', 'message': 'Database name is required'}
 
-            SaleOrder = request.env['sale.order'].sudo()
+            RatingStat = request.env['pitcar.rating.daily.stat'].sudo()
             tz = pytz.timezone('Asia/Jakarta')
-            
-            # Build base domain
-            domain = [('state', 'in', ['sale', 'done'])]
 
+            # Rentang tanggal Cetak PKB (hari Asia/Jakarta); None = seluruh histori
+            date_from = date_to = None
             if date_range != 'all':
-                now = datetime.now()
-                now_local = tz.localize(now)
-                
+                today = datetime.now(tz).date()
+
                 if date_range == 'custom' and date_start and date_end:
                     try:
-                        # Parse string dates to naive datetime
-                        start_dt = datetime.strptime(date_start, '%Y-%m-%d')
-                        end_dt = datetime.strptime(date_end, '%Y-%m-%d')
-                        
-                        # Set time range
-                        start_dt = start_dt.replace(hour=0, minute=0, second=0)
-                        end_dt = end_dt.replace(hour=23, minute=59, second=59)
-                        
-                        # Localize to Asia/Jakarta
-                        start_dt = tz.localize(start_dt)
-                        end_dt = tz.localize(end_dt)
-                        
+                        date_from = datetime.strptime(date_start, '%Y-%m-%d').date()
+                        date_to = datetime.strptime(date_end, '%Y-%m-%d').date()
                     except ValueError:
                         return {'status': 'error', 'message': 'Invalid date format. Use YYYY-MM-DD'}
-                        
-                    if start_dt > end_dt:
+
+                    if date_from > date_to:
                         return {'status': 'error', 'message': 'Start date must be before end date'}
+                elif date_range == 'today':
+                    date_from = date_to = today
+                elif date_range == 'week':
+                    date_from, date_to = today - timedelta(days=today.weekday()), today
+                elif date_range == 'month':
+                    date_from, date_to = today.replace(day=1), today
+                elif date_range == 'year':
+                    date_from, date_to = today.replace(month=1, day=1), today
                 else:
-                    if date_range == 'today':
-                        start_dt = now_local.replace(hour=0, minute=0, second=0)
-                        end_dt = now_local
-                    elif date_range == 'week':
-                        start_dt = now_local - timedelta(days=now_local.weekday())
-                        start_dt = start_dt.replace(hour=0, minute=0, second=0)
-                        end_dt = now_local
-                    elif date_range == 'month':
-                        start_dt = now_local.replace(day=1, hour=0, minute=0, second=0)
-                        end_dt = now_local
-                    elif date_range == 'year':
-                        start_dt = now_local.replace(month=1, day=1, hour=0, minute=0, second=0)
-                        end_dt = now_local
-
-                # Convert to UTC for database query
-                start_utc = start_dt.astimezone(pytz.UTC)
-                end_utc = end_dt.astimezone(pytz.UTC)
-
-                domain.extend([
-                    ('sa_cetak_pkb', '>=', start_utc.strftime('%Y-%m-%d %H:%M:%S')),
-                    ('sa_cetak_pkb', '<=', end_utc.strftime('%Y-%m-%d %H:%M:%S'))
-                ])
-
-            # Get all orders within range
-            orders = SaleOrder.search(domain)
-            
-            # Calculate statistics
-            total_services = len(orders)
-            rated_orders = orders.filtered(lambda o: o.customer_rating)
-            total_reviews = len(rated_orders)
-
-            # Calculate rating distribution    
-            rating_distribution = {str(i): 0 for i in range(1, 6)}
-            for order in rated_orders:
-                if order.customer_rating:
-                    rating_distribution[str(order.customer_rating)] = rating_distribution.get(str(order.customer_rating), 0) + 1
-
-            # Calculate satisfaction distribution
-            satisfaction_distribution = {
-                'very_satisfied': 0,
-                'satisfied': 0,
-                'neutral': 0,
-                'dissatisfied': 0,
-                'very_dissatisfied': 0
-            }
-            for order in rated_orders:
-                if order.customer_satisfaction:
-                    satisfaction_distribution[order.customer_satisfaction] = satisfaction_distribution.get(order.customer_satisfaction, 0) + 1
-
-            # Get recent reviews
-            recent_reviews = []
-            for order in rated_orders.sorted(key=lambda r: r.sa_cetak_pkb, reverse=True)[:10]:
-                if order.sa_cetak_pkb:
-                    pkb_time_utc = pytz.UTC.localize(order.sa_cetak_pkb) if not order.sa_cetak_pkb.tzinfo else order.sa_cetak_pkb
-                    pkb_time_local = pkb_time_utc.astimezone(tz)
-                    review = {
-                        'id': order.id,
-                        'order_name': order.name,
-                        'customer_name': order.partner_id.name if order.partner_id else '',
-                        'plate_number': order.partner_car_id.number_plate if order.partner_car_id else '',
-                        'car_info': f"{order.partner_car_brand.name} {order.partner_car_brand_type.name}" if order.partner_car_brand and order.partner_car_brand_type else '',
-                        'rating': float(order.customer_rating) if order.customer_rating else 0,
-                        'satisfaction': order.customer_satisfaction,
-                        'feedback': order.customer_feedback,
-                        'date': pkb_time_local.strftime('%Y-%m-%d %H:%M:%S')
-                    }
-                    recent_reviews.append(review)
-
-            # Calculate average ratings
-            category_ratings = {'service': 0, 'price': 0, 'facility': 0}
-            post_service_stats = {'rating': 0, 'count': 0}
-            if rated_orders:
-                service_total = price_total = facility_total = 0
-                initial_rating_count = 0
-                rating_count = 0
-                post_service_rating_total = 0
-                post_service_count = 0
-                
-                for order in rated_orders:
-                    if order.detailed_ratings:
-                        try:
-                            ratings = order.detailed_ratings
-                            if isinstance(ratings, str):
-                                ratings = json.loads(ratings)
-                            service_total += ratings.get('service_rating', 0)
-                            price_total += ratings.get('price_rating', 0)
-                            facility_total += ratings.get('facility_rating', 0)
-                            initial_rating_count += 1
-                        except (json.JSONDecodeError, AttributeError):
-                            continue
-
-                    # Hitung post service rating (H+3)
-                    if order.post_service_rating:
-                        try:
-                            rating_value = float(order.post_service_rating)
-                            post_service_rating_total += rating_value
-                            post_service_count += 1
-                        except (ValueError, TypeError):
-                            continue
-
-                 # Calculate averages
-                if initial_rating_count > 0:
-                    category_ratings = {
-                        'service': round(service_total / initial_rating_count, 2),
-                        'price': round(price_total / initial_rating_count, 2),
-                        'facility': round(facility_total / initial_rating_count, 2)
-                    }
-
-                if post_service_count > 0:
-                    post_service_stats = {
-                        'rating': round(post_service_rating_total / post_service_count, 2),
-                        'count': post_service_count
-                    }
+                    return {'status': 'error', 'message': f'Invalid date range: {date_range}'}
 
-            result = {
-                'overview': {
-                    'total_services': total_services,
-                    'total_reviews': total_reviews,
-                    'review_rate': round(total_reviews / total_services * 100, 2) if total_services > 0 else 0,
-                    'average_rating': round(sum(float(order.customer_rating) for order in rated_orders if order.customer_rating) / total_reviews, 2) if total_reviews > 0 else 0
-                },
-                'rating_distribution': rating_distribution,
-                'satisfaction_distribution': satisfaction_distribution,
-                'category_ratings': category_ratings,
-                'post_service_stats': post_service_stats,
-                'recent_reviews': recent_reviews,
+            # Statistik dari counter harian, review terbaru dari query ORDER BY/LIMIT
+            result = RatingStat.get_dashboard_stats(date_from, date_to)
+            result.update({
+                'recent_reviews': RatingStat.get_recent_reviews(date_from, date_to, limit=10),
                 'time_period': date_range
-            }
+            })
 
             return {
                 'status': 'success',
@@ -3424,14 +3424,18 @@ class KPIController(http.Controller):
             prev_end = start_utc - timedelta(microseconds=1)
             prev_start = prev_end - delta
 
-            # Get current period orders dengan state='sale' dan menggunakan date_completed
+            # Angka penjualan diambil dari rollup pitcar.sales.daily.fact (per hari Asia/Jakarta)
+            Fact = request.env['pitcar.sales.daily.fact'].sudo()
+            date_from, date_to, prev_date_from, prev_date_to = Fact.get_period_bounds(start, end)
+            current_facts = Fact.aggregate(date_from, date_to)
+            prev_facts = Fact.aggregate(prev_date_from, prev_date_to)
+
+            # Domain order untuk daftar top (quotation, sales, customer)
             current_domain = [
                 ('date_completed', '>=', start_utc.strftime('%Y-%m-%d %H:%M:%S')),
                 ('date_completed', '<=', end_utc.strftime('%Y-%m-%d %H:%M:%S')),
                 ('state', '=', 'sale')  # Hanya ambil confirmed sales
             ]
-
-            # Get previous period orders
             prev_domain = [
                 ('date_completed', '>=', prev_start.strftime('%Y-%m-%d %H:%M:%S')),
                 ('date_completed', '<=', prev_end.strftime('%Y-%m-%d %H:%M:%S')),
@@ -3439,126 +3443,26 @@ class KPIController(http.Controller):
             ]
 
             # Get quotations
-            current_quotations = request.env['sale.order'].sudo().search([
+            SaleOrder = request.env['sale.order'].sudo()
+            current_quotations = SaleOrder.search([
                 *current_domain,
                 ('state', '=', 'draft')
             ])
-            prev_quotations = request.env['sale.order'].sudo().search([
+            prev_quotations = SaleOrder.search([
                 *prev_domain,
                 ('state', '=', 'draft')
             ])
 
-            # Get confirmed orders
-            current_orders = request.env['sale.order'].sudo().search(current_domain)
-            prev_orders = request.env['sale.order'].sudo().search(prev_domain)
-
             # Calculate overall metrics
-            current_order_count = len(current_orders)
-            prev_order_count = len(prev_orders)
-            
-            # Hitung total flat rate hours berdasarkan flat_rate produk
-            current_flat_rate_hours = 0.0
-            for order in current_orders:
-                for line in order.order_line:
-                    if line.product_id.type == 'service' and line.product_id.flat_rate > 0:
-                        mechanics_count = len(order.car_mechanic_id_new) or 1
-                        current_flat_rate_hours += (line.product_id.flat_rate / mechanics_count * line.product_uom_qty)
-
-            prev_flat_rate_hours = 0.0
-            for order in prev_orders:
-                for line in order.order_line:
-                    if line.product_id.type == 'service' and line.product_id.flat_rate > 0:
-                        mechanics_count = len(order.car_mechanic_id_new) or 1
-                        prev_flat_rate_hours += (line.product_id.flat_rate / mechanics_count * line.product_uom_qty)
-
-            # Overall flat rate metrics
-            flat_rate_overall = {
-                'total_flat_rate_hours': {
-                    'current': round(current_flat_rate_hours, 2),
-                    'previous': round(prev_flat_rate_hours, 2),
-                    'growth': round(
-                        ((current_flat_rate_hours - prev_flat_rate_hours) / prev_flat_rate_hours * 100)
-                        if prev_flat_rate_hours else (100 if current_flat_rate_hours > 0 else 0), 2
-                    ),
-                },
-                'average_flat_rate_per_order': {
-                    'current': round(current_flat_rate_hours / current_order_count, 2) if current_order_count else 0,
-                    'previous': round(prev_flat_rate_hours / prev_order_count, 2) if prev_order_count else 0,
-                    'growth': round(
-                        (((current_flat_rate_hours / current_order_count if current_order_count else 0) -
-                        (prev_flat_rate_hours / prev_order_count if prev_order_count else 0)) /
-                        (prev_flat_rate_hours / prev_order_count if prev_order_count else 1) * 100)
-                        if prev_flat_rate_hours else (100 if current_flat_rate_hours > 0 else 0), 2
-                    ),
-                },
-            }
-
-            # Calculate flat rate per mechanic
-            def calculate_mechanic_flat_rate(orders):
-                mechanic_data = {}
-                for order in orders:
-                    if order.car_mechanic_id_new:
-                        mechanic_count = len(order.car_mechanic_id_new) or 1
-                        for mechanic in order.car_mechanic_id_new:
-                            if mechanic.id not in mechanic_data:
-                                mechanic_data[mechanic.id] = {
-                                    'id': mechanic.id,
-                                    'name': mechanic.name,
-                                    'total_flat_rate_hours': 0.0,
-                                    'order_count': 0,
-                                }
-                            mechanic_record = mechanic_data[mechanic.id]
-                            # Hitung flat rate dari produk jasa
-                            for line in order.order_line:
-                                if line.product_id.type == 'service' and line.product_id.flat_rate > 0:
-                                    flat_rate_per_mechanic = line.product_id.flat_rate / mechanic_count * line.product_uom_qty
-                                    mechanic_record['total_flat_rate_hours'] += flat_rate_per_mechanic
-                            mechanic_record['order_count'] += 1
-                return mechanic_data
-
-            current_mechanic_data = calculate_mechanic_flat_rate(current_orders)
-            prev_mechanic_data = calculate_mechanic_flat_rate(prev_orders)
-
-            # Combine mechanic data for current and previous periods
-            mechanic_flat_rate_data = []
-            all_mechanic_ids = set(current_mechanic_data.keys()) | set(prev_mechanic_data.keys())
-            for mechanic_id in all_mechanic_ids:
-                current = current_mechanic_data.get(mechanic_id, {'total_flat_rate_hours': 0, 'order_count': 0, 'name': ''})
-                prev = prev_mechanic_data.get(mechanic_id, {'total_flat_rate_hours': 0, 'order_count': 0, 'name': ''})
-                mechanic_flat_rate = {
-                    'id': mechanic_id,
-                    'name': current.get('name') or prev.get('name') or 'Unknown',
-                    'current': {
-                        'total_flat_rate_hours': round(current['total_flat_rate_hours'], 2),
-                        'order_count': current['order_count'],
-                        'average_flat_rate': round(
-                            current['total_flat_rate_hours'] / current['order_count'], 2
-                        ) if current['order_count'] else 0,
-                    },
-                    'previous': {
-                        'total_flat_rate_hours': round(prev['total_flat_rate_hours'], 2),
-                        'order_count': prev['order_count'],
-                        'average_flat_rate': round(
-                            prev['total_flat_rate_hours'] / prev['order_count'], 2
-                        ) if prev['order_count'] else 0,
-                    },
-                    'growth': {
-                        'total_flat_rate_hours': round(
-                            ((current['total_flat_rate_hours'] - prev['total_flat_rate_hours']) /
-                            prev['total_flat_rate_hours'] * 100)
-                            if prev['total_flat_rate_hours'] else (100 if current['total_flat_rate_hours'] > 0 else 0), 2
-                        ),
-                    },
-                }
-                mechanic_flat_rate_data.append(mechanic_flat_rate)
+            current_order_count = int(round(current_facts['order_count']))
+            prev_order_count = int(round(prev_facts['order_count']))
+            current_revenue = current_facts['amount_untaxed']
+            prev_revenue = prev_facts['amount_untaxed']
 
-            # Sort by current total flat rate hours
-            mechanic_flat_rate_data.sort(key=lambda x: x['current']['total_flat_rate_hours'], reverse=True)
+            # Total flat rate hours (jam flat rate produk jasa dibagi jumlah mekanik)
+            current_flat_rate_hours = current_facts['flat_rate_hours']
+            prev_flat_rate_hours = prev_facts['flat_rate_hours']
 
-            # Calculate basic metrics
-            current_revenue = sum(order.amount_untaxed for order in current_orders)
-            prev_revenue = sum(order.amount_untaxed for order in prev_orders)
-            
             metrics = {
                 'quotations': {
                     'current': len(current_quotations),
@@ -3567,10 +3471,10 @@ class KPIController(http.Controller):
                             if prev_quotations else 0
                 },
                 'orders': {
-                    'current': len(current_orders),
-                    'previous': len(prev_orders),
-                    'growth': ((len(current_orders) - len(prev_orders)) / len(prev_orders) * 100) 
-                            if prev_orders else 0
+                    'current': current_order_count,
+                    'previous': prev_order_count,
+                    'growth': ((current_order_count - prev_order_count) / prev_order_count * 100) 
+                            if prev_order_count else 0
                 },
                 'revenue': {
                     'current': current_revenue,
@@ -3578,80 +3482,24 @@ class KPIController(http.Controller):
                     'growth': ((current_revenue - prev_revenue) / prev_revenue * 100) if prev_revenue else 0
                 },
                 'average_order': {
-                    'current': current_revenue / len(current_orders) if current_orders else 0,
-                    'previous': prev_revenue / len(prev_orders) if prev_orders else 0,
-                    'growth': (((current_revenue / len(current_orders) if current_orders else 0) - 
-                            (prev_revenue / len(prev_orders) if prev_orders else 0)) / 
-                            (prev_revenue / len(prev_orders) if prev_orders else 1) * 100)
-                            if prev_orders else 0
-                },
-                'flat_rate': {
-                    'overall': flat_rate_overall,
-                    'per_mechanic': mechanic_flat_rate_data,
+                    'current': current_revenue / current_order_count if current_order_count else 0,
+                    'previous': prev_revenue / prev_order_count if prev_order_count else 0,
+                    'growth': (((current_revenue / current_order_count if current_order_count else 0) - 
+                            (prev_revenue / prev_order_count if prev_order_count else 0)) / 
+                            (prev_revenue / prev_order_count if prev_order_count else 1) * 100)
+                            if prev_order_count else 0
                 },
             }
 
-            # Calculate daily/monthly sales trend
-            trends = []
-            current = start
-            while current <= end:
-                current_end = min(current.replace(hour=23, minute=59, second=59), end)
-                day_orders = request.env['sale.order'].sudo().search([
-                    ('date_completed', '>=', current.strftime('%Y-%m-%d %H:%M:%S')),
-                    ('date_completed', '<=', current_end.strftime('%Y-%m-%d %H:%M:%S')),
-                    ('state', '=', 'sale')
-                ])
-                
-                if day_orders:
-                    trends.append({
-                        'date': current.strftime('%Y-%m-%d'),
-                        'revenue': sum(order.amount_total for order in day_orders),
-                        'orders': len(day_orders)
-                    })
-                
-                current += timedelta(days=1)
+            # Calculate daily sales trend (hanya hari yang memiliki order)
+            trends = [{
+                'date': row['date'].strftime('%Y-%m-%d'),
+                'revenue': row['amount_total'],
+                'orders': int(round(row['order_count']))
+            } for row in Fact.aggregate(date_from, date_to, groupby='date') if row['order_count'] > 0]
 
-            # Get top products
-            order_lines = request.env['sale.order.line'].sudo().search([
-                ('order_id.state', '=', 'sale'),
-                ('order_id.date_completed', '>=', start_utc.strftime('%Y-%m-%d %H:%M:%S')),
-                ('order_id.date_completed', '<=', end_utc.strftime('%Y-%m-%d %H:%M:%S'))
-            ])
-            
             # Get top products separated by category
-            service_products = {}
-            physical_products = {}
-
-            for line in order_lines:
-                product = line.product_id
-                # Check if product is a service
-                is_service = product.type == 'service'  # or use your own criteria to determine service
-                
-                # Choose target dictionary based on product type
-                target_dict = service_products if is_service else physical_products
-                
-                if product.id not in target_dict:
-                    target_dict[product.id] = {
-                        'id': product.id,
-                        'name': product.name,
-                        'orders': 0,
-                        'revenue': 0
-                    }
-                target_dict[product.id]['orders'] += line.product_uom_qty
-                target_dict[product.id]['revenue'] += line.price_subtotal
-
-            # Sort and get top 10 for each category
-            top_services = sorted(
-                service_products.values(),
-                key=lambda x: x['revenue'],
-                reverse=True
-            )[:10]
-
-            top_physical_products = sorted(
-                physical_products.values(),
-                key=lambda x: x['revenue'],
-                reverse=True
-            )[:10]
+            top_services, top_physical_products = self._get_top_products(start_utc, end_utc)
 
             # Get top quotations
             top_quotations = [{
@@ -3674,95 +3522,29 @@ class KPIController(http.Controller):
                 'service_advisor': [sa.name for sa in order.service_advisor_id],
                 'mechanic': [m.name for m in order.car_mechanic_id_new],
                 'amount': order.amount_total
-            } for order in sorted(
-                current_orders,
-                key=lambda x: x.amount_total,
-                reverse=True
-            )[:10]]
+            } for order in SaleOrder.search(current_domain, order='amount_total desc, id', limit=10)]
 
             # Get top customers
-            customer_data = {}
-            for order in current_orders:
-                if order.partner_id.id not in customer_data:
-                    customer_data[order.partner_id.id] = {
-                        'id': order.partner_id.id,
-                        'name': order.partner_id.name,
-                        'orders': 0,
-                        'revenue': 0
-                    }
-                customer_data[order.partner_id.id]['orders'] += 1
-                customer_data[order.partner_id.id]['revenue'] += order.amount_total
-
-            top_customers = sorted(
-                customer_data.values(),
-                key=lambda x: x['revenue'],
-                reverse=True
-            )[:10]
-
-            # Get top service categories 
-            subcategory_data = {key: {'name': label, 'orders': 0, 'revenue': 0}
-                    for key, label in request.env['sale.order']._fields['service_subcategory'].selection}
-
-            # Calculate subcategories data
-            for order in current_orders:
-                if order.service_subcategory:
-                    subcategory_data[order.service_subcategory]['orders'] += 1
-                    subcategory_data[order.service_subcategory]['revenue'] += order.amount_total
-
-            # Format and sort categories (with empty list fallback)
-            formatted_categories = []
-            if current_orders:
-                formatted_categories = [
-                    {
-                        'id': subcat_key,
-                        'name': subcat['name'], 
-                        'orders': subcat['orders'],
-                        'revenue': subcat['revenue']
-                    }
-                    for subcat_key, subcat in subcategory_data.items() 
-                    if subcat['orders'] > 0
-                ]
-                formatted_categories.sort(key=lambda x: x['revenue'], reverse=True)
-
-            # Get top service advisors
-            advisor_data = {}
-            for order in current_orders:
-                for advisor in order.service_advisor_id:
-                    if advisor.id not in advisor_data:
-                        advisor_data[advisor.id] = {
-                            'id': advisor.id,
-                            'name': advisor.name,
-                            'orders': 0,
-                            'revenue': 0
-                        }
-                    advisor_data[advisor.id]['orders'] += 1
-                    advisor_data[advisor.id]['revenue'] += order.amount_total / len(order.service_advisor_id)
-
-            top_advisors = sorted(
-                advisor_data.values(),
-                key=lambda x: x['revenue'],
-                reverse=True
-            )[:10]
-
-            # Get top mechanics
-            mechanic_data = {}
-            for order in current_orders:
-                for mechanic in order.car_mechanic_id_new:
-                    if mechanic.id not in mechanic_data:
-                        mechanic_data[mechanic.id] = {
-                            'id': mechanic.id,
-                            'name': mechanic.name,
-                            'orders': 0,
-                            'revenue': 0
-                        }
-                    mechanic_data[mechanic.id]['orders'] += 1
-                    mechanic_data[mechanic.id]['revenue'] += order.amount_total / len(order.car_mechanic_id_new)
-
-            top_mechanics = sorted(
-                mechanic_data.values(),
-                key=lambda x: x['revenue'],
-                reverse=True
-            )[:10]
+            top_customers = self._get_top_customers(current_domain)
+
+            # Get top service categories dari fakta per jenis servis
+            subcategory_labels = dict(SaleOrder._fields['service_subcategory'].selection)
+            formatted_categories = [{
+                'id': row['service_subcategory'],
+                'name': subcategory_labels.get(row['service_subcategory']),
+                'orders': int(round(row['order_count'])),
+                'revenue': row['amount_total']
+            } for row in Fact.aggregate(date_from, date_to, groupby='service_subcategory')
+                if row['service_subcategory'] in subcategory_labels and row['order_count'] > 0]
+            formatted_categories.sort(key=lambda x: x['revenue'], reverse=True)
+
+            # Get top service advisors and mechanics
+            top_advisors = self._get_fact_top_performers(
+                Fact, date_from, date_to, 'service_advisor_id', 'pitcar.service.advisor', 'advisor_order_count'
+            )
+            top_mechanics = self._get_fact_top_performers(
+                Fact, date_from, date_to, 'mechanic_id', 'pitcar.mechanic.new', 'mechanic_order_count'
+            )
 
             # Get cohort analysis data - New Auto Service Cohort Implementation
             cohort_params = kw.get('cohort', {})
@@ -3781,35 +3563,14 @@ class KPIController(http.Controller):
                 include_metrics=include_metrics
             )
 
-            # Fungsi bantu untuk mendapatkan order berdasarkan bulan dan tahun
-            def get_orders_by_month(orders, month, year):
-                return [order for order in orders if order.date_order and 
-                        order.date_order.month == month and order.date_order.year == year]
-
-            # Fungsi bantu untuk menghitung metrik per bulan
-            def calculate_monthly_metrics(orders, month, year):
-                monthly_orders = get_orders_by_month(orders, month, year)
-                flat_rate_hours = 0.0
-                service_rev = 0.0
-                product_rev = 0.0
-                total_flat_rate = 0.0
-                total_discount = 0.0
-                lead_time = 0.0
-                order_count = len(monthly_orders)
-
-                for order in monthly_orders:
-                    for line in order.order_line:
-                        if line.product_id.type == 'service':
-                            service_rev += line.price_subtotal
-                            if line.product_id.flat_rate > 0:
-                                mechanics_count = len(order.car_mechanic_id_new) or 1
-                                total_flat_rate += (line.product_id.flat_rate / mechanics_count * line.product_uom_qty)
-                        elif line.product_id.type == 'product':
-                            product_rev += line.price_subtotal
-                        if 'discount' in (line.name or '').lower():
-                            total_discount += line.price_subtotal
-                    if order.lead_time_servis:
-                        lead_time += order.lead_time_servis
+            # Fungsi bantu untuk menghitung metrik per bulan dari total fakta bulan tersebut
+            def calculate_monthly_metrics(facts):
+                service_rev = facts['service_revenue'] if facts else 0.0
+                product_rev = facts['product_revenue'] if facts else 0.0
+                total_flat_rate = facts['flat_rate_hours'] if facts else 0.0
+                total_discount = facts['discount_amount'] if facts else 0.0
+                lead_time = facts['lead_time'] if facts else 0.0
+                order_count = int(round(facts['order_count'])) if facts else 0
 
                 half_service_rev = service_rev / 2 if service_rev else 0
                 total_rev = service_rev + product_rev
@@ -3833,58 +3594,17 @@ class KPIController(http.Controller):
                     'avg_order_value': round(avg_order_value, 2)
                 }
 
-            # Hitung total flat rate hours berdasarkan flat_rate produk (untuk current dan previous)
-            current_flat_rate_hours = 0.0
-            for order in current_orders:
-                for line in order.order_line:
-                    if line.product_id.type == 'service' and line.product_id.flat_rate > 0:
-                        mechanics_count = len(order.car_mechanic_id_new) or 1
-                        current_flat_rate_hours += (line.product_id.flat_rate / mechanics_count * line.product_uom_qty)
-
-            prev_flat_rate_hours = 0.0
-            for order in prev_orders:
-                for line in order.order_line:
-                    if line.product_id.type == 'service' and line.product_id.flat_rate > 0:
-                        mechanics_count = len(order.car_mechanic_id_new) or 1
-                        prev_flat_rate_hours += (line.product_id.flat_rate / mechanics_count * line.product_uom_qty)
-
             # Calculate service and product revenue (untuk current dan previous)
-            service_revenue = 0.0
-            product_revenue = 0.0
-            total_flat_rate_hours = 0.0
-            total_discount = 0.0
-
-            for order in current_orders:
-                for line in order.order_line:
-                    if line.product_id.type == 'service':
-                        service_revenue += line.price_subtotal
-                        if line.product_id.flat_rate > 0:
-                            mechanics_count = len(order.car_mechanic_id_new) or 1
-                            total_flat_rate_hours += (line.product_id.flat_rate / mechanics_count * line.product_uom_qty)
-                    elif line.product_id.type == 'product':
-                        product_revenue += line.price_subtotal
-                    if 'discount' in (line.name or '').lower():
-                        total_discount += line.price_subtotal
-
+            service_revenue = current_facts['service_revenue']
+            product_revenue = current_facts['product_revenue']
+            total_flat_rate_hours = current_facts['flat_rate_hours']
+            total_discount = current_facts['discount_amount']
             half_service_revenue = service_revenue / 2
 
-            prev_service_revenue = 0.0
-            prev_product_revenue = 0.0
-            prev_total_flat_rate_hours = 0.0
-            prev_total_discount = 0.0
-
-            for order in prev_orders:
-                for line in order.order_line:
-                    if line.product_id.type == 'service':
-                        prev_service_revenue += line.price_subtotal
-                        if line.product_id.flat_rate > 0:
-                            mechanics_count = len(order.car_mechanic_id_new) or 1
-                            prev_total_flat_rate_hours += (line.product_id.flat_rate / mechanics_count * line.product_uom_qty)
-                    elif line.product_id.type == 'product':
-                        prev_product_revenue += line.price_subtotal
-                    if 'discount' in (line.name or '').lower():
-                        prev_total_discount += line.price_subtotal
-
+            prev_service_revenue = prev_facts['service_revenue']
+            prev_product_revenue = prev_facts['product_revenue']
+            prev_total_flat_rate_hours = prev_facts['flat_rate_hours']
+            prev_total_discount = prev_facts['discount_amount']
             prev_half_service_revenue = prev_service_revenue / 2
 
             total_revenue = service_revenue + product_revenue
@@ -3897,20 +3617,20 @@ class KPIController(http.Controller):
             prev_half_flat_rate_value_per_hour = prev_half_service_revenue / prev_total_flat_rate_hours if prev_total_flat_rate_hours > 0 else 0
 
             # Calculate lead time servis bersih berdasarkan filter (untuk current dan previous)
-            current_lead_time_bersih = sum(order.lead_time_servis for order in current_orders if order.lead_time_servis)
-            prev_lead_time_bersih = sum(order.lead_time_servis for order in prev_orders if order.lead_time_servis)
+            current_lead_time_bersih = current_facts['lead_time']
+            prev_lead_time_bersih = prev_facts['lead_time']
             total_lead_time_bersih = current_lead_time_bersih + prev_lead_time_bersih
 
             # Menghitung data per bulan untuk data_baru
+            current_monthly = {row['month']: row for row in Fact.aggregate(date_from, date_to, groupby='month')}
+            prev_monthly = {row['month']: row for row in Fact.aggregate(prev_date_from, prev_date_to, groupby='month')}
             data_baru = {}
             current_date = start  # Gunakan start dan end sebagai datetime langsung
             while current_date <= end:
-                month = current_date.month
-                year = current_date.year
-                month_key = f"{year}-{month:02d}"  # Format seperti "2024-11"
+                month_key = f"{current_date.year}-{current_date.month:02d}"  # Format seperti "2024-11"
                 data_baru[month_key] = {
-                    'current': calculate_monthly_metrics(current_orders, month, year),
-                    'previous': calculate_monthly_metrics(prev_orders, month, year)
+                    'current': calculate_monthly_metrics(current_monthly.get(month_key)),
+                    'previous': calculate_monthly_metrics(prev_monthly.get(month_key))
                 }
                 current_date = current_date.replace(day=1) + timedelta(days=32)
                 current_date = current_date.replace(day=1)
@@ -3997,119 +3717,23 @@ class KPIController(http.Controller):
                             ),
                         },
                         'average_flat_rate_per_order': {
-                            'current': round(current_flat_rate_hours / len(current_orders), 2) if current_orders else 0,
-                            'previous': round(prev_flat_rate_hours / len(prev_orders), 2) if prev_orders else 0,
+                            'current': round(current_flat_rate_hours / current_order_count, 2) if current_order_count else 0,
+                            'previous': round(prev_flat_rate_hours / prev_order_count, 2) if prev_order_count else 0,
                             'growth': round(
-                                (((current_flat_rate_hours / len(current_orders) if current_orders else 0) -
-                                (prev_flat_rate_hours / len(prev_orders) if prev_orders else 0)) /
-                                (prev_flat_rate_hours / len(prev_orders) if prev_orders else 1) * 100)
+                                (((current_flat_rate_hours / current_order_count if current_order_count else 0) -
+                                (prev_flat_rate_hours / prev_order_count if prev_order_count else 0)) /
+                                (prev_flat_rate_hours / prev_order_count if prev_order_count else 1) * 100)
                                 if prev_flat_rate_hours else (100 if current_flat_rate_hours > 0 else 0), 2
                             ),
                         },
                     },
-                    'per_mechanic': mechanic_flat_rate_data
+                    # Flat rate per mechanic based on work orders (PKB)
+                    'per_mechanic': self._get_mechanic_flat_rate_data(
+                        Fact, date_from, date_to, prev_date_from, prev_date_to
+                    )
                 }
             })
 
-            # Calculate flat rate per mechanic based on work orders (PKB)
-            flat_rate_per_mechanic = {}
-            for order in current_orders:
-                if order.car_mechanic_id_new:
-                    mechanic_count = len(order.car_mechanic_id_new) or 1
-                    for mechanic in order.car_mechanic_id_new:
-                        if mechanic.id not in flat_rate_per_mechanic:
-                            flat_rate_per_mechanic[mechanic.id] = {
-                                'id': mechanic.id,
-                                'name': mechanic.name,
-                                'total_service_revenue': 0.0,
-                                'flat_rate_hours': 0.0,
-                                'order_count': 0
-                            }
-                        mechanic_data = flat_rate_per_mechanic[mechanic.id]
-                        for line in order.order_line:
-                            if line.product_id.type == 'service' and line.product_id.flat_rate > 0:
-                                mechanic_data['flat_rate_hours'] += (
-                                    line.product_id.flat_rate / mechanic_count * line.product_uom_qty
-                                )
-                                mechanic_data['total_service_revenue'] += line.price_subtotal
-                        mechanic_data['order_count'] += 1
-
-            # Calculate for previous period
-            prev_flat_rate_per_mechanic = {}
-            for order in prev_orders:
-                if order.car_mechanic_id_new:
-                    mechanic_count = len(order.car_mechanic_id_new) or 1
-                    for mechanic in order.car_mechanic_id_new:
-                        if mechanic.id not in prev_flat_rate_per_mechanic:
-                            prev_flat_rate_per_mechanic[mechanic.id] = {
-                                'id': mechanic.id,
-                                'name': mechanic.name,
-                                'total_service_revenue': 0.0,
-                                'flat_rate_hours': 0.0,
-                                'order_count': 0
-                            }
-                        mechanic_data = prev_flat_rate_per_mechanic[mechanic.id]
-                        for line in order.order_line:
-                            if line.product_id.type == 'service' and line.product_id.flat_rate > 0:
-                                mechanic_data['flat_rate_hours'] += (
-                                    line.product_id.flat_rate / mechanic_count * line.product_uom_qty
-                                )
-                                mechanic_data['total_service_revenue'] += line.price_subtotal
-                        mechanic_data['order_count'] += 1
-
-            # Format flat rate data per mechanic
-            mechanic_flat_rate_data = []
-            all_mechanic_ids = set(flat_rate_per_mechanic.keys()) | set(prev_flat_rate_per_mechanic.keys())
-
-            for mechanic_id in all_mechanic_ids:
-                current = flat_rate_per_mechanic.get(mechanic_id, {
-                    'total_service_revenue': 0.0,
-                    'flat_rate_hours': 0.0,
-                    'order_count': 0,
-                    'name': ''
-                })
-                prev = prev_flat_rate_per_mechanic.get(mechanic_id, {
-                    'total_service_revenue': 0.0,
-                    'flat_rate_hours': 0.0,
-                    'order_count': 0,
-                    'name': ''
-                })
-                mechanic_flat_rate = {
-                    'id': mechanic_id,
-                    'name': current['name'] or prev['name'] or 'Unknown',
-                    'current': {
-                        'total_service_revenue': round(current['total_service_revenue'], 2),
-                        'flat_rate_hours': round(current['flat_rate_hours'], 2),
-                        'order_count': current['order_count'],
-                        'avg_flat_rate_per_order': round(
-                            current['flat_rate_hours'] / current['order_count'] 
-                            if current['order_count'] else 0, 2
-                        )
-                    },
-                    'previous': {
-                        'total_service_revenue': round(prev['total_service_revenue'], 2),
-                        'flat_rate_hours': round(prev['flat_rate_hours'], 2),
-                        'order_count': prev['order_count'],
-                        'avg_flat_rate_per_order': round(
-                            prev['flat_rate_hours'] / prev['order_count'] 
-                            if prev['order_count'] else 0, 2
-                        )
-                    },
-                    'growth': {
-                        'flat_rate_hours': round(
-                            ((current['flat_rate_hours'] - prev['flat_rate_hours']) / prev['flat_rate_hours'] * 100)
-                            if prev['flat_rate_hours'] else (100 if current['flat_rate_hours'] > 0 else 0), 2
-                        )
-                    }
-                }
-                mechanic_flat_rate_data.append(mechanic_flat_rate)
-
-            # Sort by current flat rate hours
-            mechanic_flat_rate_data.sort(key=lambda x: x['current']['flat_rate_hours'], reverse=True)
-
-            # Update metrics dengan flat rate per mechanic
-            metrics['flat_rate']['per_mechanic'] = mechanic_flat_rate_data
-
             return {
                 'status': 'success',
                 'data': {
@@ -4265,13 +3889,21 @@ class KPIController(http.Controller):
                 }
 
             # ==================== EXISTING CALCULATIONS ====================
+            # Angka penjualan diambil dari rollup pitcar.sales.daily.fact (per hari Asia/Jakarta)
+            Fact = request.env['pitcar.sales.daily.fact'].sudo()
+            date_from, date_to, prev_date_from, prev_date_to = Fact.get_period_bounds(start, end)
+            current_facts = Fact.aggregate(date_from, date_to)
+            prev_facts = Fact.aggregate(prev_date_from, prev_date_to)
+
             # Calculate basic metrics
-            current_revenue = sum(order.amount_untaxed for order in current_orders)
-            prev_revenue = sum(order.amount_untaxed for order in prev_orders)
+            current_order_count = int(round(current_facts['order_count']))
+            prev_order_count = int(round(prev_facts['order_count']))
+            current_revenue = current_facts['amount_untaxed']
+            prev_revenue = prev_facts['amount_untaxed']
             
             # Calculate flat rate hours
-            current_flat_rate_hours = self._calculate_flat_rate_hours(current_orders)
-            prev_flat_rate_hours = self._calculate_flat_rate_hours(prev_orders)
+            current_flat_rate_hours = round(current_facts['flat_rate_hours'], 2)
+            prev_flat_rate_hours = round(prev_facts['flat_rate_hours'], 2)
 
             # Get quotations
             current_quotations = request.env['sale.order'].sudo().search([
@@ -4292,10 +3924,10 @@ class KPIController(http.Controller):
                             if prev_quotations else 0
                 },
                 'orders': {
-                    'current': len(current_orders),
-                    'previous': len(prev_orders),
-                    'growth': ((len(current_orders) - len(prev_orders)) / len(prev_orders) * 100) 
-                            if prev_orders else 0
+                    'current': current_order_count,
+                    'previous': prev_order_count,
+                    'growth': ((current_order_count - prev_order_count) / prev_order_count * 100) 
+                            if prev_order_count else 0
                 },
                 'sales_revenue': {  # Renamed from 'revenue' to distinguish from accounting
                     'current': current_revenue,
@@ -4303,12 +3935,12 @@ class KPIController(http.Controller):
                     'growth': ((current_revenue - prev_revenue) / prev_revenue * 100) if prev_revenue else 0
                 },
                 'average_order': {
-                    'current': current_revenue / len(current_orders) if current_orders else 0,
-                    'previous': prev_revenue / len(prev_orders) if prev_orders else 0,
-                    'growth': (((current_revenue / len(current_orders) if current_orders else 0) - 
-                            (prev_revenue / len(prev_orders) if prev_orders else 0)) / 
-                            (prev_revenue / len(prev_orders) if prev_orders else 1) * 100)
-                            if prev_orders else 0
+                    'current': current_revenue / current_order_count if current_order_count else 0,
+                    'previous': prev_revenue / prev_order_count if prev_order_count else 0,
+                    'growth': (((current_revenue / current_order_count if current_order_count else 0) - 
+                            (prev_revenue / prev_order_count if prev_order_count else 0)) / 
+                            (prev_revenue / prev_order_count if prev_order_count else 1) * 100)
+                            if prev_order_count else 0
                 },
                 'flat_rate': {
                     'current_hours': current_flat_rate_hours,
@@ -4335,45 +3967,13 @@ class KPIController(http.Controller):
             # Get top data (existing)
             top_data = self._get_top_data(current_orders, current_quotations, start_utc, end_utc)
 
-            # Get top service advisors
-            advisor_data = {}
-            for order in current_orders:
-                for advisor in order.service_advisor_id:
-                    if advisor.id not in advisor_data:
-                        advisor_data[advisor.id] = {
-                            'id': advisor.id,
-                            'name': advisor.name,
-                            'orders': 0,
-                            'revenue': 0
-                        }
-                    advisor_data[advisor.id]['orders'] += 1
-                    advisor_data[advisor.id]['revenue'] += order.amount_total / len(order.service_advisor_id)
-
-            top_advisors = sorted(
-                advisor_data.values(),
-                key=lambda x: x['revenue'],
-                reverse=True
-            )[:10]
-
-            # Get top mechanics
-            mechanic_data = {}
-            for order in current_orders:
-                for mechanic in order.car_mechanic_id_new:
-                    if mechanic.id not in mechanic_data:
-                        mechanic_data[mechanic.id] = {
-                            'id': mechanic.id,
-                            'name': mechanic.name,
-                            'orders': 0,
-                            'revenue': 0
-                        }
-                    mechanic_data[mechanic.id]['orders'] += 1
-                    mechanic_data[mechanic.id]['revenue'] += order.amount_total / len(order.car_mechanic_id_new)
-
-            top_mechanics = sorted(
-                mechanic_data.values(),
-                key=lambda x: x['revenue'],
-                reverse=True
-            )[:10]
+            # Get top service advisors and mechanics
+            top_advisors = self._get_fact_top_performers(
+                Fact, date_from, date_to, 'service_advisor_id', 'pitcar.service.advisor', 'advisor_order_count'
+            )
+            top_mechanics = self._get_fact_top_performers(
+                Fact, date_from, date_to, 'mechanic_id', 'pitcar.mechanic.new', 'mechanic_order_count'
+            )
 
             # Get cohort analysis (existing)
             cohort_data = self._get_cohort_analysis(start_utc, end_utc, kw.get('cohort', {}))
@@ -4428,23 +4028,9 @@ class KPIController(http.Controller):
             # Define Otokits account codes to exclude
             otokits_account_codes = ['41000050']  # Add more codes if needed
             
-            # Current period journal entries
-            current_entries = request.env['account.move.line'].sudo().search([
-                ('account_id', 'in', income_accounts.ids),
-                ('date', '>=', start.date()),
-                ('date', '<=', end.date()),
-                ('move_id.state', '=', 'posted'),
-                ('company_id', '=', request.env.company.id)
-            ])
-
-            # Previous period journal entries
-            prev_entries = request.env['account.move.line'].sudo().search([
-                ('account_id', 'in', income_accounts.ids),
-                ('date', '>=', prev_start.date()),
-                ('date', '<=', prev_end.date()),
-                ('move_id.state', '=', 'posted'),
-                ('company_id', '=', request.env.company.id)
-            ])
+            # Saldo per akun (satu read_group per periode)
+            current_balances = self._get_account_balances(income_accounts, start.date(), end.date())
+            prev_balances = self._get_account_balances(income_accounts, prev_start.date(), prev_end.date())
 
             # Calculate totals with optional Otokits exclusion
             current_total = 0
@@ -4452,39 +4038,33 @@ class KPIController(http.Controller):
             prev_total = 0 
             prev_otokits_amount = 0
 
-            # Process current entries
-            for entry in current_entries:
-                amount = entry.credit - entry.debit
-                if exclude_otokits and entry.account_id.code in otokits_account_codes:
-                    current_otokits_amount += amount
-                else:
-                    current_total += amount
-
-            # Process previous entries
-            for entry in prev_entries:
-                amount = entry.credit - entry.debit
-                if exclude_otokits and entry.account_id.code in otokits_account_codes:
-                    prev_otokits_amount += amount
-                else:
-                    prev_total += amount
-
             # Calculate by account breakdown
             account_breakdown = {}
             otokits_breakdown = {}
             
             for account in income_accounts:
-                account_entries = current_entries.filtered(lambda e: e.account_id.id == account.id)
-                account_total = sum(entry.credit - entry.debit for entry in account_entries)
+                is_otokits = exclude_otokits and account.code in otokits_account_codes
+                current = current_balances.get(account.id)
+                prev = prev_balances.get(account.id)
+                account_total = current['credit'] - current['debit'] if current else 0
+                prev_account_total = prev['credit'] - prev['debit'] if prev else 0
+
+                if is_otokits:
+                    current_otokits_amount += account_total
+                    prev_otokits_amount += prev_account_total
+                else:
+                    current_total += account_total
+                    prev_total += prev_account_total
                 
                 if account_total != 0:
                     account_data = {
                         'name': account.name,
                         'code': account.code,
                         'amount': account_total,
-                        'entry_count': len(account_entries)
+                        'entry_count': current['count']
                     }
                     
-                    if exclude_otokits and account.code in otokits_account_codes:
+                    if is_otokits:
                         otokits_breakdown[account.code] = account_data
                     else:
                         account_breakdown[account.code] = account_data
@@ -4509,6 +4089,28 @@ class KPIController(http.Controller):
             _logger.error(f"Error calculating accounting revenue: {str(e)}")
             return self._empty_accounting_data()
 
+    def _get_account_balances(self, accounts, date_from, date_to):
+        """
+        Total debit/credit journal item posted per akun dalam rentang tanggal.
+
+        Returns:
+            dict: {account_id: {'debit', 'credit', 'count'}}
+        """
+        groups = request.env['account.move.line'].sudo().read_group([
+            ('account_id', 'in', accounts.ids),
+            ('date', '>=', date_from),
+            ('date', '<=', date_to),
+            ('move_id.state', '=', 'posted'),
+            ('company_id', '=', request.env.company.id)
+        ], ['debit:sum', 'credit:sum'], ['account_id'], lazy=False)
+        return {
+            group['account_id'][0]: {
+                'debit': group['debit'] or 0.0,
+                'credit': group['credit'] or 0.0,
+                'count': group['__count']
+            } for group in groups
+        }
+
     def _empty_accounting_data(self):
         """Return empty accounting data structure"""
         return {
@@ -4550,39 +4152,25 @@ class KPIController(http.Controller):
                 _logger.warning("No COGS accounts found")
                 return self._empty_cogs_data()
 
-            # Current period COGS entries
-            current_cogs_entries = request.env['account.move.line'].sudo().search([
-                ('account_id', 'in', cogs_accounts.ids),
-                ('date', '>=', start.date()),
-                ('date', '<=', end.date()),
-                ('move_id.state', '=', 'posted'),
-                ('company_id', '=', request.env.company.id)
-            ])
-
-            # Previous period COGS entries
-            prev_cogs_entries = request.env['account.move.line'].sudo().search([
-                ('account_id', 'in', cogs_accounts.ids),
-                ('date', '>=', prev_start.date()),
-                ('date', '<=', prev_end.date()),
-                ('move_id.state', '=', 'posted'),
-                ('company_id', '=', request.env.company.id)
-            ])
+            # Saldo per akun (satu read_group per periode)
+            current_balances = self._get_account_balances(cogs_accounts, start.date(), end.date())
+            prev_balances = self._get_account_balances(cogs_accounts, prev_start.date(), prev_end.date())
 
             # Calculate totals (debit - credit for expense accounts)
-            current_cogs_total = sum(entry.debit - entry.credit for entry in current_cogs_entries)
-            prev_cogs_total = sum(entry.debit - entry.credit for entry in prev_cogs_entries)
+            current_cogs_total = sum(balance['debit'] - balance['credit'] for balance in current_balances.values())
+            prev_cogs_total = sum(balance['debit'] - balance['credit'] for balance in prev_balances.values())
 
             # COGS breakdown by account
             cogs_breakdown = {}
             for account in cogs_accounts:
-                account_entries = current_cogs_entries.filtered(lambda e: e.account_id.id == account.id)
-                account_total = sum(entry.debit - entry.credit for entry in account_entries)
+                balance = current_balances.get(account.id)
+                account_total = balance['debit'] - balance['credit'] if balance else 0
                 if account_total != 0:
                     cogs_breakdown[account.code] = {
                         'name': account.name,
                         'code': account.code,
                         'amount': account_total,
-                        'entry_count': len(account_entries)
+                        'entry_count': balance['count']
                     }
 
             # Calculate COGS by category
@@ -4874,103 +4462,165 @@ class KPIController(http.Controller):
             'error': 'Loyalty system not available'
         }
 
-    def _calculate_flat_rate_hours(self, orders):
-        """Calculate total flat rate hours from orders"""
-        total_hours = 0.0
-        for order in orders:
-            for line in order.order_line:
-                if line.product_id.type == 'service' and line.product_id.flat_rate > 0:
-                    mechanics_count = len(order.car_mechanic_id_new) or 1
-                    total_hours += (line.product_id.flat_rate / mechanics_count * line.product_uom_qty)
-        return round(total_hours, 2)
+    def _get_fact_top_performers(self, Fact, date_from, date_to, groupby, model_name, count_field, limit=10):
+        """Top service advisor / mekanik berdasarkan revenue dari pitcar.sales.daily.fact"""
+        rows = [row for row in Fact.aggregate(date_from, date_to, groupby=groupby) if row[groupby]]
+        rows = sorted(rows, key=lambda x: x['amount_total'], reverse=True)[:limit]
+        records = request.env[model_name].sudo().browse([row[groupby] for row in rows])
+        names = {record.id: record.name for record in records}
+        return [{
+            'id': row[groupby],
+            'name': names.get(row[groupby]),
+            'orders': int(round(row[count_field])),
+            'revenue': row['amount_total']
+        } for row in rows]
+
+    def _get_mechanic_flat_rate_data(self, Fact, date_from, date_to, prev_date_from, prev_date_to):
+        """Flat rate per mekanik (PKB) untuk periode sekarang dan sebelumnya, urut jam flat rate"""
+        current_rows = {
+            row['mechanic_id']: row for row in Fact.aggregate(date_from, date_to, groupby='mechanic_id')
+            if row['mechanic_id']
+        }
+        prev_rows = {
+            row['mechanic_id']: row for row in Fact.aggregate(prev_date_from, prev_date_to, groupby='mechanic_id')
+            if row['mechanic_id']
+        }
+        mechanics = request.env['pitcar.mechanic.new'].sudo().browse(list(set(current_rows) | set(prev_rows)))
+
+        def period_data(row):
+            flat_rate_hours = row['mechanic_flat_rate_hours'] if row else 0.0
+            order_count = int(round(row['mechanic_order_count'])) if row else 0
+            return {
+                'total_service_revenue': round(row['mechanic_service_revenue'] if row else 0.0, 2),
+                'flat_rate_hours': round(flat_rate_hours, 2),
+                'order_count': order_count,
+                'avg_flat_rate_per_order': round(flat_rate_hours / order_count if order_count else 0, 2)
+            }
+
+        mechanic_flat_rate_data = []
+        for mechanic in mechanics:
+            current = current_rows.get(mechanic.id)
+            prev = prev_rows.get(mechanic.id)
+            current_hours = current['mechanic_flat_rate_hours'] if current else 0.0
+            prev_hours = prev['mechanic_flat_rate_hours'] if prev else 0.0
+            mechanic_flat_rate_data.append({
+                'id': mechanic.id,
+                'name': mechanic.name or 'Unknown',
+                'current': period_data(current),
+                'previous': period_data(prev),
+                'growth': {
+                    'flat_rate_hours': round(
+                        ((current_hours - prev_hours) / prev_hours * 100)
+                        if prev_hours else (100 if current_hours > 0 else 0), 2
+                    )
+                }
+            })
+
+        # Sort by current flat rate hours
+        mechanic_flat_rate_data.sort(key=lambda x: x['current']['flat_rate_hours'], reverse=True)
+        return mechanic_flat_rate_data
+
+    def _get_top_products(self, start_utc, end_utc, with_flat_rate=False, limit=10):
+        """
+        Top produk jasa dan produk fisik berdasarkan revenue, dari satu read_group
+        sale.order.line per produk.
+
+        Returns:
+            tuple: (top_services, top_physical_products)
+        """
+        groups = request.env['sale.order.line'].sudo().read_group([
+            ('order_id.state', '=', 'sale'),
+            ('order_id.date_completed', '>=', start_utc.strftime('%Y-%m-%d %H:%M:%S')),
+            ('order_id.date_completed', '<=', end_utc.strftime('%Y-%m-%d %H:%M:%S')),
+            ('product_id', '!=', False)
+        ], ['product_uom_qty:sum', 'price_subtotal:sum'], ['product_id'], lazy=False)
+        products = request.env['product.product'].sudo().browse([group['product_id'][0] for group in groups])
+        products_by_id = {product.id: product for product in products}
+
+        service_products = []
+        physical_products = []
+        for group in groups:
+            product = products_by_id[group['product_id'][0]]
+            is_service = product.type == 'service'
+            data = {
+                'id': product.id,
+                'name': product.name,
+                'orders': group['product_uom_qty'],
+                'revenue': group['price_subtotal']
+            }
+            if with_flat_rate:
+                # Add flat rate hours for services
+                data['flat_rate_hours'] = (
+                    product.flat_rate * group['product_uom_qty'] if product.flat_rate > 0 else 0
+                ) if is_service else None
+            (service_products if is_service else physical_products).append(data)
+
+        # Sort and get top 10 for each category
+        top_services = sorted(service_products, key=lambda x: x['revenue'], reverse=True)[:limit]
+        top_physical_products = sorted(physical_products, key=lambda x: x['revenue'], reverse=True)[:limit]
+        return top_services, top_physical_products
+
+    def _get_top_customers(self, domain, limit=10):
+        """Top customer berdasarkan total nilai order (read_group per partner)"""
+        groups = request.env['sale.order'].sudo().read_group(
+            domain + [('partner_id', '!=', False)],
+            ['amount_total:sum'],
+            ['partner_id'],
+            orderby='amount_total desc',
+            limit=limit,
+            lazy=False
+        )
+        partners = request.env['res.partner'].sudo().browse([group['partner_id'][0] for group in groups])
+        names = {partner.id: partner.name for partner in partners}
+        return [{
+            'id': group['partner_id'][0],
+            'name': names.get(group['partner_id'][0]),
+            'orders': group['__count'],
+            'revenue': group['amount_total']
+        } for group in groups]
 
     def _calculate_enhanced_trends(self, start, end):
         """Calculate enhanced daily trends including new metrics"""
+        Fact = request.env['pitcar.sales.daily.fact'].sudo()
+        date_from, date_to = start.date(), end.date()
+        daily_facts = {row['date']: row for row in Fact.aggregate(date_from, date_to, groupby='date')}
+
+        # Membership activity per hari Asia/Jakarta (if available)
+        membership_activity = {}
+        if 'pitcar.points.transaction' in request.env:
+            Transaction = request.env['pitcar.points.transaction'].sudo()
+            Transaction.flush_model(['transaction_date', 'status'])
+            utc_from, utc_to = Fact._utc_bounds(date_from, date_to)
+            request.env.cr.execute("""
+                SELECT (transaction_date AT TIME ZONE 'UTC' AT TIME ZONE %s)::date AS day, COUNT(*)
+                FROM {table}
+                WHERE status = 'active' AND transaction_date >= %s AND transaction_date < %s
+                GROUP BY 1
+            """.format(table=Transaction._table), ('Asia/Jakarta', utc_from, utc_to))
+            membership_activity = dict(request.env.cr.fetchall())
+
         trends = []
-        current = start
-        
-        while current <= end:
-            current_end = min(current.replace(hour=23, minute=59, second=59), end)
-            
-            # Get orders for this day
-            day_orders = request.env['sale.order'].sudo().search([
-                ('date_completed', '>=', current.strftime('%Y-%m-%d %H:%M:%S')),
-                ('date_completed', '<=', current_end.strftime('%Y-%m-%d %H:%M:%S')),
-                ('state', '=', 'sale')
-            ])
-            
-            # Calculate daily metrics
-            daily_revenue = sum(order.amount_total for order in day_orders)
-            daily_flat_rate = self._calculate_flat_rate_hours(day_orders)
-            
-            # Lead time metrics
-            completed_services = day_orders.filtered(lambda o: o.lead_time_servis > 0)
-            avg_lead_time = sum(completed_services.mapped('lead_time_servis')) / len(completed_services) if completed_services else 0
-            
-            # Membership activity (if available)
-            membership_activity = 0
-            if 'pitcar.points.transaction' in request.env:
-                daily_transactions = request.env['pitcar.points.transaction'].sudo().search_count([
-                    ('transaction_date', '>=', current),
-                    ('transaction_date', '<=', current_end),
-                    ('status', '=', 'active')
-                ])
-                membership_activity = daily_transactions
-
-            trend_data = {
-                'date': current.strftime('%Y-%m-%d'),
-                'revenue': daily_revenue,
-                'orders': len(day_orders),
-                'flat_rate_hours': daily_flat_rate,
-                'avg_lead_time': round(avg_lead_time, 2),
-                'membership_activity': membership_activity
-            }
-            
-            trends.append(trend_data)
-            current += timedelta(days=1)
+        day = date_from
+        while day <= date_to:
+            facts = daily_facts.get(day)
+            lead_time_orders = facts['lead_time_order_count'] if facts else 0
+
+            trends.append({
+                'date': day.strftime('%Y-%m-%d'),
+                'revenue': facts['amount_total'] if facts else 0,
+                'orders': int(round(facts['order_count'])) if facts else 0,
+                'flat_rate_hours': round(facts['flat_rate_hours'], 2) if facts else 0.0,
+                'avg_lead_time': round(facts['lead_time'] / lead_time_orders, 2) if lead_time_orders else 0,
+                'membership_activity': membership_activity.get(day, 0)
+            })
+            day += timedelta(days=1)
         
         return trends
 
     def _get_top_data(self, current_orders, current_quotations, start_utc, end_utc):
         """Get top performers data (existing logic enhanced)"""
-        # This method contains the existing top data logic
-        # Enhanced with additional metrics
-        
-        # Get order lines for product analysis
-        order_lines = request.env['sale.order.line'].sudo().search([
-            ('order_id.state', '=', 'sale'),
-            ('order_id.date_completed', '>=', start_utc.strftime('%Y-%m-%d %H:%M:%S')),
-            ('order_id.date_completed', '<=', end_utc.strftime('%Y-%m-%d %H:%M:%S'))
-        ])
-        
         # Service vs Product analysis
-        service_products = {}
-        physical_products = {}
-
-        for line in order_lines:
-            product = line.product_id
-            is_service = product.type == 'service'
-            target_dict = service_products if is_service else physical_products
-            
-            if product.id not in target_dict:
-                target_dict[product.id] = {
-                    'id': product.id,
-                    'name': product.name,
-                    'orders': 0,
-                    'revenue': 0,
-                    'flat_rate_hours': 0 if is_service else None
-                }
-            
-            target_dict[product.id]['orders'] += line.product_uom_qty
-            target_dict[product.id]['revenue'] += line.price_subtotal
-            
-            # Add flat rate hours for services
-            if is_service and product.flat_rate > 0:
-                target_dict[product.id]['flat_rate_hours'] += (product.flat_rate * line.product_uom_qty)
-
-        # Sort and get top 10
-        top_services = sorted(service_products.values(), key=lambda x: x['revenue'], reverse=True)[:10]
-        top_physical_products = sorted(physical_products.values(), key=lambda x: x['revenue'], reverse=True)[:10]
+        top_services, top_physical_products = self._get_top_products(start_utc, end_utc, with_flat_rate=True)
 
         # Enhanced customer analysis
         customer_data = {}
@@ -5039,106 +4689,10 @@ class KPIController(http.Controller):
             List berisi data cohort
         """
         try:
-            # Mengambil semua order dengan state 'sale' dalam periode yang ditentukan
-            # dan sudah selesai (date_completed)
-            all_orders = request.env['sale.order'].sudo().search([
-                ('state', '=', 'sale'),
-                ('date_completed', '>=', start_date.strftime('%Y-%m-%d %H:%M:%S')),
-                ('date_completed', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S'))
-            ])
-            
-            if not all_orders:
-                return []
-                
-            # Menggunakan defaultdict untuk mengorganisir pesanan berdasarkan pelanggan dan waktu
-            from collections import defaultdict
-            import calendar
-            from dateutil.relativedelta import relativedelta
-            
-            # Dictionary untuk menyimpan bulan pertama order untuk setiap pelanggan
-            customer_first_order = {}
-            # Dictionary untuk menyimpan semua order berdasarkan pelanggan dan bulan
-            customer_orders_by_month = defaultdict(lambda: defaultdict(list))
-            
-            # Kelompokkan orders berdasarkan pelanggan dan bulan
-            for order in all_orders:
-                customer_id = order.partner_id.id
-                order_date = order.date_completed.replace(tzinfo=pytz.UTC)
-                
-                # Format bulan cohort sebagai 'YYYY-MM'
-                order_month = order_date.strftime('%Y-%m')
-                
-                # Simpan order ke dalam dictionary berdasarkan pelanggan dan bulan
-                customer_orders_by_month[customer_id][order_month].append(order)
-                
-                # Catat bulan pertama kali pelanggan order (jika belum ada)
-                if customer_id not in customer_first_order or order_date < customer_first_order[customer_id]['date']:
-                    customer_first_order[customer_id] = {
-                        'date': order_date,
-                        'month': order_month
-                    }
-            
-            # Dictionary untuk menyimpan cohort
-            cohort_data = defaultdict(lambda: defaultdict(int))
-            # Dictionary untuk menyimpan total pelanggan per cohort
-            cohort_sizes = defaultdict(int)
-            
-            # Hitung bulan tersedia dalam rentang
-            start_month_date = start_date.replace(day=1, hour=0, minute=0, second=0)
-            available_months = []
-            current_month = start_month_date
-            
-            while current_month <= end_date:
-                available_months.append(current_month.strftime('%Y-%m'))
-                current_month += relativedelta(months=1)
-            
-            # Untuk setiap pelanggan, hitung aktivitas retensi
-            for customer_id, first_order_info in customer_first_order.items():
-                first_month = first_order_info['month']
-                first_date = first_order_info['date']
-                
-                # Increment ukuran cohort
-                cohort_sizes[first_month] += 1
-                
-                # Untuk setiap bulan dalam periode, hitung retensi
-                for i, month in enumerate(available_months):
-                    # Periksa apakah bulan lebih besar atau sama dengan first_month
-                    if month >= first_month:
-                        # Hitung selisih bulan antara bulan saat ini dan bulan pertama
-                        month_date = datetime.strptime(month, '%Y-%m')
-                        first_month_date = datetime.strptime(first_month, '%Y-%m')
-                        month_diff = (month_date.year - first_month_date.year) * 12 + (month_date.month - first_month_date.month)
-                        
-                        # Jika pelanggan memiliki order di bulan ini, tandai sebagai retensi
-                        if month in customer_orders_by_month[customer_id]:
-                            cohort_data[first_month][month_diff] += 1
-            
-            # Format data cohort untuk output
-            formatted_cohorts = []
-            for cohort_month, retentions in cohort_data.items():
-                cohort_size = cohort_sizes[cohort_month]
-                
-                # Buat entri cohort
-                cohort_entry = {
-                    'cohort': cohort_month,
-                    'cohort_display': datetime.strptime(cohort_month, '%Y-%m').strftime('%b %Y'),
-                    'total_customers': cohort_size
-                }
-                
-                # Tambahkan data retensi untuk setiap bulan (hingga depth)
-                for month_number in range(depth + 1):  # +1 karena kita juga ingin bulan 0
-                    retention_count = retentions.get(month_number, 0)
-                    retention_rate = (retention_count / cohort_size * 100) if cohort_size else 0
-                    
-                    # Format: 'month0', 'month1', dst. untuk retensi di bulan ke-n
-                    cohort_entry[f'month{month_number}'] = round(retention_rate, 1)
-                
-                formatted_cohorts.append(cohort_entry)
-            
-            # Urutkan cohort berdasarkan bulan (terbaru ke terlama)
-            formatted_cohorts.sort(key=lambda x: x['cohort'], reverse=True)
-            
-            return formatted_cohorts
+            result = request.env['pitcar.customer.cohort'].sudo().compute_monthly_cohorts(
+                start_date, end_date, depth=depth
+            )
+            return result['cohorts'] if result else []
             
         except Exception as e:
             _logger.error(f"Error in calculate_customer_cohorts: {str(e)}")
@@ -5154,283 +4708,17 @@ class KPIController(http.Controller):
             depth: Jumlah bulan yang akan dihitung untuk retensi (default: 6)
             segment_by: Field untuk segmentasi ('car_brand', 'service_category', 'service_advisor', dll)
             include_metrics: Jika True, akan menyertakan metrik tambahan seperti rating, revenue, dll
+                (hanya untuk hasil tanpa segmentasi)
             
         Returns:
             Dictionary berisi data cohort dengan segmentasi yang diminta
         """
         try:
-            # Mengambil semua order dengan state 'sale' dalam periode yang ditentukan
-            # dan sudah selesai (date_completed)
-            all_orders = request.env['sale.order'].sudo().search([
-                ('state', '=', 'sale'),
-                ('date_completed', '>=', start_date.strftime('%Y-%m-%d %H:%M:%S')),
-                ('date_completed', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S'))
-            ])
-            
-            if not all_orders:
-                return []
-                
-            # Menggunakan defaultdict untuk mengorganisir pesanan berdasarkan pelanggan dan waktu
-            from collections import defaultdict
-            import calendar
-            from dateutil.relativedelta import relativedelta
-            
-            # Dictionary untuk menyimpan bulan pertama order untuk setiap pelanggan
-            customer_first_order = {}
-            # Dictionary untuk menyimpan semua order berdasarkan pelanggan dan bulan
-            customer_orders_by_month = defaultdict(lambda: defaultdict(list))
-            
-            # Kelompokkan orders berdasarkan pelanggan dan bulan
-            for order in all_orders:
-                customer_id = order.partner_id.id
-                order_date = order.date_completed.replace(tzinfo=pytz.UTC)
-                
-                # Format bulan cohort sebagai 'YYYY-MM'
-                order_month = order_date.strftime('%Y-%m')
-                
-                # Simpan order ke dalam dictionary berdasarkan pelanggan dan bulan
-                customer_orders_by_month[customer_id][order_month].append(order)
-                
-                # Catat bulan pertama kali pelanggan order (jika belum ada)
-                if customer_id not in customer_first_order or order_date < customer_first_order[customer_id]['date']:
-                    customer_first_order[customer_id] = {
-                        'date': order_date,
-                        'month': order_month,
-                        'order': order  # Simpan referensi ke order agar bisa mendapatkan data segmentasi
-                    }
-            
-            # Hitung bulan tersedia dalam rentang
-            start_month_date = start_date.replace(day=1, hour=0, minute=0, second=0)
-            available_months = []
-            current_month = start_month_date
-            
-            while current_month <= end_date:
-                available_months.append(current_month.strftime('%Y-%m'))
-                current_month += relativedelta(months=1)
-                
-            # Mempersiapkan data segmentasi jika diminta
-            segment_data = {}
-            if segment_by:
-                if segment_by == 'car_brand':
-                    # Segmentasi berdasarkan brand mobil
-                    for customer_id, data in customer_first_order.items():
-                        order = data['order']
-                        brand = order.partner_car_brand.name if order.partner_car_brand else 'Unknown'
-                        if brand not in segment_data:
-                            segment_data[brand] = {
-                                'cohort_data': defaultdict(lambda: defaultdict(int)),
-                                'cohort_sizes': defaultdict(int),
-                                'customers': set()
-                            }
-                        segment_data[brand]['customers'].add(customer_id)
-                elif segment_by == 'service_category':
-                    # Segmentasi berdasarkan kategori servis
-                    for customer_id, data in customer_first_order.items():
-                        order = data['order']
-                        category = dict(order._fields['service_category'].selection).get(order.service_category, 'Unknown')
-                        if category not in segment_data:
-                            segment_data[category] = {
-                                'cohort_data': defaultdict(lambda: defaultdict(int)),
-                                'cohort_sizes': defaultdict(int),
-                                'customers': set()
-                            }
-                        segment_data[category]['customers'].add(customer_id)
-                elif segment_by == 'service_advisor':
-                    # Segmentasi berdasarkan service advisor
-                    for customer_id, data in customer_first_order.items():
-                        order = data['order']
-                        advisors = order.service_advisor_id
-                        if not advisors:
-                            advisor_name = 'No Advisor'
-                        else:
-                            advisor_name = ', '.join(advisor.name for advisor in advisors)
-                        
-                        if advisor_name not in segment_data:
-                            segment_data[advisor_name] = {
-                                'cohort_data': defaultdict(lambda: defaultdict(int)),
-                                'cohort_sizes': defaultdict(int),
-                                'customers': set()
-                            }
-                        segment_data[advisor_name]['customers'].add(customer_id)
-                elif segment_by == 'customer_rating':
-                    # Segmentasi berdasarkan rating pelanggan
-                    for customer_id, data in customer_first_order.items():
-                        order = data['order']
-                        rating = order.customer_rating or 'No Rating'
-                        if rating not in segment_data:
-                            segment_data[rating] = {
-                                'cohort_data': defaultdict(lambda: defaultdict(int)),
-                                'cohort_sizes': defaultdict(int),
-                                'customers': set()
-                            }
-                        segment_data[rating]['customers'].add(customer_id)
-            
-            # Hasil akan berbentuk berbeda tergantung apakah ada segmentasi
-            if segment_by:
-                # Proses untuk data tersegmentasi
-                segment_result = {}
-                
-                for segment_key, segment_info in segment_data.items():
-                    cohort_data = defaultdict(lambda: defaultdict(int))
-                    cohort_sizes = defaultdict(int)
-                    segment_customers = segment_info['customers']
-                    
-                    # Untuk setiap pelanggan dalam segmen ini, hitung retensi
-                    for customer_id in segment_customers:
-                        if customer_id in customer_first_order:
-                            first_month = customer_first_order[customer_id]['month']
-                            first_date = customer_first_order[customer_id]['date']
-                            
-                            # Increment ukuran cohort
-                            cohort_sizes[first_month] += 1
-                            
-                            # Untuk setiap bulan dalam periode, hitung retensi
-                            for i, month in enumerate(available_months):
-                                # Periksa apakah bulan lebih besar atau sama dengan first_month
-                                if month >= first_month:
-                                    # Hitung selisih bulan antara bulan saat ini dan bulan pertama
-                                    month_date = datetime.strptime(month, '%Y-%m')
-                                    first_month_date = datetime.strptime(first_month, '%Y-%m')
-                                    month_diff = (month_date.year - first_month_date.year) * 12 + (month_date.month - first_month_date.month)
-                                    
-                                    # Jika pelanggan memiliki order di bulan ini, tandai sebagai retensi
-                                    if month in customer_orders_by_month[customer_id]:
-                                        cohort_data[first_month][month_diff] += 1
-                    
-                    # Format data cohort untuk output
-                    formatted_cohorts = []
-                    for cohort_month, retentions in cohort_data.items():
-                        cohort_size = cohort_sizes[cohort_month]
-                        
-                        # Buat entri cohort
-                        cohort_entry = {
-                            'cohort': cohort_month,
-                            'cohort_display': datetime.strptime(cohort_month, '%Y-%m').strftime('%b %Y'),
-                            'segment': segment_key,
-                            'total_customers': cohort_size
-                        }
-                        
-                        # Tambahkan data retensi untuk setiap bulan (hingga depth)
-                        for month_number in range(depth + 1):  # +1 karena kita juga ingin bulan 0
-                            retention_count = retentions.get(month_number, 0)
-                            retention_rate = (retention_count / cohort_size * 100) if cohort_size else 0
-                            
-                            # Format: 'month0', 'month1', dst. untuk retensi di bulan ke-n
-                            cohort_entry[f'month{month_number}'] = round(retention_rate, 1)
-                        
-                        formatted_cohorts.append(cohort_entry)
-                    
-                    # Urutkan cohort berdasarkan bulan (terbaru ke terlama)
-                    formatted_cohorts.sort(key=lambda x: x['cohort'], reverse=True)
-                    segment_result[segment_key] = formatted_cohorts
-                
-                return {
-                    'segmented': True,
-                    'segment_by': segment_by,
-                    'segments': segment_result
-                }
-                
-            else:
-                # Proses tanpa segmentasi (original cohort analysis)
-                cohort_data = defaultdict(lambda: defaultdict(int))
-                cohort_sizes = defaultdict(int)
-                
-                # Untuk setiap pelanggan, hitung aktivitas retensi
-                for customer_id, first_order_info in customer_first_order.items():
-                    first_month = first_order_info['month']
-                    first_date = first_order_info['date']
-                    
-                    # Increment ukuran cohort
-                    cohort_sizes[first_month] += 1
-                    
-                    # Untuk setiap bulan dalam periode, hitung retensi
-                    for i, month in enumerate(available_months):
-                        # Periksa apakah bulan lebih besar atau sama dengan first_month
-                        if month >= first_month:
-                            # Hitung selisih bulan antara bulan saat ini dan bulan pertama
-                            month_date = datetime.strptime(month, '%Y-%m')
-                            first_month_date = datetime.strptime(first_month, '%Y-%m')
-                            month_diff = (month_date.year - first_month_date.year) * 12 + (month_date.month - first_month_date.month)
-                            
-                            # Jika pelanggan memiliki order di bulan ini, tandai sebagai retensi
-                            if month in customer_orders_by_month[customer_id]:
-                                cohort_data[first_month][month_diff] += 1
-                
-                # Format data cohort untuk output
-                formatted_cohorts = []
-                
-                # Dictionary untuk metrik tambahan jika diperlukan
-                cohort_metrics = defaultdict(lambda: {
-                    'avg_rating': [],
-                    'total_revenue': 0,
-                    'booking_rate': {'yes': 0, 'no': 0},
-                    'feedback_rate': {'yes': 0, 'no': 0}
-                }) if include_metrics else None
-                
-                for cohort_month, retentions in cohort_data.items():
-                    cohort_size = cohort_sizes[cohort_month]
-                    
-                    # Buat entri cohort
-                    cohort_entry = {
-                        'cohort': cohort_month,
-                        'cohort_display': datetime.strptime(cohort_month, '%Y-%m').strftime('%b %Y'),
-                        'total_customers': cohort_size
-                    }
-                    
-                    # Tambahkan data retensi untuk setiap bulan (hingga depth)
-                    for month_number in range(depth + 1):  # +1 karena kita juga ingin bulan 0
-                        retention_count = retentions.get(month_number, 0)
-                        retention_rate = (retention_count / cohort_size * 100) if cohort_size else 0
-                        
-                        # Format: 'month0', 'month1', dst. untuk retensi di bulan ke-n
-                        cohort_entry[f'month{month_number}'] = round(retention_rate, 1)
-                    
-                    # Tambahkan metrik tambahan jika diperlukan
-                    if include_metrics:
-                        # Ambil semua pelanggan dalam cohort ini
-                        cohort_customers = [
-                            cust_id for cust_id, info in customer_first_order.items()
-                            if info['month'] == cohort_month
-                        ]
-                        
-                        # Metrik untuk cohort ini
-                        all_orders_in_cohort = []
-                        for cust_id in cohort_customers:
-                            cust_orders = []
-                            for month_orders in customer_orders_by_month[cust_id].values():
-                                cust_orders.extend(month_orders)
-                            all_orders_in_cohort.extend(cust_orders)
-                        
-                        # Calculate metrics
-                        ratings = [float(o.customer_rating) for o in all_orders_in_cohort if o.customer_rating and o.customer_rating.isdigit()]
-                        avg_rating = sum(ratings) / len(ratings) if ratings else 0
-                        
-                        total_revenue = sum(o.amount_total for o in all_orders_in_cohort)
-                        
-                        booking_yes = sum(1 for o in all_orders_in_cohort if o.is_booking)
-                        booking_rate = (booking_yes / len(all_orders_in_cohort) * 100) if all_orders_in_cohort else 0
-                        
-                        feedback_yes = sum(1 for o in all_orders_in_cohort if o.is_willing_to_feedback == 'yes')
-                        feedback_rate = (feedback_yes / len(all_orders_in_cohort) * 100) if all_orders_in_cohort else 0
-                        
-                        cohort_entry.update({
-                            'avg_rating': round(avg_rating, 1),
-                            'total_revenue': round(total_revenue, 2),
-                            'booking_rate': round(booking_rate, 1),
-                            'feedback_rate': round(feedback_rate, 1)
-                        })
-                    
-                    formatted_cohorts.append(cohort_entry)
-                
-                # Urutkan cohort berdasarkan bulan (terbaru ke terlama)
-                formatted_cohorts.sort(key=lambda x: x['cohort'], reverse=True)
-                
-                result = {
-                    'segmented': False,
-                    'cohorts': formatted_cohorts
-                }
-                
-                return result
+            result = request.env['pitcar.customer.cohort'].sudo().compute_monthly_cohorts(
+                start_date, end_date, depth=depth, segment_by=segment_by,
+                include_metrics=include_metrics and not segment_by
+            )
+            return result or []
             
         except Exception as e:
             _logger.error(f"Error in calculate_enhanced_customer_cohorts: {str(e)}")
@@ -5452,316 +4740,11 @@ class KPIController(http.Controller):
             Dictionary berisi data cohort dengan pola retensi servis mobil
         """
         try:
-            # Mengambil semua order dalam rentang waktu
-            all_orders = request.env['sale.order'].sudo().search([
-                ('state', '=', 'sale'),
-                ('date_completed', '>=', start_date.strftime('%Y-%m-%d %H:%M:%S')),
-                ('date_completed', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S'))
-            ])
-            
-            if not all_orders:
-                return {'segmented': False, 'cohorts': []}
-                
-            # Import libraries
-            from collections import defaultdict
-            from dateutil.relativedelta import relativedelta
-            
-            # Tentukan interval dalam bulan berdasarkan tipe yang dipilih
-            interval_months = {
-                'monthly': 1,
-                '3_month': 3,
-                '6_month': 6,
-                '12_month': 12
-            }.get(interval_type, 1)
-            
-            # Tentukan window toleransi (seberapa jauh dari tanggal ekspektasi servis berikutnya)
-            # Misal: Untuk interval 3 bulan, berikan window 1 bulan (sebulan sebelum dan sesudah)
-            window_months = max(1, interval_months // 3)
-            
-            # Dictionary untuk menyimpan semua order per pelanggan dan tanggal 
-            customer_orders = defaultdict(list)
-            # Dictionary untuk menyimpan mobil yang dimiliki pelanggan
-            customer_cars = defaultdict(set)
-            # Dictionary untuk menyimpan order pertama per pelanggan
-            first_orders = {}
-            # Dictionary untuk track bulan pertama servis per cohort
-            cohort_first_months = defaultdict(list)
-            
-            # Proses semua order
-            for order in all_orders:
-                customer_id = order.partner_id.id
-                car_id = order.partner_car_id.id if order.partner_car_id else None
-                
-                if car_id:
-                    customer_cars[customer_id].add(car_id)
-                
-                # Simpan order dengan data lengkap
-                customer_orders[customer_id].append({
-                    'id': order.id,
-                    'date': order.date_completed,
-                    'car_id': car_id,
-                    'car_brand': order.partner_car_brand.name if order.partner_car_brand else None,
-                    'service_category': order.service_category,
-                    'service_subcategory': order.service_subcategory,
-                    'service_advisor': order.service_advisor_id[0].name if order.service_advisor_id else None,
-                    'customer_rating': order.customer_rating,
-                    'is_booking': order.is_booking,
-                    'is_willing_to_feedback': order.is_willing_to_feedback,
-                    'revenue': order.amount_total,
-                    'order': order
-                })
-            
-            # Urutkan order untuk setiap pelanggan berdasarkan tanggal
-            for customer_id, orders in customer_orders.items():
-                orders.sort(key=lambda o: o['date'])
-                
-                # Catat order pertama untuk setiap pelanggan
-                if orders:
-                    first_orders[customer_id] = orders[0]
-                    
-                    # Tentukan bulan cohort berdasarkan tanggal order pertama
-                    first_date = orders[0]['date']
-                    # Format cohort berdasarkan interval
-                    if interval_type == 'monthly':
-                        cohort_key = first_date.strftime('%Y-%m')  # YYYY-MM
-                    elif interval_type == '3_month':
-                        # Quarter (Q1, Q2, Q3, Q4)
-                        quarter = ((first_date.month - 1) // 3) + 1
-                        cohort_key = f"{first_date.year}-Q{quarter}"
-                    elif interval_type == '6_month':
-                        # Semester (S1, S2)
-                        semester = ((first_date.month - 1) // 6) + 1
-                        cohort_key = f"{first_date.year}-S{semester}"
-                    else:  # 12_month
-                        cohort_key = f"{first_date.year}"
-                    
-                    # Tambahkan ke cohort yang sesuai
-                    cohort_first_months[cohort_key].append({
-                        'customer_id': customer_id,
-                        'first_date': first_date,
-                        'order': orders[0]
-                    })
-            
-            # Jika ada segmentasi, proses data segmentasi
-            segment_data = {}
-            if segment_by:
-                # Inisialisasi segment data
-                for customer_info in first_orders.values():
-                    # Tentukan nilai segment berdasarkan parameter segment_by
-                    if segment_by == 'car_brand':
-                        segment_value = customer_info['car_brand'] or 'Unknown'
-                    elif segment_by == 'service_category':
-                        segment_value = dict(all_orders._fields['service_category'].selection).get(
-                            customer_info['service_category'], 'Unknown')
-                    elif segment_by == 'service_advisor':
-                        segment_value = customer_info['service_advisor'] or 'No Advisor'
-                    elif segment_by == 'customer_rating':
-                        segment_value = customer_info['customer_rating'] or 'No Rating'
-                    else:
-                        segment_value = 'Default'
-                    
-                    # Inisialisasi segment jika belum ada
-                    if segment_value not in segment_data:
-                        segment_data[segment_value] = {
-                            'cohorts': defaultdict(list),
-                            'retention_data': defaultdict(lambda: defaultdict(int))
-                        }
-                    
-                    # Tambahkan customer ke segment
-                    customer_id = customer_info['order']['partner_id'].id
-                    first_date = customer_info['date']
-                    
-                    # Tentukan cohort key seperti sebelumnya
-                    if interval_type == 'monthly':
-                        cohort_key = first_date.strftime('%Y-%m')
-                    elif interval_type == '3_month':
-                        quarter = ((first_date.month - 1) // 3) + 1
-                        cohort_key = f"{first_date.year}-Q{quarter}"
-                    elif interval_type == '6_month':
-                        semester = ((first_date.month - 1) // 6) + 1
-                        cohort_key = f"{first_date.year}-S{semester}"
-                    else:  # 12_month
-                        cohort_key = f"{first_date.year}"
-                    
-                    segment_data[segment_value]['cohorts'][cohort_key].append(customer_id)
-            
-            # Proses data retensi untuk setiap cohort
-            def process_cohort_retention(cohort_key, customer_infos, segment=None):
-                # Struktur untuk menyimpan data retensi cohort tertentu
-                retention_data = defaultdict(int)
-                cohort_size = len(customer_infos)
-                
-                # Untuk setiap pelanggan dalam cohort, cek retensi di interval berikutnya
-                for customer_info in customer_infos:
-                    customer_id = customer_info['customer_id']
-                    first_date = customer_info['first_date']
-                    
-                    # Dapatkan semua order untuk pelanggan ini
-                    orders = customer_orders[customer_id]
-                    
-                    # Untuk setiap interval berikutnya, cek apakah ada servis
-                    for interval in range(depth + 1):  # +1 karena kita ingin termasuk interval 0 (awal)
-                        # Interval 0 selalu 100% (semua pelanggan ada di bulan pertama)
-                        if interval == 0:
-                            retention_data[0] += 1
-                            continue
-                        
-                        # Hitung tanggal ekspektasi untuk interval ini
-                        expected_date = first_date + relativedelta(months=interval * interval_months)
-                        
-                        # Tentukan window toleransi
-                        window_start = expected_date - relativedelta(months=window_months)
-                        window_end = expected_date + relativedelta(months=window_months)
-                        
-                        # Cek apakah ada servis dalam window
-                        has_service = False
-                        for order in orders:
-                            if window_start <= order['date'] <= window_end:
-                                # Jika pelanggan servis dalam window, tandai sebagai retensi
-                                has_service = True
-                                break
-                        
-                        if has_service:
-                            retention_data[interval] += 1
-                
-                # Hitung persentase retensi
-                retention_percent = {}
-                for interval, count in retention_data.items():
-                    retention_percent[interval] = round((count / cohort_size * 100) if cohort_size else 0, 1)
-                
-                # Format data untuk output
-                result = {
-                    'cohort': cohort_key,
-                    'cohort_display': format_cohort_display(cohort_key, interval_type),
-                    'total_customers': cohort_size,
-                }
-                
-                # Tambahkan persentase retensi untuk setiap interval
-                for interval in range(depth + 1):
-                    result[f'month{interval}'] = retention_percent.get(interval, 0)
-                
-                # Jika segment ditentukan
-                if segment:
-                    result['segment'] = segment
-                
-                # Jika metrics diminta, tambahkan metrik lainnya
-                if include_metrics:
-                    # Ambil semua order untuk cohort ini
-                    all_cohort_orders = []
-                    for customer_info in customer_infos:
-                        all_cohort_orders.extend([o['order'] for o in customer_orders[customer_info['customer_id']]])
-                    
-                    # Hitung metrik tambahan
-                    if all_cohort_orders:
-                        # Average rating
-                        ratings = [float(o.customer_rating) for o in all_cohort_orders 
-                                if o.customer_rating and o.customer_rating.isdigit()]
-                        avg_rating = sum(ratings) / len(ratings) if ratings else 0
-                        
-                        # Booking rate
-                        booking_count = sum(1 for o in all_cohort_orders if o.is_booking)
-                        booking_rate = (booking_count / len(all_cohort_orders) * 100)
-                        
-                        # Feedback rate
-                        feedback_count = sum(1 for o in all_cohort_orders if o.is_willing_to_feedback == 'yes')
-                        feedback_rate = (feedback_count / len(all_cohort_orders) * 100)
-                        
-                        # Total revenue
-                        total_revenue = sum(o.amount_total for o in all_cohort_orders)
-                        
-                        # Cars per customer
-                        cars_per_customer = sum(len(customer_cars[info['customer_id']]) 
-                                                for info in customer_infos) / cohort_size
-                        
-                        # Tambahkan metrik ke result
-                        result.update({
-                            'avg_rating': round(avg_rating, 1),
-                            'booking_rate': round(booking_rate, 1),
-                            'feedback_rate': round(feedback_rate, 1),
-                            'total_revenue': round(total_revenue, 2),
-                            'cars_per_customer': round(cars_per_customer, 1)
-                        })
-                
-                return result
-            
-            # Helper untuk format cohort display
-            def format_cohort_display(cohort_key, interval_type):
-                """Format cohort key menjadi tampilan yang lebih user friendly"""
-                if interval_type == 'monthly':
-                    # YYYY-MM format to Month Year (e.g., Jan 2023)
-                    try:
-                        year, month = cohort_key.split('-')
-                        return datetime(int(year), int(month), 1).strftime('%b %Y')
-                    except:
-                        return cohort_key
-                elif interval_type == '3_month':
-                    # YYYY-Q# format to Q# YYYY (e.g., Q1 2023)
-                    try:
-                        year, quarter = cohort_key.split('-')
-                        return f"{quarter} {year}"
-                    except:
-                        return cohort_key
-                elif interval_type == '6_month':
-                    # YYYY-S# format to H# YYYY (e.g., H1 2023)
-                    try:
-                        year, semester = cohort_key.split('-')
-                        return f"{semester} {year}"
-                    except:
-                        return cohort_key
-                else:  # yearly
-                    # YYYY format to Year YYYY (e.g., Year 2023)
-                    return f"Year {cohort_key}"
-            
-            # Proses hasil akhir
-            if segment_by:
-                # Result dengan segmentasi
-                segment_result = {}
-                
-                for segment_value, data in segment_data.items():
-                    segment_cohorts = []
-                    
-                    for cohort_key, customer_ids in data['cohorts'].items():
-                        # Dapatkan info pelanggan untuk cohort ini
-                        customer_infos = [
-                            {'customer_id': cust_id, 'first_date': first_orders[cust_id]['date']}
-                            for cust_id in customer_ids if cust_id in first_orders
-                        ]
-                        
-                        if customer_infos:
-                            # Proses data retensi untuk segment dan cohort ini
-                            cohort_data = process_cohort_retention(
-                                cohort_key, customer_infos, segment_value
-                            )
-                            segment_cohorts.append(cohort_data)
-                    
-                    # Sort cohorts dalam segment dan simpan
-                    if segment_cohorts:
-                        segment_cohorts.sort(key=lambda x: x['cohort'], reverse=True)
-                        segment_result[segment_value] = segment_cohorts
-                
-                return {
-                    'segmented': True,
-                    'segment_by': segment_by,
-                    'interval_type': interval_type,
-                    'segments': segment_result
-                }
-                
-            else:
-                # Result tanpa segmentasi
-                formatted_cohorts = []
-                
-                for cohort_key, customer_infos in cohort_first_months.items():
-                    cohort_data = process_cohort_retention(cohort_key, customer_infos)
-                    formatted_cohorts.append(cohort_data)
-                
-                # Sort cohorts
-                formatted_cohorts.sort(key=lambda x: x['cohort'], reverse=True)
-                
-                return {
-                    'segmented': False,
-                    'interval_type': interval_type,
-                    'cohorts': formatted_cohorts
-                }
+            result = request.env['pitcar.customer.cohort'].sudo().compute_service_cohorts(
+                start_date, end_date, interval_type=interval_type, depth=depth,
+                segment_by=segment_by, include_metrics=include_metrics
+            )
+            return result or {'segmented': False, 'cohorts': []}
                 
         except Exception as e:
             _logger.error(f"Error in calculate_auto_service_cohorts: {str(e)}")
@@ -7,6 +7,8 @@ from odoo import http, _, fields
 from odoo.http import request, Response
 import pytz
 import re
+from odoo.addons.pitcar_custom.models.diagnostics import request_trace_logger
+from odoo.addons.pitcar_custom.models.kpi_engine import KPIBatchLoader
 
 _logger = logging.getLogger(__name__)
 
@@ -207,12 +209,147 @@ class KPIOverview(http.Controller):
             _logger.error(f"Error in update_kpi_value: {str(e)}")
             return {'status': 'error', 'message': str(e)}
         
+    @http.route('/web/v2/kpi/batch', type='json', auth='user', methods=['POST'], csrf=False)
+    def get_batch_kpi(self, **kw):
+        """
+        Get KPI scores for every employee of a department in one request.
+
+        Mekanik reguler dihitung sekaligus lewat pitcar.kpi.engine (query agregat
+        per model untuk seluruh mekanik). Posisi lain (leader, head store, CS)
+        memakai perhitungan per employee yang sudah ada dengan satu
+        KPIBatchLoader bersama, sehingga tiap search dijalankan sekali untuk
+        seluruh cakupan departemen lalu dibagi per employee di memori.
+        """
+        kpi_log = request_trace_logger(request, 'kpi')
+        try:
+            kpi_log.debug("Received kw: %s", kw)
+            department_id = kw.get('department_id')
+            if not department_id:
+                return {'status': 'error', 'message': 'Department ID is required'}
+
+            current_date = datetime.now()
+            month = int(kw.get('month', current_date.month))
+            year = int(kw.get('year', current_date.year))
+
+            if not (1 <= month <= 12):
+                return {'status': 'error', 'message': 'Month must be between 1 and 12'}
+
+            if year < 2000 or year > 2100:
+                return {'status': 'error', 'message': 'Invalid year'}
+
+            department = request.env['hr.department'].sudo().browse(int(department_id))
+            if not department.exists():
+                return {'status': 'error', 'message': 'Department not found'}
+
+            employees = request.env['hr.employee'].sudo().search([
+                ('department_id', '=', department.id)
+            ])
+
+            mechanics = request.env['pitcar.mechanic.new'].sudo().search([
+                ('employee_id', 'in', employees.ids)
+            ])
+            mechanic_by_employee = {}
+            for mechanic in mechanics:
+                mechanic_by_employee.setdefault(mechanic.employee_id.id, mechanic)
+
+            kpi_engine = request.env['pitcar.kpi.engine'].sudo()
+
+            # Kelompokkan employee: mekanik reguler (batch) vs posisi lain (per employee)
+            job_titles = {
+                employee.id: kpi_engine.get_mechanic_job_title(employee, mechanic_by_employee.get(employee.id))
+                for employee in employees
+            }
+            batch_mechanics = kpi_engine.filter_regular_mechanics(
+                request.env['pitcar.mechanic.new'].sudo().concat(*mechanic_by_employee.values())
+            )
+
+            kpi_context = kpi_engine.build_mechanic_context(batch_mechanics, month, year)
+            batch = KPIBatchLoader(request.env, kpi_engine.get_batch_scope(employees))
+
+            results = []
+            for employee in employees:
+                mechanic = mechanic_by_employee.get(employee.id)
+                if mechanic and mechanic in batch_mechanics:
+                    kpi_scores = kpi_engine.evaluate_mechanic_kpis(
+                        self._get_mechanic_kpi_template(), kpi_context, mechanic
+                    )
+                    results.append({
+                        'employee': {
+                            'id': employee.id,
+                            'name': employee.name,
+                            'position': job_titles[employee.id],
+                            'department': department.name
+                        },
+                        'kpi_scores': kpi_scores,
+                        'summary': kpi_engine.summarize_kpi_scores(kpi_scores)
+                    })
+                    continue
+
+                params = {'employee_id': employee.id, 'month': month, 'year': year}
+                job_title = job_titles[employee.id]
+                if mechanic or kpi_engine.is_head_store_title(job_title):
+                    response = self._compute_mechanic_kpi(params, batch=batch)
+                else:
+                    response = self._compute_customer_support_kpi(params, batch=batch)
+
+                if response.get('status') != 'success':
+                    results.append({
+                        'employee': {
+                            'id': employee.id,
+                            'name': employee.name,
+                            'position': job_title,
+                            'department': department.name
+                        },
+                        'error': response.get('message')
+                    })
+                    continue
+
+                data = response['data']
+                results.append({
+                    'employee': data['employee'],
+                    'kpi_scores': data['kpi_scores'],
+                    'summary': data['summary']
+                })
+
+            kpi_log.debug(
+                "Batch KPI department %s (%s/%s): %s employees, %s via engine, %s shared searches",
+                department.id, month, year, len(employees), len(batch_mechanics), batch.search_count
+            )
+            return {
+                'status': 'success',
+                'data': {
+                    'department': {
+                        'id': department.id,
+                        'name': department.name
+                    },
+                    'period': {
+                        'month': month,
+                        'year': year
+                    },
+                    'employees': results
+                }
+            }
+
+        except Exception as e:
+            kpi_log.error("Error in get_batch_kpi: %s", e)
+            return {'status': 'error', 'message': str(e)}
+
     @http.route('/web/v2/kpi/customer-support', type='json', auth='user', methods=['POST'], csrf=False)
     def get_customer_support_kpi(self, **kw):
         """Get KPI data for Customer Support Department"""
+        return self._compute_customer_support_kpi(kw)
+
+    def _compute_customer_support_kpi(self, kw, batch=None):
+        """
+        Perhitungan KPI Customer Support untuk satu employee.
+
+        Semua search dilewatkan ke KPIBatchLoader; get_batch_kpi memberikan
+        loader bersama agar search per departemen hanya dijalankan sekali.
+        """
+        batch = batch or KPIBatchLoader(request.env)
         try:
-            # Debug log input parameters
-            _logger.info(f"Received kw: {kw}")
+            kpi_log = request_trace_logger(request, 'kpi')
+            kpi_log.debug("Received kw: %s", kw)
 
             # Extract dan validasi parameter 
             employee_id = kw.get('employee_id')
@@ -260,11 +397,10 @@ class KPIOverview(http.Controller):
 
 
             # Get stored KPI details
-            kpi_details = request.env['cs.kpi.detail'].sudo().search([
-                ('employee_id', '=', employee_id),
+            kpi_details = batch.search_for('cs.kpi.detail', [
                 ('period_month', '=', month),
                 ('period_year', '=', year)
-            ])
+            ], 'employee_id', [employee_id])
             
             # Create map of stored values
             kpi_values = {
@@ -785,12 +921,11 @@ class KPIOverview(http.Controller):
                     
                     if kpi['type'] == 'online_response':
                         # Ambil data dari cs.chat.sampling
-                        chat_sampling = request.env['cs.chat.sampling'].sudo().search([
-                            ('cs_id', '=', employee.id),
+                        chat_sampling = batch.search_for('cs.chat.sampling', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
                             ('state', '=', 'done')
-                        ])
+                        ], 'cs_id', [employee.id])
                         if chat_sampling:
                             responses = sum(chat_sampling.mapped('responded_ontime'))
                             total_chats = sum(chat_sampling.mapped('total_chats'))
@@ -799,12 +934,11 @@ class KPIOverview(http.Controller):
                         
                     elif kpi['type'] == 'leads_report':
                         # Ambil data dari cs.leads.verification
-                        leads_checks = request.env['cs.leads.verification'].sudo().search([
-                            ('cs_id', '=', employee.id),
+                        leads_checks = batch.search_for('cs.leads.verification', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
                             ('state', '=', 'done')
-                        ])
+                        ], 'cs_id', [employee.id])
                         if leads_checks:
                             # Berdasarkan model, accuracy_rate sudah dihitung di level record
                             total_checks = len(leads_checks)
@@ -826,12 +960,11 @@ class KPIOverview(http.Controller):
                         
                     elif kpi['type'] == 'customer_contact':
                         # Ambil data dari cs.contact.monitoring
-                        contact_checks = request.env['cs.contact.monitoring'].sudo().search([
-                            ('cs_id', '=', employee.id),
+                        contact_checks = batch.search_for('cs.contact.monitoring', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
                             ('state', '=', 'done')
-                        ])
+                        ], 'cs_id', [employee.id])
                         if contact_checks:
                             total_customers = sum(contact_checks.mapped('total_customers'))
                             contacts_saved = sum(contact_checks.mapped('contacts_saved'))
@@ -851,7 +984,7 @@ class KPIOverview(http.Controller):
                             ('next_follow_up_3_months', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('state', 'in', ['sale', 'done'])
                         ]
-                        due_reminders = request.env['sale.order'].sudo().search(reminder_domain)
+                        due_reminders = batch.search('sale.order', reminder_domain)
                         completed_reminders = due_reminders.filtered(lambda o: o.reminder_3_months == 'yes')
                         total_due = len(due_reminders)
                         actual = (len(completed_reminders) / total_due * 100) if total_due else 0
@@ -859,19 +992,18 @@ class KPIOverview(http.Controller):
                         
                     elif kpi['type'] == 'finance_check':
                         # Ambil data dari cs.finance.check
-                        finance_checks = request.env['cs.finance.check'].sudo().search([
-                            ('cs_id', '=', employee.id),
+                        finance_checks = batch.search_for('cs.finance.check', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
                             ('state', '=', 'done')
-                        ])
+                        ], 'cs_id', [employee.id])
                         if finance_checks:
                             actual = sum(finance_checks.mapped('completeness_rate')) / len(finance_checks)
                             kpi['measurement'] = f"Rata-rata kelengkapan verifikasi: {actual:.1f}%"
                         
                     elif kpi['type'] == 'customer_satisfaction':
                         # Define period_orders first
-                        period_orders = request.env['sale.order'].sudo().search([
+                        period_orders = batch.search('sale.order', [
                             ('date_completed', '>=', start_date.strftime('%Y-%m-%d')),
                             ('date_completed', '<=', end_date.strftime('%Y-%m-%d')),
                             ('state', 'in', ['sale', 'done'])
@@ -902,28 +1034,25 @@ class KPIOverview(http.Controller):
                     elif kpi['type'] == 'sop_compliance':
                         # Filter berdasarkan nomor KPI untuk membedakan Leader vs Kaizen
                         if kpi['no'] == 7:  # Sampel dari Leader
-                            samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                            samplings = batch.search_for('pitcar.sop.sampling', [
                                 ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                                 ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                                ('cs_id', 'in', [employee.id]),
                                 ('state', '=', 'done'),
                                 ('sampling_type', '=', 'lead')  # Filter untuk sampel dari Leader
-                            ])
+                            ], 'cs_id', [employee.id])
                         elif kpi['no'] == 8:  # Sampel dari Kaizen
-                            samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                            samplings = batch.search_for('pitcar.sop.sampling', [
                                 ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                                 ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                                ('cs_id', 'in', [employee.id]),
                                 ('state', '=', 'done'),
                                 ('sampling_type', '=', 'kaizen')  # Filter untuk sampel dari Kaizen
-                            ])
+                            ], 'cs_id', [employee.id])
                         else:
-                            samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                            samplings = batch.search_for('pitcar.sop.sampling', [
                                 ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                                 ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                                ('cs_id', 'in', [employee.id]),
                                 ('state', '=', 'done')
-                            ])
+                            ], 'cs_id', [employee.id])
                             
                         total_samples = len(samplings)
                         passed_samples = len(samplings.filtered(lambda s: s.result == 'pass'))
@@ -938,11 +1067,10 @@ class KPIOverview(http.Controller):
                             kpi['measurement'] = f"Sesuai SOP: {passed_samples} dari {total_samples} sampel"
 
                     elif kpi['type'] == 'discipline':
-                        attendances = request.env['hr.attendance'].sudo().search([
+                        attendances = batch.search_for('hr.attendance', [
                             ('check_in', '>=', start_date.strftime('%Y-%m-%d %H:%M:%S')),
-                            ('check_in', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S')),
-                            ('employee_id', '=', employee.id)
-                        ])
+                            ('check_in', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S'))
+                        ], 'employee_id', [employee.id])
                         late_count = sum(1 for att in attendances if att.is_late)
                         actual = ((len(attendances) - late_count) / len(attendances) * 100) if attendances else 0
                         kpi['measurement'] = f"Total kehadiran: {len(attendances)}, Terlambat: {late_count}, Tepat waktu: {len(attendances) - late_count}"
@@ -973,14 +1101,10 @@ class KPIOverview(http.Controller):
 
             # Handle Lead Customer Support
             elif 'Lead Customer Support' in job_title:
-                team_members = request.env['hr.employee'].sudo().search([
-                    ('parent_id', '=', employee.id)
-                ])
+                team_members = batch.search_for('hr.employee', [], 'parent_id', [employee.id])
                 
-                team_sa = request.env['pitcar.service.advisor'].sudo().search([
-                    ('user_id', 'in', team_members.mapped('user_id').ids)
-                ])
-                all_orders = request.env['sale.order'].sudo().search(base_domain)
+                team_sa = batch.search_for('pitcar.service.advisor', [], 'user_id', team_members.mapped('user_id').ids)
+                all_orders = batch.search('sale.order', base_domain)
                 
                 # Calculate team metrics
                 non_compliant_orders = all_orders.filtered(
@@ -1093,12 +1217,11 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'customer_satisfaction':
                         # Filter orders berdasarkan periode yang dipilih
-                        period_orders = request.env['sale.order'].sudo().search([
+                        period_orders = batch.search_for('sale.order', [
                             ('date_completed', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('date_completed', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
-                            ('state', 'in', ['sale', 'done']),
-                            ('service_advisor_id', 'in', team_sa.ids)  # Untuk memastikan hanya order dari tim SA yang dihitung
-                        ])
+                            ('state', 'in', ['sale', 'done'])
+                        ], 'service_advisor_id', team_sa.ids)
                         
                         # Ambil order yang memiliki detailed_ratings dan service_rating
                         rated_orders = period_orders.filtered(lambda o: o.detailed_ratings and 'service_rating' in o.detailed_ratings)
@@ -1158,18 +1281,15 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'team_control' and kpi['no'] == 6:
                         # Get service advisors for team members
-                        team_sa = request.env['pitcar.service.advisor'].sudo().search([
-                            ('user_id', 'in', team_members.mapped('user_id').ids)
-                        ])
+                        team_sa = batch.search_for('pitcar.service.advisor', [], 'user_id', team_members.mapped('user_id').ids)
                         
                         # Get all SOP samplings for the team's service advisors (Lead)
-                        sa_samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        sa_samplings = batch.search_for('pitcar.sop.sampling', [
                             ('sale_order_id', 'in', all_orders.ids),
                             ('sop_id.is_sa', '=', True),  # Only SA-related SOPs
-                            ('sa_id', 'in', team_sa.ids),  # Using service advisor IDs
                             ('state', '=', 'done'),  # Only count completed samplings
                             ('sampling_type', '=', 'lead')  # Filter untuk sampel dari Leader
-                        ])
+                        ], 'sa_id', team_sa.ids)
                         
                         # Count total SA samplings and violations
                         total_samplings = len(sa_samplings)
@@ -1186,18 +1306,15 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'team_control' and kpi['no'] == 7:
                         # Get service advisors for team members
-                        team_sa = request.env['pitcar.service.advisor'].sudo().search([
-                            ('user_id', 'in', team_members.mapped('user_id').ids)
-                        ])
+                        team_sa = batch.search_for('pitcar.service.advisor', [], 'user_id', team_members.mapped('user_id').ids)
                         
                         # Get all SOP samplings for the team's service advisors (Kaizen)
-                        sa_samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        sa_samplings = batch.search_for('pitcar.sop.sampling', [
                             ('sale_order_id', 'in', all_orders.ids),
                             ('sop_id.is_sa', '=', True),  # Only SA-related SOPs
-                            ('sa_id', 'in', team_sa.ids),  # Using service advisor IDs
                             ('state', '=', 'done'),  # Only count completed samplings
                             ('sampling_type', '=', 'kaizen')  # Filter untuk sampel dari Kaizen
-                        ])
+                        ], 'sa_id', team_sa.ids)
                         
                         # Count total SA samplings and violations
                         total_samplings = len(sa_samplings)
@@ -1214,11 +1331,10 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'team_discipline':
                         # Otomatis ambil data kedisiplinan tim dari sistem
-                        team_attendances = request.env['hr.attendance'].sudo().search([
+                        team_attendances = batch.search_for('hr.attendance', [
                             ('check_in', '>=', start_date.strftime('%Y-%m-%d %H:%M:%S')),
-                            ('check_in', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S')),
-                            ('employee_id', 'in', team_members.ids + [employee.id])
-                        ])
+                            ('check_in', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S'))
+                        ], 'employee_id', team_members.ids + [employee.id])
                         late_count = sum(1 for att in team_attendances if att.is_late)
                         actual = ((len(team_attendances) - late_count) / len(team_attendances) * 100) if team_attendances else 0
                         measurement = f"Total kehadiran tim: {len(team_attendances)}, Terlambat: {late_count}, Tepat waktu: {len(team_attendances) - late_count}"
@@ -1245,17 +1361,14 @@ class KPIOverview(http.Controller):
 
             # Handle Service Advisor
             elif 'Service Advisor' in job_title:
-                service_advisor = request.env['pitcar.service.advisor'].sudo().search([
-                    ('user_id', '=', employee.user_id.id)
-                ], limit=1)
+                service_advisor = batch.search_for(
+                    'pitcar.service.advisor', [], 'user_id', [employee.user_id.id]
+                )[:1]
 
                 if not service_advisor:
                     return {'status': 'error', 'message': 'Service Advisor record not found'}
 
-                orders = request.env['sale.order'].sudo().search([
-                    *base_domain,
-                    ('service_advisor_id', 'in', [service_advisor.id])
-                ])
+                orders = batch.search_for('sale.order', base_domain, 'service_advisor_id', [service_advisor.id])
 
                 total_orders = len(orders)
                 complaints = len(orders.filtered(lambda o: o.customer_rating in ['1', '2']))
@@ -1320,12 +1433,11 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'customer_satisfaction':
                         # Filter orders berdasarkan periode yang dipilih
-                        period_orders = request.env['sale.order'].sudo().search([
+                        period_orders = batch.search_for('sale.order', [
                             ('date_completed', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('date_completed', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
-                            ('state', 'in', ['sale', 'done']),
-                            ('service_advisor_id', '=', service_advisor.id)  # Hanya order dari SA yang bersangkutan
-                        ])
+                            ('state', 'in', ['sale', 'done'])
+                        ], 'service_advisor_id', [service_advisor.id])
                         
                         rated_orders = period_orders.filtered(lambda o: o.detailed_ratings and 'service_rating' in o.detailed_ratings)
                         total_rated_orders = len(rated_orders)
@@ -1374,14 +1486,13 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'sop_compliance_lead':
                         # Ambil samplings untuk SA dari periode yang dipilih dengan sampling_type = 'lead'
-                        sa_samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        sa_samplings = batch.search_for('pitcar.sop.sampling', [
                             ('date', '>=', start_date.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date.strftime('%Y-%m-%d')),
                             ('sop_id.is_sa', '=', True),  # Hanya SOP untuk SA
-                            ('sa_id', 'in', [service_advisor.id]),  # Hanya untuk SA yang bersangkutan
                             ('state', '=', 'done'),  # Hanya sampling yang sudah selesai
                             ('sampling_type', '=', 'lead')  # Filter untuk sampel dari Leader
-                        ])
+                        ], 'sa_id', [service_advisor.id])
                         
                         total_samplings = len(sa_samplings)
                         sop_violations = len(sa_samplings.filtered(lambda s: s.result == 'fail'))
@@ -1395,14 +1506,13 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'sop_compliance_kaizen':
                         # Ambil samplings untuk SA dari periode yang dipilih dengan sampling_type = 'kaizen'
-                        sa_samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        sa_samplings = batch.search_for('pitcar.sop.sampling', [
                             ('date', '>=', start_date.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date.strftime('%Y-%m-%d')),
                             ('sop_id.is_sa', '=', True),  # Hanya SOP untuk SA
-                            ('sa_id', 'in', [service_advisor.id]),  # Hanya untuk SA yang bersangkutan
                             ('state', '=', 'done'),  # Hanya sampling yang sudah selesai
                             ('sampling_type', '=', 'kaizen')  # Filter untuk sampel dari Kaizen
-                        ])
+                        ], 'sa_id', [service_advisor.id])
                         
                         # Hitung total sampling dan pelanggaran
                         total_samplings = len(sa_samplings)
@@ -1419,11 +1529,10 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'discipline':
                         # Data kedisiplinan
-                        attendances = request.env['hr.attendance'].sudo().search([
+                        attendances = batch.search_for('hr.attendance', [
                             ('check_in', '>=', start_date.strftime('%Y-%m-%d %H:%M:%S')),
-                            ('check_in', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S')),
-                            ('employee_id', '=', employee.id)
-                        ])
+                            ('check_in', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S'))
+                        ], 'employee_id', [employee.id])
                         late_count = sum(1 for att in attendances if att.is_late)
                         actual = ((len(attendances) - late_count) / len(attendances) * 100) if attendances else 0
                         kpi['measurement'] = f"Total kehadiran: {len(attendances)}, Terlambat: {late_count}, Tepat waktu: {len(attendances) - late_count}"
@@ -1455,12 +1564,11 @@ class KPIOverview(http.Controller):
                     actual = 0
                     if kpi['type'] == 'front_office':
                         # Get daily checks data
-                        front_office_checks = request.env['pitcar.front.office.check'].sudo().search([
+                        front_office_checks = batch.search_for('pitcar.front.office.check', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                            ('valet_id', '=', employee.id),
                             ('state', '=', 'done')
-                        ])
+                        ], 'valet_id', [employee.id])
 
                         total_checks = len(front_office_checks)
                         if total_checks > 0:
@@ -1476,13 +1584,12 @@ class KPIOverview(http.Controller):
                             kpi['measurement'] = f"Belum ada pengecekan pada periode {month}/{year}"
 
                     elif kpi['type'] == 'valet_sop_lead':
-                        samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        samplings = batch.search_for('pitcar.sop.sampling', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                            ('valet_id', 'in', [employee.id]),
                             ('state', '=', 'done'),
                             ('sampling_type', '=', 'lead')  # Filter untuk sampel dari Leader
-                        ])
+                        ], 'valet_id', [employee.id])
                         
                         total_samplings = len(samplings)
                         if total_samplings > 0:
@@ -1494,13 +1601,12 @@ class KPIOverview(http.Controller):
                             kpi['measurement'] = f"Belum ada sampling SOP (Leader) pada periode {month}/{year}"
 
                     elif kpi['type'] == 'valet_sop_kaizen':
-                        samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        samplings = batch.search_for('pitcar.sop.sampling', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                            ('valet_id', 'in', [employee.id]),
                             ('state', '=', 'done'),
                             ('sampling_type', '=', 'kaizen')  # Filter untuk sampel dari Kaizen
-                        ])
+                        ], 'valet_id', [employee.id])
                         
                         total_samplings = len(samplings)
                         if total_samplings > 0:
@@ -1531,7 +1637,7 @@ class KPIOverview(http.Controller):
                                 kpi['measurement'] = f"Belum ada sampling SOP (Kaizen) pada periode {month}/{year}"
                             
                     elif kpi['type'] == 'customer_satisfaction':
-                        period_orders = request.env['sale.order'].sudo().search([
+                        period_orders = batch.search('sale.order', [
                             ('date_completed', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('date_completed', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('state', 'in', ['sale', 'done'])
@@ -1585,7 +1691,7 @@ class KPIOverview(http.Controller):
                 for kpi in admin_part_template:
                     actual = 0
                     if kpi['type'] == 'part_fulfillment':
-                        part_items = request.env['sale.order.part.item'].sudo().search([
+                        part_items = batch.search('sale.order.part.item', [
                             ('create_date', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('create_date', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S'))
                         ])
@@ -1595,7 +1701,7 @@ class KPIOverview(http.Controller):
                         kpi['measurement'] = f'Total request: {total_items}, Terpenuhi: {fulfilled_items}'
 
                     elif kpi['type'] == 'part_response':
-                        part_items = request.env['sale.order.part.item'].sudo().search([
+                        part_items = batch.search('sale.order.part.item', [
                             ('create_date', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('create_date', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('response_time', '!=', False)
@@ -1608,7 +1714,7 @@ class KPIOverview(http.Controller):
                         kpi['measurement'] = f'Total response: {total_responses}, Tepat waktu: {on_time_responses}'
 
                     elif kpi['type'] == 'part_availability':
-                        stockouts = request.env['stock.mandatory.stockout'].sudo().search([
+                        stockouts = batch.search('stock.mandatory.stockout', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d'))
                         ])
@@ -1619,7 +1725,7 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] in ['part_audit', 'tools_audit']:
                         audit_type = 'part' if kpi['type'] == 'part_audit' else 'tool'
-                        audit_entries = request.env['account.move'].sudo().search([
+                        audit_entries = batch.search('account.move', [
                             ('is_stock_audit', '=', True),
                             ('audit_type', '=', audit_type),
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
@@ -1634,26 +1740,24 @@ class KPIOverview(http.Controller):
                         kpi['measurement'] = f'Audit dalam toleransi: {within_tolerance} dari {total_audits}'
 
                     elif kpi['type'] == 'sop_compliance_lead':
-                        samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        samplings = batch.search_for('pitcar.sop.sampling', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                            ('part_support_id', 'in', [employee.id]),  # Asumsi ini field yang benar untuk Admin Part
                             ('state', '=', 'done'),
                             ('sampling_type', '=', 'lead')  # Filter untuk sampel dari Leader
-                        ])
+                        ], 'part_support_id', [employee.id])
                         total_samples = len(samplings)
                         passed_samples = len(samplings.filtered(lambda s: s.result == 'pass'))
                         actual = (passed_samples / total_samples * 100) if total_samples else 100
                         kpi['measurement'] = f'Sesuai SOP (Leader): {passed_samples} dari {total_samples} sampel'
 
                     elif kpi['type'] == 'sop_compliance_kaizen':
-                        samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        samplings = batch.search_for('pitcar.sop.sampling', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                            ('part_support_id', 'in', [employee.id]),  # Asumsi ini field yang benar untuk Admin Part
                             ('state', '=', 'done'),
                             ('sampling_type', '=', 'kaizen')  # Filter untuk sampel dari Kaizen
-                        ])
+                        ], 'part_support_id', [employee.id])
                         total_samples = len(samplings)
                         passed_samples = len(samplings.filtered(lambda s: s.result == 'pass'))
                         actual = (passed_samples / total_samples * 100) if total_samples else 100
@@ -1685,7 +1789,7 @@ class KPIOverview(http.Controller):
                     actual = 0
                     if kpi['type'] == 'part_fulfillment':
                         # Implementasi untuk part_fulfillment (bisa mengadopsi dari Admin Part)
-                        part_items = request.env['sale.order.part.item'].sudo().search([
+                        part_items = batch.search('sale.order.part.item', [
                             ('create_date', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('create_date', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S'))
                         ])
@@ -1696,7 +1800,7 @@ class KPIOverview(http.Controller):
                         
                     elif kpi['type'] == 'part_response':
                         # Implementasi untuk part_response (bisa mengadopsi dari Admin Part)
-                        part_items = request.env['sale.order.part.item'].sudo().search([
+                        part_items = batch.search('sale.order.part.item', [
                             ('create_date', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('create_date', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('response_time', '!=', False)
@@ -1709,20 +1813,19 @@ class KPIOverview(http.Controller):
                         kpi['measurement'] = f'Total response: {total_responses}, Tepat waktu: {on_time_responses}'
                         
                     elif kpi['type'] == 'part_purchase':
-                        purchases = request.env['part.purchase.leadtime'].sudo().search([
-                            ('partman_id', '=', employee.id),
+                        purchases = batch.search_for('part.purchase.leadtime', [
                             ('purchase_type', '=', 'part'),
                             ('state', '=', 'returned'),
                             ('return_time', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('return_time', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S'))
-                        ])
+                        ], 'partman_id', [employee.id])
                         total_purchases = len(purchases)
                         success_purchases = len(purchases.filtered(lambda p: p.actual_completeness >= 90))
                         actual = (success_purchases / total_purchases * 100) if total_purchases else 0
                         kpi['measurement'] = f"Belanja part sesuai: {success_purchases} dari {total_purchases} kali belanja"
 
                     elif kpi['type'] == 'part_audit':
-                        audit_entries = request.env['account.move'].sudo().search([
+                        audit_entries = batch.search('account.move', [
                             ('is_stock_audit', '=', True),
                             ('audit_type', '=', 'part'),
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
@@ -1737,26 +1840,24 @@ class KPIOverview(http.Controller):
                         kpi['measurement'] = f'Audit dalam toleransi: {within_tolerance} dari {total_audits}'
 
                     elif kpi['type'] == 'sop_compliance_lead':
-                        samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        samplings = batch.search_for('pitcar.sop.sampling', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                            ('part_support_id', 'in', [employee.id]),  # Perlu verifikasi field yang benar
                             ('state', '=', 'done'),
                             ('sampling_type', '=', 'lead')  # Filter untuk sampel dari Leader
-                        ])
+                        ], 'part_support_id', [employee.id])
                         total_samples = len(samplings)
                         passed_samples = len(samplings.filtered(lambda s: s.result == 'pass'))
                         actual = (passed_samples / total_samples * 100) if total_samples else 100
                         kpi['measurement'] = f'Sesuai SOP (Leader): {passed_samples} dari {total_samples} sampel'
 
                     elif kpi['type'] == 'sop_compliance_kaizen':
-                        samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        samplings = batch.search_for('pitcar.sop.sampling', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                            ('part_support_id', 'in', [employee.id]),  # Perlu verifikasi field yang benar
                             ('state', '=', 'done'),
                             ('sampling_type', '=', 'kaizen')  # Filter untuk sampel dari Kaizen
-                        ])
+                        ], 'part_support_id', [employee.id])
                         total_samples = len(samplings)
                         passed_samples = len(samplings.filtered(lambda s: s.result == 'pass'))
                         actual = (passed_samples / total_samples * 100) if total_samples else 100
@@ -1787,13 +1888,12 @@ class KPIOverview(http.Controller):
                 for kpi in toolkeeper_template:
                     actual = 0
                     if kpi['type'] == 'part_purchase':
-                        purchases = request.env['part.purchase.leadtime'].sudo().search([
-                            ('partman_id', '=', employee.id),  # Asumsi menggunakan field partman_id
+                        purchases = batch.search_for('part.purchase.leadtime', [
                             ('purchase_type', '=', 'part'),
                             ('state', '=', 'returned'),
                             ('return_time', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('return_time', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S'))
-                        ])
+                        ], 'partman_id', [employee.id])
                         total_purchases = len(purchases)
                         success_purchases = len(purchases.filtered(lambda p: p.actual_completeness >= 90))
                         actual = (success_purchases / total_purchases * 100) if total_purchases else 0
@@ -1801,12 +1901,11 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'tool_purchase':
                         # Menggunakan model pitcar.tools untuk memeriksa pengadaan tools
-                        tools = request.env['pitcar.tools'].sudo().search([
-                            ('requester_id', '=', employee.id),
+                        tools = batch.search_for('pitcar.tools', [
                             ('state', 'in', ['purchased', 'in_use', 'broken', 'deprecated']),
                             ('purchase_date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('purchase_date', '<=', end_date_utc.strftime('%Y-%m-%d'))
-                        ])
+                        ], 'requester_id', [employee.id])
                         
                         # Hitung tools yang dibeli sesuai jadwal (dari requested ke purchased)
                         total_tools = len(tools)
@@ -1838,7 +1937,7 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'part_audit':
                         # Untuk poin 3: Tools digunakan sesuai kapabilitasnya
-                        tools = request.env['pitcar.tools'].sudo().search([
+                        tools = batch.search('pitcar.tools', [
                             ('state', 'in', ['broken', 'deprecated']),
                             ('broken_date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('broken_date', '<=', end_date_utc.strftime('%Y-%m-%d'))
@@ -1851,7 +1950,7 @@ class KPIOverview(http.Controller):
                         kpi['measurement'] = f"Tools sesuai umur: {tools_in_lifetime} dari {total_tools} tools"
 
                     elif kpi['type'] == 'tools_audit':
-                        audit_entries = request.env['account.move'].sudo().search([
+                        audit_entries = batch.search('account.move', [
                             ('is_stock_audit', '=', True),
                             ('audit_type', '=', 'tool'),
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
@@ -1866,751 +1965,35 @@ class KPIOverview(http.Controller):
                         kpi['measurement'] = f'Audit dalam toleransi: {within_tolerance} dari {total_audits}'
 
                     elif kpi['type'] == 'sop_compliance_lead':
-                        samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        samplings = batch.search_for('pitcar.sop.sampling', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                            ('part_support_id', 'in', [employee.id]),  # Sesuaikan dengan field yang benar
                             ('state', '=', 'done'),
                             ('sampling_type', '=', 'lead')  # Filter untuk sampel dari Leader
-                        ])
-                        total_samples = len(samplings)
-                        passed_samples = len(samplings.filtered(lambda s: s.result == 'pass'))
-                        actual = (passed_samples / total_samples * 100) if total_samples else 100
-                        kpi['measurement'] = f'Sesuai SOP (Leader): {passed_samples} dari {total_samples} sampel'
-
-                    elif kpi['type'] == 'sop_compliance_kaizen':
-                        samplings = request.env['pitcar.sop.sampling'].sudo().search([
-                            ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
-                            ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                            ('part_support_id', 'in', [employee.id]),  # Sesuaikan dengan field yang benar
-                            ('state', '=', 'done'),
-                            ('sampling_type', '=', 'kaizen')  # Filter untuk sampel dari Kaizen
-                        ])
-                        total_samples = len(samplings)
-                        passed_samples = len(samplings.filtered(lambda s: s.result == 'pass'))
-                        actual = (passed_samples / total_samples * 100) if total_samples else 100
-                        kpi['measurement'] = f'Sesuai SOP (Kaizen): {passed_samples} dari {total_samples} sampel'
-
-                    # Perhitungan baru: weighted_score langsung dari actual × weight/100
-                    weighted_score = actual * (kpi['weight'] / 100)
-                    
-                    # Set achievement sama dengan weighted_score untuk kompatibilitas frontend
-                    achievement = weighted_score
-
-                    kpi_scores.append({
-                        'no': kpi['no'],
-                        'name': kpi['name'],
-                        'type': kpi['type'],
-                        'weight': kpi['weight'],
-                        'target': kpi['target'],
-                        'measurement': kpi['measurement'],
-                        'actual': actual,
-                        'achievement': achievement,  # Sama dengan weighted_score
-                        'weighted_score': weighted_score,
-                        'editable': ['weight', 'target']
-                    })
-
-                # Calculate total score
-                total_weight = sum(kpi['weight'] for kpi in kpi_scores if kpi.get('include_in_calculation', True))
-                total_score = sum(kpi['weighted_score'] for kpi in kpi_scores if kpi.get('include_in_calculation', True))
-                avg_target = sum(kpi['target'] * kpi['weight'] for kpi in kpi_scores if kpi.get('include_in_calculation', True)) / total_weight if total_weight else 0
-
-            else:
-                return {'status': 'error', 'message': f'Invalid position: {job_title}'}
-
-            # Calculate total score and summary
-            total_weight = sum(kpi['weight'] for kpi in kpi_scores)
-            total_score = sum(kpi['weighted_score'] for kpi in kpi_scores)
-            avg_target = sum(kpi['target'] * kpi['weight'] for kpi in kpi_scores) / total_weight if total_weight else 0
-
-            # Validate total weight
-            if total_weight != 100:
-                _logger.warning(f"Total weight ({total_weight}) is not 100% for employee {employee.name}")
-
-            # Return response
-            return {
-                'status': 'success',
-                'data': {
-                    'employee': {
-                        'id': employee.id,
-                        'name': employee.name,
-                        'position': job_title,
-                        'department': employee.department_id.name
-                    },
-                    'period': {
-                        'month': month,
-                        'year': year
-                    },
-                    'kpi_scores': kpi_scores,
-                    'summary': {
-                        'total_weight': total_weight,
-                        'target': avg_target,
-                        'total_score': total_score,
-                        'achievement_status': 'Achieved' if total_score >= avg_target else 'Below Target'
-                    }
-                }
-            }
-
-        except Exception as e:
-            _logger.error(f"Error in get_customer_support_kpi: {str(e)}")
-            return {'status': 'error', 'message': str(e)}
-    
-    @http.route('/web/v2/kpi/mechanic', type='json', auth='user', methods=['POST'], csrf=False)
-    def get_mechanic_kpi(self, **kw):
-        """Get KPI data for Mechanic Department"""
-        try:
-            # Debug log input parameters
-            _logger.info(f"Received kw: {kw}")
-
-            # Extract and validate parameter 
-            employee_id = kw.get('employee_id')
-            if not employee_id:
-                return {'status': 'error', 'message': 'Employee ID is required'}
-
-            # Get and validate month/year
-            current_date = datetime.now()
-            month = int(kw.get('month', current_date.month))
-            year = int(kw.get('year', current_date.year))
-
-            # Validate range
-            if not (1 <= month <= 12):
-                return {'status': 'error', 'message': 'Month must be between 1 and 12'}
-                
-            if year < 2000 or year > 2100:
-                return {'status': 'error', 'message': 'Invalid year'}
-
-            # Get employee
-            employee = request.env['hr.employee'].sudo().browse(employee_id)
-            if not employee.exists():
-                return {'status': 'error', 'message': 'Employee not found'}
-
-            # Set timezone
-            tz = pytz.timezone('Asia/Jakarta')
-            
-            # Calculate date range in local timezone
-            local_start = datetime(year, month, 1)
-            if month == 12:
-                local_end = datetime(year + 1, 1, 1) - timedelta(days=1)
-            else:
-                local_end = datetime(year, month + 1, 1) - timedelta(days=1)
-                
-            # Set time components
-            local_start = local_start.replace(hour=0, minute=0, second=0)
-            local_end = local_end.replace(hour=23, minute=59, second=59)
-            
-            # Convert to timezone-aware datetime
-            start_date = tz.localize(local_start)
-            end_date = tz.localize(local_end)
-            
-            # Convert to UTC for database queries
-            start_date_utc = start_date.astimezone(pytz.UTC)
-            end_date_utc = end_date.astimezone(pytz.UTC)
-            
-            # Check if employee is Head Store directly from job title
-            job_title = employee.job_title if employee.job_title else "Unknown"
-            _logger.info(f"Employee job title: {job_title}")
-            
-            # Check for Head Store role
-            is_head_store = False
-            if job_title and ("Head Store" in job_title or "Kepala Bengkel" in job_title):
-                is_head_store = True
-                _logger.info(f"Employee {employee.name} identified as Head Store from job title: {job_title}")
-            
-            # Only try to get mechanic record if not Head Store
-            mechanic = None
-            if not is_head_store:
-                mechanic = request.env['pitcar.mechanic.new'].sudo().search([
-                    ('employee_id', '=', employee.id)
-                ], limit=1)
-                
-                if not mechanic:
-                    return {'status': 'error', 'message': 'Mechanic record not found'}
-                    
-                # Only update job_title if mechanic record exists and has position_id
-                if mechanic.position_id:
-                    job_title = mechanic.position_id.name
-            
-            
-
-            # Get stored KPI details
-            kpi_details = request.env['cs.kpi.detail'].sudo().search([
-                ('employee_id', '=', employee_id),
-                ('period_month', '=', month),
-                ('period_year', '=', year)
-            ])
-            
-            # Create map of stored values
-            kpi_values = {
-                detail.kpi_type: {
-                    'weight': detail.weight,
-                    'target': detail.target,
-                    'measurement': detail.measurement,
-                    'actual': detail.actual,
-                    'description': detail.description
-                }
-                for detail in kpi_details
-            }
-
-            # Base domain for order queries
-            base_domain = [
-                ('date_completed', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
-                ('date_completed', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
-                ('state', 'in', ['sale', 'done'])
-            ]
-
-            # Get orders for the mechanic
-            # orders = request.env['sale.order'].sudo().search([
-            #     *base_domain,
-            #     ('car_mechanic_id_new', 'in', [mechanic.id])
-            # ])
-
-            # Get orders for the mechanic only if not a Head Store
-            if not is_head_store:
-                orders = request.env['sale.order'].sudo().search([
-                    *base_domain,
-                    ('car_mechanic_id_new', 'in', [mechanic.id])
-                ])
-            else:
-                # For Head Store, we might want all orders or a different query
-                orders = request.env['sale.order'].sudo().search(base_domain)  # Get all orders without mechanic filter
-
-            kpi_scores = []
-
-            # Definisi KPI template sesuai posisi
-            mechanic_kpi_template = [
-                {
-                    'no': 1,
-                    'name': 'Jumlah flat rate sesuai target',
-                    'type': 'flat_rate',
-                    'weight': 25,
-                    'target': 100,
-                    'measurement': 'Diukur dari jumlah omset yang dihasilkan dari PKB yang ditangani'
-                },
-                {
-                    'no': 2,
-                    'name': 'Jumlah PKB yang diberikan rekomendasi tambahan servis',
-                    'type': 'service_recommendation',
-                    'weight': 10,
-                    'target': 60,
-                    'measurement': 'Diukur dari persentase rekomendasi yang diberikan',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 3,
-                    'name': 'Persentase customer puas dari hasil pengerjaan / tidak komplain karena mis-analisa atau mis-pengerjaan',
-                    'type': 'service_quality',
-                    'weight': 30,
-                    'target': 90,
-                    'measurement': 'Diukur dari jumlah customer yang puas dari hasil pengerjaan (tidak komplain)'
-                },
-                # {
-                #     'no': 4,
-                #     'name': 'Jumlah hand-tools sesuai antara dara sistem dengan kondisi aktual',
-                #     'type': 'tools_check',
-                #     'weight': 10,
-                #     'target': 90,
-                #     'measurement': 'Diukur dari jumlah customer yang puas dari hasil pengerjaan (tidak komplain)',
-                #     'include_in_calculation': True
-                # },
-                {
-                    'no': 4,
-                    'name': 'Persentase sampel dari Lead: tim mekanik bekerja sesuai alur SOP',
-                    'type': 'sop_compliance_lead',
-                    'weight': 15,
-                    'target': 95,
-                    'measurement': 'Diukur dari jumlah temuan pekerjaan sesuai SOP',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 5,
-                    'name': 'Persentase sampel dari Kaizen: tim mekanik bekerja sesuai alur SOP',
-                    'type': 'sop_compliance_kaizen',
-                    'weight': 20,
-                    'target': 95,
-                    'measurement': 'Diukur dari jumlah temuan pekerjaan sesuai SOP',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 6,  # Tambahkan sebagai KPI terakhir
-                    'name': 'Kedisiplinan (Informasi)',
-                    'type': 'discipline',
-                    'weight': 0,  # Weight 0 karena tidak dihitung
-                    'target': 0,
-                    'measurement': 'Diukur dari jumlah keterlambatan dan ketidakhadiran',
-                    'include_in_calculation': False  # Set False untuk tidak masuk perhitungan
-                }
-            ]
-
-            leader_kpi_template = [
-                {
-                    'no': 1,
-                    'name': 'Jumlah flat rate sesuai target',
-                    'type': 'flat_rate',
-                    'weight': 15,
-                    'target': 100,
-                    'measurement': 'Diukur dari jumlah PKB yang berhasil dikerjakan',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 2,
-                    'name': 'Persentase waktu pengerjaan mekanik yang sesuai waktu rata-rata pengerjaan seluruh mekanik',
-                    'type': 'mechanic_efficiency',
-                    'weight': 10,
-                    'target': 80,
-                    'measurement': 'Diukur dari kesesuaian waktu pengerjaan berdasarkan target waktu',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 3,
-                    'name': 'Jumlah PKB yang diberikan rekomendasi tambahan servis',
-                    'type': 'service_recommendation',
-                    'weight': 15,
-                    'target': 80,
-                    'measurement': 'Diukur dari jumlah PKB yang diberikan rekomendasi tambahan servis',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 4,
-                    'name': 'Persentase customer puas dari hasil pengerjaan / tidak komplain karena mis-analisa atau mis-pengerjaan',
-                    'type': 'service_quality',
-                    'weight': 20,
-                    'target': 80,
-                    'measurement': 'Diukur dari jumlah customer yang puas dari hasil pengerjaan (tidak komplain)',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 5,
-                    'name': 'Jumlah customer merasa puas terhadap pelayanan & solusi diberikan',
-                    'type': 'complaint_handling',
-                    'weight': 15,
-                    'target': 90,
-                    'measurement': 'Diukur dari jumlah customer yang puas dari hasil pengerjaan (tidak komplain)',
-                    'include_in_calculation': True
-                },
-                # {
-                #     'no': 6,
-                #     'name': 'Jumlah hand-tools sesuai antara dara sistem dengan kondisi aktual',
-                #     'type': 'tools_check',
-                #     'weight': 5,
-                #     'target': 90,
-                #     'measurement': 'Diukur dari jumlah customer yang puas dari hasil pengerjaan (tidak komplain)',
-                #     'include_in_calculation': True
-                # },
-                # {
-                #     'no': 6,
-                #     'name': 'Analisis dan penyelesaian komplain dari customer',
-                #     'type': 'complaint_handling',
-                #     'weight': 15,
-                #     'target': 100,
-                #     'measurement': 'Diukur dari customer merasa puas terhadap pelayanan & solusi yang diberikan dalam kurun waktu 3 hari setelah complaint dilayangkan',
-                #     'include_in_calculation': True
-                # },
-                {
-                    'no': 6,
-                    'name': 'Persentase % sampel tim mekanik bekerja sesuai alur SOP',
-                    'type': 'sop_compliance_lead',
-                    'weight': 10,
-                    'target': 95,
-                    'measurement': 'Diukur dari jumlah temuan pekerjaan tim mekanik yang dilakukan tidak sesuai dengan alur / SOP yang ditetapkan',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 7,
-                    'name': 'Persentase % sampel dari Kaizen: tim mekanik bekerja sesuai alur SOP',
-                    'type': 'sop_compliance_kaizen',
-                    'weight': 15,
-                    'target': 95,
-                    'measurement': 'Diukur dari jumlah temuan pekerjaan tim mekanik yang dilakukan tidak sesuai dengan alur / SOP yang ditetapkan',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 8,
-                    'name': 'Menjalankan kegiatan operasional secara disiplin',
-                    'type': 'team_discipline',
-                    'weight': 0,
-                    'target': 0,
-                    'measurement': 'Diukur dari jumlah keterlambatan dan ketidakhadiran',
-                    'include_in_calculation': False
-                }
-            ]
-
-             # Add new KPI template for Head Store position
-            # Add KPI template for Head Store position
-            head_store_kpi_template = [
-                {
-                    'no': 1,
-                    'name': 'Jumlah omzet pitcar service sesuai target',
-                    'type': 'revenue_target',
-                    'weight': 15,
-                    'target': 100,
-                    'measurement': 'Jumlah omzet / target omzet',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 2,
-                    'name': 'Persentase (%) rata-rata waktu servis & penanganan customer yang sesuai target waktu',
-                    'type': 'service_time',
-                    'weight': 10,
-                    'target': 80,
-                    'measurement': '% waktu servis & penanganan yang tepat waktu / total sampel',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 3,
-                    'name': 'Persentase (%) waktu pengerjaan mekanik yang sesuai waktu rata-rata pengerjaan seluruh mekanik',
-                    'type': 'mechanic_efficiency',
-                    'weight': 10,
-                    'target': 80,
-                    'measurement': '% pengerjaan mekanik waktu sesuai rata-rata / total mekanik',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 4,
-                    'name': 'Rating survey kepuasan customer memberikan nilai minimal 4,8 dari 5',
-                    'type': 'customer_satisfaction',
-                    'weight': 10,
-                    'target': 95,
-                    'measurement': 'Formula khusus: > 4,8 = 120%, = 4,8 = 100%, 4,6-4,7 = 50%, < 4,6 = 0%',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 5,
-                    'name': 'Jumlah customer merasa puas terhadap pelayanan & solusi diberikan maksimal 3 hari setelah komplain dilayangkan',
-                    'type': 'complaint_handling',
-                    'weight': 10,
-                    'target': 95,
-                    'measurement': 'Jumlah customer puas penanganan komplain / jumlah komplain',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 6,
-                    'name': 'Persentase (%) sampel tim operasional bekerja sesuai alur SOP',
-                    'type': 'sop_compliance_lead',
-                    'weight': 10,
-                    'target': 95,
-                    'measurement': '% individu sesuai SOP / sampel',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 7,
-                    'name': 'Persentase (%) sampel dari kaizen: tim mekanik bekerja sesuai alur SOP',
-                    'type': 'sop_compliance_kaizen',
-                    'weight': 15,
-                    'target': 95,
-                    'measurement': '% individu sesuai SOP / sampel',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 8,
-                    'name': 'Jumlah hari stok part tersedia (tidak habis)',
-                    'type': 'parts_availability',
-                    'weight': 10,
-                    'target': 90,
-                    'measurement': 'Jumlah hari stok part tidak habis / jumlah hari',
-                    'include_in_calculation': True
-                },
-                {
-                    'no': 9,
-                    'name': 'Persentase (%) karyawan mengikuti program pengembangan sesuai target yang ditetapkan',
-                    'type': 'employee_development',
-                    'weight': 10,
-                    'target': 80,
-                    'measurement': '% karyawan mengikuti program / total program karyawan',
-                    'include_in_calculation': True
-                }
-            ]
-            
-            # Handle regular mechanic KPI
-            if 'Mechanic' in job_title and not is_head_store and mechanic:
-                orders = request.env['sale.order'].sudo().search([
-                    *base_domain,
-                    ('car_mechanic_id_new', 'in', [mechanic.id])
-                ])
-
-                # Calculate attendance metrics
-                attendance_domain = [
-                    ('check_in', '>=', start_date.strftime('%Y-%m-%d %H:%M:%S')),
-                    ('check_in', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S')),
-                    ('employee_id', '=', employee.id)
-                ]
-
-                # Prepare data untuk perhitungan
-                total_orders = len(orders)
-                total_revenue = sum(order.amount_total / len(order.car_mechanic_id_new) for order in orders)
-                satisfied_orders = len(orders.filtered(lambda o: o.customer_rating not in ['1', '2']))
-                sop_violations = len(orders.filtered(lambda o: o.sop_sampling_ids.filtered(lambda s: s.result == 'fail')))
-                
-                # Get attendance data
-                attendances = request.env['hr.attendance'].sudo().search(attendance_domain)
-                late_count = sum(1 for att in attendances if att.is_late)
-
-                # Calculate KPI scores
-                kpi_scores = []
-                for kpi in mechanic_kpi_template:
-                    actual = 0
-                    if kpi['type'] == 'service_quality':
-                        # Gunakan post_service_rating untuk service quality
-                        orders_with_rating = orders.filtered(lambda o: o.post_service_rating)
-                        if orders_with_rating:
-                            total_rated_orders = len(orders_with_rating)
-                            satisfied_orders = len(orders_with_rating.filtered(lambda o: o.post_service_rating not in ['1', '2']))
-                            complaints = len(orders_with_rating.filtered(lambda o: o.post_service_rating in ['1', '2']))
-                            
-                            actual = (satisfied_orders / total_rated_orders * 100) if total_rated_orders else 100
-                            kpi['measurement'] = f"Order dengan rating: {total_rated_orders}, Customer puas: {satisfied_orders}, Komplain: {complaints} ({actual:.1f}%)"
-                        else:
-                            actual = 100
-                            kpi['measurement'] = f"Belum ada rating post-service pada periode {month}/{year}"
-                        
-                    elif kpi['type'] == 'productivity':
-                        monthly_target = mechanic.monthly_target or 64000000
-                        if monthly_target == 0:
-                            actual = 0
-                        else:
-                            revenue = total_revenue
-                            actual = (revenue / monthly_target * 100)  # Actual jadi persentase
-                        
-                        formatted_revenue = "{:,.0f}".format(total_revenue)
-                        formatted_target = "{:,.0f}".format(monthly_target)
-                        kpi['measurement'] = f"Revenue: Rp {formatted_revenue} dari target Rp {formatted_target}/bulan"
-
-                    elif kpi['type'] == 'flat_rate':
-                        try:
-                            # Target flat rate bulanan mekanik (115 jam)
-                            monthly_flat_rate_target = 129  # Target default
-                            
-                            # Jika ada target spesifik di data mekanik, gunakan itu
-                            if hasattr(mechanic, 'flat_rate_target') and mechanic.flat_rate_target:
-                                monthly_flat_rate_target = mechanic.flat_rate_target
-                            
-                            # Ambil semua order yang selesai dalam periode
-                            completed_orders = request.env['sale.order'].sudo().search([
-                                ('date_completed', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
-                                ('date_completed', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
-                                ('state', '=', 'sale'),
-                                ('car_mechanic_id_new', 'in', [mechanic.id])
-                            ])
-                            
-                            # Hitung total jam flat rate terjual dari semua jasa di PKB
-                            total_flat_rate_hours = 0
-                            
-                            for order in completed_orders:
-                                # Hitung flat rate untuk setiap order line yang merupakan jasa
-                                for line in order.order_line:
-                                    if line.product_id and line.product_id.type == 'service' and line.product_id.flat_rate > 0:
-                                        # Jika ada beberapa mekanik, bagi flat rate dengan jumlah mekanik
-                                        mechanics_count = len(order.car_mechanic_id_new) or 1
-                                        line_flat_rate = line.product_id.flat_rate / mechanics_count
-                                        total_flat_rate_hours += line_flat_rate * line.product_uom_qty
-                            
-                            # Hitung persentase pencapaian terhadap target
-                            actual = (total_flat_rate_hours / monthly_flat_rate_target * 100) if monthly_flat_rate_target > 0 else 0
-                            
-                            kpi['measurement'] = f"Flat Rate: {total_flat_rate_hours:.1f} jam dari target {monthly_flat_rate_target} jam/bulan ({actual:.1f}%)"
-                            
-                        except Exception as e:
-                            _logger.error(f"Error calculating flat rate for mechanic: {str(e)}")
-                            actual = 0
-                            kpi['measurement'] = f"Error: {str(e)}"
-
-                    elif kpi['type'] == 'tools_check':
-                        try:
-                            # Ambil data pengecekan hand tools untuk mechanic individu
-                            tool_checks = request.env['pitcar.mechanic.tool.check'].sudo().search([
-                                ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
-                                ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                                ('mechanic_id', '=', employee.id),
-                                ('state', '=', 'done')
-                            ])
-                            
-                            if not tool_checks:
-                                actual = 100
-                                kpi['measurement'] = f"Belum ada pengecekan tools pada periode {month}/{year}"
-                            else:
-                                # Hitung total items dan yang sesuai
-                                total_items = sum(check.total_items for check in tool_checks)
-                                matched_items = sum(check.matched_items for check in tool_checks)
-                                
-                                # Hitung persentase kecocokan
-                                actual = (matched_items / total_items * 100) if total_items > 0 else 0
-                                
-                                # Format pesan measurement
-                                kpi['measurement'] = (
-                                    f"Hand-tools: {matched_items}/{total_items} tools sesuai ({actual:.1f}%)\n"
-                                    f"Jumlah pengecekan: {len(tool_checks)} kali"
-                                )
-                                
-                        except Exception as e:
-                            _logger.error(f"Error calculating tools check for mechanic: {str(e)}")
-                            actual = 0
-                            kpi['measurement'] = f"Error: {str(e)}"
-
-                    # elif kpi['type'] == 'flat_rate':
-                    #     try:
-                    #         tz = pytz.timezone('Asia/Jakarta')
-                    #         total_attendance_hours = 0
-                    #         total_productive_hours = 0
-
-                    #         # Get attendance records
-                    #         attendances = request.env['hr.attendance'].sudo().search([
-                    #             ('employee_id', '=', employee.id),
-                    #             ('check_in', '>=', start_date.strftime('%Y-%m-%d %H:%M:%S')),
-                    #             ('check_in', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S')),
-                    #             ('check_out', '!=', False)
-                    #         ])
-
-                    #         # Get mechanic orders
-                    #         mechanic_orders = request.env['sale.order'].sudo().search([
-                    #             ('date_completed', '>=', start_date.strftime('%Y-%m-%d %H:%M:%S')),
-                    #             ('date_completed', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S')),
-                    #             ('state', '=', 'sale'),
-                    #             ('car_mechanic_id_new', 'in', [mechanic.id])
-                    #         ])
-
-                    #         # Calculate attendance hours
-                    #         for att in attendances:
-                    #             check_in_local = pytz.utc.localize(fields.Datetime.from_string(att.check_in)).astimezone(tz)
-                    #             check_out_local = pytz.utc.localize(fields.Datetime.from_string(att.check_out)).astimezone(tz)
-                                
-                    #             # Set work start (minimal jam 8)
-                    #             work_start = check_in_local.replace(hour=8, minute=0, second=0)
-                                
-                    #             # Effective time calculation - allow overtime
-                    #             effective_start = max(check_in_local, work_start)
-                    #             effective_end = check_out_local
-                                
-                    #             if effective_end > effective_start:
-                    #                 break_start = effective_start.replace(hour=12, minute=0, second=0)
-                    #                 break_end = effective_start.replace(hour=13, minute=0, second=0)
-                                    
-                    #                 if effective_start < break_end and effective_end > break_start:
-                    #                     morning_hours = (min(break_start, effective_end) - effective_start).total_seconds() / 3600
-                    #                     afternoon_hours = (effective_end - max(break_end, effective_start)).total_seconds() / 3600
-                    #                     total_attendance_hours += max(0, morning_hours) + max(0, afternoon_hours)
-                    #                 else:
-                    #                     total_attendance_hours += (effective_end - effective_start).total_seconds() / 3600
-
-                    #         # Calculate productive hours - without dividing by mechanic count
-                    #         for order in mechanic_orders:
-                    #             if order.controller_mulai_servis and order.controller_selesai:
-                    #                 start_local = pytz.utc.localize(fields.Datetime.from_string(order.controller_mulai_servis)).astimezone(tz)
-                    #                 end_local = pytz.utc.localize(fields.Datetime.from_string(order.controller_selesai)).astimezone(tz)
-                                    
-                    #                 for att in attendances:
-                    #                     check_in_local = pytz.utc.localize(fields.Datetime.from_string(att.check_in)).astimezone(tz)
-                    #                     check_out_local = pytz.utc.localize(fields.Datetime.from_string(att.check_out)).astimezone(tz)
-                                        
-                    #                     work_start = check_in_local.replace(hour=8, minute=0, second=0)
-                                        
-                    #                     start_overlap = max(start_local, check_in_local, work_start)
-                    #                     end_overlap = min(end_local, check_out_local)
-                                        
-                    #                     if end_overlap > start_overlap:
-                    #                         break_start = start_overlap.replace(hour=12, minute=0, second=0)
-                    #                         break_end = start_overlap.replace(hour=13, minute=0, second=0)
-                                            
-                    #                         if start_overlap < break_end and end_overlap > break_start:
-                    #                             morning_prod = (min(break_start, end_overlap) - start_overlap).total_seconds() / 3600
-                    #                             afternoon_prod = (end_overlap - max(break_end, start_overlap)).total_seconds() / 3600
-                    #                             total_productive_hours += max(0, morning_prod) + max(0, afternoon_prod)
-                    #                         else:
-                    #                             total_productive_hours += (end_overlap - start_overlap).total_seconds() / 3600
-
-                    #         # Calculate flat rate
-                    #         actual = (total_productive_hours / total_attendance_hours * 100) if total_attendance_hours > 0 else 0
-                    #         actual = min(actual, 100)  # Cap at 100%
-
-                    #         kpi['measurement'] = f"""Statistik Kerja Mekanik:
-                    # Jam Kerja: {total_attendance_hours:.1f} jam
-                    # Jam Terjual: {total_productive_hours:.1f} jam
-                    # Flat Rate: {actual:.1f}%""".strip()
-
-                    #     except Exception as e:
-                    #         _logger.error(f"Error calculating flat rate for mechanic: {str(e)}")
-                    #         actual = 0
-                    #         kpi['measurement'] = f"Error: {str(e)}"
-
-                    elif kpi['type'] == 'service_efficiency':
-                        orders_with_duration = orders.filtered(lambda o: o.duration_deviation is not False)
-                        if orders_with_duration:
-                            avg_deviation = abs(sum(orders_with_duration.mapped('duration_deviation'))) / len(orders_with_duration)
-                            actual = max(0, 100 - avg_deviation)  # Convert deviation to efficiency
-                            kpi['measurement'] = f"Rata-rata deviasi waktu: {avg_deviation:.1f}%, Efisiensi: {actual:.1f}%"
-                        else:
-                            actual = 0
-                            kpi['measurement'] = "Belum ada data deviasi waktu pengerjaan"
-                        
-                    elif kpi['type'] == 'service_recommendation':
-                        if orders:
-                            total_orders = len(orders)
-                            orders_with_recs = len(orders.filtered(lambda o: o.total_recommendations > 0))
-                            avg_realization = sum(orders.mapped('recommendation_realization_rate')) / total_orders if total_orders else 0
-                            
-                            kpi['measurement'] = (
-                                f"Orders dengan rekomendasi: {orders_with_recs}/{total_orders}, "
-                                f"Rata-rata realisasi: {avg_realization:.1f}%"
-                            )
-                            actual = avg_realization
-                        
-                    elif kpi['type'] == 'sop_compliance_lead':
-                        # Sampel dari Leader untuk mekanik
-                        mechanic_samplings = request.env['pitcar.sop.sampling'].sudo().search([
-                            ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
-                            ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                            ('mechanic_id', 'in', [mechanic.id]),
-                            ('sop_id.role', '=', 'mechanic'),
-                            ('sampling_type', '=', 'lead'),  # Filter untuk sampel dari Leader
-                            ('state', '=', 'done')
-                        ])
-                        
-                        total_samplings = len(mechanic_samplings)
-                        passed_samplings = len(mechanic_samplings.filtered(lambda s: s.result == 'pass'))
-                        
-                        if total_samplings > 0:
-                            actual = (passed_samplings / total_samplings * 100)
-                            kpi['measurement'] = f"Sesuai SOP (Leader): {passed_samplings} dari {total_samplings} sampel ({actual:.1f}%)"
-                        else:
-                            actual = 100
-                            kpi['measurement'] = f"Belum ada sampling SOP dari Leader pada periode {month}/{year}"
-
-                    elif kpi['type'] == 'sop_compliance_kaizen':
-                        # Sampel dari Kaizen untuk mekanik
-                        mechanic_samplings = request.env['pitcar.sop.sampling'].sudo().search([
-                            ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
-                            ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                            ('mechanic_id', 'in', [mechanic.id]),
-                            ('sop_id.role', '=', 'mechanic'),
-                            ('sampling_type', '=', 'kaizen'),  # Filter untuk sampel dari Kaizen
-                            ('state', '=', 'done')
-                        ])
-                        
-                        total_samplings = len(mechanic_samplings)
-                        passed_samplings = len(mechanic_samplings.filtered(lambda s: s.result == 'pass'))
-                        
-                        if total_samplings > 0:
-                            actual = (passed_samplings / total_samplings * 100)
-                            kpi['measurement'] = f"Sesuai SOP (Kaizen): {passed_samplings} dari {total_samplings} sampel ({actual:.1f}%)"
-                        else:
-                            actual = 100
-                            kpi['measurement'] = f"Belum ada sampling SOP dari Kaizen pada periode {month}/{year}"
-
-                        
-                    elif kpi['type'] == 'discipline':
-                        attendances = request.env['hr.attendance'].sudo().search([
-                            ('check_in', '>=', start_date.strftime('%Y-%m-%d %H:%M:%S')),
-                            ('check_in', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S')),
-                            ('employee_id', '=', employee.id)
-                        ])
-                        late_count = sum(1 for att in attendances if att.is_late)
-                        actual = ((len(attendances) - late_count) / len(attendances) * 100) if attendances else 0
-                        kpi['measurement'] = f"Total kehadiran: {len(attendances)}, Terlambat: {late_count}, Tepat waktu: {len(attendances) - late_count}"
+                        ], 'part_support_id', [employee.id])
+                        total_samples = len(samplings)
+                        passed_samples = len(samplings.filtered(lambda s: s.result == 'pass'))
+                        actual = (passed_samples / total_samples * 100) if total_samples else 100
+                        kpi['measurement'] = f'Sesuai SOP (Leader): {passed_samples} dari {total_samples} sampel'
+
+                    elif kpi['type'] == 'sop_compliance_kaizen':
+                        samplings = batch.search_for('pitcar.sop.sampling', [
+                            ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
+                            ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
+                            ('state', '=', 'done'),
+                            ('sampling_type', '=', 'kaizen')  # Filter untuk sampel dari Kaizen
+                        ], 'part_support_id', [employee.id])
+                        total_samples = len(samplings)
+                        passed_samples = len(samplings.filtered(lambda s: s.result == 'pass'))
+                        actual = (passed_samples / total_samples * 100) if total_samples else 100
+                        kpi['measurement'] = f'Sesuai SOP (Kaizen): {passed_samples} dari {total_samples} sampel'
 
                     # Perhitungan baru: weighted_score langsung dari actual × weight/100
                     weighted_score = actual * (kpi['weight'] / 100)
                     
                     # Set achievement sama dengan weighted_score untuk kompatibilitas frontend
                     achievement = weighted_score
-                    
+
                     kpi_scores.append({
                         'no': kpi['no'],
                         'name': kpi['name'],
@@ -2620,23 +2003,195 @@ class KPIOverview(http.Controller):
                         'measurement': kpi['measurement'],
                         'actual': actual,
                         'achievement': achievement,  # Sama dengan weighted_score
-                        'weighted_score': weighted_score
+                        'weighted_score': weighted_score,
+                        'editable': ['weight', 'target']
                     })
 
+                # Calculate total score
+                total_weight = sum(kpi['weight'] for kpi in kpi_scores if kpi.get('include_in_calculation', True))
+                total_score = sum(kpi['weighted_score'] for kpi in kpi_scores if kpi.get('include_in_calculation', True))
+                avg_target = sum(kpi['target'] * kpi['weight'] for kpi in kpi_scores if kpi.get('include_in_calculation', True)) / total_weight if total_weight else 0
+
+            else:
+                return {'status': 'error', 'message': f'Invalid position: {job_title}'}
+
+            # Calculate total score and summary
+            total_weight = sum(kpi['weight'] for kpi in kpi_scores)
+            total_score = sum(kpi['weighted_score'] for kpi in kpi_scores)
+            avg_target = sum(kpi['target'] * kpi['weight'] for kpi in kpi_scores) / total_weight if total_weight else 0
+
+            # Validate total weight
+            if total_weight != 100:
+                _logger.warning(f"Total weight ({total_weight}) is not 100% for employee {employee.name}")
+
+            # Return response
+            return {
+                'status': 'success',
+                'data': {
+                    'employee': {
+                        'id': employee.id,
+                        'name': employee.name,
+                        'position': job_title,
+                        'department': employee.department_id.name
+                    },
+                    'period': {
+                        'month': month,
+                        'year': year
+                    },
+                    'kpi_scores': kpi_scores,
+                    'summary': {
+                        'total_weight': total_weight,
+                        'target': avg_target,
+                        'total_score': total_score,
+                        'achievement_status': 'Achieved' if total_score >= avg_target else 'Below Target'
+                    }
+                }
+            }
+
+        except Exception as e:
+            _logger.error(f"Error in get_customer_support_kpi: {str(e)}")
+            return {'status': 'error', 'message': str(e)}
+    
+    @http.route('/web/v2/kpi/mechanic', type='json', auth='user', methods=['POST'], csrf=False)
+    def get_mechanic_kpi(self, **kw):
+        """Get KPI data for Mechanic Department"""
+        return self._compute_mechanic_kpi(kw)
+
+    def _compute_mechanic_kpi(self, kw, batch=None):
+        """
+        Perhitungan KPI mekanik, leader dan head store untuk satu employee.
+
+        Sama seperti _compute_customer_support_kpi, search memakai loader
+        bersama dari get_batch_kpi bila ada.
+        """
+        batch = batch or KPIBatchLoader(request.env)
+        try:
+            kpi_log = request_trace_logger(request, 'kpi')
+            kpi_log.debug("Received kw: %s", kw)
+
+            # Extract and validate parameter 
+            employee_id = kw.get('employee_id')
+            if not employee_id:
+                return {'status': 'error', 'message': 'Employee ID is required'}
+
+            # Get and validate month/year
+            current_date = datetime.now()
+            month = int(kw.get('month', current_date.month))
+            year = int(kw.get('year', current_date.year))
+
+            # Validate range
+            if not (1 <= month <= 12):
+                return {'status': 'error', 'message': 'Month must be between 1 and 12'}
+                
+            if year < 2000 or year > 2100:
+                return {'status': 'error', 'message': 'Invalid year'}
+
+            # Get employee
+            employee = request.env['hr.employee'].sudo().browse(employee_id)
+            if not employee.exists():
+                return {'status': 'error', 'message': 'Employee not found'}
+
+            # Set timezone
+            tz = pytz.timezone('Asia/Jakarta')
+            
+            # Calculate date range in local timezone
+            local_start = datetime(year, month, 1)
+            if month == 12:
+                local_end = datetime(year + 1, 1, 1) - timedelta(days=1)
+            else:
+                local_end = datetime(year, month + 1, 1) - timedelta(days=1)
+                
+            # Set time components
+            local_start = local_start.replace(hour=0, minute=0, second=0)
+            local_end = local_end.replace(hour=23, minute=59, second=59)
+            
+            # Convert to timezone-aware datetime
+            start_date = tz.localize(local_start)
+            end_date = tz.localize(local_end)
+            
+            # Convert to UTC for database queries
+            start_date_utc = start_date.astimezone(pytz.UTC)
+            end_date_utc = end_date.astimezone(pytz.UTC)
+            
+            # Check if employee is Head Store directly from job title
+            job_title = employee.job_title if employee.job_title else "Unknown"
+            kpi_log.debug("Employee %s job title: %s", employee.id, job_title)
+            
+            # Check for Head Store role
+            is_head_store = False
+            if job_title and ("Head Store" in job_title or "Kepala Bengkel" in job_title):
+                is_head_store = True
+                kpi_log.debug("Employee %s identified as Head Store from job title: %s", employee.id, job_title)
+            
+            # Only try to get mechanic record if not Head Store
+            mechanic = None
+            if not is_head_store:
+                mechanic = batch.search_for('pitcar.mechanic.new', [], 'employee_id', [employee.id])[:1]
+                
+                if not mechanic:
+                    return {'status': 'error', 'message': 'Mechanic record not found'}
+                    
+                # Only update job_title if mechanic record exists and has position_id
+                if mechanic.position_id:
+                    job_title = mechanic.position_id.name
+            
+            
+
+            # Get stored KPI details
+            kpi_details = batch.search_for('cs.kpi.detail', [
+                ('period_month', '=', month),
+                ('period_year', '=', year)
+            ], 'employee_id', [employee_id])
+            
+            # Create map of stored values
+            kpi_values = {
+                detail.kpi_type: {
+                    'weight': detail.weight,
+                    'target': detail.target,
+                    'measurement': detail.measurement,
+                    'actual': detail.actual,
+                    'description': detail.description
+                }
+                for detail in kpi_details
+            }
+
+            # Base domain for order queries
+            base_domain = [
+                ('date_completed', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
+                ('date_completed', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
+                ('state', 'in', ['sale', 'done'])
+            ]
+
+            kpi_scores = []
+
+            # Definisi KPI template sesuai posisi
+            mechanic_kpi_template = self._get_mechanic_kpi_template()
+            leader_kpi_template = self._get_leader_kpi_template()
+            head_store_kpi_template = self._get_head_store_kpi_template()
+
+            # Handle regular mechanic KPI
+            if 'Mechanic' in job_title and not is_head_store and mechanic:
+                # Bulan yang sudah tutup dibaca dari snapshot jika masih valid
+                kpi_snapshot = request.env['pitcar.kpi.snapshot'].sudo()
+                is_closed_period = kpi_snapshot.is_closed_period(month, year)
+                kpi_scores = kpi_snapshot.get_kpi_scores(employee, month, year) if is_closed_period else None
+
+                if kpi_scores is None:
+                    # Semua sumber data diambil sekali dengan query agregat, lalu dievaluasi in-memory
+                    kpi_engine = request.env['pitcar.kpi.engine'].sudo()
+                    kpi_context = kpi_engine.build_mechanic_context(mechanic, month, year)
+                    kpi_scores = kpi_engine.evaluate_mechanic_kpis(mechanic_kpi_template, kpi_context, mechanic)
+                    if is_closed_period:
+                        kpi_snapshot.store_kpi_scores(employee, mechanic, month, year, kpi_scores)
 
 
             # Handle Lead Mechanic KPI
             elif ('Team Leader' in job_title or 'Lead Mechanic' in job_title) and not is_head_store and mechanic:
                 # Get team members
-                team_members = request.env['pitcar.mechanic.new'].sudo().search([
-                    ('leader_id', '=', mechanic.id)
-                ])
+                team_members = batch.search_for('pitcar.mechanic.new', [], 'leader_id', [mechanic.id])
                 
                 # Get all orders for the team including leader's orders
-                team_orders = request.env['sale.order'].sudo().search([
-                    *base_domain,
-                    ('car_mechanic_id_new', 'in', team_members.ids + [mechanic.id])  # Include leader
-                ])
+                team_orders = batch.search_for('sale.order', base_domain, 'car_mechanic_id_new', team_members.ids + [mechanic.id])
 
                 # Unit handling efficiency
                 total_units = len(team_orders)
@@ -2660,12 +2215,10 @@ class KPIOverview(http.Controller):
                 ))
                 
                 # Attendance metrics for team
-                attendance_domain = [
+                team_attendances = batch.search_for('hr.attendance', [
                     ('check_in', '>=', start_date.strftime('%Y-%m-%d %H:%M:%S')),
-                    ('check_in', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S')),
-                    ('employee_id', 'in', team_members.mapped('employee_id').ids + [employee.id])
-                ]
-                team_attendances = request.env['hr.attendance'].sudo().search(attendance_domain)
+                    ('check_in', '<=', end_date.strftime('%Y-%m-%d %H:%M:%S'))
+                ], 'employee_id', team_members.mapped('employee_id').ids + [employee.id])
                 late_count = sum(1 for att in team_attendances if att.is_late)
 
                 kpi_scores = []
@@ -2680,10 +2233,7 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'service_quality':
                         # Get all orders for the team
-                        team_orders = request.env['sale.order'].sudo().search([
-                            *base_domain,
-                            ('car_mechanic_id_new', 'in', team_members.ids + [mechanic.id])  # Include leader
-                        ])
+                        team_orders = batch.search_for('sale.order', base_domain, 'car_mechanic_id_new', team_members.ids + [mechanic.id])
                         
                         # Ambil order yang memiliki detailed_ratings dan service_rating
                         rated_orders = team_orders.filtered(lambda o: o.detailed_ratings and 'service_rating' in o.detailed_ratings)
@@ -2736,20 +2286,17 @@ class KPIOverview(http.Controller):
                     elif kpi['type'] == 'flat_rate':
                         try:
                             # Get team members
-                            team_members = request.env['pitcar.mechanic.new'].sudo().search([
-                                ('leader_id', '=', mechanic.id)
-                            ])
+                            team_members = batch.search_for('pitcar.mechanic.new', [], 'leader_id', [mechanic.id])
                             
                             # Combine team members + leader
                             all_mechanics_ids = team_members.ids
                             
                             # Get completed orders with flat rate info
-                            completed_orders = request.env['sale.order'].sudo().search([
+                            completed_orders = batch.search_for('sale.order', [
                                 ('date_completed', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                                 ('date_completed', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
-                                ('state', '=', 'sale'),
-                                ('car_mechanic_id_new', 'in', all_mechanics_ids)
-                            ])
+                                ('state', '=', 'sale')
+                            ], 'car_mechanic_id_new', all_mechanics_ids)
                             
                             # Target flat rate bulanan tim (140 jam per mekanik)
                             monthly_flat_rate_target_per_mechanic = 129  # Target default per mekanik
@@ -2818,20 +2365,17 @@ class KPIOverview(http.Controller):
                     elif kpi['type'] == 'tools_check':
                         try:
                             # Get data for team hand tools checks
-                            team_members = request.env['pitcar.mechanic.new'].sudo().search([
-                                ('leader_id', '=', mechanic.id)
-                            ])
+                            team_members = batch.search_for('pitcar.mechanic.new', [], 'leader_id', [mechanic.id])
                             
                             # List semua employee IDs tim termasuk leader
                             all_mechanic_employee_ids = team_members.mapped('employee_id').ids + [employee.id]
                             
                             # Ambil semua pengecekan tools dalam periode
-                            tool_checks = request.env['pitcar.mechanic.tool.check'].sudo().search([
+                            tool_checks = batch.search_for('pitcar.mechanic.tool.check', [
                                 ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                                 ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                                ('mechanic_id', 'in', all_mechanic_employee_ids),
                                 ('state', '=', 'done')
-                            ])
+                            ], 'mechanic_id', all_mechanic_employee_ids)
                             
                             if not tool_checks:
                                 actual = 100
@@ -2992,9 +2536,7 @@ class KPIOverview(http.Controller):
                     elif kpi['type'] == 'mechanic_efficiency':
                         try:
                             # Get team members excluding leader
-                            team_members = request.env['pitcar.mechanic.new'].sudo().search([
-                                ('leader_id', '=', mechanic.id)
-                            ])
+                            team_members = batch.search_for('pitcar.mechanic.new', [], 'leader_id', [mechanic.id])
                             
                             # Hanya ambil data mekanik tim (tidak termasuk leader)
                             team_member_ids = team_members.ids
@@ -3008,12 +2550,11 @@ class KPIOverview(http.Controller):
                                 mechanic_flat_rates = {}
                                 
                                 # Dapatkan semua order yang selesai dalam periode
-                                completed_orders = request.env['sale.order'].sudo().search([
+                                completed_orders = batch.search_for('sale.order', [
                                     ('date_completed', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                                     ('date_completed', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
-                                    ('state', '=', 'sale'),
-                                    ('car_mechanic_id_new', 'in', team_member_ids)
-                                ])
+                                    ('state', '=', 'sale')
+                                ], 'car_mechanic_id_new', team_member_ids)
                                 
                                 # Perhitungan flat rate per mekanik
                                 for member_id in team_member_ids:
@@ -3187,22 +2728,19 @@ class KPIOverview(http.Controller):
                         
                     elif kpi['type'] == 'sop_compliance_lead':
                         # Ambil data sampel SOP dari Leader untuk tim mekanik
-                        team_members = request.env['pitcar.mechanic.new'].sudo().search([
-                            ('leader_id', '=', mechanic.id)
-                        ])
+                        team_members = batch.search_for('pitcar.mechanic.new', [], 'leader_id', [mechanic.id])
                         
                         # List semua ID mekanik termasuk leader
                         all_mechanic_ids = team_members.ids + [mechanic.id]
                         
                         # Ambil sampel SOP dari Leader untuk tim mekanik
-                        team_samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        team_samplings = batch.search_for('pitcar.sop.sampling', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                            ('mechanic_id', 'in', all_mechanic_ids),
                             ('sop_id.role', '=', 'mechanic'),
                             ('sampling_type', '=', 'lead'),  # Filter untuk sampel dari Leader
                             ('state', '=', 'done')
-                        ])
+                        ], 'mechanic_id', all_mechanic_ids)
                         
                         if not team_samplings:
                             actual = 100
@@ -3249,22 +2787,19 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'sop_compliance_kaizen':
                         # Ambil data sampel SOP dari Kaizen untuk tim mekanik
-                        team_members = request.env['pitcar.mechanic.new'].sudo().search([
-                            ('leader_id', '=', mechanic.id)
-                        ])
+                        team_members = batch.search_for('pitcar.mechanic.new', [], 'leader_id', [mechanic.id])
                         
                         # List semua ID mekanik termasuk leader
                         all_mechanic_ids = team_members.ids + [mechanic.id]
                         
                         # Ambil sampel SOP dari Kaizen untuk tim mekanik
-                        team_samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        team_samplings = batch.search_for('pitcar.sop.sampling', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
-                            ('mechanic_id', 'in', all_mechanic_ids),
                             ('sop_id.role', '=', 'mechanic'),
                             ('sampling_type', '=', 'kaizen'),  # Filter untuk sampel dari Kaizen
                             ('state', '=', 'done')
-                        ])
+                        ], 'mechanic_id', all_mechanic_ids)
                         
                         if not team_samplings:
                             actual = 100
@@ -3338,10 +2873,10 @@ class KPIOverview(http.Controller):
             # Handle Head Store KPI
             elif 'Head Store' in job_title:
                 # Get all mechanics in the store
-                all_mechanics = request.env['pitcar.mechanic.new'].sudo().search([])
+                all_mechanics = batch.search('pitcar.mechanic.new', [])
                 
                 # Get all orders for the store
-                store_orders = request.env['sale.order'].sudo().search(base_domain)
+                store_orders = batch.search('sale.order', base_domain)
                 
                 # Calculate KPI scores for Head Store
                 kpi_scores = []
@@ -3488,7 +3023,7 @@ class KPIOverview(http.Controller):
                     elif kpi['type'] == 'mechanic_efficiency':
                         try:
                             # Dapatkan semua mekanik di store
-                            all_mechanics = request.env['pitcar.mechanic.new'].sudo().search([])
+                            all_mechanics = batch.search('pitcar.mechanic.new', [])
                             all_mechanic_ids = all_mechanics.ids
                             
                             # Jika tidak ada mekanik, tidak bisa menghitung
@@ -3500,7 +3035,7 @@ class KPIOverview(http.Controller):
                                 mechanic_flat_rates = {}
                                 
                                 # Dapatkan semua order yang selesai dalam periode
-                                completed_orders = request.env['sale.order'].sudo().search([
+                                completed_orders = batch.search('sale.order', [
                                     ('date_completed', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                                     ('date_completed', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                                     ('state', '=', 'sale')
@@ -3691,7 +3226,7 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'sop_compliance_lead':
                         # Hitung SOP compliance untuk tim dari sampling Lead
-                        lead_samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        lead_samplings = batch.search('pitcar.sop.sampling', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
                             ('sampling_type', '=', 'lead'),
@@ -3734,7 +3269,7 @@ class KPIOverview(http.Controller):
 
                     elif kpi['type'] == 'sop_compliance_kaizen':
                         # Hitung SOP compliance untuk tim dari sampling Kaizen
-                        kaizen_samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        kaizen_samplings = batch.search('pitcar.sop.sampling', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
                             ('sampling_type', '=', 'kaizen'),
@@ -3777,7 +3312,7 @@ class KPIOverview(http.Controller):
                     
                     elif kpi['type'] == 'sop_compliance':
                         # Calculate SOP compliance for all operational staff
-                        sop_samplings = request.env['pitcar.sop.sampling'].sudo().search([
+                        sop_samplings = batch.search('pitcar.sop.sampling', [
                             ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                             ('date', '<=', end_date_utc.strftime('%Y-%m-%d')),
                             ('state', '=', 'done')
@@ -3920,7 +3455,7 @@ class KPIOverview(http.Controller):
                     elif kpi['type'] == 'parts_availability':
                         # Calculate parts availability using stock.mandatory.stockout model
                         try:
-                            stockouts = request.env['stock.mandatory.stockout'].sudo().search([
+                            stockouts = batch.search('stock.mandatory.stockout', [
                                 ('date', '>=', start_date_utc.strftime('%Y-%m-%d')),
                                 ('date', '<=', end_date_utc.strftime('%Y-%m-%d'))
                             ])
@@ -3935,7 +3470,7 @@ class KPIOverview(http.Controller):
                     
                     elif kpi['type'] == 'employee_development':
                         # Ambil data training program selama periode yang ditentukan
-                        training_programs = request.env['kaizen.training.program'].sudo().search([
+                        training_programs = batch.search('kaizen.training.program', [
                             ('date_start', '>=', start_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('date_end', '<=', end_date_utc.strftime('%Y-%m-%d %H:%M:%S')),
                             ('state', '=', 'completed')  # Hanya program yang sudah selesai
@@ -3943,7 +3478,7 @@ class KPIOverview(http.Controller):
                         
                         if training_programs:
                             # Dapatkan semua karyawan dari departemen bengkel
-                            all_mechanics = request.env['hr.employee'].sudo().search([
+                            all_mechanics = batch.search('hr.employee', [
                                 ('department_id.name', 'ilike', 'mechanic')
                             ])
                             
@@ -6349,70 +5884,7 @@ class KPIOverview(http.Controller):
         
      # Helper methods for KPI templates
     def _get_mechanic_kpi_template(self):
-        return [
-            {
-                'no': 1,
-                'name': 'Jumlah flat rate sesuai target',
-                'type': 'flat_rate',
-                'weight': 25,
-                'target': 100,
-                'measurement': 'Diukur dari jumlah omset yang dihasilkan dari PKB yang ditangani'
-            },
-            {
-                'no': 2,
-                'name': 'Jumlah PKB yang diberikan rekomendasi tambahan servis',
-                'type': 'service_recommendation',
-                'weight': 10,
-                'target': 60,
-                'measurement': 'Diukur dari persentase rekomendasi yang diberikan',
-                'include_in_calculation': True
-            },
-            {
-                'no': 3,
-                'name': 'Persentase customer puas dari hasil pengerjaan / tidak komplain karena mis-analisa atau mis-pengerjaan',
-                'type': 'service_quality',
-                'weight': 30,
-                'target': 90,
-                'measurement': 'Diukur dari jumlah customer yang puas dari hasil pengerjaan (tidak komplain)'
-            },
-            # {
-            #     'no': 4,
-            #     'name': 'Jumlah hand-tools sesuai antara dara sistem dengan kondisi aktual',
-            #     'type': 'tools_check',
-            #     'weight': 10,
-            #     'target': 90,
-            #     'measurement': 'Diukur dari jumlah customer yang puas dari hasil pengerjaan (tidak komplain)',
-            #     'include_in_calculation': True
-            # },
-            {
-                'no': 4,
-                'name': 'Persentase sampel dari Lead: tim mekanik bekerja sesuai alur SOP',
-                'type': 'sop_compliance_lead',
-                'weight': 15,
-                'target': 95,
-                'measurement': 'Diukur dari jumlah temuan pekerjaan sesuai SOP',
-                'include_in_calculation': True
-            },
-            {
-                'no': 5,
-                'name': 'Persentase sampel dari Kaizen: tim mekanik bekerja sesuai alur SOP',
-                'type': 'sop_compliance_kaizen',
-                'weight': 20,
-                'target': 95,
-                'measurement': 'Diukur dari jumlah temuan pekerjaan sesuai SOP',
-                'include_in_calculation': True
-            },
-            {
-                'no': 6,
-                'name': 'Kedisiplinan (Informasi)',
-                'type': 'discipline',
-                'weight': 0,
-                'target': 0,
-                'measurement': 'Diukur dari jumlah keterlambatan dan ketidakhadiran',
-                'include_in_calculation': False
-            }
-            # Tambahkan KPI lainnya
-        ]
+        return request.env['pitcar.kpi.engine'].get_mechanic_kpi_template()
         
     def _get_leader_kpi_template(self):
         return [
@@ -1,12 +1,15 @@
-from odoo import http, fields, api
+from odoo import http, fields
 from odoo.http import request, Response
 import json
 import pytz
-from datetime import datetime, timedelta, time
+from datetime import datetime, timedelta
 import logging
 from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT
 from odoo.exceptions import ValidationError
 import math
+from odoo.addons.pitcar_custom.models.notification_hub import (
+    PART_PURCHASE_CHANNEL, STREAM_CHANNELS, publish, sse_stream
+)
 
 _logger = logging.getLogger(__name__)
 
@@ -612,7 +615,7 @@ class LeadTimePartController(http.Controller):
     def get_purchase_detail(self, **kw):
         """Get detailed part purchase information"""
         try:
-            _logger.info(f"Received kw: {kw}")  # Debug log untuk melihat isi kw
+            _logger.debug("Received kw: %s", kw)
             
             # Cek langsung dari kw
             purchase_id = kw.get('purchase_id')
@@ -1474,65 +1477,40 @@ class LeadTimePartController(http.Controller):
     @http.route('/web/part-purchase/notifications', type='http', auth='user', cors='*', methods=['GET'])
     def sse_notifications(self, **kw):
         _logger.info("SSE connection initiated for user: %s", request.env.user.name)
-        
-        def generate_notifications():
-            # Send initial connection message
-            yield "data: {\"type\": \"connected\", \"message\": \"SSE connection established\"}\n\n"
-            
-            # Define channel and message tracking
-            channel = 'part_purchase_notifications'
-            last_id = 0
-            
-            # Create a dedicated cursor that won't be closed between iterations
-            registry = request.env.registry
-            cr = registry.cursor()
-            env = api.Environment(cr, request.env.uid, request.env.context)
-            
-            try:
-                # Main event loop
-                while True:
-                    try:
-                        # Get new messages
-                        messages = env['bus.bus'].sudo().search([
-                            ('channel', '=', json.dumps(channel)),
-                            ('id', '>', last_id)
-                        ], order='id asc', limit=10)
-                        
-                        if messages:
-                            for message in messages:
-                                last_id = message.id
-                                _logger.info(f"Sending SSE event: {message.message}")
-                                yield f"data: {message.message}\n\n"
-                        else:
-                            # Send heartbeat comment to keep connection alive
-                            yield ":\n\n"
-                        
-                        # Commit to release locks
-                        cr.commit()
-                        time.sleep(2)
-                        
-                    except Exception as e:
-                        _logger.error(f"Error in SSE stream: {str(e)}", exc_info=True)
-                        yield f"data: {{\"type\": \"error\", \"message\": \"{str(e)}\"}}\n\n"
-                        cr.rollback()
-                        time.sleep(5)
-            except (GeneratorExit, Exception) as e:
-                # Clean up when the generator is closed or there's an error
-                _logger.info(f"Closing SSE connection: {str(e)}")
-                cr.close()
-        
-        # Set proper headers
+        return self._sse_response([PART_PURCHASE_CHANNEL], kw)
+
+    @http.route('/web/notifications/stream', type='http', auth='user', cors='*', methods=['GET'])
+    def sse_notification_stream(self, channels=None, **kw):
+        """
+        Stream SSE untuk beberapa channel sekaligus, mis.
+        ?channels=part_purchase_notifications,mentor_request_notifications,queue_dashboard
+        """
+        requested = [channel.strip() for channel in (channels or '').split(',') if channel.strip()]
+        allowed = [channel for channel in requested if channel in STREAM_CHANNELS]
+        if not allowed:
+            return Response(json.dumps({'status': 'error', 'message': 'No valid channels'}),
+                            status=400, content_type='application/json')
+        return self._sse_response(allowed, kw)
+
+    def _sse_response(self, channels, kw):
+        """Response SSE yang dilayani hub notifikasi (tanpa cursor database per koneksi)"""
+        last_event_id = request.httprequest.headers.get('Last-Event-ID') or kw.get('last_event_id')
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_event_id = None
+
         headers = [
             ('Content-Type', 'text/event-stream'),
             ('Cache-Control', 'no-cache'),
             ('Connection', 'keep-alive'),
             ('X-Accel-Buffering', 'no')
         ]
-        
-        return Response(generate_notifications(), headers=headers)
+        return Response(sse_stream(request.db, channels, last_event_id), headers=headers)
 
     @http.route('/web/part-purchase/observer', type='json', auth='user')
-    def observe_part_requests(self, last_checked=None):
+    def observe_part_requests(self, last_checked=None, cursor=None):
+        """Jika `cursor` (revision) dikirim, hanya notifikasi yang berubah sejak cursor yang dikembalikan"""
         try:
             _logger.info(f"Observer called with last_checked: {last_checked}")
             
@@ -1550,7 +1528,14 @@ class LeadTimePartController(http.Controller):
                 except Exception as e:
                     _logger.warning(f"Could not parse last_checked: {e}")
             
-            notifications = Notification.search(domain, order='request_time desc', limit=10)
+            new_cursor = Notification.get_revision_cursor()
+            if cursor is not None:
+                domain.append(('revision', '>', int(cursor)))
+                notifications = Notification.search(domain, order='revision asc', limit=10)
+                if len(notifications) == 10:
+                    new_cursor = notifications[-1].revision
+            else:
+                notifications = Notification.search(domain, order='request_time desc', limit=10)
             _logger.info(f"Found {len(notifications)} notifications")
             
             jakarta_tz = pytz.timezone('Asia/Jakarta')
@@ -1575,10 +1560,11 @@ class LeadTimePartController(http.Controller):
                 'status': 'success',
                 'data': {
                     'timestamp': jakarta_now.isoformat(),
-                    'notifications': result
+                    'notifications': result,
+                    'cursor': new_cursor
                 }
             }
-            _logger.info(f"Observer response: {response_data}")
+            _logger.debug("Observer response: %s", response_data)
             return response_data
         
         except Exception as e:
@@ -1625,11 +1611,8 @@ class LeadTimePartController(http.Controller):
             if data:
                 payload['data'] = data
             
-            message_json = json.dumps(payload)
-            _logger.info(f"Publishing notification: {title} with data: {data}")
-            
-            bus_service = request.env['bus.bus']
-            bus_service.sendone('part_purchase_notifications', message_json)
+            _logger.info("Publishing notification: %s", title)
+            publish(request.env, PART_PURCHASE_CHANNEL, notification_type, payload)
             
             return True
         except Exception as e:
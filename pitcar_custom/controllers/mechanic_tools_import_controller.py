@@ -7,7 +7,8 @@ import io
 import json
 import tempfile
 import os
-from datetime import datetime
+import shutil
+import codecs
 
 _logger = logging.getLogger(__name__)
 
@@ -39,16 +40,16 @@ class MechanicToolsImportController(http.Controller):
                 _logger.warning(f"Failed to parse column mapping: {str(e)}")
                 column_mapping = {}
             
-            # Process file content in binary mode (no encoding assumption)
-            file_content = import_file.read()
-            
-            # Simpan ke temporary file
+            # Simpan ke temporary file (disalin per blok, tanpa membaca seluruh file ke memori)
             file_ext = os.path.splitext(import_file.filename)[1].lower() if hasattr(import_file, 'filename') else '.csv'
             fd, temp_path = tempfile.mkstemp(suffix=file_ext)
             
             try:
                 with os.fdopen(fd, 'wb') as temp_file:
-                    temp_file.write(file_content)
+                    if hasattr(import_file, 'save'):
+                        import_file.save(temp_file)
+                    else:
+                        shutil.copyfileobj(import_file, temp_file)
                 
                 # Process the import - pass file extension to choose appropriate parser
                 result = self._process_import(temp_path, delimiter, import_type, column_mapping)
@@ -115,63 +116,25 @@ class MechanicToolsImportController(http.Controller):
             
             # Handle CSV files dengan berbagai encoding
             else:
-                # Coba dengan beberapa encoding
-                encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-                data_rows = []
-                header = []
-                
-                for encoding in encodings:
-                    try:
-                        with open(file_path, 'r', encoding=encoding) as f:
-                            reader = csv.reader(f, delimiter=delimiter)
-                            rows = list(reader)
-                            if rows:
-                                header = rows[0]
-                                data_rows = rows[1:]
-                                break  # Berhasil membaca file
-                    except UnicodeDecodeError:
-                        continue  # Coba encoding lain
-                    except Exception as e:
-                        _logger.error(f"Error reading CSV with {encoding}: {str(e)}")
-                        continue
-                
-                if not header:
+                encoding = self._detect_csv_encoding(file_path)
+                if not encoding:
                     return {
                         'status': 'error',
                         'message': 'Failed to read CSV file with any encoding'
                     }
                 
-                # Convert headers to lowercase
-                original_headers = [h.strip() for h in header]
-                header_lower = [h.lower().strip() for h in header]
-                
-                # Apply column mapping if provided
-                if column_mapping:
-                    mapped_headers = []
-                    for h in original_headers:
-                        # Look for exact match first, then case-insensitive
-                        if h in column_mapping:
-                            mapped_headers.append(column_mapping[h])
-                        elif h.lower() in {k.lower(): v for k, v in column_mapping.items()}:
-                            mapped_key = next(k for k in column_mapping.keys() if k.lower() == h.lower())
-                            mapped_headers.append(column_mapping[mapped_key])
-                        else:
-                            mapped_headers.append(h)
+                # Baris dibaca secara streaming; hanya satu chunk yang ada di memori
+                with open(file_path, 'r', encoding=encoding, newline='') as f:
+                    reader = csv.reader(f, delimiter=delimiter)
+                    header = next(reader, None)
+                    if not header:
+                        return {
+                            'status': 'error',
+                            'message': 'Failed to read CSV file with any encoding'
+                        }
                     
-                    header_lower = [h.lower().strip() for h in mapped_headers]
-                    _logger.info(f"Applied column mapping. Original: {original_headers}, Mapped: {mapped_headers}")
-                
-                if import_type == 'tools':
-                    return self._import_tools_from_csv(header_lower, data_rows)
-                elif import_type == 'categories':
-                    return self._import_categories_from_csv(header_lower, data_rows)
-                elif import_type == 'checks':
-                    return self._import_checks_from_csv(header_lower, data_rows)
-                else:
-                    return {
-                        'status': 'error',
-                        'message': f'Invalid import type: {import_type}'
-                    }
+                    header_lower = self._map_headers([h.strip() for h in header], column_mapping)
+                    return self._import_rows(import_type, header_lower, reader)
                 
         except Exception as e:
             _logger.error(f"Error processing import: {str(e)}", exc_info=True)
@@ -179,121 +142,116 @@ class MechanicToolsImportController(http.Controller):
                 'status': 'error',
                 'message': str(e)
             }
+
+    def _detect_csv_encoding(self, file_path, block_size=65536):
+        """Encoding pertama yang bisa men-decode seluruh file, dibaca per blok"""
+        encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+        for encoding in encodings:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            try:
+                with open(file_path, 'rb') as f:
+                    for block in iter(lambda: f.read(block_size), b''):
+                        decoder.decode(block)
+                    decoder.decode(b'', final=True)
+                return encoding
+            except UnicodeDecodeError:
+                continue  # Coba encoding lain
+            except Exception as e:
+                _logger.error(f"Error reading CSV with {encoding}: {str(e)}")
+                continue
+        return None
+
+    def _map_headers(self, headers, column_mapping=None):
+        """Terapkan column mapping (exact lalu case-insensitive) dan kembalikan header lowercase"""
+        if column_mapping:
+            mapping_lower = {k.lower(): v for k, v in column_mapping.items()}
+            mapped_headers = [column_mapping.get(h, mapping_lower.get(h.lower(), h)) for h in headers]
+            _logger.info(f"Applied column mapping. Original: {headers}, Mapped: {mapped_headers}")
+            headers = mapped_headers
+        return [h.lower().strip() for h in headers]
+
+    def _import_rows(self, import_type, header_lower, rows):
+        """Dispatch import berdasarkan tipe; `rows` boleh berupa iterator"""
+        if import_type == 'tools':
+            return self._import_tools_from_csv(header_lower, rows)
+        elif import_type == 'categories':
+            return self._import_categories_from_csv(header_lower, rows)
+        elif import_type == 'checks':
+            return self._import_checks_from_csv(header_lower, rows)
+        else:
+            return {
+                'status': 'error',
+                'message': f'Invalid import type: {import_type}'
+            }
+
+    def _iter_xlsx_rows(self, sheet):
+        """Baris data XLSX (mode read_only openpyxl, streaming)"""
+        for values in sheet.iter_rows(min_row=2, values_only=True):
+            # Tangani berbagai tipe data dengan benar
+            data_row = []
+            for value in values:
+                if value is None:
+                    data_row.append('')
+                elif isinstance(value, (int, float)):
+                    data_row.append(value)
+                else:
+                    data_row.append(str(value))
+            if any(data_row):  # Skip empty rows
+                yield data_row
+
+    def _iter_xls_rows(self, workbook, sheet):
+        import xlrd
+        for row_idx in range(1, sheet.nrows):
+            row = []
+            for col_idx in range(sheet.ncols):
+                cell = sheet.cell(row_idx, col_idx)
+                if cell.ctype == xlrd.XL_CELL_DATE:
+                    # Tangani format tanggal dengan benar
+                    date_tuple = xlrd.xldate_as_tuple(cell.value, workbook.datemode)
+                    row.append(f"{date_tuple[0]}-{date_tuple[1]:02d}-{date_tuple[2]:02d}")
+                else:
+                    row.append(str(cell.value) if cell.value != '' else '')
+            if any(row):  # Skip empty rows
+                yield row
         
     def _process_excel_import(self, file_path, import_type, column_mapping=None):
         """Process Excel files for import"""
         try:
-            import xlrd
-            import openpyxl
-            
             file_ext = os.path.splitext(file_path)[1].lower()
-            
-            # Data yang akan diproses
-            headers = []
-            data_rows = []
+            workbook = None
             
             if file_ext == '.xlsx':
-                try:
-                    # Gunakan openpyxl untuk XLSX files tanpa membaca sebagai text
-                    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-                    sheet = workbook.active
-                    
-                    # Process rows
-                    for i, row in enumerate(sheet.rows):
-                        if i == 0:
-                            # Headers
-                            headers = [str(cell.value).strip() if cell.value is not None else '' for cell in row]
-                        else:
-                            # Data rows
-                            data_row = []
-                            for cell in row:
-                                # Tangani berbagai tipe data dengan benar
-                                if cell.value is None:
-                                    data_row.append('')
-                                elif isinstance(cell.value, (int, float)):
-                                    data_row.append(cell.value)
-                                else:
-                                    data_row.append(str(cell.value))
-                            
-                            if any(data_row):  # Skip empty rows
-                                data_rows.append(data_row)
-                except Exception as e:
-                    _logger.error(f"Error processing XLSX with openpyxl: {str(e)}")
-                    # Fallback ke pendekatan lain jika openpyxl gagal
-                    raise
+                import openpyxl
+                # Gunakan openpyxl read_only supaya baris dibaca streaming
+                workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+                sheet = workbook.active
+                first_row = next(sheet.iter_rows(max_row=1, values_only=True), ())
+                headers = [str(value).strip() if value is not None else '' for value in first_row]
+                data_rows = self._iter_xlsx_rows(sheet)
                             
             elif file_ext == '.xls':
+                import xlrd
                 # Untuk file XLS, gunakan xlrd yang lebih stabil
-                workbook = xlrd.open_workbook(file_path)
+                workbook = xlrd.open_workbook(file_path, on_demand=True)
                 sheet = workbook.sheet_by_index(0)
-                
-                # Get headers
-                headers = []
-                for col in range(sheet.ncols):
-                    cell_value = sheet.cell_value(0, col)
-                    headers.append(str(cell_value).strip())
-                
-                # Get data rows
-                for row_idx in range(1, sheet.nrows):
-                    row = []
-                    for col_idx in range(sheet.ncols):
-                        cell = sheet.cell(row_idx, col_idx)
-                        if cell.ctype == xlrd.XL_CELL_DATE:
-                            # Tangani format tanggal dengan benar
-                            date_tuple = xlrd.xldate_as_tuple(cell.value, workbook.datemode)
-                            row.append(f"{date_tuple[0]}-{date_tuple[1]:02d}-{date_tuple[2]:02d}")
-                        else:
-                            row.append(str(cell.value) if cell.value != '' else '')
-                    
-                    if any(row):  # Skip empty rows
-                        data_rows.append(row)
+                headers = [str(sheet.cell_value(0, col)).strip() for col in range(sheet.ncols)]
+                data_rows = self._iter_xls_rows(workbook, sheet)
             else:
                 return {
                     'status': 'error',
                     'message': f'Unsupported file format: {file_ext}'
                 }
             
-            # Hapus karakter non-UTF8 dari headers jika perlu
-            cleaned_headers = []
-            for header in headers:
-                # Hapus karakter khusus, atur encoding
-                cleaned_header = ''.join(c for c in header if c.isprintable())
-                cleaned_headers.append(cleaned_header)
-            
-            headers = cleaned_headers
-            
-            # Apply column mapping if provided
-            original_headers = headers
-            if column_mapping:
-                mapped_headers = []
-                for h in original_headers:
-                    # Look for exact match first, then case-insensitive
-                    if h in column_mapping:
-                        mapped_headers.append(column_mapping[h])
-                    elif h.lower() in {k.lower(): v for k, v in column_mapping.items()}:
-                        mapped_key = next(k for k in column_mapping.keys() if k.lower() == h.lower())
-                        mapped_headers.append(column_mapping[mapped_key])
-                    else:
-                        mapped_headers.append(h)
-                
-                headers = mapped_headers
-                _logger.info(f"Applied column mapping. Original: {original_headers}, Mapped: {headers}")
-            
-            # Convert headers to lowercase for processing
-            header_lower = [h.lower().strip() for h in headers]
-            
-            # Process the import based on type
-            if import_type == 'tools':
-                return self._import_tools_from_csv(header_lower, data_rows)
-            elif import_type == 'categories':
-                return self._import_categories_from_csv(header_lower, data_rows)
-            elif import_type == 'checks':
-                return self._import_checks_from_csv(header_lower, data_rows)
-            else:
-                return {
-                    'status': 'error',
-                    'message': f'Invalid import type: {import_type}'
-                }
+            try:
+                # Hapus karakter khusus dari headers
+                headers = [''.join(c for c in header if c.isprintable()) for header in headers]
+                header_lower = self._map_headers(headers, column_mapping)
+                return self._import_rows(import_type, header_lower, data_rows)
+            finally:
+                if file_ext == '.xlsx':
+                    workbook.close()
+                else:
+                    workbook.release_resources()
                 
         except ImportError as e:
             return {
@@ -306,34 +264,31 @@ class MechanicToolsImportController(http.Controller):
                 'status': 'error',
                 'message': f'Error processing Excel file: {str(e)}'
             }
-    
-    def _import_tools_from_csv(self, header, data_rows):
-        """Import tools from CSV data"""
-        required_fields = ['name']
-        
-        # Check required fields
+
+    def _check_required_fields(self, header, required_fields):
         for field in required_fields:
             if field not in header:
                 return {
                     'status': 'error',
                     'message': f'Required field "{field}" not found in the file header.'
                 }
-        
-        # Convert data to JSON format
-        tools = []
+        return None
+
+    def _iter_row_dicts(self, header, data_rows):
+        """(nomor baris, dict kolom) untuk setiap baris tidak kosong, dibuat secara lazy"""
+        index = 0
         for row in data_rows:
             if not row or not any(row):  # Skip empty rows
                 continue
-                
-            tool = {}
-            for i, field in enumerate(header):
-                if i < len(row) and row[i]:
-                    tool[field] = row[i]
-            
-            tools.append(tool)
-        
-        # Process the tools data
-        return self._import_tools_from_json(tools)
+            index += 1
+            yield index, {field: row[i] for i, field in enumerate(header) if i < len(row) and row[i]}
+    
+    def _import_tools_from_csv(self, header, data_rows):
+        """Import tools from CSV data"""
+        error = self._check_required_fields(header, ['name'])
+        if error:
+            return error
+        return request.env['pitcar.mechanic.tool.import'].import_tools(self._iter_row_dicts(header, data_rows))
     
     def _import_categories_from_csv(self, header, data_rows):
         """Import categories from CSV data"""
@@ -365,31 +320,10 @@ class MechanicToolsImportController(http.Controller):
     
     def _import_checks_from_csv(self, header, data_rows):
         """Import checks from CSV data"""
-        required_fields = ['mechanic', 'date']
-        
-        # Check required fields
-        for field in required_fields:
-            if field not in header:
-                return {
-                    'status': 'error',
-                    'message': f'Required field "{field}" not found in the file header.'
-                }
-        
-        # Convert data to JSON format
-        checks = []
-        for row in data_rows:
-            if not row or not any(row):  # Skip empty rows
-                continue
-                
-            check = {}
-            for i, field in enumerate(header):
-                if i < len(row) and row[i]:
-                    check[field] = row[i]
-            
-            checks.append(check)
-        
-        # Process the checks data
-        return self._import_checks_from_json(checks)
+        error = self._check_required_fields(header, ['mechanic', 'date'])
+        if error:
+            return error
+        return request.env['pitcar.mechanic.tool.import'].import_checks(self._iter_row_dicts(header, data_rows))
     
     def _import_tools_from_json(self, tools_data):
         """Import tools from JSON data"""
@@ -398,138 +332,7 @@ class MechanicToolsImportController(http.Controller):
                 'status': 'error',
                 'message': 'No tool data provided'
             }
-        
-        tools_created = 0
-        tools_updated = 0
-        tools_skipped = 0
-        errors = []
-        
-        for tool_idx, tool_data in enumerate(tools_data, start=1):
-            try:
-                name = tool_data.get('name')
-                
-                if not name:
-                    tools_skipped += 1
-                    errors.append(f"Tool #{tool_idx}: Skipped due to missing name")
-                    continue
-                
-                # Prepare values
-                values = {
-                    'name': name,
-                }
-                
-                # Add optional fields
-                optional_fields = {
-                    'code': 'code',
-                    'description': 'description',
-                    'qty_expected': 'qty_expected',
-                    'location': 'location',
-                    'serial_number': 'serial_number',
-                    'state': 'state',
-                    'notes': 'notes',
-                }
-                
-                for key, field in optional_fields.items():
-                    if key in tool_data:
-                        values[field] = tool_data[key]
-                
-                # Handle numeric fields
-                if 'qty_expected' in values:
-                    try:
-                        values['qty_expected'] = int(float(values['qty_expected']))
-                    except (ValueError, TypeError):
-                        values['qty_expected'] = 1
-                
-                # Handle dates
-                date_fields = {
-                    'purchase_date': 'purchase_date',
-                    'warranty_end_date': 'warranty_end_date',
-                    'last_maintenance_date': 'last_maintenance_date',
-                }
-                
-                for key, field in date_fields.items():
-                    if key in tool_data and tool_data[key]:
-                        try:
-                            values[field] = datetime.strptime(tool_data[key], '%Y-%m-%d').date()
-                        except ValueError:
-                            errors.append(f"Tool #{tool_idx}: Invalid date format for {key}: {tool_data[key]}")
-                
-                # Handle related fields
-                if 'category' in tool_data and tool_data['category']:
-                    category_name = tool_data['category']
-                    category = request.env['pitcar.tool.category'].sudo().search([('name', '=', category_name)], limit=1)
-                    if not category:
-                        # Create category if it doesn't exist
-                        category = request.env['pitcar.tool.category'].sudo().create({
-                            'name': category_name,
-                        })
-                    values['category_id'] = category.id
-                
-                if 'mechanic' in tool_data and tool_data['mechanic']:
-                    mechanic_name = tool_data['mechanic']
-                    mechanic = request.env['hr.employee'].sudo().search([
-                        ('name', '=', mechanic_name),
-                        ('job_id.name', 'ilike', 'mechanic'),
-                    ], limit=1)
-                    if mechanic:
-                        values['mechanic_id'] = mechanic.id
-                        # Set to assigned state if mechanic is provided
-                        values['state'] = 'assigned'
-                        values['date_assigned'] = datetime.now().date()
-                    else:
-                        errors.append(f"Tool #{tool_idx}: Mechanic not found: {mechanic_name}")
-                
-                if 'maintenance_frequency' in tool_data:
-                    freq = tool_data['maintenance_frequency'].lower()
-                    valid_freqs = ['daily', 'weekly', 'monthly', 'quarterly', 'yearly']
-                    if freq in valid_freqs:
-                        values['maintenance_frequency'] = freq
-                    else:
-                        errors.append(f"Tool #{tool_idx}: Invalid maintenance frequency: {freq}")
-                
-                if 'state' in values:
-                    state = values['state'].lower()
-                    valid_states = ['available', 'assigned', 'maintenance', 'lost', 'damaged']
-                    if state not in valid_states:
-                        errors.append(f"Tool #{tool_idx}: Invalid state: {state}")
-                        values['state'] = 'available'
-                
-                # Check if tool already exists
-                existing_tool = None
-                if values.get('code'):
-                    existing_tool = request.env['pitcar.mechanic.hand.tool'].sudo().search([
-                        ('code', '=', values['code']),
-                    ], limit=1)
-                
-                if not existing_tool:
-                    existing_tool = request.env['pitcar.mechanic.hand.tool'].sudo().search([
-                        ('name', '=', values['name']),
-                    ], limit=1)
-                
-                if existing_tool:
-                    # Update existing tool
-                    existing_tool.write(values)
-                    tools_updated += 1
-                else:
-                    # Create new tool
-                    request.env['pitcar.mechanic.hand.tool'].sudo().create(values)
-                    tools_created += 1
-                
-            except Exception as e:
-                tools_skipped += 1
-                errors.append(f"Tool #{tool_idx}: {str(e)}")
-                _logger.error("Error importing tool #%s: %s", tool_idx, str(e))
-        
-        return {
-            'status': 'success',
-            'data': {
-                'created': tools_created,
-                'updated': tools_updated,
-                'skipped': tools_skipped,
-                'errors': errors[:10],  # Limit to first 10 errors
-                'total_errors': len(errors)
-            }
-        }
+        return request.env['pitcar.mechanic.tool.import'].import_tools(enumerate(tools_data, start=1))
     
     def _import_categories_from_json(self, categories_data):
         """Import categories from JSON data"""
@@ -626,169 +429,4 @@ class MechanicToolsImportController(http.Controller):
                 'status': 'error',
                 'message': 'No check data provided'
             }
-        
-        checks_created = 0
-        checks_updated = 0
-        checks_skipped = 0
-        check_lines_processed = 0
-        errors = []
-        
-        # Group records by mechanic and date
-        grouped_checks = {}
-        for check_idx, check_data in enumerate(checks_data, start=1):
-            try:
-                mechanic_name = check_data.get('mechanic')
-                date_str = check_data.get('date')
-                
-                if not mechanic_name or not date_str:
-                    checks_skipped += 1
-                    errors.append(f"Check #{check_idx}: Skipped due to missing mechanic or date")
-                    continue
-                
-                key = (mechanic_name, date_str)
-                if key not in grouped_checks:
-                    grouped_checks[key] = []
-                
-                grouped_checks[key].append((check_idx, check_data))
-                
-            except Exception as e:
-                checks_skipped += 1
-                errors.append(f"Check #{check_idx}: {str(e)}")
-                _logger.error("Error grouping check #%s: %s", check_idx, str(e))
-        
-        # Process each unique check
-        for (mechanic_name, date_str), check_records in grouped_checks.items():
-            try:
-                # Find mechanic
-                mechanic = request.env['hr.employee'].sudo().search([
-                    ('name', '=', mechanic_name),
-                    ('job_id.name', 'ilike', 'mechanic'),
-                ], limit=1)
-                
-                if not mechanic:
-                    for check_idx, _ in check_records:
-                        errors.append(f"Check #{check_idx}: Mechanic not found: {mechanic_name}")
-                    continue
-                
-                # Parse date
-                try:
-                    check_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                except ValueError:
-                    for check_idx, _ in check_records:
-                        errors.append(f"Check #{check_idx}: Invalid date format: {date_str}")
-                    continue
-                
-                # Get first record for check data
-                _, first_check = check_records[0]
-                
-                # Check if a check already exists for this mechanic and date
-                existing_check = request.env['pitcar.mechanic.tool.check'].sudo().search([
-                    ('mechanic_id', '=', mechanic.id),
-                    ('date', '=', check_date),
-                ], limit=1)
-                
-                if existing_check:
-                    check = existing_check
-                    # Update notes if provided
-                    if 'notes' in first_check:
-                        check.write({'notes': first_check['notes']})
-                    checks_updated += 1
-                else:
-                    # Create new check
-                    check = request.env['pitcar.mechanic.tool.check'].sudo().create({
-                        'mechanic_id': mechanic.id,
-                        'date': check_date,
-                        'notes': first_check.get('notes', ''),
-                    })
-                    checks_created += 1
-                
-                # Process all check records to update check lines
-                for check_idx, check_data in check_records:
-                    tool_data = {
-                        'tool_name': check_data.get('tool_name'),
-                        'tool_code': check_data.get('tool_code'),
-                        'qty_actual': check_data.get('qty_actual'),
-                        'physical_condition': check_data.get('physical_condition'),
-                        'line_notes': check_data.get('line_notes'),
-                    }
-                    
-                    # Skip if no tool identifier is provided
-                    if not tool_data['tool_name'] and not tool_data['tool_code']:
-                        continue
-                    
-                    # Find tool
-                    tool = None
-                    if tool_data['tool_code']:
-                        tool = request.env['pitcar.mechanic.hand.tool'].sudo().search([
-                            ('code', '=', tool_data['tool_code']),
-                        ], limit=1)
-                    
-                    if not tool and tool_data['tool_name']:
-                        tool = request.env['pitcar.mechanic.hand.tool'].sudo().search([
-                            ('name', '=', tool_data['tool_name']),
-                        ], limit=1)
-                    
-                    if not tool:
-                        errors.append(f"Check #{check_idx}: Tool not found: {tool_data['tool_code'] or tool_data['tool_name']}")
-                        continue
-                    
-                    # Find or create check line
-                    check_line = request.env['pitcar.mechanic.tool.check.line'].sudo().search([
-                        ('check_id', '=', check.id),
-                        ('tool_id', '=', tool.id),
-                    ], limit=1)
-                    
-                    line_values = {}
-                    
-                    if tool_data['qty_actual']:
-                        try:
-                            line_values['qty_actual'] = int(float(tool_data['qty_actual']))
-                        except (ValueError, TypeError):
-                            errors.append(f"Check #{check_idx}: Invalid quantity: {tool_data['qty_actual']}")
-                    
-                    if tool_data['physical_condition']:
-                        condition = tool_data['physical_condition'].lower()
-                        valid_conditions = ['good', 'fair', 'poor', 'damaged', 'missing']
-                        if condition in valid_conditions:
-                            line_values['physical_condition'] = condition
-                        else:
-                            errors.append(f"Check #{check_idx}: Invalid condition: {tool_data['physical_condition']}")
-                    
-                    if tool_data['line_notes']:
-                        line_values['notes'] = tool_data['line_notes']
-                    
-                    if check_line:
-                        # Update existing line
-                        if line_values:
-                            check_line.write(line_values)
-                            check_lines_processed += 1
-                    else:
-                        # Create new line
-                        line_values.update({
-                            'check_id': check.id,
-                            'tool_id': tool.id,
-                            'qty_expected': tool.qty_expected,
-                        })
-                        request.env['pitcar.mechanic.tool.check.line'].sudo().create(line_values)
-                        check_lines_processed += 1
-                
-                # Set check state if provided
-                if 'state' in first_check and first_check['state'] == 'done' and check.state != 'done':
-                    check.sudo().action_done()
-                
-            except Exception as e:
-                checks_skipped += 1
-                errors.append(f"Check for {mechanic_name}/{date_str}: {str(e)}")
-                _logger.error("Error processing check %s/%s: %s", mechanic_name, date_str, str(e))
-        
-        return {
-            'status': 'success',
-            'data': {
-                'created': checks_created,
-                'updated': checks_updated,
-                'check_lines': check_lines_processed,
-                'skipped': checks_skipped,
-                'errors': errors[:10],  # Limit to first 10 errors
-                'total_errors': len(errors)
-            }
-        }
\ No newline at end of file
+        return request.env['pitcar.mechanic.tool.import'].import_checks(enumerate(checks_data, start=1))
@@ -679,9 +679,12 @@ class MentorRequestController(http.Controller):
             }
         
     @http.route('/web/mentor/observer', type='json', auth='user')
-    def observe_mentor_requests(self, last_checked=None, include_read=True, limit=10):
+    def observe_mentor_requests(self, last_checked=None, include_read=True, limit=10, cursor=None):
         """Observer untuk notifikasi mentor request dengan defensive coding.
-        Menampilkan semua notifikasi termasuk yang sudah dibaca (is_read=True)."""
+        Menampilkan semua notifikasi termasuk yang sudah dibaca (is_read=True).
+
+        Jika `cursor` (revision dari response sebelumnya) dikirim, hanya notifikasi
+        yang dibuat/berubah sejak cursor tersebut yang dikembalikan."""
         try:
             _logger.info(f"Mentor Observer called with last_checked: {last_checked}, include_read: {include_read}")
             
@@ -718,17 +721,31 @@ class MentorRequestController(http.Controller):
                 if domain is None:
                     return self._build_empty_notification_response()
             
-            # Hitung jumlah total untuk paginasi
-            total_count = Notification.search_count(domain)
-            
-            # Optimasi: Cari notifikasi dengan prefetch dan sorting berdasarkan waktu terbaru
-            notifications = Notification.with_context(prefetch_fields=True).search(
-                domain, order='request_time desc', limit=limit
-            )
+            new_cursor = Notification.get_revision_cursor()
+            if cursor is not None:
+                # Mode delta: hanya perubahan setelah cursor, tanpa count seluruh window
+                domain.append(('revision', '>', int(cursor)))
+                notifications = Notification.with_context(prefetch_fields=True).search(
+                    domain, order='revision asc', limit=limit
+                )
+                total_count = len(notifications)
+                if len(notifications) == limit:
+                    # Masih ada sisa: client melanjutkan dari revision terakhir yang diterima
+                    new_cursor = notifications[-1].revision
+            else:
+                # Hitung jumlah total untuk paginasi
+                total_count = Notification.search_count(domain)
+
+                # Optimasi: Cari notifikasi dengan prefetch dan sorting berdasarkan waktu terbaru
+                notifications = Notification.with_context(prefetch_fields=True).search(
+                    domain, order='request_time desc', limit=limit
+                )
             
             # Jika tidak ada notifikasi, kembalikan response kosong
             if not notifications:
-                return self._build_empty_notification_response()
+                response = self._build_empty_notification_response()
+                response['data']['cursor'] = new_cursor
+                return response
                     
             _logger.info(f"Found {len(notifications)} mentor notifications")
             
@@ -799,10 +816,11 @@ class MentorRequestController(http.Controller):
                 'data': {
                     'timestamp': jakarta_time.isoformat(),
                     'notifications': result,
+                    'cursor': new_cursor,
                     'pagination': {
                         'total': total_count,
                         'limit': limit,
-                        'has_more': total_count > limit
+                        'has_more': total_count > limit if cursor is None else total_count >= limit
                     }
                 }
             }
@@ -977,15 +995,22 @@ class MentorRequestController(http.Controller):
             
             # Modify domain based on mechanic role
             if mechanic:
-                domain = self._apply_mechanic_role_filters(domain, mechanic)
-                if domain is None:
+                filtered_domain = self._apply_mechanic_role_filters(list(domain), mechanic)
+                if filtered_domain is None:
                     return {
                         'status': 'success',
                         'data': {'count': 0}
                     }
+                if filtered_domain != domain:
+                    # Filter peran tidak bisa dijawab counter: hitung langsung
+                    count = request.env['pitcar.notification'].sudo().search_count(filtered_domain)
+                    return {
+                        'status': 'success',
+                        'data': {'count': count}
+                    }
             
-            # Optimasi: hanya hitung total tanpa membaca records
-            count = request.env['pitcar.notification'].sudo().search_count(domain)
+            # Badge dibaca dari counter unread per hari (tanpa scan tabel notifikasi)
+            count = request.env['pitcar.notification'].sudo().get_unread_count('pitcar.mentor.request')
             
             return {
                 'status': 'success',
@@ -203,7 +203,7 @@ class ProductCatalogAPI(http.Controller):
         # Filter by availability
         if kw.get('available_only'):
             if str(kw['available_only']).lower() in ['true', '1', 'yes']:
-                domain.append(('qty_available', '>', 0))
+                domain.append(('stock_onhand_qty', '>', 0))
         
         # Filter price range
         if kw.get('min_price'):
@@ -254,7 +254,8 @@ class ProductCatalogAPI(http.Controller):
             # Filter low stock
             if kw.get('low_stock_only'):
                 if str(kw['low_stock_only']).lower() in ['true', '1', 'yes']:
-                    domain.append(('qty_available', '<=', 5))
+                    # Sama seperti qty_available: hanya produk storable yang dihitung low stock
+                    domain += [('type', '=', 'product'), ('stock_onhand_qty', '<=', 5)]
             
             # Filter below mandatory level
             if kw.get('below_mandatory_only'):
@@ -264,97 +265,23 @@ class ProductCatalogAPI(http.Controller):
         
         return domain
 
-    def _sort_products_by_stock(self, products, sort_order='desc'):
-        """Quick fix untuk stock sorting"""
-        try:
-            # Convert recordset ke list dengan stock values
-            product_stock_pairs = []
-            for product in products:
-                stock_qty = getattr(product, 'qty_available', 0) or 0
-                product_stock_pairs.append((product, float(stock_qty)))
-            
-            # Sort berdasarkan stock
-            reverse = sort_order == 'desc'
-            sorted_pairs = sorted(product_stock_pairs, key=lambda x: x[1], reverse=reverse)
-            
-            # Return sorted recordset
-            sorted_ids = [pair[0].id for pair in sorted_pairs]
-            return request.env['product.template'].sudo().browse(sorted_ids)
-        except Exception as e:
-            _logger.error(f"Stock sorting error: {str(e)}")
-            return products
-        
     def _get_products_with_stock_sorting(self, domain, sort_field, sort_order, limit, offset):
         """
-        Handle stock sorting dengan post-processing sederhana
+        Cari produk dengan sorting dan pagination di database.
+
+        Sort qty_available memakai field tersimpan stock_onhand_qty (total quant
+        lokasi internal yang diperbarui dari stock.quant), sehingga halaman
+        berapa pun tetap benar tanpa menghitung stok per produk.
         """
-        if sort_field != 'qty_available':
-            # Normal sorting untuk field lain
+        Product = request.env['product.template'].sudo()
+        if sort_field == 'qty_available':
+            order = f"stock_onhand_qty {sort_order}, id {sort_order}"
+        else:
             order = f"{sort_field} {sort_order}"
-            products = request.env['product.template'].sudo().search(
-                domain, 
-                limit=limit, 
-                offset=offset, 
-                order=order
-            )
-            total = request.env['product.template'].sudo().search_count(domain)
-            return products, total
-        
-        # Special handling untuk qty_available
-        try:
-            # Ambil semua data untuk halaman saat ini + buffer
-            buffer_size = limit * 3  # Ambil 3x lebih banyak untuk ensure correct sorting
-            extended_limit = offset + buffer_size
-            
-            # Ambil data dengan default sorting
-            all_products = request.env['product.template'].sudo().search(
-                domain, 
-                limit=extended_limit, 
-                order='name asc'  # Fallback sorting
-            )
-            
-            # Convert ke list untuk sorting
-            products_with_stock = []
-            for product in all_products:
-                try:
-                    stock_qty = product.qty_available if hasattr(product, 'qty_available') else 0.0
-                    products_with_stock.append({
-                        'product': product,
-                        'stock': float(stock_qty)
-                    })
-                except:
-                    products_with_stock.append({
-                        'product': product,
-                        'stock': 0.0
-                    })
-            
-            # Sort berdasarkan stock
-            reverse = sort_order == 'desc'
-            sorted_products = sorted(products_with_stock, key=lambda x: x['stock'], reverse=reverse)
-            
-            # Apply pagination
-            paginated_products = sorted_products[offset:offset + limit]
-            products = request.env['product.template'].sudo().browse([p['product'].id for p in paginated_products])
-            
-            # Total count
-            total = request.env['product.template'].sudo().search_count(domain)
-            
-            _logger.info(f"Stock sorting applied: {len(sorted_products)} total, showing {len(products)} for page")
-            return products, total
-            
-        except Exception as e:
-            _logger.error(f"Stock sorting failed: {str(e)}")
-            # Fallback ke normal sorting
-            products = request.env['product.template'].sudo().search(
-                domain, 
-                limit=limit, 
-                offset=offset, 
-                order='name asc'
-            )
-            total = request.env['product.template'].sudo().search_count(domain)
-            return products, total
+        products = Product.search(domain, limit=limit, offset=offset, order=order)
+        total = Product.search_count(domain)
+        return products, total
 
-    
     def _prepare_product_template_data(self, product, access_level='public', include_variants=False, include_attachments=False):
         """
         Menyiapkan data product template sesuai access level
@@ -593,33 +520,9 @@ class ProductCatalogAPI(http.Controller):
             _logger.info(f"Sort: {order}, Page: {page}, Limit: {limit}")
             
             # Cari produk
-            # products = request.env['product.template'].sudo().search(
-            #     domain, 
-            #     limit=limit, 
-            #     offset=offset, 
-            #     order=order
-            # )
-
-            # products, total = self._get_products_with_stock_sorting(
-            #     domain, sort_field, sort_order, limit, offset
-            # )
-
-            if sort_field == 'qty_available':
-                # Special handling untuk stock sorting
-                all_products = request.env['product.template'].sudo().search(domain, order='name asc')
-                sorted_products = self._sort_products_by_stock(all_products, sort_order)
-                # Apply pagination setelah sorting
-                products = sorted_products[offset:offset + limit]
-            else:
-                # Normal sorting untuk field lain
-                products = request.env['product.template'].sudo().search(
-                    domain, 
-                    limit=limit, 
-                    offset=offset, 
-                    order=order
-                )
-
-            total = request.env['product.template'].sudo().search_count(domain)
+            products, total = self._get_products_with_stock_sorting(
+                domain, sort_field, sort_order, limit, offset
+            )
             
             _logger.info(f"Search results: Found {len(products)} products out of {total} total")
             
@@ -839,7 +742,8 @@ class ProductCatalogAPI(http.Controller):
             if access_level in ['internal', 'manager']:
                 stats['low_stock_count'] = request.env['product.template'].sudo().search_count([
                     ('active', '=', True),
-                    ('qty_available', '<=', 5)
+                    ('type', '=', 'product'),
+                    ('stock_onhand_qty', '<=', 5)
                 ])
                 
                 # Check if custom fields exist before using them
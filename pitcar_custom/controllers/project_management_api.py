@@ -1719,16 +1719,10 @@ class TeamProjectAPI(http.Controller):
             
             current_employee_id = request.env.user.employee_id.id
             
-            # Get all unread messages in group (exclude own messages)
-            messages = request.env['team.project.message'].sudo().search([
-                ('group_id', '=', int(group_id)),
-                ('author_id', '!=', current_employee_id)
-            ])
-            
-            marked_count = 0
-            for message in messages:
-                if message.mark_as_read(current_employee_id):
-                    marked_count += 1
+            # Majukan high-water mark ke pesan terakhir grup (satu upsert, bukan per pesan)
+            marked_count = request.env['team.project.message.read.mark'].sudo().mark_group_read(
+                int(group_id), current_employee_id
+            )
             
             return {
                 'status': 'success',
@@ -1780,8 +1774,12 @@ class TeamProjectAPI(http.Controller):
             return {'status': 'error', 'message': str(e)}
 
 
-    def _prepare_message_data(self, message, include_read_details=False):
-        """Enhanced message data preparation with read status"""
+    def _prepare_message_data(self, message, include_read_details=False, last_read_ids=None):
+        """
+        Enhanced message data preparation with read status.
+        last_read_ids: mark baca user saat ini per grup (message.get_last_read_ids),
+        diisi pemanggil yang menyiapkan banyak pesan sekaligus.
+        """
         current_employee_id = request.env.user.employee_id.id if request.env.user.employee_id else False
         
         message_data = {
@@ -1803,7 +1801,7 @@ class TeamProjectAPI(http.Controller):
                 'read_count': message.read_count,
                 'unread_count': message.unread_count,
                 'total_recipients': message.total_recipients,
-                'is_read_by_me': current_employee_id and message.is_read_by(current_employee_id),
+                'is_read_by_me': current_employee_id and message.is_read_by(current_employee_id, last_read_ids),
                 'receipt_status': message.get_read_receipt_status()
             }
         }
@@ -3153,10 +3151,12 @@ class TeamProjectAPI(http.Controller):
                 domain, limit=limit, offset=offset, order='date desc'
             )
             
-            # Siapkan data pesan dengan read status
+            # Siapkan data pesan dengan read status; mark baca diambil sekali untuk semua pesan
+            current_employee = request.env.user.employee_id
+            last_read_ids = messages.get_last_read_ids(current_employee.id) if current_employee else {}
             message_data = []
             for message in messages:
-                msg_data = self._prepare_message_data(message, include_read_details)
+                msg_data = self._prepare_message_data(message, include_read_details, last_read_ids)
                 message_data.append(msg_data)
             
             return {
@@ -4004,91 +4004,15 @@ class TeamProjectAPI(http.Controller):
             # Get optional department filter
             department_id = kw.get('department_id') and int(kw['department_id'])
             
-            # Build domain for projects
-            project_domain = [('state', '=', 'in_progress')]
-            if department_id:
-                project_domain.append(('department_id', '=', department_id))
-                
-            # Get active projects
-            active_projects = request.env['team.project'].sudo().search(project_domain)
-            
-            # Get all team members from active projects
-            team_members = request.env['hr.employee']
-            for project in active_projects:
-                team_members |= project.team_ids
-                team_members |= project.project_manager_id
-                
-            # Remove duplicates
-            team_members = team_members.sorted(key=lambda e: e.name)
+            Workload = request.env['team.project.workload'].sudo()
             
-            # Calculate workload for each team member
-            workload_data = []
+            # Get active projects
+            active_projects = request.env['team.project'].sudo().search(
+                Workload.get_project_domain(department_id, states=['in_progress'])
+            )
             
-            for employee in team_members:
-                # Count assigned tasks
-                assigned_tasks = request.env['team.project.task'].sudo().search([
-                    ('project_id', 'in', active_projects.ids),
-                    ('assigned_to', 'in', [employee.id]),
-                    ('state', 'not in', ['done', 'cancelled'])
-                ])
-                
-                # Get last 7 days timesheets
-                today = fields.Date.today()
-                week_start = today - timedelta(days=7)
-                
-                recent_timesheets = request.env['team.project.timesheet'].sudo().search([
-                    ('employee_id', '=', employee.id),
-                    ('date', '>=', week_start),
-                    ('date', '<=', today)
-                ])
-                
-                # Calculate hours per day
-                hours_logged = sum(recent_timesheets.mapped('hours'))
-                days_worked = len(set(recent_timesheets.mapped('date')))
-                hours_per_day = hours_logged / max(days_worked, 1)
-                
-                # Calculate workload score (0-100%)
-                # Consider: task count, priority, and hours per day
-                task_count = len(assigned_tasks)
-                high_priority_count = len(assigned_tasks.filtered(lambda t: t.priority in ['2', '3']))
-                
-                # Base workload on task count (0-40%)
-                task_factor = min(40, task_count * 10)
-                
-                # Add high priority impact (0-30%)
-                priority_factor = min(30, high_priority_count * 15)
-                
-                # Add hours impact (0-30%)
-                hours_factor = min(30, hours_per_day * 5)  # 6 hours/day = 30%
-                
-                # Calculate total workload score
-                workload_score = task_factor + priority_factor + hours_factor
-                
-                # Determine workload level
-                if workload_score < 30:
-                    workload_level = 'low'
-                elif workload_score < 70:
-                    workload_level = 'medium'
-                else:
-                    workload_level = 'high'
-                    
-                # Add to results
-                workload_data.append({
-                    'employee': {
-                        'id': employee.id,
-                        'name': employee.name
-                    },
-                    'assigned_tasks': task_count,
-                    'high_priority_tasks': high_priority_count,
-                    'recent_hours': round(hours_logged, 1),
-                    'hours_per_day': round(hours_per_day, 1),
-                    'workload_score': workload_score,
-                    'workload_level': workload_level,
-                    'projects': [{
-                        'id': task.project_id.id,
-                        'name': task.project_id.name
-                    } for task in assigned_tasks]
-                })
+            # Task dan timesheet semua anggota dihitung sekaligus (tanpa query per anggota)
+            workload_data = Workload.get_member_workload(active_projects)
                 
             return {
                 'status': 'success',
@@ -4242,47 +4166,7 @@ class TeamProjectAPI(http.Controller):
     def get_department_stats(self, **kw):
         """Get project statistics grouped by department for dashboard visualization."""
         try:
-            # Get all departments that have projects
-            departments = request.env['hr.department'].sudo().search([])
-            departments_with_projects = departments.filtered(lambda d: d.id in request.env['team.project'].sudo().mapped('department_id.id'))
-            
-            department_stats = []
-            
-            for department in departments_with_projects:
-                # Get projects for this department
-                projects = request.env['team.project'].sudo().search([('department_id', '=', department.id)])
-                
-                if not projects:
-                    continue
-                    
-                total_projects = len(projects)
-                active_projects = len(projects.filtered(lambda p: p.state == 'in_progress'))
-                completed_projects = len(projects.filtered(lambda p: p.state == 'completed'))
-                
-                # Get total tasks and completed tasks
-                all_tasks = request.env['team.project.task'].sudo().search([('project_id', 'in', projects.ids)])
-                total_tasks = len(all_tasks)
-                completed_tasks = len(all_tasks.filtered(lambda t: t.state == 'done'))
-                
-                # Calculate task completion rate
-                task_completion_rate = (completed_tasks / total_tasks * 100) if total_tasks else 0
-                
-                # Calculate average project progress
-                avg_progress = sum(projects.mapped('progress')) / total_projects if total_projects else 0
-                
-                department_stats.append({
-                    'department': {
-                        'id': department.id,
-                        'name': department.name
-                    },
-                    'total_projects': total_projects,
-                    'active_projects': active_projects,
-                    'completed_projects': completed_projects,
-                    'total_tasks': total_tasks,
-                    'completed_tasks': completed_tasks,
-                    'task_completion_rate': round(task_completion_rate, 1),
-                    'avg_progress': round(avg_progress, 1)
-                })
+            department_stats = request.env['team.project.workload'].sudo().get_department_stats()
                 
             return {
                 'status': 'success',
@@ -4751,16 +4635,22 @@ class TeamProjectAPI(http.Controller):
             # Build domain for timesheets
             timesheet_domain = []
             
+            Workload = request.env['team.project.workload'].sudo()
+            project_ids = None
+            
             if project_id:
-                timesheet_domain.append(('project_id', '=', project_id))
+                project_ids = [project_id]
             elif department_id:
                 # Get projects from department
-                project_ids = request.env['team.project'].sudo().search([
-                    ('department_id', '=', department_id)
-                ]).ids
+                department_project_ids = request.env['team.project'].sudo().search(
+                    Workload.get_project_domain(department_id)
+                ).ids
                 
-                if project_ids:
-                    timesheet_domain.append(('project_id', 'in', project_ids))
+                if department_project_ids:
+                    project_ids = department_project_ids
+            
+            if project_ids:
+                timesheet_domain.append(('project_id', 'in', project_ids))
                     
             # Date filters
             if date_from:
@@ -4768,10 +4658,12 @@ class TeamProjectAPI(http.Controller):
             if date_to:
                 timesheet_domain.append(('date', '<=', date_to))
                 
-            # Get timesheets
-            timesheets = request.env['team.project.timesheet'].sudo().search(timesheet_domain)
+            # Jam, task dan project per employee dihitung dengan query GROUP BY
+            timesheet_stats = Workload.get_timesheet_stats(
+                date_from=date_from, date_to=date_to, project_ids=project_ids
+            )
             
-            if not timesheets:
+            if not timesheet_stats:
                 return {
                     'status': 'success',
                     'data': {
@@ -4781,43 +4673,28 @@ class TeamProjectAPI(http.Controller):
                     }
                 }
                 
-            # Get employees from timesheets
-            employee_ids = timesheets.mapped('employee_id.id')
-            employees = request.env['hr.employee'].sudo().browse(employee_ids)
+            employees = request.env['hr.employee'].sudo().browse(list(timesheet_stats))
+            task_outcomes = Workload.get_timesheet_task_outcomes(
+                employees.ids, date_from=date_from, date_to=date_to, project_ids=project_ids
+            )
             
             # Calculate performance metrics for each team member
             team_member_data = []
             
             for employee in employees:
-                employee_timesheets = timesheets.filtered(lambda t: t.employee_id.id == employee.id)
-                
-                if not employee_timesheets:
-                    continue
-                    
-                # Get tasks for this employee
-                task_ids = employee_timesheets.mapped('task_id.id')
-                employee_tasks = request.env['team.project.task'].sudo().browse(task_ids)
+                stats = timesheet_stats[employee.id]
+                outcomes = task_outcomes.get(employee.id, {})
                 
                 # Calculate metrics
-                total_hours = sum(employee_timesheets.mapped('hours'))
-                completed_tasks = len(employee_tasks.filtered(lambda t: t.state == 'done'))
-                total_tasks = len(employee_tasks)
+                total_hours = stats['hours']
+                completed_tasks = outcomes.get('completed_tasks', 0)
+                total_tasks = stats['task_count']
                 task_completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
                 
                 # On-time task completion
-                on_time_tasks = 0
-                for task in employee_tasks.filtered(lambda t: t.state == 'done'):
-                    if task.planned_date_end and task.actual_date_end:
-                        planned_end = fields.Datetime.from_string(task.planned_date_end)
-                        actual_end = fields.Datetime.from_string(task.actual_date_end)
-                        if actual_end <= planned_end:
-                            on_time_tasks += 1
-                            
+                on_time_tasks = outcomes.get('on_time_tasks', 0)
                 on_time_rate = (on_time_tasks / completed_tasks * 100) if completed_tasks > 0 else 0
                 
-                # Calculate unique projects
-                project_ids = employee_timesheets.mapped('project_id.id')
-                
                 # Calculate productivity (hours per task)
                 productivity = (total_hours / total_tasks) if total_tasks > 0 else 0
                 
@@ -4838,7 +4715,7 @@ class TeamProjectAPI(http.Controller):
                     'task_completion_rate': round(task_completion_rate, 1),
                     'on_time_rate': round(on_time_rate, 1),
                     'productivity': round(productivity, 2),
-                    'project_count': len(project_ids),
+                    'project_count': stats['project_count'],
                     'performance_score': round(performance_score, 1)
                 })
                 
@@ -4888,13 +4765,12 @@ class TeamProjectAPI(http.Controller):
             date_from = kw.get('date_from', fields.Date.to_string(fields.Date.today()))
             date_to = kw.get('date_to', fields.Date.to_string(fields.Date.today() + timedelta(days=30)))
             
-            # Build domain for active projects
-            project_domain = [('state', '=', 'in_progress')]
-            if department_id:
-                project_domain.append(('department_id', '=', department_id))
+            Workload = request.env['team.project.workload'].sudo()
                 
             # Get active projects
-            active_projects = request.env['team.project'].sudo().search(project_domain)
+            active_projects = request.env['team.project'].sudo().search(
+                Workload.get_project_domain(department_id, states=['in_progress'])
+            )
             
             if not active_projects:
                 return {
@@ -4913,25 +4789,28 @@ class TeamProjectAPI(http.Controller):
                 ('date', '<=', date_to)
             ]
             
-            timesheets = request.env['team.project.timesheet'].sudo().search(timesheet_domain)
+            # Jam per (project, employee) dalam satu read_group
+            timesheet_groups = request.env['team.project.timesheet'].sudo().read_group(
+                timesheet_domain, ['hours:sum'], ['project_id', 'employee_id'], lazy=False
+            )
             
             # 1. Allocation by project
             project_allocation = {}
             
-            for timesheet in timesheets:
-                project_id = timesheet.project_id.id
+            for group in timesheet_groups:
+                project_id, project_name = group['project_id']
                 if project_id not in project_allocation:
                     project_allocation[project_id] = {
                         'project': {
                             'id': project_id,
-                            'name': timesheet.project_id.name
+                            'name': project_name
                         },
                         'total_hours': 0,
                         'employee_count': set()
                     }
                     
-                project_allocation[project_id]['total_hours'] += timesheet.hours
-                project_allocation[project_id]['employee_count'].add(timesheet.employee_id.id)
+                project_allocation[project_id]['total_hours'] += group['hours']
+                project_allocation[project_id]['employee_count'].add(group['employee_id'][0])
                 
             # Format output and calculate percentages
             allocation_by_project = []
@@ -4952,34 +4831,34 @@ class TeamProjectAPI(http.Controller):
             # 2. Allocation by employee
             employee_allocation = {}
             
-            for timesheet in timesheets:
-                employee_id = timesheet.employee_id.id
+            for group in timesheet_groups:
+                employee_id, employee_name = group['employee_id']
                 if employee_id not in employee_allocation:
                     employee_allocation[employee_id] = {
                         'employee': {
                             'id': employee_id,
-                            'name': timesheet.employee_id.name
+                            'name': employee_name
                         },
                         'total_hours': 0,
                         'projects': set(),
                         'project_allocation': {}
                     }
                     
-                employee_allocation[employee_id]['total_hours'] += timesheet.hours
-                employee_allocation[employee_id]['projects'].add(timesheet.project_id.id)
+                employee_allocation[employee_id]['total_hours'] += group['hours']
+                employee_allocation[employee_id]['projects'].add(group['project_id'][0])
                 
                 # Track allocation per project
-                project_id = timesheet.project_id.id
+                project_id, project_name = group['project_id']
                 if project_id not in employee_allocation[employee_id]['project_allocation']:
                     employee_allocation[employee_id]['project_allocation'][project_id] = {
                         'project': {
                             'id': project_id,
-                            'name': timesheet.project_id.name
+                            'name': project_name
                         },
                         'hours': 0
                     }
                     
-                employee_allocation[employee_id]['project_allocation'][project_id]['hours'] += timesheet.hours
+                employee_allocation[employee_id]['project_allocation'][project_id]['hours'] += group['hours']
                 
             # Format output and calculate percentages
             allocation_by_employee = []
@@ -5010,33 +4889,26 @@ class TeamProjectAPI(http.Controller):
             
             # 3. Project resources overview
             project_resources = []
+            open_tasks, task_allocation = Workload.get_project_task_allocation(active_projects.ids)
+            assignees = request.env['hr.employee'].sudo().browse(
+                list({employee_id for allocation in task_allocation.values() for employee_id in allocation})
+            )
+            assignee_names = {assignee.id: assignee.name for assignee in assignees}
             
             for project in active_projects:
                 # Get team members assigned to this project
                 team_members = project.team_ids | project.project_manager_id
                 
-                # Get tasks for this project
-                project_tasks = request.env['team.project.task'].sudo().search([
-                    ('project_id', '=', project.id),
-                    ('state', 'not in', ['cancelled', 'done'])
-                ])
-                
                 # Get resource allocation
-                team_allocation = {}
-                for task in project_tasks:
-                    for assignee in task.assigned_to:
-                        if assignee.id not in team_allocation:
-                            team_allocation[assignee.id] = {
-                                'employee': {
-                                    'id': assignee.id,
-                                    'name': assignee.name
-                                },
-                                'task_count': 0
-                            }
-                        team_allocation[assignee.id]['task_count'] += 1
+                assignee_data = [{
+                    'employee': {
+                        'id': employee_id,
+                        'name': assignee_names.get(employee_id, '')
+                    },
+                    'task_count': task_count
+                } for employee_id, task_count in task_allocation.get(project.id, {}).items()]
                         
                 # Calculate allocation percentages
-                assignee_data = list(team_allocation.values())
                 total_task_assignments = sum(data['task_count'] for data in assignee_data)
                 
                 for data in assignee_data:
@@ -5051,7 +4923,7 @@ class TeamProjectAPI(http.Controller):
                         'name': project.name
                     },
                     'team_size': len(team_members),
-                    'active_tasks': len(project_tasks),
+                    'active_tasks': open_tasks.get(project.id, 0),
                     'team_allocation': assignee_data
                 })
                 
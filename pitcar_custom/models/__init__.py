@@ -7,7 +7,12 @@ from . import pitcar_position
 from . import res_partner
 from . import stock_picking
 from . import account_move
+from . import accounting_stats
 from . import sale_order
+from . import customer_cohort
+from . import sales_daily_fact
+from . import customer_rating_stat
+from . import lead_time_recompute
 from . import sale_order_line
 from . import product_product
 from . import product_tag
@@ -16,6 +21,7 @@ from . import service_advisor
 from . import project_task
 from . import feedback_classification
 from . import product_template
+from . import stock_age_layer
 from . import queue_management
 from . import queue_metric
 from . import quality_metrics
@@ -30,8 +36,10 @@ from . import sale_order_template_line
 from . import sop
 from . import hr_employee_public
 from . import service_booking
+from . import stall_availability
 from . import hr_working_days_config
 from . import kpi_detail
+from . import kpi_engine
 from . import lead_time_part
 from . import frontoffice_equipment
 from . import sale_order_part_item
@@ -44,11 +52,16 @@ from . import cs_finance_check
 from . import cs_leads
 from . import cs_leads_analytics
 from . import content_project
+from . import content_dashboard_stats
+from . import content_resource_forecast
 from . import mentor_request
 from . import notification
 from . import pitcar_tools
 from . import mechanic_hand_tools
+from . import mechanic_tool_import
+from . import kpi_snapshot  # Inherit pitcar.mechanic.tool.check
 from . import project_management
+from . import project_workload
 from . import kaizen_training_program
 from . import it_program
 from . import team_project_notification
@@ -56,6 +69,7 @@ from . import team_project_automated_notification
 from . import booking_metrics
 from . import sale_order_template
 from . import campaign_analytics
+from . import campaign_import_job
 
 # ============ LOYALTY SYSTEM ============
 from . import pitcar_loyalty_core
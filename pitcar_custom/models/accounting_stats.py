@@ -0,0 +1,179 @@
+from odoo import models, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+MOVE_STATES = ('draft', 'posted', 'cancel')
+MOVE_TYPES = ('entry', 'out_invoice', 'in_invoice', 'out_refund', 'in_refund')
+PARTNER_FIELDS = ('partner_id', 'vendor_id')
+
+
+class PitcarAccountingStats(models.AbstractModel):
+    """
+    Agregasi statistik account.move untuk API accounting.
+
+    Semua statistik dihitung dengan GROUP BY di database atas subquery id
+    hasil account.move._search(domain), sehingga record rule tetap berlaku
+    dan move tidak perlu dimuat ke memori worker.
+    """
+    _name = 'pitcar.accounting.stats'
+    _description = 'Accounting Statistics Aggregation'
+
+    @api.model
+    def _move_subquery(self, domain):
+        """(sql, params) subquery id account.move yang cocok dengan domain"""
+        Move = self.env['account.move']
+        Move.flush_model()
+        return Move._search(domain).subselect()
+
+    @api.model
+    def get_overview(self, domain):
+        """
+        Total, rentang tanggal dan hitungan workshop dalam satu query.
+
+        Returns:
+            dict: total_moves, total_amount, date_from, date_to, with_cars,
+                  with_service_advisors, with_mechanics, stock_audits, within_tolerance
+        """
+        fields_ = self.env['account.move']._fields
+        advisors = fields_['service_advisor_id']
+        mechanics = fields_['car_mechanic_id_new']
+        subquery, params = self._move_subquery(domain)
+
+        self.env.cr.execute("""
+            SELECT COUNT(*) AS total_moves,
+                   COALESCE(SUM(m.amount_total), 0)::float AS total_amount,
+                   MIN(m.date) AS date_from,
+                   MAX(m.date) AS date_to,
+                   COUNT(m.partner_car_id) AS with_cars,
+                   COUNT(*) FILTER (WHERE EXISTS (
+                       SELECT 1 FROM {sa_rel} sa WHERE sa.{sa_col} = m.id
+                   )) AS with_service_advisors,
+                   COUNT(*) FILTER (WHERE EXISTS (
+                       SELECT 1 FROM {mech_rel} mech WHERE mech.{mech_col} = m.id
+                   )) AS with_mechanics,
+                   COUNT(*) FILTER (WHERE m.is_stock_audit) AS stock_audits,
+                   COUNT(*) FILTER (WHERE m.is_within_tolerance) AS within_tolerance
+            FROM account_move m
+            WHERE m.id IN ({subquery})
+        """.format(
+            sa_rel=advisors.relation, sa_col=advisors.column1,
+            mech_rel=mechanics.relation, mech_col=mechanics.column1,
+            subquery=subquery,
+        ), params)
+        return self.env.cr.dictfetchone()
+
+    @api.model
+    def get_state_type_breakdown(self, domain):
+        """
+        Jumlah dan nilai move per state dan per move_type (satu query GROUP BY).
+
+        Returns:
+            tuple: ({state: {'count', 'amount'}}, {move_type: {'count', 'amount'}})
+        """
+        subquery, params = self._move_subquery(domain)
+        self.env.cr.execute("""
+            SELECT state, move_type, COUNT(*) AS count, COALESCE(SUM(amount_total), 0)::float AS amount
+            FROM account_move
+            WHERE id IN ({subquery})
+            GROUP BY state, move_type
+        """.format(subquery=subquery), params)
+
+        by_state = {state: {'count': 0, 'amount': 0} for state in MOVE_STATES}
+        by_type = {move_type: {'count': 0, 'amount': 0} for move_type in MOVE_TYPES}
+        for row in self.env.cr.dictfetchall():
+            for bucket, key in ((by_state, row['state']), (by_type, row['move_type'])):
+                if key in bucket:
+                    bucket[key]['count'] += row['count']
+                    bucket[key]['amount'] += row['amount']
+        return by_state, by_type
+
+    @api.model
+    def get_monthly_breakdown(self, domain):
+        """
+        Returns:
+            dict: {'YYYY-MM': {'count', 'amount'}}, bulan terbaru lebih dulu
+        """
+        subquery, params = self._move_subquery(domain)
+        self.env.cr.execute("""
+            SELECT to_char(date, 'YYYY-MM') AS month, COUNT(*) AS count,
+                   COALESCE(SUM(amount_total), 0)::float AS amount
+            FROM account_move
+            WHERE id IN ({subquery}) AND date IS NOT NULL
+            GROUP BY 1
+            ORDER BY 1 DESC
+        """.format(subquery=subquery), params)
+        return {
+            row['month']: {'count': row['count'], 'amount': row['amount']}
+            for row in self.env.cr.dictfetchall()
+        }
+
+    @api.model
+    def get_top_partners(self, domain, partner_field='partner_id', limit=10):
+        """
+        Partner dengan nilai transaksi terbesar.
+
+        Args:
+            partner_field (str): 'partner_id' (customer) atau 'vendor_id' (vendor)
+
+        Returns:
+            list: dict id, name, count, amount urut amount menurun
+        """
+        if partner_field not in PARTNER_FIELDS:
+            raise ValueError("Invalid partner field: %s" % partner_field)
+
+        subquery, params = self._move_subquery(domain)
+        self.env.cr.execute("""
+            SELECT {field} AS partner_id, COUNT(*) AS count,
+                   COALESCE(SUM(amount_total), 0)::float AS amount
+            FROM account_move
+            WHERE id IN ({subquery}) AND {field} IS NOT NULL
+            GROUP BY {field}
+            ORDER BY amount DESC, {field}
+            LIMIT %s
+        """.format(field=partner_field, subquery=subquery), list(params) + [limit])
+        rows = self.env.cr.dictfetchall()
+
+        partners = self.env['res.partner'].browse([row['partner_id'] for row in rows])
+        names = {partner.id: partner.name for partner in partners}
+        return [{
+            'id': row['partner_id'],
+            'name': names.get(row['partner_id']),
+            'count': row['count'],
+            'amount': row['amount']
+        } for row in rows]
+
+    @api.model
+    def get_customer_analysis(self, domain):
+        """
+        Sumber customer dan jumlah customer loyal dari journal item move yang cocok.
+
+        Returns:
+            dict: customer_sources {source: count}, loyal_customers {count, percentage}
+        """
+        self.env['account.move'].flush_model()
+        Line = self.env['account.move.line']
+        Line.flush_model(['move_id', 'customer_source', 'is_loyal_customer'])
+        line_query = Line._search([
+            ('move_id', 'in', self.env['account.move']._search(domain)),
+            ('customer_source', '!=', False)
+        ])
+        subquery, params = line_query.subselect()
+        self.env.cr.execute("""
+            SELECT customer_source, COUNT(*) AS count,
+                   COUNT(*) FILTER (WHERE is_loyal_customer) AS loyal_count
+            FROM account_move_line
+            WHERE id IN ({subquery})
+            GROUP BY customer_source
+        """.format(subquery=subquery), params)
+        rows = self.env.cr.dictfetchall()
+
+        loyal_count = sum(row['loyal_count'] for row in rows)
+        total_count = sum(row['count'] for row in rows)
+        return {
+            'customer_sources': {row['customer_source']: row['count'] for row in rows},
+            'loyal_customers': {
+                'count': loyal_count,
+                'percentage': (loyal_count / total_count * 100) if total_count > 0 else 0
+            }
+        }
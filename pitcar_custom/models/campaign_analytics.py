@@ -1,10 +1,38 @@
 # models/campaign_analytics.py
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from datetime import datetime
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Kunci natural satu baris export Meta Ads
+CAMPAIGN_NATURAL_KEY = ('campaign_name', 'adset_name', 'ad_name', 'date_start', 'date_stop')
+
+# Mapping header CSV export Meta Ads ke field model
+CAMPAIGN_CSV_FIELD_MAPPING = {
+    'campaign_name': 'campaign_name',
+    'adset_name': 'adset_name',
+    'ad_name': 'ad_name',
+    'spend': 'spend',
+    'reach': 'reach',
+    'impressions': 'impressions',
+    'frequency': 'frequency',
+    'cpm': 'cpm',
+    'date_start': 'date_start',
+    'date_stop': 'date_stop',
+    'onsite_conversion.messaging_conversation_started_7d': 'messaging_conversation_started_7d',
+    'cost_per_onsite_conversion.messaging_conversation_started_7d': 'cost_per_messaging_conversion',
+    'purchase': 'purchase',
+    'add_to_cart': 'add_to_cart',
+    'cost_per_purchase': 'cost_per_purchase',
+    'cost_per_add_to_cart': 'cost_per_add_to_cart',
+    'purchase_value': 'purchase_value'
+}
+CAMPAIGN_INTEGER_FIELDS = ('reach', 'impressions', 'messaging_conversation_started_7d', 'purchase', 'add_to_cart')
+CAMPAIGN_FLOAT_FIELDS = ('spend', 'frequency', 'cpm', 'cost_per_messaging_conversion',
+                         'cost_per_purchase', 'cost_per_add_to_cart', 'purchase_value')
+
 class CampaignAnalytics(models.Model):
     _name = 'campaign.analytics'
     _description = 'Campaign Analytics Data'
@@ -117,6 +145,16 @@ class CampaignAnalytics(models.Model):
         help='Total nilai pembelian'
     )
 
+    # Import
+    import_job_id = fields.Many2one(
+        'campaign.import.job',
+        string='Import Job',
+        index=True,
+        ondelete='set null',
+        copy=False,
+        help='Job import terakhir yang membuat atau memperbarui data ini'
+    )
+
     # Computed Fields
     campaign_duration = fields.Integer(
         string='Campaign Duration (Days)',
@@ -339,6 +377,141 @@ class CampaignAnalytics(models.Model):
             result.append((record.id, name))
         return result
 
+    def init(self):
+        # Lookup upsert import berdasarkan kunci natural
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS campaign_analytics_natural_key_idx
+            ON campaign_analytics (campaign_name, adset_name, ad_name, date_start, date_stop)
+        """)
+
+    @api.model
+    def _parse_import_date(self, date_string):
+        """Parse date string to date object"""
+        if not date_string:
+            return fields.Date.today()
+            
+        date_formats = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d']
+        
+        for fmt in date_formats:
+            try:
+                return datetime.strptime(date_string, fmt).date()
+            except ValueError:
+                continue
+        
+        raise ValueError(f'Unable to parse date: {date_string}')
+
+    @api.model
+    def _parse_import_row(self, row):
+        """Parse a single CSV row into campaign values"""
+        values = {}
+        
+        for csv_field, model_field in CAMPAIGN_CSV_FIELD_MAPPING.items():
+            if csv_field in row and row[csv_field]:
+                raw_value = row[csv_field].strip()
+                
+                if model_field in ['date_start', 'date_stop']:
+                    values[model_field] = self._parse_import_date(raw_value)
+                elif model_field in CAMPAIGN_INTEGER_FIELDS:
+                    values[model_field] = int(float(raw_value)) if raw_value else 0
+                elif model_field in CAMPAIGN_FLOAT_FIELDS:
+                    values[model_field] = float(raw_value) if raw_value else 0.0
+                else:
+                    values[model_field] = raw_value
+
+        return values
+
+    @api.model
+    def upsert_import_rows(self, rows, extra_values=None):
+        """
+        Upsert satu batch baris import berdasarkan kunci natural
+        (campaign_name, adset_name, ad_name, date_start, date_stop).
+
+        Record yang sudah ada dicari dengan satu search untuk seluruh batch,
+        record baru dibuat dengan satu create. Baris dengan kunci sama di dalam
+        batch digabung (baris terakhir menang).
+
+        Args:
+            rows (iterable): tuple (nomor baris, dict kolom CSV)
+            extra_values (dict): nilai tambahan untuk setiap record (mis. import_job_id)
+
+        Returns:
+            dict: created_ids, updated_ids, errors (list teks per baris)
+        """
+        errors = []
+        values_by_key = {}
+        for row_num, row in rows:
+            try:
+                values = self._parse_import_row(row)
+                missing = [name for name in CAMPAIGN_NATURAL_KEY if not values.get(name)]
+                if missing:
+                    raise ValueError('Missing required field(s): %s' % ', '.join(missing))
+                key = tuple(values[name] for name in CAMPAIGN_NATURAL_KEY)
+                if extra_values:
+                    values.update(extra_values)
+                values_by_key.pop(key, None)
+                values_by_key[key] = (row_num, values)
+            except Exception as e:
+                errors.append(f"Row {row_num}: {str(e)}")
+
+        result = {'created_ids': [], 'updated_ids': [], 'errors': errors}
+        if not values_by_key:
+            return result
+
+        Campaign = self.with_context(active_test=False)
+        keys = list(values_by_key)
+        existing = Campaign.search([
+            (name, 'in', list({key[index] for key in keys}))
+            for index, name in enumerate(CAMPAIGN_NATURAL_KEY)
+        ], order='id')
+        existing_by_key = {}
+        for record in existing:
+            existing_by_key.setdefault(tuple(record[name] for name in CAMPAIGN_NATURAL_KEY), record)
+
+        creates = []
+        writes = []
+        for key, (row_num, values) in values_by_key.items():
+            record = existing_by_key.get(key)
+            if record:
+                writes.append((row_num, record, values))
+            else:
+                creates.append((row_num, values))
+
+        if writes:
+            try:
+                with self.env.cr.savepoint():
+                    for _row_num, record, values in writes:
+                        record.write(values)
+                result['updated_ids'].extend(record.id for _, record, _ in writes)
+            except Exception as e:
+                # Ulangi per baris supaya hanya baris yang bermasalah yang gagal
+                _logger.warning("Campaign batch update failed, retrying per row: %s", e)
+                self.env.clear()
+                for row_num, record, values in writes:
+                    try:
+                        with self.env.cr.savepoint():
+                            record.write(values)
+                        result['updated_ids'].append(record.id)
+                    except Exception as row_error:
+                        self.env.clear()
+                        errors.append(f"Row {row_num}: {str(row_error)}")
+
+        if creates:
+            try:
+                with self.env.cr.savepoint():
+                    result['created_ids'].extend(self.create([values for _, values in creates]).ids)
+            except Exception as e:
+                # Ulangi per baris supaya hanya baris yang bermasalah yang gagal
+                _logger.warning("Campaign batch create failed, retrying per row: %s", e)
+                self.env.clear()
+                for row_num, values in creates:
+                    try:
+                        with self.env.cr.savepoint():
+                            result['created_ids'].append(self.create(values).id)
+                    except Exception as row_error:
+                        self.env.clear()
+                        errors.append(f"Row {row_num}: {str(row_error)}")
+        return result
+
     @api.model
     def create_from_csv_data(self, csv_data):
         """Helper method to create records from CSV data"""
@@ -0,0 +1,189 @@
+from odoo import models, fields, api, _
+from odoo.tools import split_every
+from itertools import islice
+import csv
+import io
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+MAX_LOGGED_ERRORS = 100
+CRON_TIME_LIMIT = 240
+
+
+class CampaignImportJob(models.Model):
+    """
+    Job import CSV Campaign Analytics.
+
+    File disimpan sebagai attachment lalu dibaca secara streaming per batch
+    (csv.DictReader di atas TextIOWrapper), sehingga file tidak pernah
+    di-decode utuh ke memori. Setiap batch di-upsert berdasarkan kunci natural
+    lewat campaign.analytics.upsert_import_rows. File besar diproses oleh cron
+    dengan commit per batch; processed_rows menjadi titik lanjut jika job
+    terhenti di tengah jalan.
+    """
+    _name = 'campaign.import.job'
+    _description = 'Campaign Analytics Import Job'
+    _order = 'id desc'
+
+    name = fields.Char(string='Name', required=True, default=lambda self: _('Campaign Import'))
+    user_id = fields.Many2one('res.users', string='Requested By', default=lambda self: self.env.user)
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed')
+    ], string='Status', default='queued', required=True, index=True)
+
+    attachment_id = fields.Many2one('ir.attachment', string='File', ondelete='set null')
+    total_rows = fields.Integer(string='Total Rows', help='Perkiraan jumlah baris (jumlah baris baru di file)')
+    processed_rows = fields.Integer(string='Processed Rows')
+    progress = fields.Float(string='Progress (%)', compute='_compute_progress')
+    created_count = fields.Integer(string='Created')
+    updated_count = fields.Integer(string='Updated')
+    error_count = fields.Integer(string='Errors')
+    error_log = fields.Text(string='Error Log')
+    started_at = fields.Datetime(string='Started At')
+    finished_at = fields.Datetime(string='Finished At')
+
+    @api.depends('total_rows', 'processed_rows', 'state')
+    def _compute_progress(self):
+        for job in self:
+            if job.state == 'done':
+                job.progress = 100.0
+            elif job.total_rows:
+                job.progress = round(min(job.processed_rows / job.total_rows, 1.0) * 100, 1)
+            else:
+                job.progress = 0.0
+
+    @api.model
+    def create_from_content(self, content, filename=None):
+        """Buat job dari isi file CSV (bytes)"""
+        job = self.create({
+            'name': filename or _('Campaign Import'),
+            # Baris header tidak dihitung
+            'total_rows': content.rstrip(b'\r\n').count(b'\n'),
+        })
+        job.attachment_id = self.env['ir.attachment'].sudo().create({
+            'name': filename or 'campaign_import.csv',
+            'raw': content,
+            'mimetype': 'text/csv',
+            'res_model': self._name,
+            'res_id': job.id,
+        })
+        return job
+
+    def _iter_rows(self):
+        """
+        Baris CSV sebagai tuple (nomor baris, dict). Attachment di filestore dibaca
+        langsung dari file; hanya attachment yang disimpan di database yang dimuat utuh.
+        """
+        self.ensure_one()
+        attachment = self.attachment_id.sudo()
+        if attachment.store_fname:
+            binary = open(attachment._full_path(attachment.store_fname), 'rb')
+        else:
+            binary = io.BytesIO(attachment.raw or b'')
+        with io.TextIOWrapper(binary, encoding='utf-8-sig', newline='') as stream:
+            yield from enumerate(csv.DictReader(stream), start=2)
+
+    def _run(self, time_limit=None, commit=False):
+        """
+        Proses job mulai dari processed_rows.
+
+        Args:
+            time_limit (int): batas waktu dalam detik; job berhenti setelah batch berjalan selesai
+            commit (bool): commit setelah setiap batch (hanya untuk cron)
+
+        Returns:
+            bool: True jika semua baris sudah diproses
+        """
+        self.ensure_one()
+        if self.state not in ('queued', 'running'):
+            return True
+
+        deadline = time_limit and time.time() + time_limit
+        if self.state == 'queued':
+            self.write({'state': 'running', 'started_at': fields.Datetime.now()})
+
+        Campaign = self.env['campaign.analytics'].with_context(tracking_disable=True, mail_create_nolog=True)
+        rows = islice(self._iter_rows(), self.processed_rows, None)
+        for batch in split_every(IMPORT_BATCH_SIZE, rows):
+            result = Campaign.upsert_import_rows(batch, {'import_job_id': self.id})
+            vals = {
+                'processed_rows': self.processed_rows + len(batch),
+                'created_count': self.created_count + len(result['created_ids']),
+                'updated_count': self.updated_count + len(set(result['updated_ids'])),
+                'error_count': self.error_count + len(result['errors']),
+            }
+            logged = (self.error_log or '').splitlines()
+            if result['errors'] and len(logged) < MAX_LOGGED_ERRORS:
+                vals['error_log'] = '\n'.join(logged + result['errors'][:MAX_LOGGED_ERRORS - len(logged)])
+            self.write(vals)
+            if commit:
+                self.env.cr.commit()
+            if deadline and time.time() > deadline:
+                return False
+
+        self.write({
+            'state': 'done',
+            'total_rows': self.processed_rows,
+            'finished_at': fields.Datetime.now(),
+        })
+        if commit:
+            self.env.cr.commit()
+        return True
+
+    def _fail(self, error):
+        self.write({
+            'state': 'failed',
+            'finished_at': fields.Datetime.now(),
+            'error_log': '\n'.join(filter(None, [self.error_log, str(error)])),
+        })
+
+    def action_enqueue(self):
+        """Jalankan job di background lewat cron"""
+        self.filtered(lambda j: j.state == 'failed').write({'state': 'running', 'finished_at': False})
+        cron = self.env.ref('pitcar_custom.ir_cron_campaign_import_jobs', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    @api.model
+    def _cron_process_jobs(self, time_limit=CRON_TIME_LIMIT):
+        """Proses job yang antre; cron dipicu ulang jika waktu habis sebelum semua selesai"""
+        deadline = time.time() + time_limit
+        for job in self.search([('state', 'in', ('queued', 'running'))], order='id'):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                self.env.ref('pitcar_custom.ir_cron_campaign_import_jobs')._trigger()
+                break
+            try:
+                finished = job._run(time_limit=remaining, commit=True)
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.exception("Campaign import job %s failed", job.id)
+                job._fail(e)
+                self.env.cr.commit()
+                continue
+            if not finished:
+                self.env.ref('pitcar_custom.ir_cron_campaign_import_jobs')._trigger()
+                break
+
+    def get_summary(self):
+        """Ringkasan hasil import untuk ditampilkan di wizard"""
+        self.ensure_one()
+        if self.state in ('queued', 'running'):
+            text = _("Import running in background: %s / %s rows processed (%s%%)") % (
+                self.processed_rows, self.total_rows, self.progress)
+        elif self.state == 'failed':
+            text = _("Import failed after %s rows") % self.processed_rows
+        else:
+            text = _("Import completed!")
+        text += "\n" + _("Created: %s records") % self.created_count
+        text += "\n" + _("Updated: %s records") % self.updated_count
+        text += "\n" + _("Errors: %s") % self.error_count
+        if self.error_log:
+            text += "\n\n" + _("Errors:") + "\n" + "\n".join(self.error_log.splitlines()[:5])
+        return text
@@ -0,0 +1,334 @@
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+PENDING_TASK_STATES = ('draft', 'in_progress', 'review', 'revision')
+FEEDBACK_KEYWORDS = ("quality", "deadline", "format", "incorrect", "missing", "rework", "clarity", "alignment", "brand")
+
+# Unit date_trunc PostgreSQL per jenis pengelompokan trend
+TREND_UNITS = {
+    'daily': 'day',
+    'weekly': 'week',
+    'monthly': 'month',
+}
+
+# Durasi aktual task dalam jam (sama dengan content.task._compute_hours)
+ACTUAL_HOURS_SQL = """
+    CASE WHEN t.actual_date_start IS NOT NULL AND t.actual_date_end IS NOT NULL
+         THEN ROUND((EXTRACT(EPOCH FROM (t.actual_date_end - t.actual_date_start)) / 3600.0)::numeric, 2)
+         ELSE 0 END
+"""
+
+
+class ContentDashboardStats(models.AbstractModel):
+    """
+    Agregasi dashboard content (task, BAU, revisi).
+
+    Task difilter lewat content.task._search(domain) lalu dihitung dengan
+    GROUP BY di database, dan trend dikelompokkan per hari/minggu/bulan
+    dengan date_trunc, sehingga dashboard tidak memuat semua task ke memori.
+    """
+    _name = 'content.dashboard.stats'
+    _description = 'Content Dashboard Aggregation'
+
+    # ------------------------------------------------------------------
+    # Filter
+    # ------------------------------------------------------------------
+    @api.model
+    def _task_subquery(self, project_id=None, employee_id=None):
+        """(sql, params) subquery id content.task sesuai filter project / anggota tim"""
+        domain = []
+        if project_id:
+            domain.append(('project_id', '=', project_id))
+        if employee_id:
+            domain.append(('assigned_to', 'in', [employee_id]))
+        Task = self.env['content.task']
+        Task.flush_model()
+        return Task._search(domain).subselect()
+
+    # ------------------------------------------------------------------
+    # Trend
+    # ------------------------------------------------------------------
+    @api.model
+    def get_trend_grouping(self, date_from, date_to):
+        """Harian sampai 14 hari, mingguan sampai 60 hari, selebihnya bulanan"""
+        delta = (date_to - date_from).days + 1
+        if delta > 60:
+            return 'monthly'
+        if delta > 14:
+            return 'weekly'
+        return 'daily'
+
+    @api.model
+    def get_trend_periods(self, date_from, date_to, grouping):
+        """
+        Awal setiap bucket dan label tampilannya.
+
+        Returns:
+            list: tuple (tanggal awal bucket, label) urut waktu
+        """
+        periods = []
+        if grouping == 'daily':
+            current = date_from
+            while current <= date_to:
+                periods.append((current, str(current)))
+                current += timedelta(days=1)
+        elif grouping == 'weekly':
+            current = date_from - timedelta(days=date_from.weekday())
+            while current <= date_to:
+                periods.append((current, f"{current} to {current + timedelta(days=6)}"))
+                current += timedelta(days=7)
+        else:
+            current = date_from.replace(day=1)
+            while current <= date_to:
+                periods.append((current, f"{current.year}-{current.month}"))
+                current = (current + timedelta(days=32)).replace(day=1)
+        return periods
+
+    @api.model
+    def get_trend_counts(self, date_from, date_to, grouping):
+        """
+        Jumlah task dibuat, task selesai, BAU selesai dan revisi per bucket.
+
+        Tanggal datetime dibandingkan sebagai tanggal UTC (sama dengan .date()
+        pada nilai field Datetime).
+
+        Returns:
+            dict: {'task_creation', 'task_completion', 'bau_completion'}: {bucket: count},
+                  'revisions': {bucket: (revision_count, task_count)}
+        """
+        unit = TREND_UNITS[grouping]
+        self.env['content.task'].flush_model(['create_date', 'state', 'actual_date_end'])
+        self.env['content.bau'].flush_model(['date', 'state'])
+        self.env['content.revision'].flush_model(['date_requested', 'task_id'])
+        cr = self.env.cr
+        params = {'unit': unit, 'date_from': date_from, 'date_to': date_to, 'next_day': date_to + timedelta(days=1)}
+
+        cr.execute("""
+            SELECT date_trunc(%(unit)s, create_date)::date, COUNT(*)
+            FROM content_task
+            WHERE create_date >= %(date_from)s AND create_date < %(next_day)s
+            GROUP BY 1
+        """, params)
+        task_creation = dict(cr.fetchall())
+
+        cr.execute("""
+            SELECT date_trunc(%(unit)s, actual_date_end)::date, COUNT(*)
+            FROM content_task
+            WHERE state = 'done' AND actual_date_end >= %(date_from)s AND actual_date_end < %(next_day)s
+            GROUP BY 1
+        """, params)
+        task_completion = dict(cr.fetchall())
+
+        cr.execute("""
+            SELECT date_trunc(%(unit)s, date)::date, COUNT(*)
+            FROM content_bau
+            WHERE state = 'done' AND date BETWEEN %(date_from)s AND %(date_to)s
+            GROUP BY 1
+        """, params)
+        bau_completion = dict(cr.fetchall())
+
+        cr.execute("""
+            SELECT date_trunc(%(unit)s, date_requested)::date, COUNT(*), COUNT(DISTINCT task_id)
+            FROM content_revision
+            WHERE date_requested >= %(date_from)s AND date_requested < %(next_day)s
+            GROUP BY 1
+        """, params)
+        revisions = {bucket: (count, task_count) for bucket, count, task_count in cr.fetchall()}
+
+        return {
+            'task_creation': task_creation,
+            'task_completion': task_completion,
+            'bau_completion': bau_completion,
+            'revisions': revisions,
+        }
+
+    # ------------------------------------------------------------------
+    # Task
+    # ------------------------------------------------------------------
+    @api.model
+    def get_task_summary(self, project_id=None, employee_id=None):
+        """
+        Returns:
+            dict: total, pending, completed, on_time, delayed
+        """
+        subquery, params = self._task_subquery(project_id, employee_id)
+        self.env.cr.execute("""
+            SELECT COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE state IN %s) AS pending,
+                   COUNT(*) FILTER (WHERE state = 'done') AS completed,
+                   COUNT(*) FILTER (
+                       WHERE state = 'done' AND actual_date_end <= planned_date_end
+                   ) AS on_time,
+                   COUNT(*) FILTER (
+                       WHERE state = 'done' AND actual_date_end > planned_date_end
+                   ) AS delayed
+            FROM content_task
+            WHERE id IN ({subquery})
+        """.format(subquery=subquery), [PENDING_TASK_STATES] + list(params))
+        return self.env.cr.dictfetchone()
+
+    @api.model
+    def get_time_tracking(self, project_id=None, employee_id=None, limit=10):
+        """
+        Jam rencana vs aktual task selesai (total dan task dengan selisih terbesar)
+        serta jam per content type untuk semua task.
+
+        Returns:
+            dict: planned_vs_actual (maks limit), by_content_type, total_planned, total_actual
+        """
+        subquery, params = self._task_subquery(project_id, employee_id)
+        cr = self.env.cr
+
+        cr.execute("""
+            SELECT COALESCE(SUM(t.planned_hours), 0)::float AS total_planned,
+                   COALESCE(SUM({actual_hours}), 0)::float AS total_actual
+            FROM content_task t
+            WHERE t.id IN ({subquery}) AND t.state = 'done' AND t.planned_hours > 0
+        """.format(actual_hours=ACTUAL_HOURS_SQL, subquery=subquery), params)
+        totals = cr.dictfetchone()
+
+        cr.execute("""
+            SELECT t.id, t.name, t.content_type, t.planned_hours,
+                   ({actual_hours})::float AS actual_hours
+            FROM content_task t
+            WHERE t.id IN ({subquery}) AND t.state = 'done' AND t.planned_hours > 0
+            ORDER BY ABS(({actual_hours}) - t.planned_hours) DESC, t.id
+            LIMIT %s
+        """.format(actual_hours=ACTUAL_HOURS_SQL, subquery=subquery), list(params) + [limit])
+        planned_vs_actual = [{
+            'id': row['id'],
+            'name': row['name'],
+            'content_type': row['content_type'],
+            'planned_hours': row['planned_hours'],
+            'actual_hours': row['actual_hours'],
+            'variance': row['actual_hours'] - row['planned_hours'],
+            'variance_percent': (row['actual_hours'] - row['planned_hours']) / row['planned_hours'] * 100
+        } for row in cr.dictfetchall()]
+
+        cr.execute("""
+            SELECT t.content_type,
+                   COALESCE(SUM(t.planned_hours), 0)::float AS planned,
+                   COALESCE(SUM({actual_hours}), 0)::float AS actual,
+                   COUNT(*) AS tasks
+            FROM content_task t
+            WHERE t.id IN ({subquery}) AND t.content_type IS NOT NULL
+            GROUP BY t.content_type
+        """.format(actual_hours=ACTUAL_HOURS_SQL, subquery=subquery), params)
+        by_content_type = [{
+            'type': row['content_type'],
+            'total_planned': round(row['planned'], 1),
+            'total_actual': round(row['actual'], 1),
+            'avg_planned': round(row['planned'] / row['tasks'], 1),
+            'avg_actual': round(row['actual'] / row['tasks'], 1),
+            'task_count': row['tasks']
+        } for row in cr.dictfetchall()]
+
+        return {
+            'planned_vs_actual': planned_vs_actual,
+            'by_content_type': by_content_type,
+            'total_planned': totals['total_planned'],
+            'total_actual': totals['total_actual'],
+        }
+
+    # ------------------------------------------------------------------
+    # Revisi
+    # ------------------------------------------------------------------
+    @api.model
+    def get_revision_stats(self, project_id=None, employee_id=None, limit=10):
+        """
+        Returns:
+            dict: high_revision_task_ids (maks limit, revisi terbanyak lebih dulu),
+                  by_content_type, by_requestor, feedback_keywords, total_revisions,
+                  tasks_with_revisions, excessive_revisions_count
+        """
+        subquery, params = self._task_subquery(project_id, employee_id)
+        self.env['content.revision'].flush_model(['task_id', 'requested_by', 'feedback'])
+        cr = self.env.cr
+
+        cr.execute("""
+            SELECT COALESCE(SUM(revision_count), 0) AS total_revisions,
+                   COUNT(*) FILTER (WHERE revision_count > 0) AS tasks_with_revisions,
+                   COUNT(*) FILTER (WHERE revision_count > max_allowed_revisions) AS excessive_revisions_count
+            FROM content_task
+            WHERE id IN ({subquery})
+        """.format(subquery=subquery), params)
+        result = cr.dictfetchone()
+
+        cr.execute("""
+            SELECT id FROM content_task
+            WHERE id IN ({subquery}) AND revision_count > 0
+            ORDER BY revision_count DESC, id
+            LIMIT %s
+        """.format(subquery=subquery), list(params) + [limit])
+        result['high_revision_task_ids'] = [row[0] for row in cr.fetchall()]
+
+        cr.execute("""
+            SELECT content_type, COALESCE(SUM(revision_count), 0) AS count, COUNT(*) AS tasks
+            FROM content_task
+            WHERE id IN ({subquery}) AND content_type IS NOT NULL
+            GROUP BY content_type
+        """.format(subquery=subquery), params)
+        result['by_content_type'] = cr.dictfetchall()
+
+        cr.execute("""
+            SELECT requested_by, COUNT(*) AS count
+            FROM content_revision
+            WHERE task_id IN ({subquery}) AND requested_by IS NOT NULL
+            GROUP BY requested_by
+        """.format(subquery=subquery), params)
+        result['by_requestor'] = dict(cr.fetchall())
+
+        keyword_counts = ', '.join(
+            "COUNT(*) FILTER (WHERE feedback ILIKE %s)" for _keyword in FEEDBACK_KEYWORDS
+        )
+        cr.execute("""
+            SELECT {keyword_counts}
+            FROM content_revision
+            WHERE task_id IN ({subquery})
+        """.format(keyword_counts=keyword_counts, subquery=subquery),
+            ['%%%s%%' % keyword for keyword in FEEDBACK_KEYWORDS] + list(params))
+        result['feedback_keywords'] = {
+            keyword: count for keyword, count in zip(FEEDBACK_KEYWORDS, cr.fetchone()) if count
+        }
+        return result
+
+    # ------------------------------------------------------------------
+    # BAU
+    # ------------------------------------------------------------------
+    @api.model
+    def get_bau_summary(self, date_from, date_to, project_id=None, creator_id=None):
+        """
+        Returns:
+            dict: total, planned, completed, total_hours, daily_hours [{'date', 'hours'}] urut tanggal
+        """
+        self.env['content.bau'].flush_model(['date', 'state', 'hours_spent', 'project_id', 'creator_id'])
+        where = ["date >= %s", "date <= %s"]
+        params = [fields.Date.to_date(date_from), fields.Date.to_date(date_to)]
+        if project_id:
+            where.append("project_id = %s")
+            params.append(project_id)
+        if creator_id:
+            where.append("creator_id = %s")
+            params.append(creator_id)
+
+        self.env.cr.execute("""
+            SELECT date, COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE state = 'planned') AS planned,
+                   COUNT(*) FILTER (WHERE state = 'done') AS completed,
+                   COALESCE(SUM(hours_spent), 0)::float AS hours
+            FROM content_bau
+            WHERE {where}
+            GROUP BY date
+            ORDER BY date
+        """.format(where=' AND '.join(where)), params)
+        rows = self.env.cr.dictfetchall()
+        return {
+            'total': sum(row['total'] for row in rows),
+            'planned': sum(row['planned'] for row in rows),
+            'completed': sum(row['completed'] for row in rows),
+            'total_hours': sum(row['hours'] for row in rows),
+            'daily_hours': [{'date': str(row['date']), 'hours': round(row['hours'], 1)} for row in rows],
+        }
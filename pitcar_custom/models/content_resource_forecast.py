@@ -0,0 +1,290 @@
+from odoo import models, fields, api
+from datetime import datetime, time, timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+PENDING_TASK_STATES = ('draft', 'in_progress', 'review', 'revision')
+CONTENT_TYPES = ('video', 'design')
+# 5 task aktif per minggu = 100% alokasi
+TASKS_PER_WEEK = 5
+ALLOCATION_PER_TASK = 100 // TASKS_PER_WEEK
+
+
+class ContentForecastTasks(object):
+    """Task pending dalam horizon forecast beserta offset minggunya"""
+
+    def __init__(self, rows, date_from, weeks_ahead):
+        self.rows = rows
+        self.date_from = date_from
+        self.weeks_ahead = weeks_ahead
+
+    def delivery_week(self, row):
+        """Minggu target selesai (0..weeks_ahead-1) atau None"""
+        if not row['planned_date_end']:
+            return None
+        week = (row['planned_date_end'].date() - self.date_from).days // 7
+        return week if 0 <= week < self.weeks_ahead else None
+
+    def active_weeks(self, row):
+        """
+        Minggu di mana task aktif: rentang rencana beririsan dengan minggu
+        tersebut atau tanggal mulai jatuh di minggu tersebut.
+        """
+        if not row['planned_date_start'] or not row['planned_date_end']:
+            return []
+        start_offset = (row['planned_date_start'].date() - self.date_from).days
+        end_offset = (row['planned_date_end'].date() - self.date_from).days
+        first_week = max(0, -(-(start_offset - 6) // 7))
+        last_week = min(self.weeks_ahead - 1, end_offset // 7)
+        weeks = set(range(first_week, last_week + 1))
+        if 0 <= start_offset // 7 < self.weeks_ahead:
+            weeks.add(start_offset // 7)
+        return sorted(weeks)
+
+
+class ContentResourceForecast(models.AbstractModel):
+    """
+    Forecast beban kerja tim content.
+
+    Task pending beserta assignee diambil dengan satu query, lalu matriks
+    alokasi employee x minggu, forecast delivery per minggu dan demand vs
+    kapasitas dibangun dalam satu kali lintasan atas task tersebut. Biaya
+    forecast mengikuti jumlah task aktif, bukan jumlah employee perusahaan.
+    """
+    _name = 'content.resource.forecast'
+    _description = 'Content Resource Forecast'
+
+    @api.model
+    def _fetch_pending_tasks(self, date_from, date_to, weeks_ahead):
+        """
+        Task pending yang masuk forecast delivery (target selesai >= date_from
+        atau belum ada) atau forecast resource (mulai/selesai dalam periode).
+        """
+        Task = self.env['content.task']
+        Task.flush_model(['state', 'planned_date_start', 'planned_date_end', 'content_type', 'project_id', 'name'])
+        assigned = Task._fields['assigned_to']
+        self.env.cr.execute("""
+            SELECT t.id, t.name, t.content_type, t.project_id, t.planned_date_start, t.planned_date_end,
+                   ARRAY_REMOVE(ARRAY_AGG(rel.{col2} ORDER BY rel.{col2}), NULL) AS employee_ids
+            FROM content_task t
+            LEFT JOIN {rel} rel ON rel.{col1} = t.id
+            WHERE t.state IN %(states)s
+              AND (t.planned_date_end >= %(date_from)s OR t.planned_date_end IS NULL
+                   OR (t.planned_date_start >= %(date_from)s AND t.planned_date_start <= %(date_to)s))
+            GROUP BY t.id
+            ORDER BY t.id
+        """.format(rel=assigned.relation, col1=assigned.column1, col2=assigned.column2), {
+            'states': PENDING_TASK_STATES,
+            'date_from': datetime.combine(date_from, time.min),
+            'date_to': datetime.combine(date_to, time.min),
+        })
+        return ContentForecastTasks(self.env.cr.dictfetchall(), date_from, weeks_ahead)
+
+    @api.model
+    def _in_resource_period(self, row, date_from, date_to):
+        """Mulai atau selesai rencana dalam [date_from, date_to] (batas datetime seperti domain search)"""
+        period_start = datetime.combine(date_from, time.min)
+        period_end = datetime.combine(date_to, time.min)
+        start, end = row['planned_date_start'], row['planned_date_end']
+        return bool((start and period_start <= start <= period_end) or (end and period_start <= end <= period_end))
+
+    @api.model
+    def get_team_capacity(self):
+        """
+        Kapasitas mingguan video dan design: jumlah employee dengan jabatan
+        mengandung 'video'/'design' x TASKS_PER_WEEK. Jika salah satunya nol,
+        diperkirakan dari task selesai 30 hari terakhir dibagi 4 minggu.
+
+        Returns:
+            dict: {'video': int, 'design': int}
+        """
+        Employee = self.env['hr.employee']
+        capacity = {
+            content_type: Employee.search_count([('job_id.name', 'ilike', content_type)]) * TASKS_PER_WEEK
+            for content_type in CONTENT_TYPES
+        }
+        if not all(capacity.values()):
+            groups = self.env['content.task'].read_group([
+                ('state', '=', 'done'),
+                ('actual_date_end', '>=', fields.Date.today() - timedelta(days=30)),
+                ('content_type', 'in', list(CONTENT_TYPES))
+            ], ['content_type'], ['content_type'], lazy=False)
+            completed = {group['content_type']: group['__count'] for group in groups}
+            for content_type in CONTENT_TYPES:
+                if not capacity[content_type]:
+                    capacity[content_type] = completed.get(content_type, 0) // 4
+        return capacity
+
+    @api.model
+    def suggest_leveling(self, allocation, tasks_by_id, weeks_ahead):
+        """
+        Saran perataan beban secara greedy untuk sel employee x minggu di atas
+        TASKS_PER_WEEK. Task berlebih (target selesai paling akhir lebih dulu)
+        dipindahkan ke employee lain dengan beban terendah di minggu itu yang
+        pernah memegang content type yang sama; jika tidak ada, ke minggu
+        berikutnya milik employee yang sama yang masih longgar.
+
+        Args:
+            allocation (dict): {employee_id: [list task_id per minggu]}
+
+        Returns:
+            list: dict task_id, task_name, week, from_employee_id, to_employee_id, to_week
+        """
+        loads = {employee_id: [len(week) for week in weeks] for employee_id, weeks in allocation.items()}
+        employees_by_type = {}
+        for employee_id, weeks in allocation.items():
+            for task_ids in weeks:
+                for task_id in task_ids:
+                    employees_by_type.setdefault(tasks_by_id[task_id]['content_type'], set()).add(employee_id)
+
+        far_future = datetime.max
+        suggestions = []
+        for week in range(weeks_ahead):
+            for employee_id in sorted(allocation):
+                excess = loads[employee_id][week] - TASKS_PER_WEEK
+                if excess <= 0:
+                    continue
+                candidates = sorted(
+                    allocation[employee_id][week],
+                    key=lambda task_id: tasks_by_id[task_id]['planned_date_end'] or far_future,
+                    reverse=True
+                )
+                for task_id in candidates[:excess]:
+                    task = tasks_by_id[task_id]
+                    peers = [
+                        peer for peer in employees_by_type.get(task['content_type'], ())
+                        if peer != employee_id and peer not in task['employee_ids']
+                        and loads[peer][week] < TASKS_PER_WEEK
+                    ]
+                    suggestion = {
+                        'task_id': task_id,
+                        'task_name': task['name'],
+                        'week': f"Week {week + 1}",
+                        'from_employee_id': employee_id,
+                        'to_employee_id': None,
+                        'to_week': None,
+                    }
+                    if peers:
+                        peer = min(peers, key=lambda p: (loads[p][week], p))
+                        loads[peer][week] += 1
+                        suggestion['to_employee_id'] = peer
+                        suggestion['to_week'] = suggestion['week']
+                    else:
+                        later = next((w for w in range(week + 1, weeks_ahead)
+                                      if loads[employee_id][w] < TASKS_PER_WEEK), None)
+                        if later is None:
+                            continue
+                        loads[employee_id][later] += 1
+                        suggestion['to_employee_id'] = employee_id
+                        suggestion['to_week'] = f"Week {later + 1}"
+                    loads[employee_id][week] -= 1
+                    suggestions.append(suggestion)
+        return suggestions
+
+    @api.model
+    def get_forecast(self, weeks_ahead=4, include_leveling=False):
+        """
+        Returns:
+            dict: resource_forecast, delivery_forecast, capacity_planning
+        """
+        date_from = fields.Date.today()
+        date_to = date_from + timedelta(days=weeks_ahead * 7)
+        tasks = self._fetch_pending_tasks(date_from, date_to, weeks_ahead)
+
+        week_starts = [date_from + timedelta(days=week * 7) for week in range(weeks_ahead)]
+        delivery = [{'video': 0, 'design': 0, 'total': 0, 'projects': set()} for _week in range(weeks_ahead)]
+        allocation = {}
+        tasks_by_id = {}
+        for row in tasks.rows:
+            week = tasks.delivery_week(row)
+            if week is not None:
+                bucket = delivery[week]
+                bucket['total'] += 1
+                if row['content_type'] in CONTENT_TYPES:
+                    bucket[row['content_type']] += 1
+                if row['project_id']:
+                    bucket['projects'].add(row['project_id'])
+
+            if not row['employee_ids'] or not self._in_resource_period(row, date_from, date_to):
+                continue
+            tasks_by_id[row['id']] = row
+            active_weeks = tasks.active_weeks(row)
+            for employee_id in row['employee_ids']:
+                weeks = allocation.setdefault(employee_id, [[] for _week in range(weeks_ahead)])
+                for active_week in active_weeks:
+                    weeks[active_week].append(row['id'])
+
+        delivery_forecast = [{
+            'week': f"Week {week + 1}",
+            'date_range': f"{week_starts[week]} to {week_starts[week] + timedelta(days=6)}",
+            'video_count': bucket['video'],
+            'design_count': bucket['design'],
+            'total_tasks': bucket['total'],
+            'projects': len(bucket['projects'])
+        } for week, bucket in enumerate(delivery)]
+
+        # Hanya employee yang punya task dalam periode, urutan default hr.employee
+        employees = self.env['hr.employee'].search([('id', 'in', list(allocation))])
+        resource_forecast = []
+        for employee in employees:
+            resource_forecast.append({
+                'id': employee.id,
+                'name': employee.name,
+                'position': employee.job_id.name if employee.job_id else '',
+                'weekly_allocation': [{
+                    'week': f"Week {week + 1}",
+                    'date_range': f"{week_starts[week]} to {week_starts[week] + timedelta(days=6)}",
+                    'task_count': len(task_ids),
+                    'allocation_percent': min(len(task_ids) * ALLOCATION_PER_TASK, 100),
+                    'task_ids': task_ids
+                } for week, task_ids in enumerate(allocation[employee.id])]
+            })
+        # Sort by highest allocation
+        resource_forecast.sort(
+            key=lambda x: sum(w['allocation_percent'] for w in x['weekly_allocation']),
+            reverse=True
+        )
+
+        # Calculate team capacity planning
+        capacity = self.get_team_capacity()
+        capacity_utilization = []
+        demand_vs_capacity = []
+        for week, forecast in enumerate(delivery_forecast):
+            utilization = {'week': forecast['week']}
+            for content_type in CONTENT_TYPES:
+                planned = forecast[f'{content_type}_count']
+                utilization[content_type] = {
+                    'capacity': capacity[content_type],
+                    'planned': planned,
+                    'utilization_percent': round(
+                        (planned / capacity[content_type] * 100) if capacity[content_type] > 0 else 0, 1
+                    )
+                }
+            capacity_utilization.append(utilization)
+
+            # Demand (slot task aktif) vs kapasitas anggota yang punya task di forecast
+            week_loads = [len(weeks[week]) for weeks in allocation.values()]
+            demand = sum(week_loads)
+            team_capacity = len(allocation) * TASKS_PER_WEEK
+            demand_vs_capacity.append({
+                'week': forecast['week'],
+                'capacity': team_capacity,
+                'demand': demand,
+                'utilization_percent': round((demand / team_capacity * 100) if team_capacity else 0, 1),
+                'overallocated_employees': sum(1 for load in week_loads if load > TASKS_PER_WEEK)
+            })
+
+        capacity_planning = {
+            'weekly_utilization': capacity_utilization,
+            'team_capacity': capacity,
+            'demand_vs_capacity': demand_vs_capacity,
+        }
+        if include_leveling:
+            capacity_planning['leveling_suggestions'] = self.suggest_leveling(allocation, tasks_by_id, weeks_ahead)
+
+        return {
+            'resource_forecast': resource_forecast,
+            'delivery_forecast': delivery_forecast,
+            'capacity_planning': capacity_planning,
+        }
@@ -0,0 +1,282 @@
+from odoo import models, api
+from bisect import bisect_left
+from calendar import monthrange
+from collections import Counter
+from datetime import datetime
+import logging
+
+_logger = logging.getLogger(__name__)
+
+INTERVAL_MONTHS = {
+    'monthly': 1,
+    '3_month': 3,
+    '6_month': 6,
+    '12_month': 12,
+}
+
+# Label segment jika nilai segment order pertama kosong
+EMPTY_SEGMENT_LABELS = {
+    'car_brand': 'Unknown',
+    'service_category': 'Unknown',
+    'service_advisor': 'No Advisor',
+    'customer_rating': 'No Rating',
+}
+
+
+def add_months(value, months):
+    """Sama dengan value + relativedelta(months=months): hari dipotong ke akhir bulan"""
+    month_index = value.year * 12 + value.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return value.replace(year=year, month=month, day=min(value.day, monthrange(year, month)[1]))
+
+
+class CohortOrders(object):
+    """
+    Order selesai dalam rentang sebagai kolom (tuple per field), urut
+    partner, date_completed, id. Order satu customer selalu bersebelahan
+    sehingga customer diproses sebagai potongan [start, end).
+    """
+
+    def __init__(self, rows, brand_names, advisor_names, category_labels):
+        columns = list(zip(*rows)) if rows else [()] * 10
+        (self.partners, self.cars, self.dates, self.amounts, self.brands, self.categories,
+         self.ratings, self.bookings, self.feedbacks, self.advisors) = columns
+        self.brand_names = brand_names
+        self.advisor_names = advisor_names
+        self.category_labels = category_labels
+
+    def __len__(self):
+        return len(self.partners)
+
+    def customer_runs(self):
+        """(start, end) index order untuk setiap customer"""
+        partners = self.partners
+        start = 0
+        for index in range(1, len(partners) + 1):
+            if index == len(partners) or partners[index] != partners[start]:
+                yield start, index
+                start = index
+
+    def segment_value(self, index, segment_by, advisor_mode='all'):
+        """Nilai segment dari order pada index, None jika segment_by tidak dikenal"""
+        if segment_by == 'car_brand':
+            value = self.brand_names.get(self.brands[index])
+        elif segment_by == 'service_category':
+            value = self.category_labels.get(self.categories[index])
+        elif segment_by == 'service_advisor':
+            advisor_ids = self.advisors[index] or []
+            if advisor_mode == 'first':
+                advisor_ids = advisor_ids[:1]
+            value = ', '.join(self.advisor_names.get(advisor_id) or '' for advisor_id in advisor_ids)
+        elif segment_by == 'customer_rating':
+            value = self.ratings[index]
+        else:
+            return None
+        return value or EMPTY_SEGMENT_LABELS[segment_by]
+
+
+class PitcarCustomerCohort(models.AbstractModel):
+    """
+    Analisis cohort retensi customer dari sale.order selesai.
+
+    Order diambil dengan satu query yang hanya memuat kolom yang dibutuhkan
+    (partner, mobil, tanggal selesai, nilai, kunci segment), lalu setiap
+    customer diproses satu kali: cohort, segment dan offset retensinya
+    langsung diakumulasikan ke bucket (segment, cohort).
+    """
+    _name = 'pitcar.customer.cohort'
+    _description = 'Customer Cohort Analysis'
+
+    @api.model
+    def _fetch_orders(self, start_date, end_date, with_advisors=False):
+        Order = self.env['sale.order']
+        Order.flush_model([
+            'state', 'date_completed', 'partner_id', 'partner_car_id', 'partner_car_brand', 'amount_total',
+            'service_category', 'customer_rating', 'is_booking', 'is_willing_to_feedback', 'service_advisor_id'
+        ])
+        advisors = Order._fields['service_advisor_id']
+        advisor_column = "NULL"
+        if with_advisors:
+            advisor_column = """(
+                SELECT ARRAY_AGG(rel.{col2} ORDER BY rel.{col2}) FROM {rel} rel WHERE rel.{col1} = so.id
+            )""".format(rel=advisors.relation, col1=advisors.column1, col2=advisors.column2)
+
+        self.env.cr.execute("""
+            SELECT so.partner_id, so.partner_car_id, so.date_completed,
+                   COALESCE(so.amount_total, 0)::float, so.partner_car_brand, so.service_category,
+                   so.customer_rating, COALESCE(so.is_booking, FALSE), so.is_willing_to_feedback,
+                   {advisor_column}
+            FROM sale_order so
+            WHERE so.state = 'sale' AND so.date_completed >= %s AND so.date_completed <= %s
+            ORDER BY so.partner_id, so.date_completed, so.id
+        """.format(advisor_column=advisor_column), (
+            start_date.strftime('%Y-%m-%d %H:%M:%S'), end_date.strftime('%Y-%m-%d %H:%M:%S')
+        ))
+        rows = self.env.cr.fetchall()
+
+        brand_ids = {row[4] for row in rows if row[4]}
+        brands = self.env['res.partner.car.brand'].sudo().browse(list(brand_ids))
+        advisor_ids = {advisor_id for row in rows for advisor_id in (row[9] or [])}
+        advisor_records = self.env['pitcar.service.advisor'].sudo().browse(list(advisor_ids))
+        return CohortOrders(
+            rows,
+            {brand.id: brand.name for brand in brands},
+            {advisor.id: advisor.name for advisor in advisor_records},
+            dict(Order._fields['service_category'].selection),
+        )
+
+    @api.model
+    def _cohort_key(self, value, interval_type):
+        if interval_type == 'monthly':
+            return value.strftime('%Y-%m')
+        if interval_type == '3_month':
+            return f"{value.year}-Q{(value.month - 1) // 3 + 1}"
+        if interval_type == '6_month':
+            return f"{value.year}-S{(value.month - 1) // 6 + 1}"
+        return f"{value.year}"
+
+    @api.model
+    def _cohort_display(self, cohort_key, interval_type):
+        """Format cohort key menjadi tampilan yang lebih user friendly"""
+        try:
+            if interval_type == 'monthly':
+                year, month = cohort_key.split('-')
+                return datetime(int(year), int(month), 1).strftime('%b %Y')
+            if interval_type in ('3_month', '6_month'):
+                year, period = cohort_key.split('-')
+                return f"{period} {year}"
+        except ValueError:
+            return cohort_key
+        return f"Year {cohort_key}"
+
+    @api.model
+    def _cohort_metrics(self, orders, runs, with_cars=False):
+        """Rating rata-rata, revenue, booking rate dan feedback rate dari semua order customer cohort"""
+        indexes = [index for start, end in runs for index in range(start, end)]
+        order_count = len(indexes)
+        ratings = [float(orders.ratings[i]) for i in indexes if orders.ratings[i] and orders.ratings[i].isdigit()]
+        booking_count = sum(1 for i in indexes if orders.bookings[i])
+        feedback_count = sum(1 for i in indexes if orders.feedbacks[i] == 'yes')
+        metrics = {
+            'avg_rating': round(sum(ratings) / len(ratings) if ratings else 0, 1),
+            'total_revenue': round(sum(orders.amounts[i] for i in indexes), 2),
+            'booking_rate': round((booking_count / order_count * 100) if order_count else 0, 1),
+            'feedback_rate': round((feedback_count / order_count * 100) if order_count else 0, 1),
+        }
+        if with_cars:
+            cars = sum(len({orders.cars[i] for i in range(start, end) if orders.cars[i]}) for start, end in runs)
+            metrics['cars_per_customer'] = round(cars / len(runs), 1) if runs else 0
+        return metrics
+
+    @api.model
+    def _format_result(self, orders, buckets, depth, interval_type, segment_by, include_metrics, with_cars, rate_fn):
+        """Susun output {'segmented', 'cohorts'} atau {'segmented', 'segment_by', 'segments'} dari bucket"""
+        segments = {}
+        for (segment, cohort_key), bucket in buckets.items():
+            size = bucket['size']
+            entry = {
+                'cohort': cohort_key,
+                'cohort_display': self._cohort_display(cohort_key, interval_type),
+            }
+            if segment is not None:
+                entry['segment'] = segment
+            entry['total_customers'] = size
+            for offset in range(depth + 1):
+                entry[f'month{offset}'] = rate_fn(bucket['counts'].get(offset, 0), size)
+            if include_metrics:
+                entry.update(self._cohort_metrics(orders, bucket['runs'], with_cars))
+            segments.setdefault(segment, []).append(entry)
+
+        for cohorts in segments.values():
+            # Urutkan cohort berdasarkan periode (terbaru ke terlama)
+            cohorts.sort(key=lambda x: x['cohort'], reverse=True)
+        if segment_by:
+            return {'segmented': True, 'segment_by': segment_by, 'segments': segments}
+        return {'segmented': False, 'cohorts': segments.get(None, [])}
+
+    @api.model
+    def compute_monthly_cohorts(self, start_date, end_date, depth=6, segment_by=None, include_metrics=False):
+        """
+        Retensi per bulan kalender: customer dihitung retensi di bulan ke-n jika
+        memiliki order di bulan (bulan pertama + n).
+
+        Returns:
+            dict | None: None jika tidak ada order dalam rentang
+        """
+        orders = self._fetch_orders(start_date, end_date, with_advisors=segment_by == 'service_advisor')
+        if not len(orders):
+            return None
+
+        month_indexes = [value.year * 12 + value.month - 1 for value in orders.dates]
+        buckets = {}
+        for start, end in orders.customer_runs():
+            segment = None
+            if segment_by:
+                segment = orders.segment_value(start, segment_by)
+                if segment is None:
+                    continue
+            first_month = month_indexes[start]
+            key = (segment, orders.dates[start].strftime('%Y-%m'))
+            bucket = buckets.setdefault(key, {'size': 0, 'counts': Counter(), 'runs': []})
+            bucket['size'] += 1
+            bucket['counts'].update({month_indexes[i] - first_month for i in range(start, end)})
+            if include_metrics:
+                bucket['runs'].append((start, end))
+
+        def rate(count, size):
+            return round((count / size * 100) if size else 0, 1)
+
+        return self._format_result(orders, buckets, depth, 'monthly', segment_by, include_metrics, False, rate)
+
+    @api.model
+    def compute_service_cohorts(self, start_date, end_date, interval_type='monthly', depth=12,
+                                segment_by=None, include_metrics=False):
+        """
+        Retensi berbasis interval servis: customer dihitung retensi pada interval
+        ke-n jika ada order dalam window toleransi di sekitar tanggal order
+        pertama + n interval.
+
+        Returns:
+            dict | None: None jika tidak ada order dalam rentang
+        """
+        orders = self._fetch_orders(start_date, end_date, with_advisors=segment_by == 'service_advisor')
+        if not len(orders):
+            return None
+
+        interval_months = INTERVAL_MONTHS.get(interval_type, 1)
+        # Window toleransi: untuk interval 3 bulan, sebulan sebelum dan sesudah
+        window_months = max(1, interval_months // 3)
+
+        buckets = {}
+        for start, end in orders.customer_runs():
+            segment = None
+            if segment_by:
+                segment = orders.segment_value(start, segment_by, advisor_mode='first') or 'Default'
+            first_date = orders.dates[start]
+            customer_dates = orders.dates[start:end]
+
+            retained = [0]
+            for interval in range(1, depth + 1):
+                expected_date = add_months(first_date, interval * interval_months)
+                window_start = add_months(expected_date, -window_months)
+                window_end = add_months(expected_date, window_months)
+                position = bisect_left(customer_dates, window_start)
+                if position < len(customer_dates) and customer_dates[position] <= window_end:
+                    retained.append(interval)
+
+            key = (segment, self._cohort_key(first_date, interval_type))
+            bucket = buckets.setdefault(key, {'size': 0, 'counts': Counter(), 'runs': []})
+            bucket['size'] += 1
+            bucket['counts'].update(retained)
+            if include_metrics:
+                bucket['runs'].append((start, end))
+
+        def rate(count, size):
+            return round((count / size * 100) if size else 0, 1) if count else 0
+
+        result = self._format_result(
+            orders, buckets, depth, interval_type, segment_by, include_metrics, True, rate
+        )
+        result['interval_type'] = interval_type
+        return result
@@ -0,0 +1,407 @@
+from odoo import models, fields, api
+from datetime import datetime, time, timedelta
+import logging
+import pytz
+
+_logger = logging.getLogger(__name__)
+
+STAT_TIMEZONE = 'Asia/Jakarta'
+ORDER_STATES = ('sale', 'done')
+RATING_VALUES = ('1', '2', '3', '4', '5')
+SATISFACTION_LEVELS = ('very_satisfied', 'satisfied', 'neutral', 'dissatisfied', 'very_dissatisfied')
+RATING_CATEGORIES = ('service', 'price', 'facility')
+
+STAT_MEASURES = (
+    ('service_count', 'review_count', 'rating_sum')
+    + tuple(f'rating_{value}_count' for value in RATING_VALUES)
+    + tuple(f'{level}_count' for level in SATISFACTION_LEVELS)
+    + ('detailed_count',)
+    + tuple(f'{category}_rating_sum' for category in RATING_CATEGORIES)
+    + ('post_service_count', 'post_service_rating_sum')
+)
+
+
+def _json_number(key):
+    """Nilai numerik detailed_ratings->>key, 0 jika kosong atau bukan angka"""
+    value = f"(so.detailed_ratings->>'{key}')"
+    return f"CASE WHEN {value} ~ '^-?[0-9]+(\\.[0-9]+)?$' THEN {value}::numeric ELSE 0 END"
+
+
+class PitcarRatingDailyStat(models.Model):
+    """
+    Counter harian rating customer untuk dashboard /web/rating/dashboard.
+
+    Satu baris per hari Cetak PKB (Asia/Jakarta) dari sale.order state
+    sale/done; order tanpa tanggal PKB masuk ke baris tanpa tanggal yang
+    hanya ikut dihitung pada tampilan 'all'. Measure rating, kepuasan,
+    kategori detailed_ratings dan post service hanya dihitung dari order yang
+    sudah memberi rating, sama seperti dashboard sebelumnya.
+
+    Setiap hari (termasuk baris tanpa tanggal) unik lewat index
+    COALESCE(date, 'infinity'). Write order menambahkan selisih kontribusi
+    order sebelum/sesudah write ke baris harinya (x = x + delta), sehingga
+    transaksi bersamaan tidak saling menimpa dan baris tanpa tanggal tidak
+    perlu dihitung ulang. Cron harian membangun ulang seluruh tabel untuk
+    perubahan yang tidak lewat write order.
+    """
+    _name = 'pitcar.rating.daily.stat'
+    _description = 'Customer Rating Daily Statistics'
+    _order = 'date desc'
+    _rec_name = 'date'
+
+    date = fields.Date('Tanggal PKB', index=True, readonly=True)
+    service_count = fields.Integer('Services', readonly=True)
+    review_count = fields.Integer('Reviews', readonly=True)
+    rating_sum = fields.Integer('Rating Total', readonly=True)
+    rating_1_count = fields.Integer('Rating 1', readonly=True)
+    rating_2_count = fields.Integer('Rating 2', readonly=True)
+    rating_3_count = fields.Integer('Rating 3', readonly=True)
+    rating_4_count = fields.Integer('Rating 4', readonly=True)
+    rating_5_count = fields.Integer('Rating 5', readonly=True)
+    very_satisfied_count = fields.Integer('Very Satisfied', readonly=True)
+    satisfied_count = fields.Integer('Satisfied', readonly=True)
+    neutral_count = fields.Integer('Neutral', readonly=True)
+    dissatisfied_count = fields.Integer('Dissatisfied', readonly=True)
+    very_dissatisfied_count = fields.Integer('Very Dissatisfied', readonly=True)
+    detailed_count = fields.Integer('Detailed Ratings', readonly=True)
+    service_rating_sum = fields.Float('Service Rating Total', readonly=True)
+    price_rating_sum = fields.Float('Price Rating Total', readonly=True)
+    facility_rating_sum = fields.Float('Facility Rating Total', readonly=True)
+    post_service_count = fields.Integer('Post Service Ratings', readonly=True)
+    post_service_rating_sum = fields.Integer('Post Service Rating Total', readonly=True)
+
+    def init(self):
+        # Recent reviews: ORDER BY sa_cetak_pkb DESC LIMIT hanya atas order yang sudah dirating
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS sale_order_rated_pkb_idx
+            ON sale_order (sa_cetak_pkb DESC, id DESC)
+            WHERE customer_rating IS NOT NULL
+        """)
+        self.env.cr.execute("SELECT 1 FROM pg_indexes WHERE indexname = 'pitcar_rating_daily_stat_day_uniq'")
+        if not self.env.cr.fetchone():
+            # Versi lama bisa menyimpan baris ganda per hari; kosongkan dan bangun ulang setelah index dibuat
+            self.env.cr.execute("DELETE FROM pitcar_rating_daily_stat")
+            self.env.cr.execute("""
+                CREATE UNIQUE INDEX pitcar_rating_daily_stat_day_uniq
+                ON pitcar_rating_daily_stat ((COALESCE(date, 'infinity'::date)))
+            """)
+            self._rebuild()
+
+    @api.model
+    def local_date(self, value):
+        """Tanggal Asia/Jakarta dari datetime UTC naive (None jika kosong)"""
+        if not value:
+            return None
+        return pytz.UTC.localize(value).astimezone(pytz.timezone(STAT_TIMEZONE)).date()
+
+    @api.model
+    def utc_bounds(self, date_from, date_to):
+        """Batas UTC naive [awal date_from, awal hari setelah date_to) untuk filter sa_cetak_pkb"""
+        tz = pytz.timezone(STAT_TIMEZONE)
+        start = tz.localize(datetime.combine(date_from, time.min)).astimezone(pytz.UTC)
+        end = tz.localize(datetime.combine(date_to + timedelta(days=1), time.min)).astimezone(pytz.UTC)
+        return start.replace(tzinfo=None), end.replace(tzinfo=None)
+
+    # ------------------------------------------------------------------
+    # Rebuild
+    # ------------------------------------------------------------------
+    @api.model
+    def _stat_query(self, order_filter=""):
+        """SELECT measure per hari PKB dari sale_order state sale/done (parameter %(tz)s, %(states)s)"""
+        rated = "so.customer_rating IS NOT NULL"
+        detailed = f"{rated} AND jsonb_typeof(so.detailed_ratings::jsonb) = 'object' AND so.detailed_ratings::jsonb <> '{{}}'::jsonb"
+        rating_counts = ''.join(
+            f"COUNT(*) FILTER (WHERE so.customer_rating = '{value}') AS rating_{value}_count,\n"
+            for value in RATING_VALUES
+        )
+        satisfaction_counts = ''.join(
+            f"COUNT(*) FILTER (WHERE {rated} AND so.customer_satisfaction = '{level}') AS {level}_count,\n"
+            for level in SATISFACTION_LEVELS
+        )
+        category_sums = ''.join(
+            f"COALESCE(SUM({_json_number(category + '_rating')}) FILTER (WHERE {detailed}), 0) AS {category}_rating_sum,\n"
+            for category in RATING_CATEGORIES
+        )
+        return """
+            SELECT (so.sa_cetak_pkb AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s)::date AS date,
+                   COUNT(*) AS service_count,
+                   COUNT(*) FILTER (WHERE {rated}) AS review_count,
+                   COALESCE(SUM(so.customer_rating::integer) FILTER (WHERE {rated}), 0) AS rating_sum,
+                   {rating_counts}
+                   {satisfaction_counts}
+                   COUNT(*) FILTER (WHERE {detailed}) AS detailed_count,
+                   {category_sums}
+                   COUNT(*) FILTER (WHERE {rated} AND so.post_service_rating IS NOT NULL) AS post_service_count,
+                   COALESCE(SUM(so.post_service_rating::integer)
+                            FILTER (WHERE {rated} AND so.post_service_rating IS NOT NULL), 0) AS post_service_rating_sum
+            FROM sale_order so
+            WHERE so.state IN %(states)s {order_filter}
+            GROUP BY 1
+        """.format(
+            rated=rated,
+            detailed=detailed,
+            rating_counts=rating_counts,
+            satisfaction_counts=satisfaction_counts,
+            category_sums=category_sums,
+            order_filter=order_filter,
+        )
+
+    def _flush_rating_fields(self):
+        self.env['sale.order'].flush_model([
+            'state', 'sa_cetak_pkb', 'customer_rating', 'customer_satisfaction',
+            'detailed_ratings', 'post_service_rating'
+        ])
+
+    def _upsert_rows(self, select_query, params, increment=False):
+        """
+        INSERT baris hari dari `select_query` dengan ON CONFLICT pada index hari.
+        increment=False menimpa measure (rebuild), True menambahkan (delta).
+
+        Baris yang sedang/baru diubah transaksi lain membuat transaksi ini
+        menunggu lalu gagal serialization dan diulang Odoo.
+
+        Returns:
+            set: tanggal baris yang ditulis (None = baris tanpa tanggal)
+        """
+        if increment:
+            updates = ', '.join(f"{measure} = pitcar_rating_daily_stat.{measure} + EXCLUDED.{measure}" for measure in STAT_MEASURES)
+        else:
+            updates = ', '.join(f"{measure} = EXCLUDED.{measure}" for measure in STAT_MEASURES)
+        params = dict(params, uid=self.env.uid)
+        self.env.cr.execute("""
+            INSERT INTO pitcar_rating_daily_stat (
+                date, {measures}, create_uid, create_date, write_uid, write_date
+            )
+            SELECT stat.*, %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+            FROM ({select_query}) stat
+            ORDER BY COALESCE(stat.date, 'infinity'::date)
+            ON CONFLICT ((COALESCE(date, 'infinity'::date))) DO UPDATE
+            SET {updates}, write_uid = EXCLUDED.write_uid, write_date = EXCLUDED.write_date
+            RETURNING date
+        """.format(
+            measures=', '.join(STAT_MEASURES),
+            select_query=select_query,
+            updates=updates,
+        ), params)
+        written = {row[0] for row in self.env.cr.fetchall()}
+        self.invalidate_model()
+        return written
+
+    @api.model
+    def _rebuild(self, days=None):
+        """
+        Hitung ulang baris counter dengan satu INSERT ... SELECT GROUP BY hari
+        (upsert per hari), lalu hapus baris hari yang tidak lagi punya order.
+
+        Args:
+            days (iterable): tanggal Asia/Jakarta (None = baris tanpa tanggal PKB);
+                jika days tidak diberikan seluruh tabel dibangun ulang
+        """
+        self._flush_rating_fields()
+        params = {'tz': STAT_TIMEZONE, 'states': ORDER_STATES}
+        order_filter = ""
+        stale_filter = "TRUE"
+        if days is not None:
+            days = set(days)
+            dated = sorted(day for day in days if day)
+            conditions, order_conditions = [], []
+            if dated:
+                params['days'] = tuple(dated)
+                params['utc_from'], params['utc_to'] = self.utc_bounds(dated[0], dated[-1])
+                conditions.append("date IN %(days)s")
+                order_conditions.append("""(
+                    so.sa_cetak_pkb >= %(utc_from)s AND so.sa_cetak_pkb < %(utc_to)s
+                    AND (so.sa_cetak_pkb AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s)::date IN %(days)s
+                )""")
+            if None in days:
+                conditions.append("date IS NULL")
+                order_conditions.append("so.sa_cetak_pkb IS NULL")
+            if not conditions:
+                return 0
+            stale_filter = "(" + " OR ".join(conditions) + ")"
+            order_filter = "AND (" + " OR ".join(order_conditions) + ")"
+
+        written = self._upsert_rows(self._stat_query(order_filter), params)
+        written_dated = tuple(day for day in written if day)
+        self.env.cr.execute("""
+            DELETE FROM pitcar_rating_daily_stat
+            WHERE {stale_filter}
+              AND NOT (date IS NULL AND %(keep_undated)s)
+              AND NOT (date IS NOT NULL AND date IN %(written)s)
+        """.format(stale_filter=stale_filter), dict(
+            params,
+            keep_undated=None in written,
+            # IN () tidak valid; tanggal dummy tidak pernah cocok karena date selalu < infinity
+            written=written_dated or ('infinity',),
+        ))
+        self.invalidate_model()
+        return len(written)
+
+    @api.model
+    def get_order_contributions(self, orders):
+        """
+        Kontribusi measure order (state sale/done) per hari PKB dari nilai di database.
+
+        Returns:
+            dict: {date | None: {measure: nilai}}
+        """
+        if not orders:
+            return {}
+        self._flush_rating_fields()
+        self.env.cr.execute(self._stat_query("AND so.id IN %(order_ids)s"), {
+            'tz': STAT_TIMEZONE,
+            'states': ORDER_STATES,
+            'order_ids': tuple(orders.ids),
+        })
+        return {row.pop('date'): row for row in self.env.cr.dictfetchall()}
+
+    @api.model
+    def apply_order_deltas(self, before, after):
+        """Tambahkan selisih kontribusi (after - before) ke baris hari masing-masing"""
+        rows = []
+        for day in set(before) | set(after):
+            old, new = before.get(day, {}), after.get(day, {})
+            delta = {measure: new.get(measure, 0) - old.get(measure, 0) for measure in STAT_MEASURES}
+            if any(delta.values()):
+                rows.append([day] + [delta[measure] for measure in STAT_MEASURES])
+        if not rows:
+            return 0
+
+        columns = ', '.join(('date',) + STAT_MEASURES)
+        # Cast eksplisit supaya kolom date tetap bertipe date walau semua baris tanpa tanggal
+        row_template = '(%s::date' + ', %s' * len(STAT_MEASURES) + ')'
+        values = ', '.join([row_template] * len(rows))
+        select_query = self.env.cr.mogrify(
+            f"SELECT * FROM (VALUES {values}) AS delta ({columns})", [value for row in rows for value in row]
+        ).decode()
+        # Nilai VALUES sudah di-escape; '%' literal di-escape untuk execute berikutnya
+        return len(self._upsert_rows(select_query.replace('%', '%%'), {}, increment=True))
+
+    @api.model
+    def refresh_days(self, days):
+        """Hitung ulang counter untuk sekumpulan tanggal PKB (None = order tanpa tanggal PKB)"""
+        return self._rebuild(days=days)
+
+    @api.model
+    def _cron_rebuild_stats(self):
+        """Bangun ulang seluruh counter rating dari sale.order"""
+        count = self._rebuild()
+        _logger.info("Customer rating daily stats rebuilt: %s rows", count)
+
+    # ------------------------------------------------------------------
+    # Dashboard
+    # ------------------------------------------------------------------
+    @api.model
+    def get_dashboard_stats(self, date_from=None, date_to=None):
+        """
+        Statistik dashboard rating dari SUM counter harian.
+
+        Args:
+            date_from, date_to (date): rentang tanggal PKB Asia/Jakarta;
+                keduanya None untuk seluruh histori (termasuk order tanpa tanggal PKB)
+
+        Returns:
+            dict: overview, rating_distribution, satisfaction_distribution,
+                  category_ratings, post_service_stats
+        """
+        self.flush_model()
+        where, params = "", {}
+        if date_from or date_to:
+            where = "WHERE date >= %(date_from)s AND date <= %(date_to)s"
+            params = {'date_from': date_from, 'date_to': date_to}
+        self.env.cr.execute("""
+            SELECT {sums} FROM pitcar_rating_daily_stat {where}
+        """.format(
+            sums=', '.join(f"COALESCE(SUM({measure}), 0) AS {measure}" for measure in STAT_MEASURES),
+            where=where,
+        ), params)
+        totals = self.env.cr.dictfetchone()
+
+        total_services = totals['service_count']
+        total_reviews = totals['review_count']
+        category_ratings = {category: 0 for category in RATING_CATEGORIES}
+        if totals['detailed_count']:
+            category_ratings = {
+                category: round(float(totals[f'{category}_rating_sum']) / totals['detailed_count'], 2)
+                for category in RATING_CATEGORIES
+            }
+        post_service_stats = {'rating': 0, 'count': 0}
+        if totals['post_service_count']:
+            post_service_stats = {
+                'rating': round(totals['post_service_rating_sum'] / totals['post_service_count'], 2),
+                'count': totals['post_service_count']
+            }
+
+        return {
+            'overview': {
+                'total_services': total_services,
+                'total_reviews': total_reviews,
+                'review_rate': round(total_reviews / total_services * 100, 2) if total_services > 0 else 0,
+                'average_rating': round(totals['rating_sum'] / total_reviews, 2) if total_reviews > 0 else 0
+            },
+            'rating_distribution': {value: totals[f'rating_{value}_count'] for value in RATING_VALUES},
+            'satisfaction_distribution': {level: totals[f'{level}_count'] for level in SATISFACTION_LEVELS},
+            'category_ratings': category_ratings,
+            'post_service_stats': post_service_stats,
+        }
+
+    @api.model
+    def get_recent_reviews(self, date_from=None, date_to=None, limit=10):
+        """
+        Review terbaru berdasarkan Cetak PKB (ORDER BY ... LIMIT di database).
+
+        Returns:
+            list: dict review dengan tanggal PKB waktu Asia/Jakarta
+        """
+        domain = [
+            ('state', 'in', list(ORDER_STATES)),
+            ('customer_rating', '!=', False),
+            ('sa_cetak_pkb', '!=', False),
+        ]
+        if date_from or date_to:
+            utc_from, utc_to = self.utc_bounds(date_from, date_to)
+            domain += [('sa_cetak_pkb', '>=', utc_from), ('sa_cetak_pkb', '<', utc_to)]
+        orders = self.env['sale.order'].search(domain, order='sa_cetak_pkb desc, id desc', limit=limit)
+
+        tz = pytz.timezone(STAT_TIMEZONE)
+        return [{
+            'id': order.id,
+            'order_name': order.name,
+            'customer_name': order.partner_id.name if order.partner_id else '',
+            'plate_number': order.partner_car_id.number_plate if order.partner_car_id else '',
+            'car_info': f"{order.partner_car_brand.name} {order.partner_car_brand_type.name}" if order.partner_car_brand and order.partner_car_brand_type else '',
+            'rating': float(order.customer_rating) if order.customer_rating else 0,
+            'satisfaction': order.customer_satisfaction,
+            'feedback': order.customer_feedback,
+            'date': pytz.UTC.localize(order.sa_cetak_pkb).astimezone(tz).strftime('%Y-%m-%d %H:%M:%S')
+        } for order in orders]
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+
+    _RATING_STAT_FIELDS = {
+        'state', 'sa_cetak_pkb', 'customer_rating', 'customer_satisfaction',
+        'detailed_ratings', 'post_service_rating',
+    }
+
+    def _in_rating_stats(self, vals):
+        """True jika ada order yang dihitung counter sebelum atau sesudah write ini"""
+        return vals.get('state') in ORDER_STATES or any(order.state in ORDER_STATES for order in self)
+
+    def write(self, vals):
+        if not self._RATING_STAT_FIELDS.intersection(vals) or not self._in_rating_stats(vals):
+            return super().write(vals)
+
+        Stat = self.env['pitcar.rating.daily.stat'].sudo()
+        before = Stat.get_order_contributions(self)
+        res = super().write(vals)
+        Stat.apply_order_deltas(before, Stat.get_order_contributions(self))
+        return res
+
+    def unlink(self):
+        Stat = self.env['pitcar.rating.daily.stat'].sudo()
+        before = Stat.get_order_contributions(self.filtered(lambda order: order.state in ORDER_STATES))
+        res = super().unlink()
+        Stat.apply_order_deltas(before, {})
+        return res
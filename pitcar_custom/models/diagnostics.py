@@ -0,0 +1,141 @@
+"""
+Diagnostik terstruktur untuk subsistem lead time dan KPI.
+
+Semua pesan memakai format lazy (%s) lewat logger per subsistem
+(`odoo.addons.pitcar_custom.diagnostics.<subsistem>`) dan diberi trace id
+supaya baris log dari satu request/recompute bisa dikelompokkan.
+
+Trace per order bersifat opt-in:
+    - context `lead_time_trace_order_ids`: list id order (atau True untuk semua order)
+    - system parameter `pitcar.lead_time_trace_order_ids`: id order dipisah koma
+    - level DEBUG pada logger subsistem: trace semua order
+
+Jika tidak ada yang aktif, `order_tracer()` mengembalikan NULL_TRACER yang
+bernilai False sehingga hot path cukup mengecek `if tracer` tanpa format apa pun.
+"""
+import logging
+import uuid
+
+TRACE_ID_CONTEXT_KEY = 'pitcar_trace_id'
+TRACE_ID_HEADER = 'X-Trace-Id'
+TRACE_ORDERS_CONTEXT_KEY = 'lead_time_trace_order_ids'
+TRACE_ORDERS_PARAM = 'pitcar.lead_time_trace_order_ids'
+
+_LOGGER_PREFIX = 'odoo.addons.pitcar_custom.diagnostics'
+
+
+def get_logger(subsystem):
+    """Logger untuk satu subsistem, mis. 'lead_time' atau 'kpi'"""
+    return logging.getLogger('%s.%s' % (_LOGGER_PREFIX, subsystem))
+
+
+def new_trace_id():
+    return uuid.uuid4().hex[:12]
+
+
+class TraceLogger(logging.LoggerAdapter):
+    """Logger adapter yang menambahkan prefix trace id pada setiap pesan"""
+
+    def process(self, msg, kwargs):
+        return '[trace:%s] %s' % (self.extra['trace_id'], msg), kwargs
+
+    @property
+    def trace_id(self):
+        return self.extra['trace_id']
+
+
+def trace_logger(subsystem, trace_id=None):
+    return TraceLogger(get_logger(subsystem), {'trace_id': trace_id or new_trace_id()})
+
+
+def request_trace_id(http_request):
+    """
+    Trace id untuk satu HTTP request. Memakai header X-Trace-Id jika dikirim
+    client, dan disimpan di object request supaya semua log dalam request yang
+    sama (termasuk sub-call seperti batch KPI) memakai id yang sama.
+    """
+    trace_id = getattr(http_request, '_pitcar_trace_id', None)
+    if not trace_id:
+        header = http_request.httprequest.headers.get(TRACE_ID_HEADER)
+        trace_id = header[:64] if header else new_trace_id()
+        http_request._pitcar_trace_id = trace_id
+    return trace_id
+
+
+def request_trace_logger(http_request, subsystem):
+    return trace_logger(subsystem, request_trace_id(http_request))
+
+
+class OrderTracer(object):
+    """Trace per order untuk perhitungan lead time; hanya dibuat jika trace aktif"""
+
+    def __init__(self, logger, order_ids=None, level=logging.INFO):
+        self.logger = logger
+        self.order_ids = order_ids
+        self.level = level
+
+    def __bool__(self):
+        return True
+
+    def wants(self, order):
+        return self.order_ids is None or order.id in self.order_ids
+
+    def log(self, order, msg, *args):
+        self.logger.log(self.level, '%s: ' + msg, order.name, *args)
+
+
+class _NullTracer(object):
+    def __bool__(self):
+        return False
+
+    def wants(self, order):
+        return False
+
+    def log(self, order, msg, *args):
+        pass
+
+
+NULL_TRACER = _NullTracer()
+
+
+def _parse_order_ids(value):
+    if value is True:
+        return None
+    if isinstance(value, str):
+        value = value.replace(';', ',').split(',')
+    return {int(order_id) for order_id in value or () if str(order_id).strip().isdigit()}
+
+
+def order_tracer(records, subsystem='lead_time'):
+    """
+    Tracer untuk recordset order yang sedang dihitung.
+
+    Returns:
+        OrderTracer | NULL_TRACER
+    """
+    env = records.env
+    logger = get_logger(subsystem)
+
+    context_value = env.context.get(TRACE_ORDERS_CONTEXT_KEY)
+    param_value = env['ir.config_parameter'].sudo().get_param(TRACE_ORDERS_PARAM)
+    if not context_value and not param_value:
+        if not logger.isEnabledFor(logging.DEBUG):
+            return NULL_TRACER
+        return OrderTracer(
+            trace_logger(subsystem, env.context.get(TRACE_ID_CONTEXT_KEY)),
+            order_ids=None, level=logging.DEBUG
+        )
+
+    order_ids = set()
+    for value in (context_value, param_value):
+        if not value:
+            continue
+        parsed = _parse_order_ids(value)
+        if parsed is None:
+            order_ids = None
+            break
+        order_ids |= parsed
+
+    if order_ids is not None and not order_ids.intersection(records.ids):
+        return NULL_TRACER
+    return OrderTracer(trace_logger(subsystem, env.context.get(TRACE_ID_CONTEXT_KEY)), order_ids=order_ids)
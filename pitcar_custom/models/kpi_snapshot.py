@@ -0,0 +1,497 @@
+from odoo import models, fields, api
+from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
+import logging
+import psycopg2.errors
+import pytz
+
+_logger = logging.getLogger(__name__)
+
+
+class PitcarKPISnapshot(models.Model):
+    """
+    Snapshot KPI bulanan per employee untuk periode yang sudah tutup.
+
+    Diisi oleh cron (atau saat endpoint KPI pertama kali menghitung bulan yang
+    sudah lewat) dan ditandai stale saat data sumber employee/periode tersebut
+    berubah, supaya pembacaan bulan lalu cukup satu lookup ter-index.
+
+    Perubahan yang tidak lewat write() (stored compute saat flush, create dan
+    unlink record sumber) dicatat lewat mark_dirty() dan di-invalidate sekali
+    saat precommit, setelah semua nilai dan relasi sudah tertulis.
+    """
+    _name = 'pitcar.kpi.snapshot'
+    _description = 'Monthly KPI Snapshot'
+    _order = 'period_year desc, period_month desc, employee_id, kpi_no'
+    _rec_name = 'employee_id'
+
+    employee_id = fields.Many2one('hr.employee', 'Employee', required=True, ondelete='cascade')
+    mechanic_id = fields.Many2one('pitcar.mechanic.new', 'Mechanic', ondelete='set null')
+    period_month = fields.Integer('Month', required=True)
+    period_year = fields.Integer('Year', required=True)
+
+    kpi_no = fields.Integer('No')
+    kpi_type = fields.Char('KPI Type', required=True)
+    name = fields.Char('KPI')
+    weight = fields.Float('Bobot')
+    target = fields.Float('Target')
+    measurement = fields.Text('Tolak Ukur')
+    actual = fields.Float('Aktual')
+    weighted_score = fields.Float('Weighted Score')
+
+    is_stale = fields.Boolean('Stale', default=False, index=True)
+    computed_at = fields.Datetime('Computed At', default=fields.Datetime.now)
+
+    _sql_constraints = [
+        ('unique_kpi_snapshot',
+         'unique(employee_id, period_year, period_month, kpi_type)',
+         'KPI snapshot must be unique per employee, period and type!')
+    ]
+
+    # ------------------------------------------------------------------
+    # Read / write snapshot
+    # ------------------------------------------------------------------
+    @api.model
+    def is_closed_period(self, month, year):
+        """Periode dianggap tutup jika bulan tersebut sudah lewat (waktu Asia/Jakarta)"""
+        today = datetime.now(pytz.timezone('Asia/Jakarta')).date()
+        return (year, month) < (today.year, today.month)
+
+    @api.model
+    def get_kpi_scores(self, employee, month, year):
+        """
+        Ambil kpi_scores dari snapshot.
+
+        Returns:
+            list | None: None jika snapshot belum ada atau sudah stale
+        """
+        snapshots = self.search([
+            ('employee_id', '=', employee.id),
+            ('period_year', '=', year),
+            ('period_month', '=', month)
+        ])
+        if not snapshots or any(snapshots.mapped('is_stale')):
+            return None
+
+        return [{
+            'no': snapshot.kpi_no,
+            'name': snapshot.name,
+            'type': snapshot.kpi_type,
+            'weight': snapshot.weight,
+            'target': snapshot.target,
+            'measurement': snapshot.measurement,
+            'actual': snapshot.actual,
+            'achievement': snapshot.weighted_score,
+            'weighted_score': snapshot.weighted_score
+        } for snapshot in snapshots]
+
+    @api.model
+    def store_kpi_scores(self, employee, mechanic, month, year, kpi_scores):
+        """
+        Simpan kpi_scores employee/periode dengan upsert pada unique key
+        (employee, periode, kpi_type), lalu hapus tipe KPI yang tidak lagi ada.
+
+        Dipanggil juga dari endpoint GET, jadi request yang menghitung periode
+        yang sama bersamaan tidak boleh gagal di unique constraint. Jika baris
+        yang sama sedang/baru ditulis transaksi lain (serialization failure),
+        penyimpanan dilewati: snapshot transaksi lain sama validnya.
+
+        Returns:
+            bool: True jika snapshot tersimpan
+        """
+        if not kpi_scores:
+            return False
+
+        self.flush_model()
+        now = fields.Datetime.now()
+        uid = self.env.uid
+        try:
+            with self.env.cr.savepoint():
+                for kpi in kpi_scores:
+                    self.env.cr.execute("""
+                        INSERT INTO pitcar_kpi_snapshot (
+                            employee_id, mechanic_id, period_month, period_year,
+                            kpi_no, kpi_type, name, weight, target, measurement,
+                            actual, weighted_score, is_stale, computed_at,
+                            create_uid, create_date, write_uid, write_date
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, FALSE, %s, %s, %s, %s, %s)
+                        ON CONFLICT (employee_id, period_year, period_month, kpi_type) DO UPDATE SET
+                            mechanic_id = EXCLUDED.mechanic_id,
+                            kpi_no = EXCLUDED.kpi_no,
+                            name = EXCLUDED.name,
+                            weight = EXCLUDED.weight,
+                            target = EXCLUDED.target,
+                            measurement = EXCLUDED.measurement,
+                            actual = EXCLUDED.actual,
+                            weighted_score = EXCLUDED.weighted_score,
+                            is_stale = FALSE,
+                            computed_at = EXCLUDED.computed_at,
+                            write_uid = EXCLUDED.write_uid,
+                            write_date = EXCLUDED.write_date
+                    """, (
+                        employee.id, mechanic.id if mechanic else None, month, year,
+                        kpi['no'], kpi['type'], kpi['name'], kpi['weight'], kpi['target'], kpi['measurement'],
+                        kpi['actual'], kpi['weighted_score'], now,
+                        uid, now, uid, now,
+                    ))
+
+                self.env.cr.execute("""
+                    DELETE FROM pitcar_kpi_snapshot
+                    WHERE employee_id = %s
+                      AND period_year = %s
+                      AND period_month = %s
+                      AND kpi_type NOT IN %s
+                """, (employee.id, year, month, tuple(kpi['type'] for kpi in kpi_scores)))
+        except psycopg2.errors.SerializationFailure:
+            _logger.info("KPI snapshot %s (%s/%s) is being written concurrently, skipped", employee.id, month, year)
+            return False
+        finally:
+            self.invalidate_model()
+        return True
+
+    @api.model
+    def invalidate_snapshots(self, employee_ids, periods):
+        """
+        Tandai snapshot stale untuk employee dan periode yang terdampak.
+
+        Args:
+            employee_ids (iterable): id hr.employee
+            periods (iterable | None): tuple (month, year); None berarti semua periode
+        """
+        employee_ids = [emp_id for emp_id in set(employee_ids) if emp_id]
+        periods = set(periods) if periods is not None else None
+        if not employee_ids or periods == set():
+            return
+
+        period_domain = []
+        for month, year in periods or ():
+            period_domain = (['|'] if period_domain else []) + period_domain + [
+                '&', ('period_month', '=', month), ('period_year', '=', year)
+            ]
+
+        snapshots = self.sudo().search([
+            ('employee_id', 'in', employee_ids),
+            ('is_stale', '=', False)
+        ] + period_domain)
+        if snapshots:
+            snapshots.write({'is_stale': True})
+
+    @api.model
+    def mark_dirty(self, records):
+        """
+        Catat record sumber KPI yang berubah di luar write() (stored compute
+        saat flush, create, relasi). Snapshot terkait ditandai stale sekali saat
+        precommit lewat _get_kpi_snapshot_keys() milik model record tersebut.
+        """
+        if not records:
+            return
+        pending = self.env.cr.precommit.data.setdefault('pitcar.kpi.snapshot.dirty', {})
+        if not pending:
+            self.env.cr.precommit.add(self._invalidate_dirty_records)
+        pending.setdefault(records._name, set()).update(records.ids)
+
+    def _invalidate_dirty_records(self):
+        pending = self.env.cr.precommit.data.pop('pitcar.kpi.snapshot.dirty', {})
+        for model_name, record_ids in pending.items():
+            records = self.env[model_name].sudo().browse(record_ids).exists()
+            employee_ids, periods = records._get_kpi_snapshot_keys()
+            self.invalidate_snapshots(employee_ids, periods)
+        self.flush_model()
+
+    @api.model
+    def periods_for_value(self, value):
+        """
+        Periode (month, year) yang bisa terdampak oleh perubahan pada tanggal/datetime tertentu.
+
+        Batas periode KPI untuk field Date/attendance dihitung dari jam UTC, sehingga
+        hari terakhir bulan sebelumnya ikut masuk ke bulan berikutnya. Karena itu
+        bulan dari hari berikutnya juga ikut di-invalidate.
+        """
+        if not value:
+            return set()
+        if isinstance(value, str):
+            value = fields.Datetime.to_datetime(value)
+        next_day = value + timedelta(days=1)
+        return {(value.month, value.year), (next_day.month, next_day.year)}
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+    @api.model
+    def refresh_mechanic_snapshots(self, month, year, mechanics=None):
+        """
+        Hitung ulang snapshot mekanik reguler untuk satu periode.
+        Hanya mekanik yang belum punya snapshot atau snapshot-nya stale yang dihitung.
+        """
+        if not self.is_closed_period(month, year):
+            return 0
+
+        kpi_engine = self.env['pitcar.kpi.engine']
+        if mechanics is None:
+            mechanics = self.env['pitcar.mechanic.new'].search([('employee_id', '!=', False)])
+        mechanics = kpi_engine.filter_regular_mechanics(mechanics)
+
+        existing = self.search([
+            ('employee_id', 'in', mechanics.mapped('employee_id').ids),
+            ('period_year', '=', year),
+            ('period_month', '=', month)
+        ])
+        fresh_employee_ids = set(existing.mapped('employee_id').ids) - set(
+            existing.filtered('is_stale').mapped('employee_id').ids
+        )
+        mechanics = mechanics.filtered(lambda m: m.employee_id.id not in fresh_employee_ids)
+        if not mechanics:
+            return 0
+
+        kpi_context = kpi_engine.build_mechanic_context(mechanics, month, year)
+        for mechanic in mechanics:
+            kpi_scores = kpi_engine.evaluate_mechanic_kpis(
+                kpi_engine.get_mechanic_kpi_template(), kpi_context, mechanic
+            )
+            self.store_kpi_scores(mechanic.employee_id, mechanic, month, year, kpi_scores)
+
+        _logger.info("KPI snapshot refreshed for %s mechanics (%s/%s)", len(mechanics), month, year)
+        return len(mechanics)
+
+    @api.model
+    def _cron_refresh_kpi_snapshots(self):
+        """Isi snapshot bulan lalu dan hitung ulang semua snapshot yang stale"""
+        today = datetime.now(pytz.timezone('Asia/Jakarta')).date()
+        previous_month = today.replace(day=1) - relativedelta(months=1)
+        periods = {(previous_month.month, previous_month.year)}
+
+        stale_groups = self.read_group(
+            [('is_stale', '=', True)],
+            ['period_month', 'period_year'],
+            ['period_month', 'period_year'],
+            lazy=False
+        )
+        periods |= {(group['period_month'], group['period_year']) for group in stale_groups}
+
+        for month, year in sorted(periods, key=lambda p: (p[1], p[0])):
+            self.refresh_mechanic_snapshots(month, year)
+            self.env.cr.commit()
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+
+    _KPI_SNAPSHOT_FIELDS = {
+        'state', 'date_completed', 'car_mechanic_id_new', 'post_service_rating', 'order_line',
+    }
+    # Stored compute yang dibaca KPI; nilainya ditulis saat flush tanpa lewat write()
+    _KPI_SNAPSHOT_COMPUTED_FIELDS = {
+        'amount_total', 'duration_deviation', 'total_recommendations', 'recommendation_realization_rate',
+    }
+
+    def _get_kpi_snapshot_keys(self):
+        """Employee mekanik dan periode KPI yang dipengaruhi order ini"""
+        snapshot_model = self.env['pitcar.kpi.snapshot']
+        employee_ids = set()
+        periods = set()
+        for order in self.filtered('date_completed'):
+            employee_ids.update(order.car_mechanic_id_new.mapped('employee_id').ids)
+            periods |= snapshot_model.periods_for_value(order.date_completed)
+        return employee_ids, periods
+
+    def write(self, vals):
+        if not self._KPI_SNAPSHOT_FIELDS.intersection(vals):
+            return super().write(vals)
+
+        employee_ids, periods = self._get_kpi_snapshot_keys()
+        res = super().write(vals)
+        new_employee_ids, new_periods = self._get_kpi_snapshot_keys()
+        self.env['pitcar.kpi.snapshot'].invalidate_snapshots(
+            employee_ids | new_employee_ids, periods | new_periods
+        )
+        return res
+
+    def _write(self, vals):
+        res = super()._write(vals)
+        if self._KPI_SNAPSHOT_COMPUTED_FIELDS.intersection(vals):
+            self.env['pitcar.kpi.snapshot'].mark_dirty(self)
+        return res
+
+    def unlink(self):
+        employee_ids, periods = self._get_kpi_snapshot_keys()
+        res = super().unlink()
+        self.env['pitcar.kpi.snapshot'].invalidate_snapshots(employee_ids, periods)
+        return res
+
+
+class SaleOrderLine(models.Model):
+    _inherit = 'sale.order.line'
+
+    # Flat rate mekanik dihitung dari produk dan qty baris order
+    _KPI_SNAPSHOT_FIELDS = {'order_id', 'product_id', 'product_uom_qty'}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env['pitcar.kpi.snapshot'].mark_dirty(lines.mapped('order_id'))
+        return lines
+
+    def write(self, vals):
+        if not self._KPI_SNAPSHOT_FIELDS.intersection(vals):
+            return super().write(vals)
+
+        orders = self.mapped('order_id')
+        res = super().write(vals)
+        self.env['pitcar.kpi.snapshot'].mark_dirty(orders | self.mapped('order_id'))
+        return res
+
+    def unlink(self):
+        orders = self.mapped('order_id')
+        res = super().unlink()
+        self.env['pitcar.kpi.snapshot'].mark_dirty(orders)
+        return res
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'flat_rate' in vals:
+            # Flat rate dibaca langsung dari produk saat KPI dihitung, jadi semua order selesai
+            # yang memuat produk ini ikut terdampak
+            orders = self.env['sale.order'].sudo().search([
+                ('order_line.product_id.product_tmpl_id', 'in', self.ids),
+                ('state', 'in', ['sale', 'done']),
+                ('date_completed', '!=', False),
+            ])
+            self.env['pitcar.kpi.snapshot'].mark_dirty(orders)
+        return res
+
+
+class PitcarSOPSampling(models.Model):
+    _inherit = 'pitcar.sop.sampling'
+
+    _KPI_SNAPSHOT_FIELDS = {'state', 'result', 'date', 'sampling_type', 'mechanic_id', 'sop_id'}
+
+    def _get_kpi_snapshot_keys(self):
+        snapshot_model = self.env['pitcar.kpi.snapshot']
+        employee_ids = set()
+        periods = set()
+        for sampling in self:
+            employee_ids.update(sampling.mechanic_id.mapped('employee_id').ids)
+            periods |= snapshot_model.periods_for_value(sampling.date)
+        return employee_ids, periods
+
+    def write(self, vals):
+        if not self._KPI_SNAPSHOT_FIELDS.intersection(vals):
+            return super().write(vals)
+
+        employee_ids, periods = self._get_kpi_snapshot_keys()
+        res = super().write(vals)
+        new_employee_ids, new_periods = self._get_kpi_snapshot_keys()
+        self.env['pitcar.kpi.snapshot'].invalidate_snapshots(
+            employee_ids | new_employee_ids, periods | new_periods
+        )
+        return res
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        samplings = super().create(vals_list)
+        # Relasi mekanik (many2many) baru lengkap setelah flush
+        self.env['pitcar.kpi.snapshot'].mark_dirty(samplings)
+        return samplings
+
+    def unlink(self):
+        employee_ids, periods = self._get_kpi_snapshot_keys()
+        res = super().unlink()
+        self.env['pitcar.kpi.snapshot'].invalidate_snapshots(employee_ids, periods)
+        return res
+
+
+class HrAttendance(models.Model):
+    _inherit = 'hr.attendance'
+
+    def _invalidate_kpi_snapshots(self):
+        snapshot_model = self.env['pitcar.kpi.snapshot']
+        periods = set()
+        for attendance in self:
+            periods |= snapshot_model.periods_for_value(attendance.check_in)
+        snapshot_model.invalidate_snapshots(self.mapped('employee_id').ids, periods)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._invalidate_kpi_snapshots()
+        return records
+
+    def write(self, vals):
+        if 'check_in' not in vals and 'employee_id' not in vals:
+            return super().write(vals)
+
+        self._invalidate_kpi_snapshots()
+        res = super().write(vals)
+        self._invalidate_kpi_snapshots()
+        return res
+
+    def unlink(self):
+        self._invalidate_kpi_snapshots()
+        return super().unlink()
+
+
+class PitcarMechanicToolCheck(models.Model):
+    _inherit = 'pitcar.mechanic.tool.check'
+
+    _KPI_SNAPSHOT_FIELDS = {'state', 'date', 'mechanic_id'}
+    # Dihitung dari baris pengecekan saat flush
+    _KPI_SNAPSHOT_COMPUTED_FIELDS = {'total_items', 'matched_items'}
+
+    def _get_kpi_snapshot_keys(self):
+        snapshot_model = self.env['pitcar.kpi.snapshot']
+        periods = set()
+        for check in self:
+            periods |= snapshot_model.periods_for_value(check.date)
+        return set(self.mapped('mechanic_id').ids), periods
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        checks = super().create(vals_list)
+        self.env['pitcar.kpi.snapshot'].mark_dirty(checks)
+        return checks
+
+    def write(self, vals):
+        if not self._KPI_SNAPSHOT_FIELDS.intersection(vals):
+            return super().write(vals)
+
+        employee_ids, periods = self._get_kpi_snapshot_keys()
+        res = super().write(vals)
+        new_employee_ids, new_periods = self._get_kpi_snapshot_keys()
+        self.env['pitcar.kpi.snapshot'].invalidate_snapshots(
+            employee_ids | new_employee_ids, periods | new_periods
+        )
+        return res
+
+    def _write(self, vals):
+        res = super()._write(vals)
+        if self._KPI_SNAPSHOT_COMPUTED_FIELDS.intersection(vals):
+            self.env['pitcar.kpi.snapshot'].mark_dirty(self)
+        return res
+
+    def unlink(self):
+        employee_ids, periods = self._get_kpi_snapshot_keys()
+        res = super().unlink()
+        self.env['pitcar.kpi.snapshot'].invalidate_snapshots(employee_ids, periods)
+        return res
+
+
+class PitcarMechanicNew(models.Model):
+    _inherit = 'pitcar.mechanic.new'
+
+    # Target dibaca dari record mekanik saat ini untuk semua periode
+    _KPI_SNAPSHOT_FIELDS = {'monthly_target', 'employee_id'}
+
+    def write(self, vals):
+        if not self._KPI_SNAPSHOT_FIELDS.intersection(vals):
+            return super().write(vals)
+
+        employee_ids = set(self.mapped('employee_id').ids)
+        res = super().write(vals)
+        self.env['pitcar.kpi.snapshot'].invalidate_snapshots(
+            employee_ids | set(self.mapped('employee_id').ids), None
+        )
+        return res
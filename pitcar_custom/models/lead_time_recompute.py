@@ -0,0 +1,256 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import AccessError, UserError
+from odoo.tools.safe_eval import safe_eval
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Semua field lead time tersimpan yang dihitung ulang oleh job
+LEAD_TIME_FIELDS = [
+    'lead_time_servis',
+    'total_lead_time_servis',
+    'is_overnight',
+    'overall_lead_time',
+    'lead_time_tunggu_penerimaan',
+    'lead_time_penerimaan',
+    'lead_time_tunggu_servis',
+    'estimasi_durasi_pengerjaan',
+    'lead_time_tunggu_konfirmasi',
+    'lead_time_tunggu_part1',
+    'lead_time_tunggu_part2',
+    'lead_time_istirahat',
+    'lead_time_tunggu_sublet',
+    'lead_time_job_stop_lain',
+    'lead_time_stage',
+    'lead_time_progress',
+]
+
+
+class LeadTimeRecomputeJob(models.Model):
+    """
+    Job background untuk menghitung ulang field lead time sale.order.
+
+    Order diproses per chunk (urut id) dengan satu flush per chunk dan commit
+    berkala. Posisi terakhir (last_order_id) ikut di-commit sehingga job bisa
+    dilanjutkan oleh cron setelah worker crash/restart.
+    """
+    _name = 'pitcar.lead.time.recompute.job'
+    _description = 'Lead Time Recompute Job'
+    _order = 'create_date desc'
+
+    name = fields.Char('Name', required=True, default=lambda self: _('Lead Time Recompute'))
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled')
+    ], string='Status', default='draft', required=True, index=True)
+
+    domain = fields.Text('Order Domain', default='[]', required=True,
+                         help='Domain sale.order yang akan dihitung ulang')
+    chunk_size = fields.Integer('Chunk Size', default=500, required=True)
+    commit_every = fields.Integer('Commit Every (chunks)', default=1, required=True)
+
+    last_order_id = fields.Integer('Last Processed Order ID', default=0, readonly=True)
+    total_count = fields.Integer('Total Orders', readonly=True)
+    processed_count = fields.Integer('Processed', readonly=True)
+    error_count = fields.Integer('Errors', readonly=True)
+    last_error = fields.Text('Last Error', readonly=True)
+
+    started_at = fields.Datetime('Started At', readonly=True)
+    finished_at = fields.Datetime('Finished At', readonly=True)
+    elapsed_seconds = fields.Float('Elapsed (s)', readonly=True)
+
+    progress = fields.Float('Progress (%)', compute='_compute_stats')
+    throughput = fields.Float('Throughput (orders/s)', compute='_compute_stats')
+
+    @api.depends('processed_count', 'total_count', 'elapsed_seconds')
+    def _compute_stats(self):
+        for job in self:
+            job.progress = (job.processed_count / job.total_count * 100) if job.total_count else 0
+            job.throughput = (job.processed_count / job.elapsed_seconds) if job.elapsed_seconds else 0
+
+    def _get_order_domain(self):
+        self.ensure_one()
+        return safe_eval(self.domain or '[]')
+
+    # ------------------------------------------------------------------
+    # Actions
+    # ------------------------------------------------------------------
+    def action_start(self):
+        for job in self:
+            if job.state == 'running':
+                continue
+            if job.chunk_size <= 0 or job.commit_every <= 0:
+                raise UserError(_('Chunk size dan commit interval harus lebih dari 0'))
+            job.write({
+                'state': 'running',
+                'last_order_id': 0,
+                'processed_count': 0,
+                'error_count': 0,
+                'last_error': False,
+                'total_count': self.env['sale.order'].search_count(job._get_order_domain()),
+                'started_at': fields.Datetime.now(),
+                'finished_at': False,
+                'elapsed_seconds': 0,
+            })
+        self._trigger_cron()
+        return True
+
+    def action_resume(self):
+        self.filtered(lambda j: j.state in ('failed', 'cancelled')).write({'state': 'running'})
+        self._trigger_cron()
+        return True
+
+    def action_cancel(self):
+        self.filtered(lambda j: j.state in ('draft', 'running')).write({'state': 'cancelled'})
+        return True
+
+    def _trigger_cron(self):
+        cron = self.env.ref('pitcar_custom.ir_cron_process_lead_time_recompute', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    @api.model
+    def create_for_orders(self, orders, name=None):
+        """Buat dan jalankan job untuk sekumpulan order tertentu"""
+        job = self.create({
+            'name': name or _('Lead Time Recompute (%s orders)') % len(orders),
+            'domain': repr([('id', 'in', orders.ids)]),
+        })
+        job.action_start()
+        return job
+
+    # ------------------------------------------------------------------
+    # Processing
+    # ------------------------------------------------------------------
+    @api.model
+    def _cron_process_jobs(self, time_limit=240):
+        """Proses job yang sedang berjalan sampai batas waktu cron tercapai"""
+        deadline = time.time() + time_limit
+        for job in self.search([('state', '=', 'running')], order='id'):
+            if time.time() >= deadline:
+                break
+            try:
+                job._process(deadline)
+            except Exception as e:
+                _logger.error("Lead time recompute job %s failed: %s", job.id, str(e), exc_info=True)
+                self.env.cr.rollback()
+                self.env.clear()
+                job.write({'state': 'failed', 'last_error': str(e)})
+                self.env.cr.commit()
+        if self.search_count([('state', '=', 'running')]):
+            # Masih ada sisa: jadwalkan ulang cron segera
+            self._trigger_cron()
+
+    def _process(self, deadline=None):
+        self.ensure_one()
+        SaleOrder = self.env['sale.order'].with_context(active_test=False, tracking_disable=True)
+        domain = self._get_order_domain()
+        chunks_since_commit = 0
+        chunk_started = time.time()
+
+        while self.state == 'running':
+            order_ids = SaleOrder.search(
+                domain + [('id', '>', self.last_order_id)],
+                order='id', limit=self.chunk_size
+            ).ids
+            if not order_ids:
+                self.write({'state': 'done', 'finished_at': fields.Datetime.now()})
+                self.env.cr.commit()
+                _logger.info(
+                    "Lead time recompute job %s done: %s orders, %s errors, %.1f orders/s",
+                    self.id, self.processed_count, self.error_count, self.throughput
+                )
+                return
+
+            errors = self._process_chunk(SaleOrder.browse(order_ids))
+
+            self.write({
+                'last_order_id': order_ids[-1],
+                'processed_count': self.processed_count + len(order_ids),
+                'error_count': self.error_count + len(errors),
+                'last_error': errors[-1] if errors else self.last_error,
+                'elapsed_seconds': self.elapsed_seconds + (time.time() - chunk_started),
+            })
+            chunk_started = time.time()
+
+            chunks_since_commit += 1
+            if chunks_since_commit >= self.commit_every:
+                self.env.cr.commit()
+                chunks_since_commit = 0
+                _logger.info(
+                    "Lead time recompute job %s: %s/%s orders (%.1f%%, %.1f orders/s)",
+                    self.id, self.processed_count, self.total_count, self.progress, self.throughput
+                )
+
+            # Lepas cache record yang sudah diproses supaya memori tetap kecil
+            self.env.invalidate_all()
+            if deadline and time.time() >= deadline:
+                break
+
+        self.env.cr.commit()
+
+    def _process_chunk(self, orders):
+        """
+        Hitung ulang satu chunk dengan satu flush. Jika chunk gagal, ulangi per order
+        dengan savepoint supaya order yang bermasalah tidak menggagalkan seluruh chunk.
+
+        Returns:
+            list: pesan error per order yang gagal
+        """
+        # Pastikan progress job sudah tertulis sebelum env.clear() di jalur error
+        self.flush_recordset()
+        try:
+            with self.env.cr.savepoint():
+                orders._recompute_lead_time_fields()
+            return []
+        except Exception as e:
+            _logger.warning("Lead time recompute chunk failed, retrying per order: %s", e)
+            self.env.clear()
+
+        errors = []
+        for order in orders:
+            try:
+                with self.env.cr.savepoint():
+                    order._recompute_lead_time_fields()
+            except Exception as e:
+                self.env.clear()
+                errors.append(f"{order.id}: {str(e)}")
+        return errors
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+
+    def _recompute_lead_time_fields(self):
+        """Tandai semua field lead time untuk dihitung ulang lalu tulis dengan satu flush"""
+        for fname in LEAD_TIME_FIELDS:
+            self.env.add_to_compute(self._fields[fname], self)
+        self.flush_recordset(LEAD_TIME_FIELDS)
+
+    def action_recompute_lead_time_background(self):
+        """Jalankan recompute lead time order terpilih sebagai job background"""
+        # Job dibuat dengan sudo, jadi batasi ke grup yang sama dengan server action-nya
+        if not (self.env.user.has_group('sales_team.group_sale_manager') or self.env.user.has_group('base.group_system')):
+            raise AccessError(_('Hanya Sales Manager yang dapat menjadwalkan recompute lead time'))
+        return self._schedule_lead_time_recompute()
+
+    def _schedule_lead_time_recompute(self):
+        """
+        Buat job recompute (sudo) untuk order ini. Pemanggil wajib sudah memeriksa hak
+        akses; action_recompute_lead_time_batch memakai hak tulis user atas order terpilih.
+        """
+        job = self.env['pitcar.lead.time.recompute.job'].sudo().create_for_orders(self)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Recompute Scheduled',
+                'message': f'Recompute lead time untuk {len(self)} order dijalankan di background (job #{job.id}).',
+                'type': 'info',
+                'sticky': False,
+            }
+        }
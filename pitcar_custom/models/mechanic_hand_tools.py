@@ -145,29 +145,30 @@ class MechanicToolCheck(models.Model):
             'supervisor_id': self.env.user.employee_id.id
         })
     
-    @api.model
-    def create(self, vals):
+    @api.model_create_multi
+    def create(self, vals_list):
         # Auto-create check lines for all tools assigned to the mechanic
-        record = super().create(vals)
+        records = super().create(vals_list)
         
-        # Get all tools assigned to this mechanic
-        mechanic_id = vals.get('mechanic_id')
-        if not mechanic_id:
-            return record
+        # Get all tools assigned to these mechanics (satu search untuk semua check)
+        mechanic_ids = records.mapped('mechanic_id').ids
+        if not mechanic_ids:
+            return records
             
         tools = self.env['pitcar.mechanic.hand.tool'].search([
-            ('mechanic_id', '=', mechanic_id),
+            ('mechanic_id', 'in', mechanic_ids),
             ('active', '=', True)
         ])
         
-        for tool in tools:
-            self.env['pitcar.mechanic.tool.check.line'].create({
-                'check_id': record.id,
-                'tool_id': tool.id,
-                'qty_expected': tool.qty_expected,
-                'qty_actual': 0  # To be filled during check
-            })
-        return record
+        line_vals = [{
+            'check_id': record.id,
+            'tool_id': tool.id,
+            'qty_expected': tool.qty_expected,
+            'qty_actual': 0  # To be filled during check
+        } for record in records for tool in tools if tool.mechanic_id == record.mechanic_id]
+        if line_vals:
+            self.env['pitcar.mechanic.tool.check.line'].create(line_vals)
+        return records
 
 class MechanicToolCheckLine(models.Model):
     _name = 'pitcar.mechanic.tool.check.line'
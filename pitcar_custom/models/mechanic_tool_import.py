@@ -0,0 +1,488 @@
+from odoo import models, fields, api
+from odoo.tools import split_every
+from datetime import datetime
+from collections import defaultdict
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 500
+MAX_ROW_ERRORS = 1000
+
+VALID_TOOL_STATES = ['available', 'assigned', 'maintenance', 'lost', 'damaged']
+VALID_MAINTENANCE_FREQUENCIES = ['daily', 'weekly', 'monthly', 'quarterly', 'yearly']
+VALID_CONDITIONS = ['good', 'fair', 'poor', 'damaged', 'missing']
+
+
+class ImportStats(object):
+    """Penghitung hasil import dan error per baris"""
+
+    def __init__(self, **counters):
+        self.counters = dict(counters)
+        self.errors = []
+        self.total_errors = 0
+        self.rows = 0
+        self.started = time.time()
+
+    def add(self, counter, value=1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def error(self, row, message):
+        self.total_errors += 1
+        if len(self.errors) < MAX_ROW_ERRORS:
+            self.errors.append({'row': row, 'message': message})
+
+    def result(self, label):
+        elapsed = time.time() - self.started
+        data = dict(self.counters)
+        data.update({
+            # Format lama: 10 error pertama sebagai teks
+            'errors': ["%s #%s: %s" % (label, e['row'], e['message']) for e in self.errors[:10]],
+            'total_errors': self.total_errors,
+            'row_errors': self.errors,
+            'total_rows': self.rows,
+            'elapsed_seconds': round(elapsed, 2),
+            'rows_per_second': round(self.rows / elapsed, 1) if elapsed else 0,
+        })
+        return {'status': 'success', 'data': data}
+
+
+class MechanicToolImport(models.AbstractModel):
+    """
+    Import master hand tool dan tool check secara streaming.
+
+    Baris diproses per chunk: semua kunci lookup (kategori, mekanik, tool,
+    check, check line) dalam satu chunk di-resolve dengan satu search per model,
+    lalu record baru dibuat dengan satu create per model. Hasil lookup disimpan
+    di cache selama import sehingga chunk berikutnya tidak mencari ulang.
+    """
+    _name = 'pitcar.mechanic.tool.import'
+    _description = 'Mechanic Tools Importer'
+
+    def _import_env(self):
+        return self.sudo().with_context(tracking_disable=True, mail_create_nolog=True, mail_notrack=True)
+
+    @api.model
+    def _parse_date(self, value):
+        if isinstance(value, datetime):
+            return value.date()
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+
+    # ------------------------------------------------------------------
+    # Lookup per chunk
+    # ------------------------------------------------------------------
+    @api.model
+    def _resolve_mechanics(self, names, cache):
+        missing = [name for name in names if name not in cache]
+        if missing:
+            for name in missing:
+                cache[name] = False
+            mechanics = self.env['hr.employee'].search([
+                ('name', 'in', missing),
+                ('job_id.name', 'ilike', 'mechanic'),
+            ], order='id')
+            for mechanic in mechanics:
+                if not cache[mechanic.name]:
+                    cache[mechanic.name] = mechanic.id
+        return cache
+
+    @api.model
+    def _resolve_categories(self, names, cache):
+        """Id kategori per nama; kategori yang belum ada dibuat dengan satu create"""
+        Category = self.env['pitcar.tool.category']
+        missing = [name for name in names if name not in cache]
+        if missing:
+            for category in Category.search([('name', 'in', missing)], order='id'):
+                cache.setdefault(category.name, category.id)
+            to_create = [name for name in missing if name not in cache]
+            if to_create:
+                for category in Category.create([{'name': name} for name in to_create]):
+                    cache[category.name] = category.id
+        return cache
+
+    @api.model
+    def _resolve_tools(self, codes, names, cache):
+        """Cache tool per ('code', kode) dan ('name', nama); record pertama (id terkecil) yang dipakai"""
+        Tool = self.env['pitcar.mechanic.hand.tool']
+        missing_codes = [code for code in codes if ('code', code) not in cache]
+        missing_names = [name for name in names if ('name', name) not in cache]
+        for code in missing_codes:
+            cache[('code', code)] = False
+        for name in missing_names:
+            cache[('name', name)] = False
+        if missing_codes:
+            for tool in Tool.search([('code', 'in', missing_codes)], order='id'):
+                if not cache[('code', tool.code)]:
+                    cache[('code', tool.code)] = tool
+        if missing_names:
+            for tool in Tool.search([('name', 'in', missing_names)], order='id'):
+                if not cache[('name', tool.name)]:
+                    cache[('name', tool.name)] = tool
+        return cache
+
+    # ------------------------------------------------------------------
+    # Tools
+    # ------------------------------------------------------------------
+    @api.model
+    def _prepare_tool_values(self, row, tool_data, stats):
+        """Nilai tool dari satu baris (tanpa relasi); None jika baris dilewati"""
+        name = tool_data.get('name')
+        if not name:
+            stats.add('skipped')
+            stats.error(row, "Skipped due to missing name")
+            return None
+
+        values = {'name': name}
+        for key in ('code', 'description', 'qty_expected', 'location', 'serial_number', 'state', 'notes'):
+            if key in tool_data:
+                values[key] = tool_data[key]
+
+        if 'qty_expected' in values:
+            try:
+                values['qty_expected'] = int(float(values['qty_expected']))
+            except (ValueError, TypeError):
+                values['qty_expected'] = 1
+
+        for key in ('purchase_date', 'warranty_end_date', 'last_maintenance_date'):
+            if tool_data.get(key):
+                try:
+                    values[key] = self._parse_date(tool_data[key])
+                except ValueError:
+                    stats.error(row, "Invalid date format for %s: %s" % (key, tool_data[key]))
+
+        if 'maintenance_frequency' in tool_data:
+            freq = str(tool_data['maintenance_frequency']).lower()
+            if freq in VALID_MAINTENANCE_FREQUENCIES:
+                values['maintenance_frequency'] = freq
+            else:
+                stats.error(row, "Invalid maintenance frequency: %s" % freq)
+
+        if 'state' in values:
+            state = str(values['state']).lower()
+            if state in VALID_TOOL_STATES:
+                values['state'] = state
+            else:
+                stats.error(row, "Invalid state: %s" % state)
+                values['state'] = 'available'
+        return values
+
+    @api.model
+    def import_tools(self, records, chunk_size=IMPORT_CHUNK_SIZE):
+        """
+        Upsert pitcar.mechanic.hand.tool (cocok berdasarkan code, lalu name).
+
+        Args:
+            records (iterable): tuple (nomor baris, dict data tool); boleh generator
+
+        Returns:
+            dict: response import dengan statistik dan error per baris
+        """
+        importer = self._import_env()
+        stats = ImportStats(created=0, updated=0, skipped=0)
+        caches = {'categories': {}, 'mechanics': {}, 'tools': {}}
+        for chunk in split_every(chunk_size, records):
+            importer._import_tools_chunk(chunk, stats, caches)
+        _logger.info("Tools import: %s rows, %s", stats.rows, stats.counters)
+        return stats.result('Tool')
+
+    def _import_tools_chunk(self, chunk, stats, caches):
+        stats.rows += len(chunk)
+        prepared = []
+        for row, tool_data in chunk:
+            values = self._prepare_tool_values(row, tool_data, stats)
+            if values is not None:
+                prepared.append((row, tool_data, values))
+
+        self._resolve_categories({str(data['category']) for _, data, _ in prepared if data.get('category')},
+                                 caches['categories'])
+        self._resolve_mechanics({str(data['mechanic']) for _, data, _ in prepared if data.get('mechanic')},
+                                caches['mechanics'])
+        self._resolve_tools({values['code'] for _, _, values in prepared if values.get('code')},
+                            {values['name'] for _, _, values in prepared}, caches['tools'])
+
+        today = fields.Date.context_today(self)
+        writes = []
+        creates = []
+        # Tool baru di chunk ini per kunci, supaya baris duplikat memperbarui nilai create yang sama
+        pending = {}
+        for row, tool_data, values in prepared:
+            if tool_data.get('category'):
+                values['category_id'] = caches['categories'][str(tool_data['category'])]
+            if tool_data.get('mechanic'):
+                mechanic_id = caches['mechanics'].get(str(tool_data['mechanic']))
+                if mechanic_id:
+                    values.update({'mechanic_id': mechanic_id, 'state': 'assigned', 'date_assigned': today})
+                else:
+                    stats.error(row, "Mechanic not found: %s" % tool_data['mechanic'])
+
+            keys = [('code', values['code'])] if values.get('code') else []
+            keys.append(('name', values['name']))
+            tool = next((caches['tools'][key] for key in keys if caches['tools'].get(key)), None)
+            pending_vals = next((pending[key] for key in keys if key in pending), None)
+            if tool:
+                writes.append((row, tool, values))
+            elif pending_vals is not None:
+                pending_vals[1].update(values)
+                stats.add('updated')
+            else:
+                entry = (row, values)
+                creates.append(entry)
+                for key in keys:
+                    pending[key] = entry
+
+        self._write_rows(writes, stats, 'updated')
+        created = self._create_rows('pitcar.mechanic.hand.tool', creates, stats, 'created')
+        for tool in created:
+            caches['tools'].setdefault(('name', tool.name), tool)
+            if tool.code:
+                caches['tools'].setdefault(('code', tool.code), tool)
+
+    # ------------------------------------------------------------------
+    # Upsert helper
+    # ------------------------------------------------------------------
+    def _write_rows(self, writes, stats, counter):
+        """
+        Baris dengan nilai identik ditulis dengan satu write. Record yang muncul lebih
+        dari sekali dibagi ke beberapa putaran supaya urutan baris tetap dihormati.
+        Jika satu grup gagal, grup itu diulang per baris dengan savepoint.
+        """
+        rounds = []
+        seen = defaultdict(int)
+        for row, record, values in writes:
+            round_index = seen[record]
+            seen[record] += 1
+            if round_index == len(rounds):
+                rounds.append({})
+            key = tuple(sorted((fname, repr(value)) for fname, value in values.items()))
+            rounds[round_index].setdefault(key, []).append((row, record, values))
+
+        for groups in rounds:
+            for group in groups.values():
+                records = group[0][1].browse([record.id for _, record, _ in group])
+                try:
+                    with self.env.cr.savepoint():
+                        records.write(group[0][2])
+                    stats.add(counter, len(group))
+                    continue
+                except Exception as e:
+                    _logger.warning("Batch write %s failed, retrying per row: %s", records._name, e)
+                    self.env.clear()
+
+                for row, record, values in group:
+                    try:
+                        with self.env.cr.savepoint():
+                            record.write(values)
+                        stats.add(counter)
+                    except Exception as e:
+                        self.env.clear()
+                        stats.add('skipped')
+                        stats.error(row, str(e))
+
+    def _create_rows(self, model_name, creates, stats, counter):
+        """
+        Satu create untuk seluruh baris; jika gagal, ulangi per baris dengan savepoint
+        supaya hanya baris yang bermasalah yang dilaporkan.
+        """
+        Model = self.env[model_name]
+        if not creates:
+            return Model
+        try:
+            with self.env.cr.savepoint():
+                records = Model.create([values for _, values in creates])
+            stats.add(counter, len(creates))
+            return records
+        except Exception as e:
+            _logger.warning("Batch create %s failed, retrying per row: %s", model_name, e)
+            self.env.clear()
+
+        records = Model
+        for row, values in creates:
+            try:
+                with self.env.cr.savepoint():
+                    records |= Model.create(values)
+                stats.add(counter)
+            except Exception as e:
+                self.env.clear()
+                stats.add('skipped')
+                stats.error(row, str(e))
+        return records
+
+    # ------------------------------------------------------------------
+    # Checks
+    # ------------------------------------------------------------------
+    @api.model
+    def import_checks(self, records, chunk_size=IMPORT_CHUNK_SIZE):
+        """
+        Upsert pitcar.mechanic.tool.check per (mekanik, tanggal) dan check line per tool.
+
+        Args:
+            records (iterable): tuple (nomor baris, dict data check); boleh generator
+
+        Returns:
+            dict: response import dengan statistik dan error per baris
+        """
+        importer = self._import_env()
+        stats = ImportStats(created=0, updated=0, check_lines=0, skipped=0)
+        caches = {'mechanics': {}, 'tools': {}, 'checks': {}, 'lines': {}, 'seen': set()}
+        checks_to_finish = self.env['pitcar.mechanic.tool.check']
+        for chunk in split_every(chunk_size, records):
+            checks_to_finish |= importer._import_checks_chunk(chunk, stats, caches)
+
+        # State done diterapkan setelah semua line masuk (sama seperti import per grup sebelumnya)
+        checks_to_finish = checks_to_finish.filtered(lambda c: c.state != 'done')
+        if checks_to_finish:
+            checks_to_finish.action_done()
+        _logger.info("Tool checks import: %s rows, %s", stats.rows, stats.counters)
+        return stats.result('Check')
+
+    def _import_checks_chunk(self, chunk, stats, caches):
+        """
+        Returns:
+            recordset: check yang harus di-set done
+        """
+        Check = self.env['pitcar.mechanic.tool.check']
+        stats.rows += len(chunk)
+
+        rows = []
+        for row, check_data in chunk:
+            mechanic_name = check_data.get('mechanic')
+            date_str = check_data.get('date')
+            if not mechanic_name or not date_str:
+                stats.add('skipped')
+                stats.error(row, "Skipped due to missing mechanic or date")
+                continue
+            rows.append((row, str(mechanic_name), date_str, check_data))
+
+        mechanics = self._resolve_mechanics({mechanic_name for _, mechanic_name, _, _ in rows}, caches['mechanics'])
+
+        valid_rows = []
+        for row, mechanic_name, date_str, check_data in rows:
+            if not mechanics.get(mechanic_name):
+                stats.error(row, "Mechanic not found: %s" % mechanic_name)
+                continue
+            try:
+                check_date = self._parse_date(date_str)
+            except ValueError:
+                stats.error(row, "Invalid date format: %s" % date_str)
+                continue
+            valid_rows.append((row, (mechanics[mechanic_name], check_date), check_data))
+
+        # Check yang sudah ada untuk kunci baru di chunk ini
+        new_keys = {key for _, key, _ in valid_rows if key not in caches['checks']}
+        if new_keys:
+            existing = Check.search([
+                ('mechanic_id', 'in', list({key[0] for key in new_keys})),
+                ('date', 'in', list({key[1] for key in new_keys})),
+            ], order='id')
+            for check in existing:
+                key = (check.mechanic_id.id, check.date)
+                if key in new_keys and key not in caches['checks']:
+                    caches['checks'][key] = check
+                    stats.add('updated')
+                    first = next(data for _, k, data in valid_rows if k == key)
+                    if 'notes' in first:
+                        check.write({'notes': first['notes']})
+
+        # Check baru dibuat sekaligus; baris pertama per kunci menentukan notes
+        creates = []
+        for row, key, check_data in valid_rows:
+            if key not in caches['checks'] and key not in {k for k, _ in creates}:
+                creates.append((key, (row, {
+                    'mechanic_id': key[0],
+                    'date': key[1],
+                    'notes': check_data.get('notes', ''),
+                })))
+        if creates:
+            created = self._create_rows('pitcar.mechanic.tool.check', [entry for _, entry in creates], stats, 'created')
+            for check in created:
+                caches['checks'][(check.mechanic_id.id, check.date)] = check
+
+        to_finish = Check
+        first_rows = {}
+        for row, key, check_data in valid_rows:
+            first_rows.setdefault(key, check_data)
+        for key, check_data in first_rows.items():
+            check = caches['checks'].get(key)
+            if check and key not in caches['seen']:
+                caches['seen'].add(key)
+                if check_data.get('state') == 'done':
+                    to_finish |= check
+
+        self._import_check_lines(valid_rows, stats, caches)
+        return to_finish
+
+    def _import_check_lines(self, valid_rows, stats, caches):
+        Line = self.env['pitcar.mechanic.tool.check.line']
+        line_rows = []
+        for row, key, check_data in valid_rows:
+            check = caches['checks'].get(key)
+            if not check:
+                continue
+            if not check_data.get('tool_name') and not check_data.get('tool_code'):
+                continue
+            line_rows.append((row, check, check_data))
+
+        tools = self._resolve_tools(
+            {check_data['tool_code'] for _, _, check_data in line_rows if check_data.get('tool_code')},
+            {check_data['tool_name'] for _, _, check_data in line_rows if check_data.get('tool_name')},
+            caches['tools'],
+        )
+
+        resolved = []
+        for row, check, check_data in line_rows:
+            tool = None
+            if check_data.get('tool_code'):
+                tool = tools.get(('code', check_data['tool_code']))
+            if not tool and check_data.get('tool_name'):
+                tool = tools.get(('name', check_data['tool_name']))
+            if not tool:
+                stats.error(row, "Tool not found: %s" % (check_data.get('tool_code') or check_data.get('tool_name')))
+                continue
+            resolved.append((row, check, tool, check_data))
+
+        # Line yang sudah ada (termasuk line otomatis dari create check) dalam satu search
+        new_pairs = {(check.id, tool.id) for _, check, tool, _ in resolved} - set(caches['lines'])
+        if new_pairs:
+            for line in Line.search([
+                ('check_id', 'in', list({pair[0] for pair in new_pairs})),
+                ('tool_id', 'in', list({pair[1] for pair in new_pairs})),
+            ], order='id'):
+                caches['lines'].setdefault((line.check_id.id, line.tool_id.id), line)
+
+        writes = []
+        creates = []
+        pending = {}
+        for row, check, tool, check_data in resolved:
+            line_values = {}
+            if check_data.get('qty_actual'):
+                try:
+                    line_values['qty_actual'] = int(float(check_data['qty_actual']))
+                except (ValueError, TypeError):
+                    stats.error(row, "Invalid quantity: %s" % check_data['qty_actual'])
+            if check_data.get('physical_condition'):
+                condition = str(check_data['physical_condition']).lower()
+                if condition in VALID_CONDITIONS:
+                    line_values['physical_condition'] = condition
+                else:
+                    stats.error(row, "Invalid condition: %s" % check_data['physical_condition'])
+            if check_data.get('line_notes'):
+                line_values['notes'] = check_data['line_notes']
+
+            pair = (check.id, tool.id)
+            line = caches['lines'].get(pair)
+            if line:
+                if line_values:
+                    writes.append((row, line, line_values))
+            elif pair in pending:
+                pending[pair][1].update(line_values)
+                if line_values:
+                    stats.add('check_lines')
+            else:
+                line_values.update({'check_id': check.id, 'tool_id': tool.id, 'qty_expected': tool.qty_expected})
+                pending[pair] = (row, line_values)
+                creates.append(pending[pair])
+
+        self._write_rows(writes, stats, 'check_lines')
+        for line in self._create_rows('pitcar.mechanic.tool.check.line', creates, stats, 'check_lines'):
+            caches['lines'][(line.check_id.id, line.tool_id.id)] = line
@@ -1,9 +1,9 @@
 from odoo import models, fields, api
 from odoo.exceptions import UserError
 from datetime import datetime
-import json
 import logging
 import pytz
+from .notification_hub import MENTOR_REQUEST_CHANNEL, publish
 
 _logger = logging.getLogger(__name__)
 
@@ -515,9 +515,7 @@ class MentorRequest(models.Model):
             }
             if data:
                 payload['data'] = data
-            message_json = json.dumps(payload)
-            bus_service = self.env['bus.bus']
-            bus_service.sendone('mentor_request_notifications', message_json)
+            publish(self.env, MENTOR_REQUEST_CHANNEL, notification_type, payload)
             return True
         except Exception as e:
             _logger.error(f"Error publishing notification to bus: {str(e)}")
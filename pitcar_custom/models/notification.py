@@ -20,23 +20,135 @@ class Notification(models.Model):
     data = fields.Text(string='Data')
     is_read = fields.Boolean(string='Is Read', default=False)
     create_date = fields.Datetime(string='Created On', readonly=True)
-    request_time = fields.Datetime(string='Request Time', required=True)
+    request_time = fields.Datetime(string='Request Time', required=True, index=True)
+    # Nomor perubahan monoton sesuai urutan commit, dipakai observer untuk mengambil delta
+    revision = fields.Integer(string='Revision', readonly=True, copy=False, index=True)
+
+    _UNREAD_WINDOW_DAYS = 30
+    _COUNTER_FIELDS = {'model', 'is_read', 'request_time'}
+
+    def init(self):
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS pitcar_notification_revision_seq")
+        self.env.cr.execute("""
+            UPDATE pitcar_notification
+            SET revision = nextval('pitcar_notification_revision_seq')
+            WHERE revision IS NULL
+        """)
 
     @api.depends('model', 'res_id')
     def _compute_name(self):
+        # Kelompokkan per model supaya exists()/name dibaca sekali per model
+        records_by_model = {}
         for record in self:
             if record.model and record.res_id:
-                try:
-                    model_obj = self.env[record.model].sudo().browse(record.res_id)
-                    if model_obj.exists() and hasattr(model_obj, 'name'):
-                        record.name = model_obj.name
+                records_by_model.setdefault(record.model, []).append(record)
+            else:
+                record.name = 'Unknown'
+
+        for model, records in records_by_model.items():
+            try:
+                targets = self.env[model].sudo().browse({record.res_id for record in records}).exists()
+                has_name = 'name' in targets._fields
+                names = {target.id: target.name for target in targets} if has_name else {}
+                for record in records:
+                    if record.res_id in names:
+                        record.name = names[record.res_id]
                     else:
                         record.name = f"{record.model} #{record.res_id} (Not Found)"
-                except Exception as e:
-                    _logger.warning(f"Error computing name for {record.model}/{record.res_id}: {e}")
+            except Exception as e:
+                _logger.warning("Error computing name for %s: %s", model, e)
+                for record in records:
                     record.name = f"{record.model} #{record.res_id} (Error)"
-            else:
-                record.name = 'Unknown'
+
+    # ------------------------------------------------------------------
+    # Counter unread & revision
+    # ------------------------------------------------------------------
+    def _counter_keys(self):
+        """(model, tanggal request) untuk notifikasi yang belum dibaca"""
+        return [
+            (record.model, record.request_time.date())
+            for record in self
+            if not record.is_read and record.model and record.request_time
+        ]
+
+    def _bump_revision(self):
+        """
+        Catat notifikasi yang berubah; revision baru diberikan saat precommit.
+
+        Revision diambil di bawah advisory lock yang ditahan sampai commit,
+        sehingga urutan revision sama dengan urutan commit. Observer yang
+        membaca MAX(revision) tidak akan melewatkan revision lebih kecil milik
+        transaksi yang belum commit.
+        """
+        if not self.ids:
+            return
+        pending = self.env.cr.precommit.data.setdefault('pitcar.notification.revision', set())
+        if not pending:
+            self.env.cr.precommit.add(self._assign_pending_revisions)
+        pending.update(self.ids)
+
+    def _assign_pending_revisions(self):
+        notification_ids = self.env.cr.precommit.data.pop('pitcar.notification.revision', set())
+        if not notification_ids:
+            return
+        self.env.cr.execute("SELECT pg_advisory_xact_lock(hashtext('pitcar_notification_revision'))")
+        self.env.cr.execute("""
+            UPDATE pitcar_notification
+            SET revision = nextval('pitcar_notification_revision_seq')
+            WHERE id IN %s
+        """, (tuple(sorted(notification_ids)),))
+        self.env['pitcar.notification'].invalidate_model(['revision'])
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._bump_revision()
+        self.env['pitcar.notification.counter'].apply_deltas(records._counter_keys(), 1)
+        return records
+
+    def write(self, vals):
+        if not self._COUNTER_FIELDS.intersection(vals):
+            res = super().write(vals)
+            self._bump_revision()
+            return res
+
+        Counter = self.env['pitcar.notification.counter']
+        old_keys = self._counter_keys()
+        res = super().write(vals)
+        Counter.apply_deltas(old_keys, -1)
+        Counter.apply_deltas(self._counter_keys(), 1)
+        self._bump_revision()
+        return res
+
+    def unlink(self):
+        keys = self._counter_keys()
+        res = super().unlink()
+        self.env['pitcar.notification.counter'].apply_deltas(keys, -1)
+        return res
+
+    @api.model
+    def get_unread_count(self, model):
+        """Jumlah notifikasi belum dibaca untuk model dalam 30 hari terakhir (dari tabel counter)"""
+        cutoff = fields.Datetime.now() - timedelta(days=self._UNREAD_WINDOW_DAYS)
+        count = self.env['pitcar.notification.counter'].get_count(model, cutoff.date() + timedelta(days=1))
+        # Hari batas window dihitung tepat dari tabel notifikasi (rentang satu hari, ter-index)
+        count += self.sudo().search_count([
+            ('model', '=', model),
+            ('is_read', '=', False),
+            ('request_time', '>=', cutoff),
+            ('request_time', '<', datetime.combine(cutoff.date() + timedelta(days=1), datetime.min.time())),
+        ])
+        return count
+
+    @api.model
+    def get_revision_cursor(self):
+        """
+        Revision terakhir yang sudah commit; observer mulai dari nilai ini.
+        Aman karena revision diberikan berurutan sesuai commit (_bump_revision).
+        """
+        self.flush_model(['revision'])
+        self.env.cr.execute("SELECT COALESCE(MAX(revision), 0) FROM pitcar_notification")
+        return self.env.cr.fetchone()[0]
 
     @api.model
     def create_or_update_notification(self, model, res_id, type, title, message, request_time=None, data=None, user_id=None, priority=None):
@@ -92,4 +204,72 @@ class Notification(models.Model):
                 return new_notif
         except Exception as e:
             _logger.error(f"Error in create_or_update_notification: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+class NotificationCounter(models.Model):
+    """
+    Counter notifikasi belum dibaca per model per hari (tanggal request_time, UTC).
+
+    Diperbarui dengan delta saat notifikasi dibuat/diubah/dihapus sehingga badge
+    unread cukup menjumlahkan maksimal 31 baris, bukan scan tabel notifikasi.
+    """
+    _name = 'pitcar.notification.counter'
+    _description = 'Unread Notification Counter'
+    _log_access = False
+
+    model = fields.Char(string='Model', required=True, index=True)
+    day = fields.Date(string='Day', required=True, index=True)
+    unread_count = fields.Integer(string='Unread', default=0)
+
+    _sql_constraints = [
+        ('unique_model_day', 'unique(model, day)', 'Counter must be unique per model and day!')
+    ]
+
+    def init(self):
+        self.rebuild()
+
+    @api.model
+    def rebuild(self):
+        """Hitung ulang semua counter dari tabel notifikasi"""
+        self.env['pitcar.notification'].flush_model(['model', 'is_read', 'request_time'])
+        self.env.cr.execute("DELETE FROM pitcar_notification_counter")
+        self.env.cr.execute("""
+            INSERT INTO pitcar_notification_counter (model, day, unread_count)
+            SELECT model, request_time::date, COUNT(*)
+            FROM pitcar_notification
+            WHERE is_read IS NOT TRUE AND model IS NOT NULL AND request_time IS NOT NULL
+            GROUP BY model, request_time::date
+        """)
+        self.invalidate_model()
+
+    @api.model
+    def apply_deltas(self, keys, sign):
+        """
+        Args:
+            keys (list): tuple (model, day), boleh berulang
+            sign (int): 1 atau -1
+        """
+        deltas = {}
+        for key in keys:
+            deltas[key] = deltas.get(key, 0) + sign
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        values = [value for (model, day), delta in deltas.items() for value in (model, day, delta)]
+        self.env.cr.execute("""
+            INSERT INTO pitcar_notification_counter (model, day, unread_count)
+            VALUES %s
+            ON CONFLICT (model, day) DO UPDATE
+            SET unread_count = GREATEST(pitcar_notification_counter.unread_count + EXCLUDED.unread_count, 0)
+        """ % ', '.join(['(%s, %s, %s)'] * len(deltas)), values)
+        self.invalidate_model()
+
+    @api.model
+    def get_count(self, model, day_from):
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(unread_count), 0)
+            FROM pitcar_notification_counter
+            WHERE model = %s AND day >= %s
+        """, (model, day_from))
+        return self.env.cr.fetchone()[0]
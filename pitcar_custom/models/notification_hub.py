@@ -0,0 +1,250 @@
+"""
+Hub notifikasi in-process untuk stream SSE.
+
+Satu thread listener per worker melakukan LISTEN pada channel NOTIFY `imbus`
+milik bus.bus. Saat ada notifikasi untuk channel yang sedang di-subscribe,
+listener membaca baris bus_bus baru dengan satu cursor singkat lalu
+membagikannya ke queue in-memory setiap subscriber. Stream SSE tidak lagi
+memegang cursor database selama koneksi terbuka.
+
+Setiap channel menyimpan replay buffer terbatas sehingga client yang
+reconnect dengan Last-Event-ID bisa melanjutkan tanpa query tambahan; jika id
+tersebut sudah keluar dari buffer, subscriber menerima event `resync` dan
+client memuat ulang data lewat endpoint observer.
+"""
+from collections import deque
+import json
+import logging
+import queue
+import select
+import threading
+import time
+
+import odoo
+from odoo.addons.bus.models.bus import channel_with_db, json_dump
+
+_logger = logging.getLogger(__name__)
+
+REPLAY_BUFFER_SIZE = 200
+SUBSCRIBER_QUEUE_SIZE = 100
+LISTEN_TIMEOUT = 30
+FETCH_LIMIT = 500
+
+# Channel bus yang boleh di-subscribe lewat stream notifikasi
+PART_PURCHASE_CHANNEL = 'part_purchase_notifications'
+MENTOR_REQUEST_CHANNEL = 'mentor_request_notifications'
+QUEUE_DASHBOARD_CHANNEL = 'queue_dashboard'
+STREAM_CHANNELS = (PART_PURCHASE_CHANNEL, MENTOR_REQUEST_CHANNEL, QUEUE_DASHBOARD_CHANNEL)
+
+RESYNC = 'resync'
+
+
+def publish(env, channel, notification_type, payload):
+    """Kirim notifikasi ke channel bus; dikirim ke subscriber setelah transaksi commit"""
+    env['bus.bus'].sudo()._sendone(channel, notification_type, payload)
+
+
+class Subscription(object):
+    """Queue event untuk satu stream; diisi oleh thread listener hub"""
+
+    def __init__(self, hub, dbname, channels, replay=()):
+        self.hub = hub
+        self.dbname = dbname
+        self.channels = frozenset(channels)
+        self.queue = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+        for event in replay:
+            self.push(event)
+
+    def push(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Client terlalu lambat: kosongkan queue dan minta client sinkron ulang
+            self._drain()
+            self.queue.put_nowait((event[0], event[1], RESYNC, None))
+
+    def _drain(self):
+        try:
+            while True:
+                self.queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def get(self, timeout):
+        """
+        Returns:
+            tuple | None: (event_id, channel, notification_type, payload), None jika timeout
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class NotificationHub(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._buffers = {}
+        self._last_ids = {}
+        self._start_ids = {}
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Subscribe
+    # ------------------------------------------------------------------
+    def subscribe(self, dbname, channels, last_event_id=None):
+        channels = [channel for channel in channels if channel]
+        self._ensure_started(dbname)
+        with self._lock:
+            replay = []
+            if last_event_id is not None:
+                replay = self._replay(dbname, channels, last_event_id)
+            subscription = Subscription(self, dbname, channels, replay)
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def _replay(self, dbname, channels, last_event_id):
+        resync = [(self._last_ids.get(dbname, 0), None, RESYNC, None)]
+        if last_event_id < self._start_ids.get(dbname, 0):
+            # Event sebelum hub berjalan tidak ada di buffer
+            return resync
+        events = []
+        for channel in channels:
+            buffer = self._buffers.get((dbname, channel))
+            if not buffer:
+                continue
+            if len(buffer) == buffer.maxlen and buffer[0][0] > last_event_id:
+                # Sebagian event mungkin sudah keluar dari buffer
+                return resync
+            events.extend(event for event in buffer if event[0] > last_event_id)
+        return sorted(events, key=lambda event: event[0])
+
+    # ------------------------------------------------------------------
+    # Listener
+    # ------------------------------------------------------------------
+    def _ensure_started(self, dbname):
+        with self._lock:
+            idle = not any(s.dbname == dbname for s in self._subscriptions)
+        if idle:
+            # Listener tidak membaca database ini selama tidak ada subscriber: mulai dari id terbaru
+            with odoo.sql_db.db_connect(dbname).cursor() as cr:
+                cr.execute("SELECT COALESCE(MAX(id), 0) FROM bus_bus")
+                last_id = cr.fetchone()[0]
+            with self._lock:
+                if last_id > self._last_ids.get(dbname, 0):
+                    self._last_ids[dbname] = last_id
+                    self._start_ids[dbname] = last_id
+
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='pitcar.notification_hub', daemon=True)
+            self._thread.start()
+
+    def _subscribed_channels(self):
+        with self._lock:
+            channels = {}
+            for subscription in self._subscriptions:
+                channels.setdefault(subscription.dbname, set()).update(subscription.channels)
+            return channels
+
+    def _run(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                _logger.exception("Notification hub listener error, restarting in %ss", LISTEN_TIMEOUT)
+                time.sleep(LISTEN_TIMEOUT)
+
+    def _listen(self):
+        with odoo.sql_db.db_connect('postgres').cursor() as cr:
+            conn = cr._cnx
+            cr.execute("listen imbus")
+            cr.commit()
+            while True:
+                subscribed = self._subscribed_channels()
+                if select.select([conn], [], [], LISTEN_TIMEOUT) == ([], [], []):
+                    # Timeout: ambil ulang untuk berjaga-jaga jika ada NOTIFY yang terlewat
+                    dirty_dbs = set(subscribed)
+                else:
+                    conn.poll()
+                    dirty_dbs = set()
+                    while conn.notifies:
+                        for channel in json.loads(conn.notifies.pop().payload):
+                            if isinstance(channel, list) and len(channel) == 2 \
+                                    and channel[1] in subscribed.get(channel[0], ()):
+                                dirty_dbs.add(channel[0])
+                for dbname in dirty_dbs:
+                    self._fetch(dbname, subscribed[dbname])
+
+    def _fetch(self, dbname, channels):
+        """Baca baris bus_bus baru untuk channel yang di-subscribe lalu bagikan ke subscriber"""
+        keys = {json_dump(channel_with_db(dbname, channel)): channel for channel in channels}
+        with odoo.sql_db.db_connect(dbname).cursor() as cr:
+            cr.execute("""
+                SELECT id, channel, message FROM bus_bus
+                WHERE id > %s AND channel IN %s
+                ORDER BY id LIMIT %s
+            """, (self._last_ids.get(dbname, 0), tuple(keys), FETCH_LIMIT))
+            rows = cr.fetchall()
+        if not rows:
+            return
+
+        events = []
+        for event_id, channel_key, message in rows:
+            message = json.loads(message)
+            events.append((event_id, keys[channel_key], message.get('type'), message.get('payload')))
+
+        with self._lock:
+            self._last_ids[dbname] = max(self._last_ids.get(dbname, 0), rows[-1][0])
+            for event in events:
+                buffer = self._buffers.setdefault((dbname, event[1]), deque(maxlen=REPLAY_BUFFER_SIZE))
+                buffer.append(event)
+            subscriptions = [s for s in self._subscriptions if s.dbname == dbname]
+
+        for event in events:
+            for subscription in subscriptions:
+                if event[1] in subscription.channels:
+                    subscription.push(event)
+
+
+# Satu hub per proses worker
+hub = NotificationHub()
+
+
+def sse_stream(dbname, channels, last_event_id=None, heartbeat=15):
+    """
+    Generator SSE yang membaca dari hub.
+
+    Setiap event dikirim sebagai `id` dan `data` (payload JSON ditambah nama
+    channel). Heartbeat komentar dikirim saat tidak ada event.
+    """
+    subscription = hub.subscribe(dbname, channels, last_event_id)
+    try:
+        yield "data: {\"type\": \"connected\", \"message\": \"SSE connection established\"}\n\n"
+        while True:
+            event = subscription.get(heartbeat)
+            if event is None:
+                yield ":\n\n"
+                continue
+            event_id, channel, notification_type, payload = event
+            if notification_type == RESYNC:
+                data = {'type': RESYNC}
+            elif isinstance(payload, dict):
+                data = dict(payload, type=payload.get('type', notification_type))
+            else:
+                data = {'type': notification_type, 'payload': payload}
+            if channel:
+                data['channel'] = channel
+            yield "id: %s\ndata: %s\n\n" % (event_id, json_dump(data))
+    finally:
+        subscription.close()
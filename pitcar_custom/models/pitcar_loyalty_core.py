@@ -355,10 +355,9 @@ class PitcarLoyaltyCustomer(models.Model):
     @api.depends('six_month_spending')
     def _compute_membership_level(self):
         """Calculate membership level berdasarkan 6-month spending"""
+        # Get thresholds from config
+        config = self.env['pitcar.loyalty.config'].get_active_config()
         for customer in self:
-            # Get thresholds from config
-            config = self.env['pitcar.loyalty.config'].get_active_config()
-            
             if customer.six_month_spending >= config.membership_platinum_threshold:
                 customer.membership_level = 'platinum'
             elif customer.six_month_spending >= config.membership_gold_threshold:
@@ -383,8 +382,10 @@ class PitcarLoyaltyCustomer(models.Model):
     
     @api.depends('sale_order_ids', 'sale_order_ids.amount_total', 'sale_order_ids.date_order', 'sale_order_ids.state')
     def _compute_six_month_spending(self):
+        # Satu query agregat untuk seluruh recordset, bukan satu query per customer
+        spending = self._get_six_month_spending_map(self._origin.ids)
         for customer in self:
-            customer.six_month_spending = customer.get_six_month_spending()
+            customer.six_month_spending = spending.get(customer._origin.id, 0.0)
     
     @api.depends('points_transaction_ids')
     def _compute_referral_count(self):
@@ -410,33 +411,7 @@ class PitcarLoyaltyCustomer(models.Model):
     
     def update_membership_level(self):
         """Update membership level based on spending in last 6 months"""
-        config = self.env['pitcar.loyalty.config'].get_config()
-        
-        # Calculate spending in last 6 months
-        from dateutil.relativedelta import relativedelta
-        six_months_ago = fields.Date.today() - relativedelta(months=6)
-        
-        # Get confirmed orders in last 6 months
-        recent_orders = self.sale_order_ids.filtered(
-            lambda o: o.state in ['sale', 'done'] 
-            and o.date_order.date() >= six_months_ago
-        )
-        recent_spending = sum(recent_orders.mapped('amount_total'))
-        
-        # Determine new level based on recent spending
-        new_level = config.get_membership_level(recent_spending)
-        
-        if new_level != self.membership_level:
-            old_level = self.membership_level
-            self.membership_level = new_level
-            
-            # Log membership change
-            level_change = "upgraded" if self._get_level_weight(new_level) > self._get_level_weight(old_level) else "downgraded"
-            
-            self.message_post(
-                body=f"🔄 Membership {level_change} from {old_level} to {new_level}! (Based on 6-month spending: Rp {recent_spending:,.0f})"
-            )
-            _logger.info(f"Customer {self.display_name} {level_change} to {new_level} (6-month spending: {recent_spending})")
+        return self._recompute_membership_levels(self.ids)
     
     def _get_level_weight(self, level):
         """Get numeric weight for level comparison"""
@@ -445,14 +420,113 @@ class PitcarLoyaltyCustomer(models.Model):
     
     def get_six_month_spending(self):
         """Get spending amount in last 6 months"""
-        from dateutil.relativedelta import relativedelta
+        self.ensure_one()
+        return self._get_six_month_spending_map(self.ids).get(self.id, 0.0)
+    
+    @api.model
+    def _get_six_month_spending_map(self, customer_ids=None):
+        """
+        Spending 6 bulan terakhir per loyalty customer dengan satu query agregat.
+        
+        Args:
+            customer_ids (list): batasi ke customer tertentu; None = semua customer
+        
+        Returns:
+            dict: {customer_id: spending}
+        """
         six_months_ago = fields.Date.today() - relativedelta(months=6)
+        self.env['sale.order'].flush_model(['loyalty_customer_id', 'state', 'date_order', 'amount_total'])
+        
+        query = """
+            SELECT loyalty_customer_id, COALESCE(SUM(amount_total), 0)::float AS spending
+            FROM sale_order
+            WHERE loyalty_customer_id IS NOT NULL
+              AND state IN ('sale', 'done')
+              AND date_order >= %s
+        """
+        params = [six_months_ago]
+        if customer_ids is not None:
+            if not customer_ids:
+                return {}
+            query += " AND loyalty_customer_id IN %s"
+            params.append(tuple(customer_ids))
+        query += " GROUP BY loyalty_customer_id"
         
-        recent_orders = self.sale_order_ids.filtered(
-            lambda o: o.state in ['sale', 'done'] 
-            and o.date_order.date() >= six_months_ago
-        )
-        return sum(recent_orders.mapped('amount_total'))
+        self.env.cr.execute(query, params)
+        return dict(self.env.cr.fetchall())
+    
+    @api.model
+    def _recompute_membership_levels(self, customer_ids=None, batch_size=1000):
+        """
+        Hitung ulang six_month_spending dan membership level secara set-based.
+        
+        Spending dihitung dengan satu agregat SQL, dibandingkan dengan nilai
+        tersimpan, dan hanya baris yang berubah yang ditulis (per batch). Notifikasi
+        perubahan level dimasukkan ke antrian pitcar.loyalty.level.change dan
+        di-post oleh cron terpisah.
+        
+        Returns:
+            int: jumlah customer yang level-nya berubah
+        """
+        config = self.env['pitcar.loyalty.config'].get_active_config()
+        spending_map = self._get_six_month_spending_map(customer_ids)
+        
+        self.flush_model(['membership_level', 'six_month_spending', 'status'])
+        if customer_ids is None:
+            self.env.cr.execute("""
+                SELECT id, membership_level, six_month_spending
+                FROM pitcar_loyalty_customer
+                WHERE status = 'active'
+            """)
+        else:
+            if not customer_ids:
+                return 0
+            self.env.cr.execute("""
+                SELECT id, membership_level, six_month_spending
+                FROM pitcar_loyalty_customer
+                WHERE id IN %s
+            """, (tuple(customer_ids),))
+        
+        spending_updates = []
+        level_changes = {}
+        change_log = []
+        for customer_id, current_level, current_spending in self.env.cr.fetchall():
+            spending = spending_map.get(customer_id, 0.0)
+            if abs((current_spending or 0.0) - spending) > 0.005:
+                spending_updates.append((customer_id, spending))
+            
+            new_level = config.get_membership_level(spending)
+            if new_level != current_level:
+                level_changes.setdefault(new_level, []).append(customer_id)
+                change_log.append({
+                    'customer_id': customer_id,
+                    'old_level': current_level,
+                    'new_level': new_level,
+                    'six_month_spending': spending,
+                })
+        
+        # six_month_spending: update langsung per batch (membership_level ditulis di bawah)
+        for start in range(0, len(spending_updates), batch_size):
+            batch = spending_updates[start:start + batch_size]
+            self.env.cr.execute("""
+                UPDATE pitcar_loyalty_customer AS c
+                SET six_month_spending = v.spending
+                FROM (VALUES %s) AS v(id, spending)
+                WHERE c.id = v.id
+            """ % ', '.join(['(%s, %s::float)'] * len(batch)), [value for row in batch for value in row])
+        if spending_updates:
+            self.invalidate_model(['six_month_spending'])
+        
+        # membership_level: satu write per level per batch agar field turunan (sale.order) ikut terupdate
+        customers = self.with_context(tracking_disable=True)
+        for level, ids in level_changes.items():
+            for start in range(0, len(ids), batch_size):
+                customers.browse(ids[start:start + batch_size]).write({'membership_level': level})
+        
+        if change_log:
+            self.env['pitcar.loyalty.level.change'].sudo().enqueue(change_log)
+        
+        return len(change_log)
     
     def action_recalculate_points(self):
         """Recalculate total points (for debugging)"""
@@ -559,19 +633,60 @@ class PitcarLoyaltyCustomer(models.Model):
     @api.model 
     def auto_update_membership_levels(self):
         """Cron job: Update membership levels for all active customers"""
-        active_customers = self.search([('status', '=', 'active')])
-        
-        updated_count = 0
-        for customer in active_customers:
-            old_level = customer.membership_level
-            customer.update_membership_level()
-            if customer.membership_level != old_level:
-                updated_count += 1
-        
-        _logger.info(f"Auto-updated membership levels for {updated_count} customers")
+        updated_count = self._recompute_membership_levels()
+        _logger.info("Auto-updated membership levels for %s customers", updated_count)
         return updated_count
 
 
+class PitcarLoyaltyLevelChange(models.Model):
+    """
+    Antrian perubahan membership level.
+    
+    Perhitungan level hanya mencatat perubahan di sini; pesan chatter di-post
+    oleh cron terpisah per batch supaya cron level harian tidak membuat ribuan
+    mail.message dalam satu transaksi.
+    """
+    _name = 'pitcar.loyalty.level.change'
+    _description = 'Loyalty Membership Level Change'
+    _order = 'id'
+    
+    customer_id = fields.Many2one('pitcar.loyalty.customer', string='Customer', required=True, ondelete='cascade', index=True)
+    old_level = fields.Char(string='Old Level')
+    new_level = fields.Char(string='New Level', required=True)
+    six_month_spending = fields.Float(string='6-Month Spending (IDR)')
+    is_notified = fields.Boolean(string='Notified', default=False, index=True)
+    
+    @api.model
+    def enqueue(self, vals_list):
+        changes = self.create(vals_list)
+        cron = self.env.ref('pitcar_custom.cron_post_membership_level_changes', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return changes
+    
+    @api.model
+    def _cron_post_level_change_messages(self, batch_size=500):
+        """Post pesan chatter untuk perubahan level yang belum dinotifikasi"""
+        Customer = self.env['pitcar.loyalty.customer']
+        while True:
+            changes = self.search([('is_notified', '=', False)], limit=batch_size)
+            if not changes:
+                break
+            for change in changes:
+                level_change = "upgraded" if Customer._get_level_weight(change.new_level) > Customer._get_level_weight(change.old_level) else "downgraded"
+                change.customer_id.message_post(
+                    body=f"🔄 Membership {level_change} from {change.old_level} to {change.new_level}! (Based on 6-month spending: Rp {change.six_month_spending:,.0f})"
+                )
+            changes.write({'is_notified': True})
+            self.env.cr.commit()
+        
+        # Bersihkan antrian yang sudah dinotifikasi lebih dari 30 hari
+        self.search([
+            ('is_notified', '=', True),
+            ('create_date', '<', fields.Datetime.now() - timedelta(days=30))
+        ]).unlink()
+
+
 class PitcarPointsTransaction(models.Model):
     """
     Transaction history untuk points - untuk audit trail yang lengkap
@@ -1,4 +1,5 @@
 from odoo import models, fields, api
+from odoo.tools import split_every
 # from dateutil.relativedelta import relativedelta
 from datetime import datetime
 import logging
@@ -128,46 +129,53 @@ class ProductTemplate(models.Model):
             }
         return None
 
-    @api.depends('product_variant_ids.stock_move_ids.state', 'product_variant_ids.stock_quant_ids.quantity')
+    stock_age_layer_ids = fields.One2many('pitcar.stock.age.layer', 'product_tmpl_id', string='Stock Age Layers')
+
+    # Stok on hand tersimpan (quant di lokasi internal) untuk filter/sort di database
+    stock_onhand_qty = fields.Float(
+        string='Stok On Hand',
+        compute='_compute_stock_onhand_qty',
+        store=True,
+        index=True,
+        digits='Product Unit of Measure',
+        help='Jumlah quant di lokasi internal semua varian, diperbarui setiap stock.quant berubah'
+    )
+
+    @api.depends('product_variant_ids.stock_quant_ids.quantity', 'product_variant_ids.stock_quant_ids.location_id')
+    def _compute_stock_onhand_qty(self):
+        # Total quant internal per template (satu query untuk seluruh batch)
+        templates = self.browse([tmpl_id for tmpl_id in self._origin.ids if tmpl_id])
+        qty_by_template = {}
+        variants = templates.with_context(active_test=False).product_variant_ids
+        if variants:
+            template_by_variant = {variant.id: variant.product_tmpl_id.id for variant in variants}
+            groups = self.env['stock.quant'].sudo().read_group(
+                [('product_id', 'in', variants.ids), ('location_id.usage', '=', 'internal')],
+                ['product_id', 'quantity:sum'],
+                ['product_id']
+            )
+            for group in groups:
+                tmpl_id = template_by_variant[group['product_id'][0]]
+                qty_by_template[tmpl_id] = qty_by_template.get(tmpl_id, 0.0) + group['quantity']
+
+        for product in self:
+            product.stock_onhand_qty = qty_by_template.get(product._origin.id, 0.0)
+
+    @api.depends('stock_age_layer_ids.is_open', 'stock_age_layer_ids.in_date')
     def _compute_oldest_stock_entry_date(self):
+        # Tanggal masuk layer FIFO terbuka paling lama per template (satu query untuk seluruh batch)
+        template_ids = [tmpl_id for tmpl_id in self._origin.ids if tmpl_id]
+        oldest_by_template = {}
+        if template_ids:
+            groups = self.env['pitcar.stock.age.layer'].sudo().read_group(
+                [('product_tmpl_id', 'in', template_ids), ('is_open', '=', True)],
+                ['product_tmpl_id', 'in_date:min'],
+                ['product_tmpl_id']
+            )
+            oldest_by_template = {group['product_tmpl_id'][0]: group['in_date'] for group in groups}
+
         for product in self:
-            _logger.info(f"Computing oldest stock entry date for product: {product.name}")
-            
-            current_stock = sum(product.with_context(company_owned=True).product_variant_ids.mapped('qty_available'))
-            _logger.info(f"Current stock: {current_stock}")
-
-            if current_stock <= 0:
-                product.oldest_stock_entry_date = False
-                _logger.info("No stock available, set oldest_stock_entry_date to False")
-                continue
-
-            moves = self.env['stock.move'].search([
-                ('product_id', 'in', product.product_variant_ids.ids),
-                ('state', '=', 'done')
-            ], order='date asc')
-
-            stock_entries = []
-            for move in moves:
-                if move.location_dest_id.usage == 'internal' and move.location_id.usage != 'internal':
-                    # Incoming move
-                    stock_entries.append((move.date, move.product_uom_qty, 'in'))
-                elif move.location_id.usage == 'internal' and move.location_dest_id.usage != 'internal':
-                    # Outgoing move
-                    qty_to_remove = move.product_uom_qty
-                    while qty_to_remove > 0 and stock_entries:
-                        if stock_entries[0][1] <= qty_to_remove:
-                            qty_to_remove -= stock_entries[0][1]
-                            stock_entries.pop(0)
-                        else:
-                            stock_entries[0] = (stock_entries[0][0], stock_entries[0][1] - qty_to_remove, 'in')
-                            qty_to_remove = 0
-
-            if stock_entries:
-                product.oldest_stock_entry_date = stock_entries[0][0]
-                _logger.info(f"Set oldest_stock_entry_date to {product.oldest_stock_entry_date}")
-            else:
-                product.oldest_stock_entry_date = False
-                _logger.info("No stock entries found, set oldest_stock_entry_date to False")
+            product.oldest_stock_entry_date = oldest_by_template.get(product._origin.id, False)
 
     @api.depends('oldest_stock_entry_date')
     def _compute_inventory_age(self):
@@ -192,6 +200,8 @@ class ProductTemplate(models.Model):
                 product.inventory_age_category = 'new'
 
     def action_update_inventory_age(self):
+        """Bangun ulang layer umur persediaan dari histori stock.move untuk template terpilih"""
+        self.env['pitcar.stock.age.layer'].sudo().rebuild_for_products(self.mapped('product_variant_ids'))
         self._compute_oldest_stock_entry_date()
         self._compute_inventory_age()
         return True
@@ -200,6 +210,46 @@ class ProductTemplate(models.Model):
         self._compute_inventory_age()
         self.env.cr.commit()
 
+    @api.model
+    def _init_stock_age_layers(self):
+        """
+        Bangun layer FIFO dari histori sekali saja. Dipanggil saat install/upgrade modul
+        (data/cron_jobs.xml) sehingga tanggal masuk dan umur semua template langsung benar,
+        tanpa menunggu cron harian berikutnya.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        if params.get_param('pitcar.stock_age_layers_initialized'):
+            return
+        products = self.env['product.product'].with_context(active_test=False).search([('type', '=', 'product')])
+        self.env['pitcar.stock.age.layer'].sudo().rebuild_for_products(products)
+        templates = products.product_tmpl_id
+        self.env.add_to_compute(self._fields['oldest_stock_entry_date'], templates)
+        templates.flush_recordset([
+            'oldest_stock_entry_date', 'inventory_age', 'inventory_age_days', 'inventory_age_category',
+        ])
+        params.set_param('pitcar.stock_age_layers_initialized', fields.Datetime.now())
+        _logger.info("Stock age layers initialized for %s templates", len(templates))
+
+    @api.model
+    def _update_days_in_inventory(self, chunk_size=1000):
+        """
+        Cron harian: umur persediaan berubah setiap hari, tanggal masuk tidak.
+        Hanya field umur yang dihitung ulang (dari oldest_stock_entry_date tersimpan),
+        per chunk dengan commit.
+        """
+        # Normalnya sudah dijalankan saat upgrade; di sini hanya pengaman (no-op bila sudah)
+        self._init_stock_age_layers()
+
+        age_fields = ['inventory_age', 'inventory_age_days', 'inventory_age_category']
+        products = self.with_context(active_test=False).search([('oldest_stock_entry_date', '!=', False)])
+        for chunk in split_every(chunk_size, products.ids, self.browse):
+            for fname in age_fields:
+                self.env.add_to_compute(self._fields[fname], chunk)
+            chunk.flush_recordset(age_fields)
+            self.env.cr.commit()
+            self.env.invalidate_all()
+        _logger.info("Inventory age refreshed for %s products", len(products))
+
     @api.model
     def action_update_all_inventory_age(self):
         products = self.search([])
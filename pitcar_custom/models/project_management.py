@@ -835,6 +835,59 @@ class TeamProjectGroup(models.Model):
     def action_unarchive(self):
         self.write({'is_archived': False})
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        groups = super().create(vals_list)
+        groups._sync_memberships()
+        return groups
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'member_ids' in vals:
+            self._sync_memberships()
+        return res
+
+    def _get_last_message_ids(self):
+        """Id pesan terakhir per grup (0 jika belum ada pesan)"""
+        if not self.ids:
+            return {}
+        self.env['team.project.message'].flush_model(['group_id'])
+        self.env.cr.execute("""
+            SELECT group_id, MAX(id) FROM team_project_message
+            WHERE group_id IN %s GROUP BY group_id
+        """, (tuple(self.ids),))
+        return dict(self.env.cr.fetchall())
+
+    def _sync_memberships(self):
+        """
+        Catat epoch keanggotaan: anggota baru mulai menerima pesan setelah id pesan
+        terakhir saat bergabung, anggota yang keluar berhenti di id pesan terakhir saat keluar.
+        Pesan lama tidak ditulis ulang saat anggota berubah.
+        """
+        Membership = self.env['team.project.group.membership'].sudo()
+        last_ids = self._get_last_message_ids()
+        current = Membership.search([('group_id', 'in', self.ids), ('is_current', '=', True)])
+
+        to_create = []
+        for group in self:
+            existing = current.filtered(lambda m: m.group_id == group)
+            existing_ids = set(existing.mapped('employee_id').ids)
+            member_ids = set(group.member_ids.ids)
+            last_id = last_ids.get(group.id, 0)
+
+            to_create.extend({
+                'group_id': group.id,
+                'employee_id': employee_id,
+                'joined_message_id': last_id,
+            } for employee_id in member_ids - existing_ids)
+
+            left = existing.filtered(lambda m: m.employee_id.id not in member_ids)
+            if left:
+                left.write({'is_current': False, 'left_message_id': last_id})
+
+        if to_create:
+            Membership.create(to_create)
+
 
 class TeamProjectMessage(models.Model):
     _name = 'team.project.message'
@@ -991,14 +1044,14 @@ class TeamProjectMessage(models.Model):
         # Lewati notifikasi untuk pengirim
         members = self.group_id.member_ids.filtered(lambda m: m.id != self.author_id.id)
         
-        # Ekstrak ID user yang dimention
-        mentioned_user_ids = []
+        # Ekstrak ID employee yang dimention (format @[employee_id:nama], sama dengan _process_mentions)
+        mentioned_employee_ids = []
         if self.content:
             mention_pattern = r'@\[(\d+):[^\]]+\]'
             mentioned_id_strings = re.findall(mention_pattern, self.content)
-            mentioned_user_ids = [int(id_str) for id_str in mentioned_id_strings if id_str.isdigit()]
+            mentioned_employee_ids = [int(id_str) for id_str in mentioned_id_strings if id_str.isdigit()]
         
-        _logger.info(f"Memberitahu anggota grup, mentioned_user_ids: {mentioned_user_ids}")
+        _logger.debug("Memberitahu anggota grup, mentioned_employee_ids: %s", mentioned_employee_ids)
         
         # Tentukan tipe pesan dan prioritas
         is_announcement = self.message_type == 'announcement'
@@ -1011,83 +1064,125 @@ class TeamProjectMessage(models.Model):
             priority = 'normal'
             category = 'new_message'
         
+        message_data = {
+            'message_id': self.id,
+            'group_id': self.group_id.id,
+            'action': 'view_group_chat',
+            'author_id': self.author_id.id
+        }
+        
         # Notifikasi setiap anggota kecuali yang dimention (mereka sudah mendapat notifikasi mention)
-        for member in members:
-            # Lewati anggota tanpa akun pengguna
-            if not member.user_id:
-                continue
-                
-            # Lewati anggota yang sudah dimention (mereka sudah mendapat notifikasi mention)
-            if member.user_id.id in mentioned_user_ids:
-                _logger.info(f"Melewati notifikasi reguler untuk user yang dimention: {member.user_id.name}")
-                continue
-                
-            # Buat notifikasi pesan
-            message_data = {
-                'message_id': self.id,
-                'group_id': self.group_id.id,
-                'action': 'view_group_chat',
-                'author_id': self.author_id.id
-            }
-            
-            self.env['team.project.notification'].sudo().create_project_notification(
-                model='team.project.message',
-                res_id=self.id,
-                notif_type='new_message',
-                title=title,
-                message=f"{self.author_id.name}: {self.content[:100]}...",
-                recipient_id=member.id,  # Gunakan employee_id langsung
-                category=category,
-                project_id=self.project_id.id if self.project_id else False,
-                sender_id=self.author_id.id,
-                data=message_data,
-                priority=priority
-            )
-    # Tambahkan field baru untuk read status
+        # Lewati anggota tanpa akun pengguna
+        recipients = members.filtered(lambda m: m.user_id and m.id not in mentioned_employee_ids)
+        notification_batch = [{
+            'model': 'team.project.message',
+            'res_id': self.id,
+            'notif_type': 'new_message',
+            'title': title,
+            'message': f"{self.author_id.name}: {self.content[:100]}...",
+            'recipient_id': member.id,  # Gunakan employee_id langsung
+            'category': category,
+            'project_id': self.project_id.id if self.project_id else False,
+            'sender_id': self.author_id.id,
+            'data': message_data,
+            'priority': priority
+        } for member in recipients]
+        
+        if notification_batch:
+            self.env['team.project.notification'].sudo().create_notifications_batch(notification_batch)
+
+    # Riwayat read per pesan (lama); status baca sekarang memakai high-water mark per grup
     read_ids = fields.One2many(
         'team.project.message.read', 
         'message_id', 
         string='Read Status'
     )
+    # Statistik baca dihitung saat dibaca (tidak disimpan) sehingga perubahan anggota
+    # grup tidak menulis ulang seluruh pesan lama
     read_count = fields.Integer(
         string='Read Count', 
-        compute='_compute_read_stats', 
-        store=True
+        compute='_compute_read_stats'
     )
     unread_count = fields.Integer(
         string='Unread Count', 
-        compute='_compute_read_stats', 
-        store=True
+        compute='_compute_read_stats'
     )
     total_recipients = fields.Integer(
         string='Total Recipients',
-        compute='_compute_read_stats',
-        store=True
+        compute='_compute_read_stats'
     )
     
-    @api.depends('read_ids', 'group_id.member_ids', 'author_id')
+    @api.depends('group_id', 'author_id')
     def _compute_read_stats(self):
         """Compute read statistics for the message"""
+        stats = self._get_read_stats()
         for message in self:
-            if not message.group_id:
-                message.read_count = 0
-                message.unread_count = 0
-                message.total_recipients = 0
-                continue
-                
-            # Total recipients = all group members except the author
-            total_members = len(message.group_id.member_ids)
-            if message.author_id and message.author_id in message.group_id.member_ids:
-                total_recipients = total_members - 1
-            else:
-                total_recipients = total_members
-                
-            read_count = len(message.read_ids)
-            unread_count = max(0, total_recipients - read_count)
-            
+            total_recipients, read_count = stats.get(message.id, (0, 0))
             message.read_count = read_count
-            message.unread_count = unread_count
+            message.unread_count = max(0, total_recipients - read_count)
             message.total_recipients = total_recipients
+
+    def _get_read_stats(self):
+        """
+        Jumlah penerima dan pembaca per pesan grup dengan satu query.
+
+        Penerima = anggota yang epoch keanggotaannya mencakup pesan (bergabung
+        sebelum pesan dan belum keluar saat pesan dikirim), kecuali penulis.
+        Pembaca = penerima dengan high-water mark >= id pesan.
+
+        Returns:
+            dict: {message_id: (total_recipients, read_count)}
+        """
+        message_ids = [message_id for message_id in self.ids if message_id]
+        if not message_ids:
+            return {}
+        self.flush_model(['group_id', 'author_id'])
+        self.env['team.project.group.membership'].flush_model()
+        self.env['team.project.message.read.mark'].flush_model()
+        self.env.cr.execute("""
+            SELECT msg.id,
+                   COUNT(mem.id) AS total_recipients,
+                   COUNT(mark.id) FILTER (WHERE mark.last_read_message_id >= msg.id) AS read_count
+            FROM team_project_message msg
+            JOIN team_project_group_membership mem
+                ON mem.group_id = msg.group_id
+               AND mem.joined_message_id < msg.id
+               AND (mem.is_current OR mem.left_message_id >= msg.id)
+               AND mem.employee_id IS DISTINCT FROM msg.author_id
+            LEFT JOIN team_project_message_read_mark mark
+                ON mark.group_id = msg.group_id AND mark.reader_id = mem.employee_id
+            WHERE msg.id IN %s
+            GROUP BY msg.id
+        """, (tuple(message_ids),))
+        return {row[0]: (row[1], row[2]) for row in self.env.cr.fetchall()}
+
+    def _get_recipient_read_status(self):
+        """
+        Penerima satu pesan beserta status baca.
+
+        Returns:
+            list: tuple (employee_id, is_read, read_at)
+        """
+        self.ensure_one()
+        if not self.group_id:
+            return []
+        self.flush_recordset(['group_id', 'author_id'])
+        self.env['team.project.group.membership'].flush_model()
+        self.env['team.project.message.read.mark'].flush_model()
+        self.env.cr.execute("""
+            SELECT mem.employee_id,
+                   COALESCE(mark.last_read_message_id >= %s, FALSE) AS is_read,
+                   mark.read_at
+            FROM team_project_group_membership mem
+            LEFT JOIN team_project_message_read_mark mark
+                ON mark.group_id = mem.group_id AND mark.reader_id = mem.employee_id
+            WHERE mem.group_id = %s
+              AND mem.joined_message_id < %s
+              AND (mem.is_current OR mem.left_message_id >= %s)
+              AND mem.employee_id IS DISTINCT FROM %s
+            ORDER BY mark.read_at DESC NULLS LAST, mem.employee_id
+        """, (self.id, self.group_id.id, self.id, self.id, self.author_id.id or None))
+        return self.env.cr.fetchall()
     
     def mark_as_read(self, reader_id=None):
         """Mark message as read by specific user"""
@@ -1116,39 +1211,48 @@ class TeamProjectMessage(models.Model):
                 'total_recipients': 0
             }
         
-        # Get read status
-        for read_record in self.read_ids:
-            read_status.append({
-                'reader_id': read_record.reader_id.id,
-                'reader_name': read_record.reader_id.name,
-                'read_at': read_record.read_at,
-                'avatar': read_record.reader_id.image_128 or False
-            })
-        
-        # Get unread members
-        read_member_ids = self.read_ids.mapped('reader_id.id')
-        unread_members = self.group_id.member_ids.filtered(
-            lambda m: m.id not in read_member_ids and m.id != self.author_id.id
-        )
+        recipients = self._get_recipient_read_status()
+        employees = self.env['hr.employee'].sudo().browse([employee_id for employee_id, _, _ in recipients])
         
-        for member in unread_members:
-            unread_status.append({
-                'member_id': member.id,
-                'member_name': member.name,
-                'avatar': member.image_128 or False
-            })
+        for (employee_id, is_read, read_at), employee in zip(recipients, employees):
+            if is_read:
+                read_status.append({
+                    'reader_id': employee.id,
+                    'reader_name': employee.name,
+                    'read_at': read_at,
+                    'avatar': employee.image_128 or False
+                })
+            else:
+                unread_status.append({
+                    'member_id': employee.id,
+                    'member_name': employee.name,
+                    'avatar': employee.image_128 or False
+                })
         
         return {
             'read': read_status,
             'unread': unread_status,
             'read_count': len(read_status),
             'unread_count': len(unread_status),
-            'total_recipients': self.total_recipients
+            'total_recipients': len(recipients)
         }
     
-    def is_read_by(self, employee_id):
-        """Check if message is read by specific employee"""
-        return bool(self.read_ids.filtered(lambda r: r.reader_id.id == employee_id))
+    def get_last_read_ids(self, employee_id):
+        """Mark baca employee untuk semua grup pesan di recordset, satu query: {group_id: last_read_message_id}"""
+        return self.env['team.project.message.read.mark'].get_last_read_ids(self.mapped('group_id').ids, employee_id)
+
+    def is_read_by(self, employee_id, last_read_ids=None):
+        """
+        Check if message is read by specific employee.
+        last_read_ids: hasil get_last_read_ids() dari pemanggil yang menampilkan
+        banyak pesan, supaya mark tidak di-query per pesan.
+        """
+        self.ensure_one()
+        if not self.group_id or not employee_id:
+            return False
+        if last_read_ids is None:
+            last_read_ids = self.get_last_read_ids(employee_id)
+        return last_read_ids.get(self.group_id.id, 0) >= self.id
     
     def get_read_receipt_status(self):
         """Get read receipt status for message display"""
@@ -1198,7 +1302,15 @@ class TeamProjectMessageRead(models.Model):
     
     @api.model
     def mark_message_as_read(self, message_id, reader_id=None):
-        """Mark a message as read by a specific user"""
+        """
+        Mark a message as read by a specific user.
+
+        Membaca satu pesan memajukan high-water mark pembaca di grup tersebut
+        (pesan sebelumnya ikut terbaca); tidak lagi membuat baris per pesan.
+
+        Returns:
+            team.project.message.read.mark | False
+        """
         if not reader_id:
             if not self.env.user.employee_id:
                 return False
@@ -1206,37 +1318,156 @@ class TeamProjectMessageRead(models.Model):
             
         # Get the message
         message = self.env['team.project.message'].sudo().browse(message_id)
-        if not message.exists():
+        if not message.exists() or not message.group_id:
             return False
             
         # Don't mark own messages as read
         if message.author_id.id == reader_id:
             return False
             
-        # Check if already marked as read
-        existing = self.search([
-            ('message_id', '=', message_id),
-            ('reader_id', '=', reader_id)
-        ], limit=1)
-        
-        if existing:
-            return existing
-            
-        # Create read record
         try:
-            read_record = self.create({
-                'message_id': message_id,
-                'reader_id': reader_id,
-                'read_at': fields.Datetime.now()
-            })
-            
-            _logger.info(f"Message {message_id} marked as read by employee {reader_id}")
-            return read_record
+            mark = self.env['team.project.message.read.mark'].sudo().advance(
+                message.group_id.id, reader_id, message.id
+            )
+            _logger.debug("Message %s marked as read by employee %s", message_id, reader_id)
+            return mark
             
         except Exception as e:
             _logger.error(f"Error marking message as read: {str(e)}")
             return False
 
+
+class TeamProjectGroupMembership(models.Model):
+    """
+    Epoch keanggotaan grup kolaborasi.
+
+    Anggota menjadi penerima pesan dengan id > joined_message_id dan, setelah
+    keluar, <= left_message_id. Perubahan anggota hanya menambah/menutup satu
+    baris di sini, bukan menghitung ulang statistik semua pesan grup.
+    """
+    _name = 'team.project.group.membership'
+    _description = 'Collaboration Group Membership Epoch'
+    _order = 'group_id, joined_message_id'
+
+    group_id = fields.Many2one('team.project.group', string='Group', required=True, ondelete='cascade', index=True)
+    employee_id = fields.Many2one('hr.employee', string='Employee', required=True, ondelete='cascade', index=True)
+    joined_message_id = fields.Integer(string='Joined After Message', default=0, required=True)
+    left_message_id = fields.Integer(string='Left After Message')
+    is_current = fields.Boolean(string='Current Member', default=True, index=True)
+
+    def init(self):
+        # Anggota yang sudah ada dianggap penerima semua pesan (sama dengan perhitungan lama)
+        members = self.env['team.project.group']._fields['member_ids']
+        self.env.cr.execute("""
+            INSERT INTO team_project_group_membership (group_id, employee_id, joined_message_id, is_current)
+            SELECT rel.{group_col}, rel.{employee_col}, 0, TRUE
+            FROM {rel} rel
+            WHERE NOT EXISTS (
+                SELECT 1 FROM team_project_group_membership mem
+                WHERE mem.group_id = rel.{group_col} AND mem.employee_id = rel.{employee_col}
+            )
+        """.format(rel=members.relation, group_col=members.column1, employee_col=members.column2))
+
+
+class TeamProjectMessageReadMark(models.Model):
+    """High-water mark baca per pembaca per grup (id pesan terakhir yang dibaca)"""
+    _name = 'team.project.message.read.mark'
+    _description = 'Group Message Read Mark'
+    _rec_name = 'reader_id'
+
+    group_id = fields.Many2one('team.project.group', string='Group', required=True, ondelete='cascade', index=True)
+    reader_id = fields.Many2one('hr.employee', string='Reader', required=True, ondelete='cascade', index=True)
+    last_read_message_id = fields.Integer(string='Last Read Message', default=0, required=True)
+    read_at = fields.Datetime(string='Read At', default=fields.Datetime.now)
+
+    _sql_constraints = [
+        ('unique_group_reader', 'UNIQUE(group_id, reader_id)', 'Read mark must be unique per group and reader')
+    ]
+
+    def init(self):
+        # Migrasi status baca per pesan menjadi high-water mark per grup
+        self.env.cr.execute("""
+            INSERT INTO team_project_message_read_mark (group_id, reader_id, last_read_message_id, read_at)
+            SELECT msg.group_id, r.reader_id, MAX(r.message_id), MAX(r.read_at)
+            FROM team_project_message_read r
+            JOIN team_project_message msg ON msg.id = r.message_id
+            WHERE msg.group_id IS NOT NULL
+            GROUP BY msg.group_id, r.reader_id
+            ON CONFLICT (group_id, reader_id) DO NOTHING
+        """)
+
+    @api.model
+    def get_last_read_id(self, group_id, reader_id):
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT last_read_message_id FROM team_project_message_read_mark
+            WHERE group_id = %s AND reader_id = %s
+        """, (group_id, reader_id))
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0
+
+    @api.model
+    def get_last_read_ids(self, group_ids, reader_id):
+        """Mark pembaca untuk beberapa grup sekaligus: {group_id: last_read_message_id}"""
+        if not group_ids or not reader_id:
+            return {}
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT group_id, last_read_message_id FROM team_project_message_read_mark
+            WHERE group_id IN %s AND reader_id = %s
+        """, (tuple(group_ids), reader_id))
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def advance(self, group_id, reader_id, message_id):
+        """
+        Majukan mark pembaca ke `message_id` (tidak pernah mundur) dengan satu upsert.
+
+        Returns:
+            team.project.message.read.mark
+        """
+        self.flush_model()
+        self.env.cr.execute("""
+            INSERT INTO team_project_message_read_mark
+                (group_id, reader_id, last_read_message_id, read_at, create_uid, create_date, write_uid, write_date)
+            VALUES (%s, %s, %s, NOW() AT TIME ZONE 'UTC', %s, NOW() AT TIME ZONE 'UTC', %s, NOW() AT TIME ZONE 'UTC')
+            ON CONFLICT (group_id, reader_id) DO UPDATE
+            SET last_read_message_id = GREATEST(team_project_message_read_mark.last_read_message_id,
+                                                EXCLUDED.last_read_message_id),
+                read_at = CASE
+                    WHEN EXCLUDED.last_read_message_id > team_project_message_read_mark.last_read_message_id
+                    THEN EXCLUDED.read_at ELSE team_project_message_read_mark.read_at END,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+            RETURNING id
+        """, (group_id, reader_id, message_id, self.env.uid, self.env.uid))
+        mark = self.browse(self.env.cr.fetchone()[0])
+        self.invalidate_model()
+        self.env['team.project.message'].invalidate_model(['read_count', 'unread_count', 'total_recipients'])
+        return mark
+
+    @api.model
+    def mark_group_read(self, group_id, reader_id):
+        """
+        Tandai semua pesan grup terbaca oleh pembaca.
+
+        Returns:
+            int: jumlah pesan (bukan milik pembaca) yang sebelumnya belum terbaca
+        """
+        previous = self.get_last_read_id(group_id, reader_id)
+        self.env['team.project.message'].flush_model(['group_id', 'author_id'])
+        self.env.cr.execute("""
+            SELECT MAX(id),
+                   COUNT(*) FILTER (WHERE id > %s AND author_id IS DISTINCT FROM %s)
+            FROM team_project_message
+            WHERE group_id = %s
+        """, (previous, reader_id, group_id))
+        last_id, unread = self.env.cr.fetchone()
+        if last_id and last_id > previous:
+            self.advance(group_id, reader_id, last_id)
+        return unread or 0
+
+
 class TeamProjectBAU(models.Model):
     _name = 'team.project.bau'
     _description = 'Business As Usual Activity'
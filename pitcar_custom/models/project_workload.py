@@ -0,0 +1,316 @@
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Prioritas task yang dihitung sebagai high priority (High, Critical)
+HIGH_PRIORITIES = ('2', '3')
+CLOSED_TASK_STATES = ('done', 'cancelled')
+
+
+class TeamProjectWorkload(models.AbstractModel):
+    """
+    Agregasi beban kerja anggota tim untuk dashboard project.
+
+    Statistik semua anggota dihitung sekaligus dengan dua query GROUP BY
+    (task terbuka per assignee dan timesheet per employee), sehingga jumlah
+    query tidak bertambah mengikuti jumlah anggota departemen.
+    """
+    _name = 'team.project.workload'
+    _description = 'Team Workload Aggregation'
+
+    @api.model
+    def get_project_domain(self, department_id=None, states=None):
+        domain = []
+        if states:
+            domain.append(('state', 'in', list(states)))
+        if department_id:
+            domain.append(('department_ids', 'in', [department_id]))
+        return domain
+
+    @api.model
+    def get_project_members(self, projects):
+        """Anggota tim dan project manager dari sekumpulan project, urut nama"""
+        return (projects.mapped('team_ids') | projects.mapped('project_manager_id')).sorted(key=lambda e: e.name or '')
+
+    @api.model
+    def get_task_stats(self, employee_ids=None, project_ids=None):
+        """
+        Jumlah task terbuka per assignee.
+
+        Returns:
+            dict: {employee_id: {'open_tasks', 'high_priority_tasks', 'project_ids'}}
+        """
+        if employee_ids is not None and not employee_ids:
+            return {}
+        if project_ids is not None and not project_ids:
+            return {}
+
+        Task = self.env['team.project.task']
+        Task.flush_model(['assigned_to', 'state', 'priority', 'project_id'])
+        assigned = Task._fields['assigned_to']
+
+        where = ["t.state NOT IN %s"]
+        params = [CLOSED_TASK_STATES]
+        if employee_ids is not None:
+            where.append("rel.{col} IN %s".format(col=assigned.column2))
+            params.append(tuple(employee_ids))
+        if project_ids is not None:
+            where.append("t.project_id IN %s")
+            params.append(tuple(project_ids))
+
+        self.env.cr.execute("""
+            SELECT rel.{col2} AS employee_id,
+                   COUNT(*) AS open_tasks,
+                   COUNT(*) FILTER (WHERE t.priority IN %s) AS high_priority_tasks,
+                   ARRAY_AGG(DISTINCT t.project_id) AS project_ids
+            FROM team_project_task t
+            JOIN {rel} rel ON rel.{col1} = t.id
+            WHERE {where}
+            GROUP BY rel.{col2}
+        """.format(
+            rel=assigned.relation, col1=assigned.column1, col2=assigned.column2, where=' AND '.join(where)
+        ), [HIGH_PRIORITIES] + params)
+
+        return {row['employee_id']: row for row in self.env.cr.dictfetchall()}
+
+    @api.model
+    def get_timesheet_stats(self, employee_ids=None, date_from=None, date_to=None, project_ids=None):
+        """
+        Jam timesheet dan jumlah hari kerja berbeda per employee.
+
+        Returns:
+            dict: {employee_id: {'hours', 'days_worked', 'task_count', 'project_count'}}
+        """
+        if employee_ids is not None and not employee_ids:
+            return {}
+        if project_ids is not None and not project_ids:
+            return {}
+
+        self.env['team.project.timesheet'].flush_model(['employee_id', 'date', 'hours', 'project_id', 'task_id'])
+        where = ["TRUE"]
+        params = []
+        if employee_ids is not None:
+            where.append("employee_id IN %s")
+            params.append(tuple(employee_ids))
+        if project_ids is not None:
+            where.append("project_id IN %s")
+            params.append(tuple(project_ids))
+        if date_from:
+            where.append("date >= %s")
+            params.append(fields.Date.to_date(date_from))
+        if date_to:
+            where.append("date <= %s")
+            params.append(fields.Date.to_date(date_to))
+
+        self.env.cr.execute("""
+            SELECT employee_id,
+                   COALESCE(SUM(hours), 0)::float AS hours,
+                   COUNT(DISTINCT date) AS days_worked,
+                   COUNT(DISTINCT task_id) AS task_count,
+                   COUNT(DISTINCT project_id) AS project_count
+            FROM team_project_timesheet
+            WHERE {where}
+            GROUP BY employee_id
+        """.format(where=' AND '.join(where)), params)
+
+        return {row['employee_id']: row for row in self.env.cr.dictfetchall()}
+
+    @api.model
+    def get_timesheet_task_outcomes(self, employee_ids, date_from=None, date_to=None, project_ids=None):
+        """
+        Hasil task yang pernah di-timesheet per employee: jumlah task selesai dan
+        task selesai tepat waktu (actual_date_end <= planned_date_end).
+
+        Returns:
+            dict: {employee_id: {'completed_tasks', 'on_time_tasks'}}
+        """
+        if not employee_ids or (project_ids is not None and not project_ids):
+            return {}
+
+        self.env['team.project.task'].flush_model(['state', 'planned_date_end', 'actual_date_end'])
+        where = ["ts.employee_id IN %s"]
+        params = [tuple(employee_ids)]
+        if project_ids is not None:
+            where.append("ts.project_id IN %s")
+            params.append(tuple(project_ids))
+        if date_from:
+            where.append("ts.date >= %s")
+            params.append(fields.Date.to_date(date_from))
+        if date_to:
+            where.append("ts.date <= %s")
+            params.append(fields.Date.to_date(date_to))
+
+        self.env.cr.execute("""
+            SELECT pairs.employee_id,
+                   COUNT(*) FILTER (WHERE t.state = 'done') AS completed_tasks,
+                   COUNT(*) FILTER (
+                       WHERE t.state = 'done' AND t.actual_date_end <= t.planned_date_end
+                   ) AS on_time_tasks
+            FROM (
+                SELECT DISTINCT ts.employee_id, ts.task_id
+                FROM team_project_timesheet ts
+                WHERE {where}
+            ) pairs
+            JOIN team_project_task t ON t.id = pairs.task_id
+            GROUP BY pairs.employee_id
+        """.format(where=' AND '.join(where)), params)
+
+        return {row['employee_id']: row for row in self.env.cr.dictfetchall()}
+
+    @api.model
+    def get_project_task_allocation(self, project_ids):
+        """
+        Jumlah task terbuka per project dan per assignee.
+
+        Returns:
+            tuple: ({project_id: open_task_count}, {project_id: {employee_id: task_count}})
+        """
+        if not project_ids:
+            return {}, {}
+
+        Task = self.env['team.project.task']
+        Task.flush_model(['assigned_to', 'state', 'project_id'])
+        assigned = Task._fields['assigned_to']
+
+        self.env.cr.execute("""
+            SELECT project_id, COUNT(*) AS task_count
+            FROM team_project_task
+            WHERE project_id IN %s AND state NOT IN %s
+            GROUP BY project_id
+        """, (tuple(project_ids), CLOSED_TASK_STATES))
+        open_tasks = dict(self.env.cr.fetchall())
+
+        self.env.cr.execute("""
+            SELECT t.project_id, rel.{col2} AS employee_id, COUNT(*) AS task_count
+            FROM team_project_task t
+            JOIN {rel} rel ON rel.{col1} = t.id
+            WHERE t.project_id IN %s AND t.state NOT IN %s
+            GROUP BY t.project_id, rel.{col2}
+        """.format(rel=assigned.relation, col1=assigned.column1, col2=assigned.column2),
+            (tuple(project_ids), CLOSED_TASK_STATES))
+        allocation = {}
+        for project_id, employee_id, task_count in self.env.cr.fetchall():
+            allocation.setdefault(project_id, {})[employee_id] = task_count
+        return open_tasks, allocation
+
+    @api.model
+    def compute_workload_score(self, task_count, high_priority_count, hours_per_day):
+        """
+        Skor beban kerja 0-100: jumlah task (maks 40), task prioritas tinggi (maks 30)
+        dan jam per hari (maks 30, 6 jam/hari = 30).
+
+        Returns:
+            tuple: (score, level)
+        """
+        score = min(40, task_count * 10) + min(30, high_priority_count * 15) + min(30, hours_per_day * 5)
+        if score < 30:
+            level = 'low'
+        elif score < 70:
+            level = 'medium'
+        else:
+            level = 'high'
+        return score, level
+
+    @api.model
+    def get_member_workload(self, projects, days=7):
+        """
+        Beban kerja semua anggota project aktif.
+
+        Returns:
+            list: dict per anggota (urut nama) dengan jumlah task, jam dan skor
+        """
+        members = self.get_project_members(projects)
+        if not members:
+            return []
+
+        today = fields.Date.context_today(self)
+        task_stats = self.get_task_stats(members.ids, projects.ids)
+        timesheet_stats = self.get_timesheet_stats(members.ids, today - timedelta(days=days), today)
+
+        project_names = {project.id: project.name for project in projects}
+        result = []
+        for employee in members:
+            tasks = task_stats.get(employee.id, {})
+            timesheets = timesheet_stats.get(employee.id, {})
+            task_count = tasks.get('open_tasks', 0)
+            high_priority_count = tasks.get('high_priority_tasks', 0)
+            hours_logged = timesheets.get('hours', 0.0)
+            hours_per_day = hours_logged / max(timesheets.get('days_worked', 0), 1)
+            score, level = self.compute_workload_score(task_count, high_priority_count, hours_per_day)
+
+            result.append({
+                'employee': {
+                    'id': employee.id,
+                    'name': employee.name
+                },
+                'assigned_tasks': task_count,
+                'high_priority_tasks': high_priority_count,
+                'recent_hours': round(hours_logged, 1),
+                'hours_per_day': round(hours_per_day, 1),
+                'workload_score': score,
+                'workload_level': level,
+                'projects': [{
+                    'id': project_id,
+                    'name': project_names.get(project_id, '')
+                } for project_id in sorted(tasks.get('project_ids') or [])]
+            })
+        return result
+
+    @api.model
+    def get_department_stats(self):
+        """
+        Statistik project dan task per departemen dengan dua query GROUP BY.
+
+        Returns:
+            list: dict per departemen yang memiliki project
+        """
+        Project = self.env['team.project']
+        Project.flush_model(['department_ids', 'state', 'progress'])
+        self.env['team.project.task'].flush_model(['project_id', 'state'])
+        departments = Project._fields['department_ids']
+
+        self.env.cr.execute("""
+            SELECT rel.{dept} AS department_id,
+                   COUNT(*) AS total_projects,
+                   COUNT(*) FILTER (WHERE p.state = 'in_progress') AS active_projects,
+                   COUNT(*) FILTER (WHERE p.state = 'completed') AS completed_projects,
+                   COALESCE(AVG(p.progress), 0)::float AS avg_progress
+            FROM team_project p
+            JOIN {rel} rel ON rel.{proj} = p.id
+            GROUP BY rel.{dept}
+        """.format(rel=departments.relation, proj=departments.column1, dept=departments.column2))
+        project_stats = self.env.cr.dictfetchall()
+
+        self.env.cr.execute("""
+            SELECT rel.{dept} AS department_id,
+                   COUNT(t.id) AS total_tasks,
+                   COUNT(t.id) FILTER (WHERE t.state = 'done') AS completed_tasks
+            FROM team_project_task t
+            JOIN {rel} rel ON rel.{proj} = t.project_id
+            GROUP BY rel.{dept}
+        """.format(rel=departments.relation, proj=departments.column1, dept=departments.column2))
+        task_stats = {row['department_id']: row for row in self.env.cr.dictfetchall()}
+
+        departments = self.env['hr.department'].browse([row['department_id'] for row in project_stats])
+        names = {department.id: department.name for department in departments}
+        result = []
+        for row in sorted(project_stats, key=lambda r: names.get(r['department_id']) or ''):
+            tasks = task_stats.get(row['department_id'], {})
+            total_tasks = tasks.get('total_tasks', 0)
+            completed_tasks = tasks.get('completed_tasks', 0)
+            result.append({
+                'department': {
+                    'id': row['department_id'],
+                    'name': names.get(row['department_id'], '')
+                },
+                'total_projects': row['total_projects'],
+                'active_projects': row['active_projects'],
+                'completed_projects': row['completed_projects'],
+                'total_tasks': total_tasks,
+                'completed_tasks': completed_tasks,
+                'task_completion_rate': round((completed_tasks / total_tasks * 100) if total_tasks else 0, 1),
+                'avg_progress': round(row['avg_progress'], 1)
+            })
+        return result
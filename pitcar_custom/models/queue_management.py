@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 import pytz
 import logging as _logger
 from dateutil.relativedelta import relativedelta
+from .notification_hub import QUEUE_DASHBOARD_CHANNEL, publish
 
 class QueueManagement(models.Model):
     _name = 'queue.management'
@@ -44,15 +45,12 @@ class QueueManagement(models.Model):
     def _broadcast_queue_update(self):
         self.ensure_one()
         try:
-            message = {
-                'type': 'refresh_dashboard',
-                'payload': {
-                    'timestamp': fields.Datetime.now(),
-                    'message': 'refresh'
-                }
+            payload = {
+                'timestamp': fields.Datetime.now(),
+                'message': 'refresh'
             }
-            self.env['bus.bus']._sendone('queue_dashboard', message)
-            _logger.info('Queue update broadcast sent: %s', message)
+            publish(self.env, QUEUE_DASHBOARD_CHANNEL, 'refresh_dashboard', payload)
+            _logger.debug('Queue update broadcast sent for queue %s', self.id)
         except Exception as e:
             _logger.error('Failed to broadcast queue update: %s', str(e))
     
@@ -5,9 +5,15 @@ import pytz
 from datetime import timedelta, date, datetime, time
 import logging
 import json
+from .working_time import SHOP_CALENDAR, FULL_DAY_CALENDAR
+from .diagnostics import order_tracer
 
 _logger = logging.getLogger(__name__)
 
+# Batas recompute lead time yang dijalankan langsung (di atas ini pakai job background)
+LEAD_TIME_SYNC_RECOMPUTE_LIMIT = 1000
+LEAD_TIME_RECOMPUTE_CHUNK = 200
+
 READONLY_FIELD_STATES = {
     state: [('readonly', True)]
     for state in {'sale', 'done', 'cancel'}
@@ -1038,7 +1044,7 @@ class SaleOrder(models.Model):
     sa_mulai_penerimaan = fields.Datetime(string='Mulai Penerimaan')
     is_penerimaan_filled = fields.Boolean(compute='_compute_is_penerimaan_filled', store=True)
 
-    sa_cetak_pkb = fields.Datetime("Cetak PKB")
+    sa_cetak_pkb = fields.Datetime("Cetak PKB", index=True)
     
     controller_estimasi_mulai = fields.Datetime("Estimasi Pekerjaan Mulai", tracking=True)
     controller_estimasi_selesai = fields.Datetime("Estimasi Pekerjaan Selesai", tracking=True)
@@ -1923,6 +1929,7 @@ class SaleOrder(models.Model):
 
     @api.depends('sa_jam_masuk', 'fo_unit_keluar', 'controller_selesai')
     def _compute_overall_lead_time(self):
+        tracer = order_tracer(self)
         for order in self:
             try:
                 if not order.sa_jam_masuk:
@@ -1939,18 +1946,18 @@ class SaleOrder(models.Model):
                     delta = waktu_selesai - order.sa_jam_masuk
                     order.overall_lead_time = delta.total_seconds() / 3600
                     
-                    _logger.info(f"""
-                        Perhitungan Overall Lead Time untuk {order.name}:
-                        - Waktu Masuk: {order.sa_jam_masuk}
-                        - Waktu Selesai: {waktu_selesai}
-                        - Menggunakan: {'Unit Keluar' if order.fo_unit_keluar else 'Controller Selesai'}
-                        - Overall Lead Time: {order.overall_lead_time:.2f} jam
-                    """)
+                    if tracer and tracer.wants(order):
+                        tracer.log(
+                            order, "overall masuk=%s selesai=%s (%s): %.2f jam",
+                            order.sa_jam_masuk, waktu_selesai,
+                            'unit keluar' if order.fo_unit_keluar else 'controller selesai',
+                            order.overall_lead_time
+                        )
                 else:
                     order.overall_lead_time = 0
                     
             except Exception as e:
-                _logger.error(f"Error dalam compute overall lead time: {str(e)}")
+                _logger.error("Error dalam compute overall lead time %s: %s", order.name, e)
                 order.overall_lead_time = 0
     # def action_recompute_lead_time(self):
     #     """
@@ -2166,6 +2173,8 @@ class SaleOrder(models.Model):
              'controller_tunggu_sublet_mulai', 'controller_tunggu_sublet_selesai',
              'controller_job_stop_lain_mulai', 'controller_job_stop_lain_selesai')  # Tambahkan dependency job stop lain
     def _compute_lead_time_servis(self):
+        calendar = self._get_working_calendar()
+        tracer = order_tracer(self)
         for order in self:
             try:
                 if not order.controller_mulai_servis or not order.controller_selesai:
@@ -2175,119 +2184,13 @@ class SaleOrder(models.Model):
                     continue
 
                 # Set timezone dan convert waktu
-                tz = pytz.timezone('Asia/Jakarta')
-                mulai_local = pytz.utc.localize(fields.Datetime.from_string(order.controller_mulai_servis)).astimezone(tz)
-                selesai_local = pytz.utc.localize(fields.Datetime.from_string(order.controller_selesai)).astimezone(tz)
-
-                _logger.info(f"""
-                    Mulai hitung lead time untuk {order.name}:
-                    Mulai: {mulai_local.strftime('%Y-%m-%d %H:%M:%S')}
-                    Selesai: {selesai_local.strftime('%Y-%m-%d %H:%M:%S')}
-                """)
-
-                total_duration = timedelta()
-                current_date = mulai_local.date()
-                end_date = selesai_local.date()
-
-                # Loop untuk setiap hari
-                while current_date <= end_date:
-                    # Set waktu awal dan akhir untuk hari ini
-                    if current_date == mulai_local.date():
-                        day_start = max(mulai_local, tz.localize(datetime.combine(current_date, time(8, 0))))
-                    else:
-                        day_start = tz.localize(datetime.combine(current_date, time(8, 0)))
-
-                    if current_date == selesai_local.date():
-                        day_end = min(selesai_local, tz.localize(datetime.combine(current_date, time(17, 0))))
-                    else:
-                        day_end = tz.localize(datetime.combine(current_date, time(17, 0)))
-
-                    # Set waktu istirahat untuk hari ini
-                    break_start = tz.localize(datetime.combine(current_date, time(12, 0)))
-                    break_end = tz.localize(datetime.combine(current_date, time(13, 0)))
-
-                    # Validasi waktu kerja valid
-                    if day_start.time() < time(8, 0):
-                        day_start = tz.localize(datetime.combine(current_date, time(8, 0)))
-                    if day_end.time() > time(17, 0):
-                        day_end = tz.localize(datetime.combine(current_date, time(17, 0)))
-
-                    # Hitung durasi kerja efektif
-                    if day_end > day_start:
-                        # Case 1: Overlap dengan istirahat
-                        if day_start < break_start and day_end > break_end:
-                            morning_duration = break_start - day_start
-                            afternoon_duration = day_end - break_end
-                            total_duration += morning_duration + afternoon_duration
-                            
-                        # Case 2: Hanya overlap dengan akhir istirahat
-                        elif day_start < break_end and day_end > break_end:
-                            duration = day_end - break_end
-                            total_duration += duration
-
-                        # Case 3: Hanya overlap dengan awal istirahat
-                        elif day_start < break_start and day_end > break_start:
-                            duration = break_start - day_start
-                            total_duration += duration
-
-                        # Case 4: Tidak overlap dengan istirahat
-                        else:
-                            duration = day_end - day_start
-                            total_duration += duration
+                mulai_local = calendar.to_local(order.controller_mulai_servis)
+                selesai_local = calendar.to_local(order.controller_selesai)
 
-                    current_date += timedelta(days=1)
+                # Jam kerja efektif (08:00-17:00, dikurangi istirahat 12:00-13:00)
+                total_hours = calendar.effective_hours(mulai_local, selesai_local)
 
                 # Calculate job stops including 'job stop lain'
-                job_stops = []
-                
-                # Helper function untuk menghitung waktu efektif job stop
-                def calculate_stop_duration(start, end):
-                    if not start or not end:
-                        return 0
-                    
-                    start_dt = pytz.utc.localize(fields.Datetime.from_string(start))
-                    end_dt = pytz.utc.localize(fields.Datetime.from_string(end))
-                    
-                    start_local = start_dt.astimezone(tz)
-                    end_local = end_dt.astimezone(tz)
-                    
-                    stop_duration = timedelta()
-                    current = start_local.date()
-                    stop_end_date = end_local.date()
-                    
-                    while current <= stop_end_date:
-                        # Get day's boundaries
-                        if current == start_local.date():
-                            day_start = max(start_local, tz.localize(datetime.combine(current, time(8, 0))))
-                        else:
-                            day_start = tz.localize(datetime.combine(current, time(8, 0)))
-
-                        if current == end_local.date():
-                            day_end = min(end_local, tz.localize(datetime.combine(current, time(17, 0))))
-                        else:
-                            day_end = tz.localize(datetime.combine(current, time(17, 0)))
-
-                        # Adjust for lunch break
-                        break_start = tz.localize(datetime.combine(current, time(12, 0)))
-                        break_end = tz.localize(datetime.combine(current, time(13, 0)))
-
-                        if day_end > day_start:
-                            if day_start < break_start and day_end > break_end:
-                                morning = break_start - day_start
-                                afternoon = day_end - break_end
-                                stop_duration += morning + afternoon
-                            elif day_start < break_end and day_end > break_end:
-                                stop_duration += day_end - break_end
-                            elif day_start < break_start and day_end > break_start:
-                                stop_duration += break_start - day_start
-                            else:
-                                stop_duration += day_end - day_start
-
-                        current += timedelta(days=1)
-                    
-                    return stop_duration.total_seconds() / 3600
-
-                # Calculate each job stop
                 stops_to_calculate = [
                     ('Tunggu Konfirmasi', order.controller_tunggu_konfirmasi_mulai, order.controller_tunggu_konfirmasi_selesai),
                     ('Tunggu Part 1', order.controller_tunggu_part1_mulai, order.controller_tunggu_part1_selesai),
@@ -2295,88 +2198,66 @@ class SaleOrder(models.Model):
                     ('Tunggu Sublet', order.controller_tunggu_sublet_mulai, order.controller_tunggu_sublet_selesai),
                     ('Job Stop Lain', order.controller_job_stop_lain_mulai, order.controller_job_stop_lain_selesai)  # Tambahkan job stop lain
                 ]
+                stops_to_calculate = [stop for stop in stops_to_calculate if stop[1] and stop[2]]
+                job_stops = calendar.effective_hours_bulk([(start, end) for _name, start, end in stops_to_calculate])
 
-                for stop_name, start, end in stops_to_calculate:
-                    if start and end:
-                        duration = calculate_stop_duration(start, end)
-                        job_stops.append(duration)
-                        _logger.info(f"{stop_name}: {duration:.2f} jam")
-
-                # Convert total durasi ke jam
-                total_hours = total_duration.total_seconds() / 3600
                 total_stops = sum(job_stops)
 
                 # Set final values
                 order.total_lead_time_servis = total_hours
                 order.lead_time_servis = max(0, total_hours - total_stops)
-                order.is_overnight = end_date > mulai_local.date()
+                order.is_overnight = selesai_local.date() > mulai_local.date()
 
-                _logger.info(f"""
-                    Hasil akhir {order.name}:
-                    - Total Lead Time: {total_hours:.2f} jam
-                    - Total Job Stops: {total_stops:.2f} jam
-                    - Lead Time Bersih: {order.lead_time_servis:.2f} jam
-                    - Menginap: {order.is_overnight}
-                """)
+                if tracer and tracer.wants(order):
+                    tracer.log(order, "mulai=%s selesai=%s", mulai_local, selesai_local)
+                    for (stop_name, _start, _end), duration in zip(stops_to_calculate, job_stops):
+                        tracer.log(order, "job stop %s: %.2f jam", stop_name, duration)
+                    tracer.log(
+                        order, "total=%.2f jam, job stop=%.2f jam, bersih=%.2f jam, menginap=%s",
+                        total_hours, total_stops, order.lead_time_servis, order.is_overnight
+                    )
 
             except Exception as e:
-                _logger.error(f"Error menghitung lead time untuk {order.name}: {str(e)}")
+                _logger.error("Error menghitung lead time untuk %s: %s", order.name, e)
                 order.lead_time_servis = 0
                 order.total_lead_time_servis = 0
                 order.is_overnight = False
 
+    @api.model
+    def _get_working_calendar(self):
+        """
+        Kalender jam kerja bengkel untuk perhitungan lead time.
+        Hari libur global (resource.calendar.leaves tanpa resource) hanya dipakai jika
+        parameter sistem pitcar.lead_time_use_public_holidays diaktifkan.
+        """
+        use_holidays = self.env['ir.config_parameter'].sudo().get_param('pitcar.lead_time_use_public_holidays')
+        if not use_holidays or use_holidays.lower() in ('0', 'false'):
+            return SHOP_CALENDAR
+
+        leaves = self.env['resource.calendar.leaves'].sudo().search([
+            ('resource_id', '=', False),
+            ('calendar_id', 'in', [False, self.env.company.resource_calendar_id.id]),
+        ])
+        holidays = set()
+        for leave in leaves:
+            day = SHOP_CALENDAR.to_local(leave.date_from).date()
+            last_day = SHOP_CALENDAR.to_local(leave.date_to).date()
+            while day <= last_day:
+                holidays.add(day)
+                day += timedelta(days=1)
+        return SHOP_CALENDAR.with_holidays(holidays)
+
     def calculate_effective_hours(self, start_dt, end_dt):
         """
         Hitung jam efektif antara dua waktu, dengan mempertimbangkan:
-        - Jam kerja (08:00-17:00)
+        - Jam kerja (08:00-17:00) untuk hari-hari di antaranya
         - Waktu istirahat (12:00-13:00)
+        Hari pertama/terakhir tidak dipotong jam buka, sama seperti perhitungan
+        lama (bisa bernilai negatif jika mulai setelah 17:00 / selesai sebelum 08:00).
         """
         if not start_dt or not end_dt or end_dt <= start_dt:
             return 0
-
-        tz = pytz.timezone('Asia/Jakarta')
-        start_local = pytz.utc.localize(start_dt).astimezone(tz)
-        end_local = pytz.utc.localize(end_dt).astimezone(tz)
-
-        total_hours = 0
-        current_date = start_local.date()
-        end_date = end_local.date()
-
-        while current_date <= end_date:
-            # Set waktu untuk hari ini
-            if current_date == start_local.date():
-                day_start = start_local
-            else:
-                day_start = tz.localize(datetime.combine(current_date, time(8, 0)))
-
-            if current_date == end_local.date():
-                day_end = end_local
-            else:
-                day_end = tz.localize(datetime.combine(current_date, time(17, 0)))
-
-            # Set waktu istirahat
-            break_start = tz.localize(datetime.combine(current_date, time(12, 0)))
-            break_end = tz.localize(datetime.combine(current_date, time(13, 0)))
-
-            # Hitung jam efektif
-            if day_start < break_start and day_end > break_end:
-                # Ada 2 periode: sebelum dan sesudah istirahat
-                morning_hours = (break_start - day_start).total_seconds() / 3600
-                afternoon_hours = (day_end - break_end).total_seconds() / 3600
-                total_hours += morning_hours + afternoon_hours
-            elif day_start < break_end and day_end > break_end:
-                # Hanya periode setelah istirahat
-                total_hours += (day_end - break_end).total_seconds() / 3600
-            elif day_start < break_start and day_end > break_start:
-                # Hanya periode sebelum istirahat
-                total_hours += (break_start - day_start).total_seconds() / 3600
-            else:
-                # Tidak overlap dengan istirahat
-                total_hours += (day_end - day_start).total_seconds() / 3600
-
-            current_date += timedelta(days=1)
-
-        return total_hours
+        return self._get_working_calendar().span_hours_utc(start_dt, end_dt)
 
     def recompute_productive_hours(self):
         """
@@ -2464,18 +2345,29 @@ class SaleOrder(models.Model):
 
     # Tambahkan method untuk recompute batch/multiple orders
     def action_recompute_lead_time_batch(self):
-        """Method untuk recompute multiple orders sekaligus"""
+        """
+        Method untuk recompute multiple orders sekaligus.
+        Seleksi besar dijalankan sebagai job background (chunk + commit berkala).
+        """
+        if len(self) > LEAD_TIME_SYNC_RECOMPUTE_LIMIT:
+            # Job berjalan sebagai sudo: cukup pastikan user boleh mengubah order terpilih,
+            # sama seperti jalur sinkron di bawah
+            self.check_access_rights('write')
+            self.check_access_rule('write')
+            return self._schedule_lead_time_recompute()
+
         success_count = 0
         error_count = 0
-        
-        for order in self:
+
+        for batch in split_every(LEAD_TIME_RECOMPUTE_CHUNK, self.ids, self.browse):
             try:
-                order.invalidate_cache(['lead_time_servis', 'total_lead_time_servis'])
-                order._compute_lead_time_servis()
-                success_count += 1
+                with self.env.cr.savepoint():
+                    batch._recompute_lead_time_fields()
+                success_count += len(batch)
             except Exception as e:
-                _logger.error(f"Error recomputing lead time for order {order.name}: {str(e)}")
-                error_count += 1
+                _logger.error(f"Error recomputing lead time for orders {batch.ids}: {str(e)}")
+                self.env.clear()
+                error_count += len(batch)
 
         return {
             'type': 'ir.actions.client',
@@ -2490,80 +2382,21 @@ class SaleOrder(models.Model):
     
     def action_recompute_all_orders(self):
         """Recompute lead time untuk semua order yang ditampilkan di list view"""
-        for order in self:
-            order.action_recompute_lead_time()
-        
-        return {
-            'type': 'ir.actions.client',
-            'tag': 'display_notification',
-            'params': {
-                'title': 'Success',
-                'message': f'Successfully recomputed {len(self)} orders',
-                'type': 'success',
-                'sticky': False,
-            }
-        }
+        return self.action_recompute_lead_time_batch()
 
     def hitung_waktu_kerja_efektif(self, waktu_mulai, waktu_selesai, is_normal_break=True):
         """
         Menghitung waktu kerja efektif dengan mempertimbangkan istirahat
         @param waktu_mulai: datetime - Waktu mulai
         @param waktu_selesai: datetime - Waktu selesai
-        @param is_normal_break: boolean - True jika menggunakan perhitungan istirahat normal
+        @param is_normal_break: boolean - True jika menggunakan jam bengkel (08:00-17:00)
+                                dan istirahat normal, False untuk durasi penuh 24 jam
         """
         if not waktu_mulai or not waktu_selesai or waktu_selesai <= waktu_mulai:
             return timedelta()
 
-        BENGKEL_BUKA = time(8, 0)
-        BENGKEL_TUTUP = time(17, 0)
-        ISTIRAHAT_MULAI = time(12, 0)
-        ISTIRAHAT_SELESAI = time(13, 0)
-
-        waktu_kerja = timedelta()
-        current_date = waktu_mulai.date()
-        end_date = waktu_selesai.date()
-
-        while current_date <= end_date:
-            # Tentukan waktu mulai dan selesai untuk hari ini
-            if current_date == waktu_mulai.date():
-                start_time = waktu_mulai.time()
-            else:
-                start_time = BENGKEL_BUKA if is_normal_break else time(0, 0)
-
-            if current_date == waktu_selesai.date():
-                end_time = waktu_selesai.time()
-            else:
-                end_time = BENGKEL_TUTUP if is_normal_break else time(23, 59, 59)
-
-            # Batasi dengan jam kerja bengkel jika menggunakan istirahat normal
-            if is_normal_break:
-                if start_time < BENGKEL_BUKA:
-                    start_time = BENGKEL_BUKA
-                if end_time > BENGKEL_TUTUP:
-                    end_time = BENGKEL_TUTUP
-
-            if start_time < end_time:
-                day_start = datetime.combine(current_date, start_time)
-                day_end = datetime.combine(current_date, end_time)
-                
-                work_time = day_end - day_start
-
-                # Kurangi waktu istirahat jika perlu
-                if is_normal_break:
-                    istirahat_start = datetime.combine(current_date, ISTIRAHAT_MULAI)
-                    istirahat_end = datetime.combine(current_date, ISTIRAHAT_SELESAI)
-
-                    if day_start < istirahat_end and day_end > istirahat_start:
-                        overlap_start = max(day_start, istirahat_start)
-                        overlap_end = min(day_end, istirahat_end)
-                        istirahat_duration = overlap_end - overlap_start
-                        work_time -= istirahat_duration
-
-                waktu_kerja += work_time
-
-            current_date += timedelta(days=1)
-
-        return waktu_kerja
+        calendar = SHOP_CALENDAR if is_normal_break else FULL_DAY_CALENDAR
+        return timedelta(seconds=calendar.effective_seconds(waktu_mulai, waktu_selesai))
 
      # Fields yang dipertahankan
     lead_time_calculation_details = fields.Text(
@@ -0,0 +1,486 @@
+from odoo import models, fields, api
+from datetime import datetime, time as dt_time, timedelta
+import logging
+import pytz
+import time
+
+_logger = logging.getLogger(__name__)
+
+FACT_TIMEZONE = 'Asia/Jakarta'
+REBUILD_CHUNK_DAYS = 31
+REFRESH_RECENT_DAYS = 3
+CRON_TIME_LIMIT = 240
+BACKFILL_PARAM = 'pitcar_custom.sales_fact_backfilled_from'
+
+FACT_MEASURES = (
+    'order_count', 'advisor_order_count', 'mechanic_order_count',
+    'amount_untaxed', 'amount_total', 'service_revenue', 'product_revenue', 'discount_amount',
+    'flat_rate_hours', 'mechanic_flat_rate_hours', 'mechanic_service_revenue',
+    'lead_time', 'lead_time_order_count',
+)
+
+# Ekspresi GROUP BY yang boleh dipakai aggregate()
+FACT_GROUPBY = {
+    'date': "date",
+    'month': "to_char(date, 'YYYY-MM')",
+    'service_advisor_id': "service_advisor_id",
+    'mechanic_id': "mechanic_id",
+    'service_category': "service_category",
+    'service_subcategory': "service_subcategory",
+    'product_category_id': "product_category_id",
+}
+
+
+class PitcarSalesDailyFact(models.Model):
+    """
+    Rollup harian sale.order selesai (state sale) untuk dashboard statistik.
+
+    Satu baris per hari (tanggal selesai waktu Asia/Jakarta) x service advisor
+    x mekanik x jenis servis x kategori produk. Order dengan beberapa advisor,
+    mekanik atau kategori produk dipecah dengan bobot 1/n per dimensi, sehingga
+    SUM atas kolom mana pun tetap sama dengan nilai order aslinya:
+
+    - order_count, amount_*, service/product_revenue, discount_amount,
+      flat_rate_hours dan lead_time dibobot advisor x mekanik (total periode,
+      revenue per advisor/mekanik = nilai order / jumlah advisor/mekanik).
+    - advisor_order_count hanya dibobot mekanik dan kategori, mechanic_order_count
+      dan mechanic_* hanya dibobot advisor dan kategori, sehingga SUM per
+      advisor/mekanik menghitung setiap order satu kali.
+    - flat_rate_hours mengikuti definisi dashboard: jam flat rate produk jasa
+      dibagi jumlah mekanik order.
+
+    Hari yang terdampak dicatat saat order atau baris order berubah (termasuk
+    stored compute yang ditulis saat flush, lihat SaleOrder dan SaleOrderLine
+    di bawah) dan dibangun ulang sekali per transaksi saat precommit. Cron
+    mengisi histori dan membangun ulang beberapa hari terakhir untuk
+    perubahan di luar order (mis. flat rate produk).
+
+    Rebuild satu hari selalu meng-upsert baris pitcar.sales.daily.fact.day
+    hari tersebut lebih dulu. Transaksi lain yang membangun ulang hari yang
+    sama menunggu baris itu lalu gagal dengan serialization failure (isolasi
+    REPEATABLE READ) dan diulang oleh Odoo, sehingga DELETE + INSERT kedua
+    transaksi tidak pernah menggandakan fakta.
+    """
+    _name = 'pitcar.sales.daily.fact'
+    _description = 'Sales Daily Fact'
+    _order = 'date desc'
+    _rec_name = 'date'
+
+    date = fields.Date('Date', required=True, index=True, readonly=True)
+    service_advisor_id = fields.Many2one('pitcar.service.advisor', 'Service Advisor', readonly=True, ondelete='set null')
+    mechanic_id = fields.Many2one('pitcar.mechanic.new', 'Mechanic', readonly=True, ondelete='set null')
+    service_category = fields.Selection(
+        selection=lambda self: self.env['sale.order']._fields['service_category'].selection,
+        string='Kategori Servis', readonly=True
+    )
+    service_subcategory = fields.Selection(
+        selection=lambda self: self.env['sale.order']._fields['service_subcategory'].selection,
+        string='Jenis Servis', readonly=True
+    )
+    product_category_id = fields.Many2one('product.category', 'Product Category', readonly=True, ondelete='set null')
+
+    order_count = fields.Float('Orders', readonly=True)
+    advisor_order_count = fields.Float('Orders (per Advisor)', readonly=True)
+    mechanic_order_count = fields.Float('Orders (per Mechanic)', readonly=True)
+    amount_untaxed = fields.Float('Untaxed Amount', readonly=True)
+    amount_total = fields.Float('Total Amount', readonly=True)
+    service_revenue = fields.Float('Service Revenue', readonly=True)
+    product_revenue = fields.Float('Product Revenue', readonly=True)
+    discount_amount = fields.Float('Discount', readonly=True)
+    flat_rate_hours = fields.Float('Flat Rate Hours', readonly=True)
+    mechanic_flat_rate_hours = fields.Float('Flat Rate Hours (per Mechanic)', readonly=True)
+    mechanic_service_revenue = fields.Float('Flat Rate Service Revenue (per Mechanic)', readonly=True)
+    lead_time = fields.Float('Lead Time Servis (jam)', readonly=True)
+    lead_time_order_count = fields.Float('Orders with Lead Time', readonly=True)
+
+    # ------------------------------------------------------------------
+    # Periode
+    # ------------------------------------------------------------------
+    @api.model
+    def local_date(self, value):
+        """Tanggal Asia/Jakarta dari datetime UTC naive (nilai field Datetime)"""
+        if not value:
+            return None
+        return pytz.UTC.localize(value).astimezone(pytz.timezone(FACT_TIMEZONE)).date()
+
+    @api.model
+    def get_period_bounds(self, start, end):
+        """
+        Rentang hari periode dashboard dan periode pembanding dengan jumlah hari yang sama.
+
+        Args:
+            start, end: datetime Asia/Jakarta
+
+        Returns:
+            tuple: (date_from, date_to, prev_date_from, prev_date_to)
+        """
+        date_from, date_to = start.date(), end.date()
+        prev_date_to = date_from - timedelta(days=1)
+        prev_date_from = prev_date_to - (date_to - date_from)
+        return date_from, date_to, prev_date_from, prev_date_to
+
+    @api.model
+    def _utc_bounds(self, date_from, date_to):
+        """Batas UTC [awal date_from, awal hari setelah date_to) untuk filter date_completed"""
+        tz = pytz.timezone(FACT_TIMEZONE)
+        start = tz.localize(datetime.combine(date_from, dt_time.min)).astimezone(pytz.UTC)
+        end = tz.localize(datetime.combine(date_to + timedelta(days=1), dt_time.min)).astimezone(pytz.UTC)
+        return start.replace(tzinfo=None), end.replace(tzinfo=None)
+
+    # ------------------------------------------------------------------
+    # Rebuild
+    # ------------------------------------------------------------------
+    @api.model
+    def _rebuild(self, date_from, date_to, days=None):
+        """
+        Hapus dan bangun ulang baris fakta untuk rentang hari (opsional hanya hari di `days`)
+        dengan satu INSERT ... SELECT dari sale_order dan sale_order_line.
+        """
+        self.env.flush_all()
+        utc_from, utc_to = self._utc_bounds(date_from, date_to)
+        day_filter = ""
+        params = {
+            'tz': FACT_TIMEZONE,
+            'utc_from': utc_from,
+            'utc_to': utc_to,
+            'date_from': date_from,
+            'date_to': date_to,
+            'uid': self.env.uid,
+        }
+        if days is not None:
+            day_filter = "AND date IN %(days)s"
+            params['days'] = tuple(days)
+
+        self.env['pitcar.sales.daily.fact.day'].lock_days(date_from, date_to, days)
+        self.env.cr.execute("""
+            DELETE FROM pitcar_sales_daily_fact
+            WHERE date >= %(date_from)s AND date <= %(date_to)s {day_filter}
+        """.format(day_filter=day_filter), params)
+
+        Order = self.env['sale.order']
+        advisors = Order._fields['service_advisor_id']
+        mechanics = Order._fields['car_mechanic_id_new']
+        self.env.cr.execute("""
+            WITH orders AS (
+                SELECT so.id, so.service_category, so.service_subcategory,
+                       COALESCE(so.lead_time_servis, 0) AS lead_time,
+                       (so.date_completed AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s)::date AS date
+                FROM sale_order so
+                WHERE so.state = 'sale'
+                  AND so.date_completed >= %(utc_from)s AND so.date_completed < %(utc_to)s
+            ),
+            scoped AS (
+                SELECT * FROM orders WHERE TRUE {day_filter}
+            ),
+            advisors AS (
+                SELECT o.id AS order_id, rel.{sa_col2} AS advisor_id,
+                       1.0 / GREATEST(COUNT(rel.{sa_col2}) OVER (PARTITION BY o.id), 1) AS share
+                FROM scoped o
+                LEFT JOIN {sa_rel} rel ON rel.{sa_col1} = o.id
+            ),
+            mechanics AS (
+                SELECT o.id AS order_id, rel.{mech_col2} AS mechanic_id,
+                       GREATEST(COUNT(rel.{mech_col2}) OVER (PARTITION BY o.id), 1) AS mechanic_count,
+                       1.0 / GREATEST(COUNT(rel.{mech_col2}) OVER (PARTITION BY o.id), 1) AS share
+                FROM scoped o
+                LEFT JOIN {mech_rel} rel ON rel.{mech_col1} = o.id
+            ),
+            lines AS (
+                SELECT l.order_id, pt.categ_id,
+                       SUM(l.price_subtotal) AS amount_untaxed,
+                       SUM(l.price_total) AS amount_total,
+                       SUM(l.price_subtotal) FILTER (WHERE pt.type = 'service') AS service_revenue,
+                       SUM(l.price_subtotal) FILTER (WHERE pt.type = 'product') AS product_revenue,
+                       SUM(l.price_subtotal) FILTER (WHERE l.name ILIKE '%%discount%%') AS discount_amount,
+                       SUM(pt.flat_rate * l.product_uom_qty)
+                           FILTER (WHERE pt.type = 'service' AND pt.flat_rate > 0) AS flat_rate_hours,
+                       SUM(l.price_subtotal)
+                           FILTER (WHERE pt.type = 'service' AND pt.flat_rate > 0) AS flat_rate_revenue
+                FROM sale_order_line l
+                JOIN scoped o ON o.id = l.order_id
+                LEFT JOIN product_product pp ON pp.id = l.product_id
+                LEFT JOIN product_template pt ON pt.id = pp.product_tmpl_id
+                WHERE l.display_type IS NULL
+                GROUP BY l.order_id, pt.categ_id
+            ),
+            order_lines AS (
+                SELECT o.id, o.date, o.service_category, o.service_subcategory, o.lead_time, l.categ_id,
+                       1.0 / COUNT(*) OVER (PARTITION BY o.id) AS categ_share,
+                       COALESCE(l.amount_untaxed, 0) AS amount_untaxed,
+                       COALESCE(l.amount_total, 0) AS amount_total,
+                       COALESCE(l.service_revenue, 0) AS service_revenue,
+                       COALESCE(l.product_revenue, 0) AS product_revenue,
+                       COALESCE(l.discount_amount, 0) AS discount_amount,
+                       COALESCE(l.flat_rate_hours, 0) AS flat_rate_hours,
+                       COALESCE(l.flat_rate_revenue, 0) AS flat_rate_revenue
+                FROM scoped o
+                LEFT JOIN lines l ON l.order_id = o.id
+            )
+            INSERT INTO pitcar_sales_daily_fact (
+                date, service_advisor_id, mechanic_id, service_category, service_subcategory,
+                product_category_id, order_count, advisor_order_count, mechanic_order_count,
+                amount_untaxed, amount_total, service_revenue, product_revenue, discount_amount,
+                flat_rate_hours, mechanic_flat_rate_hours, mechanic_service_revenue,
+                lead_time, lead_time_order_count,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT ol.date, a.advisor_id, m.mechanic_id, ol.service_category, ol.service_subcategory,
+                   ol.categ_id,
+                   SUM(ol.categ_share * a.share * m.share),
+                   SUM(ol.categ_share * m.share),
+                   SUM(ol.categ_share * a.share),
+                   SUM(ol.amount_untaxed * a.share * m.share),
+                   SUM(ol.amount_total * a.share * m.share),
+                   SUM(ol.service_revenue * a.share * m.share),
+                   SUM(ol.product_revenue * a.share * m.share),
+                   SUM(ol.discount_amount * a.share * m.share),
+                   SUM(ol.flat_rate_hours / m.mechanic_count * a.share * m.share),
+                   SUM(ol.flat_rate_hours / m.mechanic_count * a.share),
+                   SUM(ol.flat_rate_revenue * a.share),
+                   SUM(ol.lead_time * ol.categ_share * a.share * m.share),
+                   COALESCE(SUM(ol.categ_share * a.share * m.share) FILTER (WHERE ol.lead_time > 0), 0),
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+            FROM order_lines ol
+            JOIN advisors a ON a.order_id = ol.id
+            JOIN mechanics m ON m.order_id = ol.id
+            GROUP BY ol.date, a.advisor_id, m.mechanic_id, ol.service_category, ol.service_subcategory, ol.categ_id
+        """.format(
+            day_filter=day_filter,
+            sa_rel=advisors.relation, sa_col1=advisors.column1, sa_col2=advisors.column2,
+            mech_rel=mechanics.relation, mech_col1=mechanics.column1, mech_col2=mechanics.column2,
+        ), params)
+        inserted = self.env.cr.rowcount
+        self.invalidate_model()
+        return inserted
+
+    @api.model
+    def refresh_days(self, days):
+        """Bangun ulang fakta untuk sekumpulan tanggal (date Asia/Jakarta)"""
+        days = sorted(day for day in set(days) if day)
+        if not days:
+            return 0
+        return self._rebuild(days[0], days[-1], days=days)
+
+    @api.model
+    def mark_dirty(self, records=None, days=()):
+        """
+        Catat order/baris order yang berubah (atau langsung tanggal fakta);
+        hari terkait dibangun ulang sekali saat precommit, setelah semua nilai
+        termasuk stored compute sudah tertulis.
+        """
+        pending = self.env.cr.precommit.data.setdefault('pitcar.sales.daily.fact.dirty', {})
+        if not pending:
+            self.env.cr.precommit.add(self._refresh_dirty)
+        if records:
+            pending.setdefault(records._name, set()).update(records.ids)
+        pending.setdefault('days', set()).update(day for day in days if day)
+
+    def _refresh_dirty(self):
+        pending = self.env.cr.precommit.data.pop('pitcar.sales.daily.fact.dirty', {})
+        days = pending.pop('days', set())
+        orders = self.env['sale.order'].sudo().browse(pending.pop('sale.order', ()))
+        lines = self.env['sale.order.line'].sudo().browse(pending.pop('sale.order.line', ()))
+        orders = (orders | lines.exists().mapped('order_id')).exists()
+        days |= {
+            self.local_date(order.date_completed)
+            for order in orders if order.state == 'sale' and order.date_completed
+        }
+        self.sudo().refresh_days(days)
+
+    @api.model
+    def rebuild_range(self, date_from, date_to, commit=False):
+        """Bangun ulang fakta rentang hari per potongan REBUILD_CHUNK_DAYS hari"""
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        total = 0
+        chunk_start = date_from
+        while chunk_start <= date_to:
+            chunk_end = min(chunk_start + timedelta(days=REBUILD_CHUNK_DAYS - 1), date_to)
+            total += self._rebuild(chunk_start, chunk_end)
+            if commit:
+                self.env.cr.commit()
+            chunk_start = chunk_end + timedelta(days=1)
+        return total
+
+    @api.model
+    def _cron_refresh_facts(self, time_limit=CRON_TIME_LIMIT):
+        """
+        Bangun ulang beberapa hari terakhir, lalu lanjutkan backfill histori mundur
+        per bulan sampai order selesai paling awal. Titik backfill disimpan di
+        ir.config_parameter; cron dipicu ulang jika waktu habis sebelum selesai.
+        """
+        deadline = time.time() + time_limit
+        today = datetime.now(pytz.timezone(FACT_TIMEZONE)).date()
+        self.rebuild_range(today - timedelta(days=REFRESH_RECENT_DAYS), today, commit=True)
+
+        self.env.cr.execute("SELECT MIN(date_completed) FROM sale_order WHERE state = 'sale'")
+        first_completed = self.local_date(self.env.cr.fetchone()[0])
+        if not first_completed:
+            return
+
+        params = self.env['ir.config_parameter'].sudo()
+        backfilled_from = fields.Date.to_date(params.get_param(BACKFILL_PARAM)) or today - timedelta(days=REFRESH_RECENT_DAYS)
+        while backfilled_from > first_completed:
+            if time.time() > deadline:
+                self.env.ref('pitcar_custom.ir_cron_sales_daily_fact')._trigger()
+                return
+            chunk_end = backfilled_from - timedelta(days=1)
+            chunk_start = max(chunk_end - timedelta(days=REBUILD_CHUNK_DAYS - 1), first_completed)
+            self._rebuild(chunk_start, chunk_end)
+            backfilled_from = chunk_start
+            params.set_param(BACKFILL_PARAM, fields.Date.to_string(backfilled_from))
+            self.env.cr.commit()
+            _logger.info("Sales daily fact backfilled from %s", backfilled_from)
+
+    # ------------------------------------------------------------------
+    # Agregasi
+    # ------------------------------------------------------------------
+    @api.model
+    def aggregate(self, date_from, date_to, groupby=None):
+        """
+        SUM semua measure fakta dalam rentang hari.
+
+        Args:
+            groupby (str): salah satu key FACT_GROUPBY; None untuk total periode
+
+        Returns:
+            dict | list: total periode, atau list dict (dengan key groupby) urut nilai group
+        """
+        if groupby and groupby not in FACT_GROUPBY:
+            raise ValueError("Invalid fact groupby: %s" % groupby)
+
+        self.flush_model()
+        sums = ', '.join(
+            "COALESCE(SUM({measure}), 0)::float AS {measure}".format(measure=measure) for measure in FACT_MEASURES
+        )
+        if groupby:
+            expression = FACT_GROUPBY[groupby]
+            self.env.cr.execute("""
+                SELECT {expression} AS {groupby}, {sums}
+                FROM pitcar_sales_daily_fact
+                WHERE date >= %s AND date <= %s
+                GROUP BY 1
+                ORDER BY 1
+            """.format(expression=expression, groupby=groupby, sums=sums), (date_from, date_to))
+            return self.env.cr.dictfetchall()
+
+        self.env.cr.execute("""
+            SELECT {sums}
+            FROM pitcar_sales_daily_fact
+            WHERE date >= %s AND date <= %s
+        """.format(sums=sums), (date_from, date_to))
+        return self.env.cr.dictfetchone()
+
+
+class PitcarSalesDailyFactDay(models.Model):
+    """
+    Satu baris per tanggal fakta yang pernah dibangun ulang. Di-upsert oleh
+    setiap rebuild sebelum DELETE fakta hari tersebut, sebagai kunci per hari
+    yang juga berlaku untuk hari yang belum punya baris fakta.
+    """
+    _name = 'pitcar.sales.daily.fact.day'
+    _description = 'Sales Daily Fact Day'
+    _order = 'date desc'
+    _rec_name = 'date'
+
+    date = fields.Date('Date', required=True, readonly=True)
+    rebuilt_at = fields.Datetime('Rebuilt At', readonly=True)
+
+    _sql_constraints = [
+        ('date_unique', 'unique(date)', 'Sales fact day must be unique!')
+    ]
+
+    @api.model
+    def lock_days(self, date_from, date_to, days=None):
+        """
+        Upsert baris hari [date_from, date_to] (atau hanya `days`) berurutan
+        tanggal. Baris yang sedang/baru diubah transaksi lain membuat transaksi
+        ini menunggu lalu gagal serialization dan diulang.
+        """
+        if days is not None:
+            day_source, params = "unnest(%(days)s::date[])", {'days': sorted(days)}
+        else:
+            day_source, params = "generate_series(%(date_from)s::date, %(date_to)s::date, '1 day')", {
+                'date_from': date_from,
+                'date_to': date_to,
+            }
+        params['uid'] = self.env.uid
+        self.env.cr.execute("""
+            INSERT INTO pitcar_sales_daily_fact_day (date, rebuilt_at, create_uid, create_date, write_uid, write_date)
+            SELECT day::date, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+            FROM {day_source} AS day
+            ORDER BY 1
+            ON CONFLICT (date) DO UPDATE
+            SET rebuilt_at = EXCLUDED.rebuilt_at, write_uid = EXCLUDED.write_uid, write_date = EXCLUDED.write_date
+        """.format(day_source=day_source), params)
+        self.invalidate_model()
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+
+    _SALES_FACT_FIELDS = {
+        'state', 'date_completed', 'service_advisor_id', 'car_mechanic_id_new',
+        'service_subcategory', 'order_line',
+    }
+    # Stored compute yang dibaca fakta; ditulis saat flush tanpa lewat write()
+    _SALES_FACT_COMPUTED_FIELDS = {'service_category', 'lead_time_servis'}
+
+    def _get_sales_fact_days(self):
+        """Tanggal fakta (Asia/Jakarta) yang memuat order ini"""
+        fact_model = self.env['pitcar.sales.daily.fact']
+        return {fact_model.local_date(order.date_completed) for order in self if order.date_completed}
+
+    def write(self, vals):
+        if not self._SALES_FACT_FIELDS.intersection(vals):
+            return super().write(vals)
+
+        days = self._get_sales_fact_days()
+        res = super().write(vals)
+        self.env['pitcar.sales.daily.fact'].mark_dirty(self, days=days)
+        return res
+
+    def _write(self, vals):
+        res = super()._write(vals)
+        if self._SALES_FACT_COMPUTED_FIELDS.intersection(vals):
+            self.env['pitcar.sales.daily.fact'].mark_dirty(self)
+        return res
+
+    def unlink(self):
+        days = self._get_sales_fact_days()
+        res = super().unlink()
+        self.env['pitcar.sales.daily.fact'].mark_dirty(days=days)
+        return res
+
+
+class SaleOrderLine(models.Model):
+    _inherit = 'sale.order.line'
+
+    # Kolom baris yang dibaca fakta, termasuk subtotal yang dihitung saat flush
+    _SALES_FACT_FIELDS = {
+        'order_id', 'product_id', 'product_uom_qty', 'name', 'display_type', 'price_subtotal', 'price_total',
+    }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env['pitcar.sales.daily.fact'].mark_dirty(lines)
+        return lines
+
+    def write(self, vals):
+        if 'order_id' in vals:
+            # Order lama juga kehilangan baris ini
+            self.env['pitcar.sales.daily.fact'].mark_dirty(self.mapped('order_id'))
+        return super().write(vals)
+
+    def _write(self, vals):
+        res = super()._write(vals)
+        if self._SALES_FACT_FIELDS.intersection(vals):
+            self.env['pitcar.sales.daily.fact'].mark_dirty(self)
+        return res
+
+    def unlink(self):
+        orders = self.mapped('order_id')
+        res = super().unlink()
+        self.env['pitcar.sales.daily.fact'].mark_dirty(orders)
+        return res
@@ -0,0 +1,216 @@
+from odoo import models, fields, api
+from bisect import bisect_left
+from datetime import timedelta
+import logging
+import math
+
+_logger = logging.getLogger(__name__)
+
+# Jam operasional booking bengkel (jam desimal)
+BOOKING_OPEN_HOUR = 8.0
+BOOKING_CLOSE_HOUR = 17.0
+
+
+class DayAvailability(object):
+    """
+    Index ketersediaan stall untuk satu hari.
+
+    Booking per stall disimpan terurut, lalu digabung menjadi blok sibuk yang
+    saling lepas (start, end) sehingga pertanyaan "apakah stall kosong untuk
+    [t, t+d)" cukup satu bisect, dan slot kosong berikutnya dibaca dari celah
+    antar blok tanpa query tambahan.
+    """
+
+    def __init__(self, booking_date, stall_ids, bookings, open_hour=BOOKING_OPEN_HOUR, close_hour=BOOKING_CLOSE_HOUR):
+        self.booking_date = booking_date
+        self.open_hour = open_hour
+        self.close_hour = close_hour
+        self.bookings_by_stall = {stall_id: [] for stall_id in stall_ids}
+        for booking in bookings:
+            stall_id = booking['stall_id'] and booking['stall_id'][0]
+            if stall_id in self.bookings_by_stall:
+                self.bookings_by_stall[stall_id].append(booking)
+
+        self._busy = {}
+        self._busy_starts = {}
+        for stall_id, stall_bookings in self.bookings_by_stall.items():
+            stall_bookings.sort(key=lambda b: (b['booking_time'], b['booking_end_time']))
+            blocks = []
+            for booking in stall_bookings:
+                start = booking['booking_time']
+                end = max(booking['booking_end_time'] or start, start)
+                if blocks and start < blocks[-1][1]:
+                    blocks[-1][1] = max(blocks[-1][1], end)
+                else:
+                    blocks.append([start, end])
+            self._busy[stall_id] = [tuple(block) for block in blocks]
+            self._busy_starts[stall_id] = [block[0] for block in blocks]
+
+    def busy_blocks(self, stall_id):
+        return self._busy.get(stall_id, [])
+
+    def is_free(self, stall_id, start, end):
+        """True jika tidak ada booking stall yang beririsan dengan [start, end)"""
+        starts = self._busy_starts.get(stall_id, [])
+        index = bisect_left(starts, end) - 1
+        return index < 0 or self._busy[stall_id][index][1] <= start
+
+    def free_stalls(self, start, end):
+        """Id stall yang kosong untuk [start, end)"""
+        return [stall_id for stall_id in self._busy if self.is_free(stall_id, start, end)]
+
+    def free_slots(self, stall_id, duration=0.0, after=None):
+        """
+        Celah kosong stall dalam jam operasional.
+
+        Args:
+            duration (float): durasi minimal celah (jam)
+            after (float): hanya celah setelah jam ini (mis. jam sekarang)
+
+        Returns:
+            list: tuple (start, end) terurut
+        """
+        cursor = max(self.open_hour, after or self.open_hour)
+        slots = []
+        for block_start, block_end in self.busy_blocks(stall_id):
+            if block_end <= cursor:
+                continue
+            gap_end = min(block_start, self.close_hour)
+            if gap_end - cursor >= duration and gap_end > cursor:
+                slots.append((cursor, gap_end))
+            cursor = max(cursor, block_end)
+            if cursor >= self.close_hour:
+                return slots
+        if self.close_hour - cursor >= duration and self.close_hour > cursor:
+            slots.append((cursor, self.close_hour))
+        return slots
+
+    def booked_hours(self, stall_id):
+        """Total jam sibuk stall pada hari ini (dipakai untuk menyeimbangkan beban stall)"""
+        return sum(end - start for start, end in self.busy_blocks(stall_id))
+
+    def free_windows(self, duration, step=0.5, after=None):
+        """
+        Semua jam mulai (kelipatan `step` dari jam buka) yang muat untuk `duration`,
+        beserta stall yang kosong, dengan menyapu celah kosong tiap stall.
+
+        Returns:
+            dict: {jam mulai: [stall_id, ...]}
+        """
+        windows = {}
+        for stall_id in self._busy:
+            for slot_start, slot_end in self.free_slots(stall_id, duration, after):
+                steps = math.ceil(round((slot_start - self.open_hour) / step, 6))
+                start = self.open_hour + steps * step
+                while start + duration <= slot_end + 1e-9:
+                    windows.setdefault(round(start, 4), []).append(stall_id)
+                    steps += 1
+                    start = self.open_hour + steps * step
+        return windows
+
+    def next_free_time(self, stall_id, after=None, duration=0.0):
+        """Jam paling awal >= after di mana stall kosong selama `duration`, atau None"""
+        slots = self.free_slots(stall_id, duration, after)
+        return slots[0][0] if slots else None
+
+
+class PitcarStallAvailability(models.AbstractModel):
+    _name = 'pitcar.stall.availability'
+    _description = 'Stall Availability Engine'
+
+    _BOOKING_FIELDS = [
+        'stall_id', 'booking_time', 'booking_end_time', 'partner_id',
+        'partner_car_id', 'service_subcategory', 'state',
+    ]
+
+    @api.model
+    def get_day_availability(self, booking_date, stalls=None, excluded_states=('cancelled',)):
+        """
+        Bangun DayAvailability untuk satu tanggal dengan satu query booking.
+
+        Args:
+            booking_date (date|str): tanggal booking
+            stalls (recordset): pitcar.service.stall; default semua stall aktif
+
+        Returns:
+            DayAvailability
+        """
+        if stalls is None:
+            stalls = self.env['pitcar.service.stall'].sudo().search([('active', '=', True)])
+
+        bookings = self.env['pitcar.service.booking'].sudo().search_read([
+            ('stall_id', 'in', stalls.ids),
+            ('booking_date', '=', fields.Date.to_date(booking_date)),
+            ('state', 'not in', list(excluded_states)),
+        ], self._BOOKING_FIELDS, order='booking_time')
+
+        return DayAvailability(fields.Date.to_date(booking_date), stalls.ids, bookings)
+
+    @api.model
+    def get_range_availability(self, date_from, date_to, stalls=None, excluded_states=('cancelled',)):
+        """
+        DayAvailability per tanggal untuk rentang [date_from, date_to] dengan satu query booking.
+
+        Returns:
+            list: DayAvailability terurut per tanggal
+        """
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        if stalls is None:
+            stalls = self.env['pitcar.service.stall'].sudo().search([('active', '=', True)])
+
+        bookings = self.env['pitcar.service.booking'].sudo().search_read([
+            ('stall_id', 'in', stalls.ids),
+            ('booking_date', '>=', date_from),
+            ('booking_date', '<=', date_to),
+            ('state', 'not in', list(excluded_states)),
+        ], self._BOOKING_FIELDS + ['booking_date'], order='booking_date, booking_time')
+
+        bookings_by_date = {}
+        for booking in bookings:
+            bookings_by_date.setdefault(booking['booking_date'], []).append(booking)
+
+        days = []
+        current = date_from
+        while current <= date_to:
+            days.append(DayAvailability(current, stalls.ids, bookings_by_date.get(current, [])))
+            current += timedelta(days=1)
+        return days
+
+    @api.model
+    def suggest_slots(self, date_from, date_to, duration, limit=5, step=0.5, not_before=None, stalls=None):
+        """
+        N jendela booking terbaik untuk durasi tertentu.
+
+        Diurutkan berdasarkan waktu paling awal; untuk setiap jam mulai dipilih
+        stall dengan beban (jam terbooking) paling kecil pada hari itu.
+
+        Args:
+            duration (float): durasi servis (jam)
+            step (float): granularitas jam mulai (jam)
+            not_before (datetime): datetime lokal naive; slot sebelum ini dilewati
+
+        Returns:
+            list: dict date, start_time, end_time, stall_id, alternative_stall_ids
+        """
+        suggestions = []
+        for day in self.get_range_availability(date_from, date_to, stalls):
+            if not_before and day.booking_date < not_before.date():
+                continue
+            after = None
+            if not_before and day.booking_date == not_before.date():
+                after = not_before.hour + not_before.minute / 60.0
+
+            windows = day.free_windows(duration, step, after)
+            for start in sorted(windows):
+                stall_ids = sorted(windows[start], key=lambda stall_id: (day.booked_hours(stall_id), stall_id))
+                suggestions.append({
+                    'date': day.booking_date,
+                    'start_time': start,
+                    'end_time': start + duration,
+                    'stall_id': stall_ids[0],
+                    'alternative_stall_ids': stall_ids[1:],
+                })
+                if len(suggestions) >= limit:
+                    return suggestions
+        return suggestions
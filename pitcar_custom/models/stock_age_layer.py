@@ -0,0 +1,144 @@
+from odoo import models, fields, api
+from odoo.tools import float_is_zero, split_every
+from collections import defaultdict, deque
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class PitcarStockAgeLayer(models.Model):
+    """
+    Layer FIFO untuk umur persediaan.
+
+    Setiap move masuk (lokasi non-internal -> internal) membuat satu layer dan
+    setiap move keluar (internal -> non-internal) mengurangi layer terlama.
+    Umur persediaan produk = in_date layer terbuka paling lama, sehingga tidak
+    perlu replay seluruh histori stock.move setiap kali stok berubah.
+    """
+    _name = 'pitcar.stock.age.layer'
+    _description = 'Stock Age FIFO Layer'
+    _order = 'in_date, id'
+
+    product_id = fields.Many2one('product.product', 'Product', required=True, index=True, ondelete='cascade')
+    product_tmpl_id = fields.Many2one(
+        'product.template', 'Product Template',
+        related='product_id.product_tmpl_id', store=True, index=True
+    )
+    move_id = fields.Many2one('stock.move', 'Stock Move', index=True, ondelete='set null')
+    in_date = fields.Datetime('Entry Date', required=True, index=True)
+    quantity = fields.Float('Quantity', digits='Product Unit of Measure')
+    remaining_qty = fields.Float('Remaining Quantity', digits='Product Unit of Measure')
+    is_open = fields.Boolean('Open', compute='_compute_is_open', store=True, index=True)
+
+    @api.depends('remaining_qty', 'product_id.uom_id.rounding')
+    def _compute_is_open(self):
+        for layer in self:
+            layer.is_open = not float_is_zero(
+                layer.remaining_qty, precision_rounding=layer.product_id.uom_id.rounding or 0.01
+            ) and layer.remaining_qty > 0
+
+    @api.model
+    def _get_move_direction(self, source_usage, dest_usage):
+        """'in', 'out' atau None (sama dengan aturan perhitungan umur persediaan sebelumnya)"""
+        if dest_usage == 'internal' and source_usage != 'internal':
+            return 'in'
+        if source_usage == 'internal' and dest_usage != 'internal':
+            return 'out'
+        return None
+
+    @api.model
+    def _consume(self, product, quantity):
+        """Kurangi layer terbuka produk secara FIFO sebanyak `quantity`"""
+        rounding = product.uom_id.rounding or 0.01
+        layers = self.search([('product_id', '=', product.id), ('is_open', '=', True)])
+        for layer in layers:
+            if quantity <= 0 or float_is_zero(quantity, precision_rounding=rounding):
+                break
+            consumed = min(layer.remaining_qty, quantity)
+            layer.remaining_qty -= consumed
+            quantity -= consumed
+
+    @api.model
+    def apply_moves(self, moves):
+        """Perbarui layer untuk move yang baru selesai, urut tanggal per produk"""
+        layer_vals = []
+        for move in moves.sorted(lambda m: (m.date, m.id)):
+            direction = self._get_move_direction(move.location_id.usage, move.location_dest_id.usage)
+            if direction == 'in':
+                layer_vals.append({
+                    'product_id': move.product_id.id,
+                    'move_id': move.id,
+                    'in_date': move.date,
+                    'quantity': move.product_qty,
+                    'remaining_qty': move.product_qty,
+                })
+            elif direction == 'out':
+                # Layer masuk sebelumnya dalam batch yang sama harus sudah ada sebelum dikonsumsi
+                if layer_vals:
+                    self.create(layer_vals)
+                    layer_vals = []
+                self._consume(move.product_id, move.product_qty)
+        if layer_vals:
+            self.create(layer_vals)
+
+    @api.model
+    def rebuild_for_products(self, products, chunk_size=500):
+        """
+        Bangun ulang layer dari histori stock.move yang sudah done.
+
+        Dipakai sekali untuk inisialisasi (atau perbaikan data); histori dibaca
+        per chunk produk dengan satu query dan direplay memakai deque.
+        """
+        total_layers = 0
+        for product_ids in split_every(chunk_size, products.ids):
+            self.search([('product_id', 'in', list(product_ids))]).unlink()
+            self.env.cr.execute("""
+                SELECT m.id, m.product_id, m.date, m.product_qty,
+                       src.usage AS source_usage, dst.usage AS dest_usage
+                FROM stock_move m
+                JOIN stock_location src ON src.id = m.location_id
+                JOIN stock_location dst ON dst.id = m.location_dest_id
+                WHERE m.state = 'done' AND m.product_id IN %s
+                ORDER BY m.product_id, m.date, m.id
+            """, (tuple(product_ids),))
+
+            entries_by_product = defaultdict(deque)
+            for row in self.env.cr.dictfetchall():
+                direction = self._get_move_direction(row['source_usage'], row['dest_usage'])
+                entries = entries_by_product[row['product_id']]
+                if direction == 'in':
+                    entries.append([row['date'], row['product_qty'], row['id'], row['product_qty']])
+                elif direction == 'out':
+                    quantity = row['product_qty']
+                    while quantity > 0 and entries:
+                        if entries[0][1] <= quantity:
+                            quantity -= entries.popleft()[1]
+                        else:
+                            entries[0][1] -= quantity
+                            quantity = 0
+
+            layer_vals = [{
+                'product_id': product_id,
+                'move_id': move_id,
+                'in_date': in_date,
+                'quantity': quantity,
+                'remaining_qty': remaining_qty,
+            } for product_id, entries in entries_by_product.items()
+                for in_date, remaining_qty, move_id, quantity in entries]
+            if layer_vals:
+                self.create(layer_vals)
+            total_layers += len(layer_vals)
+
+        _logger.info("Stock age layers rebuilt for %s products (%s open layers)", len(products), total_layers)
+        return total_layers
+
+
+class StockMove(models.Model):
+    _inherit = 'stock.move'
+
+    def _action_done(self, cancel_backorder=False):
+        moves = super()._action_done(cancel_backorder=cancel_backorder)
+        done_moves = moves.filtered(lambda m: m.state == 'done')
+        if done_moves:
+            self.env['pitcar.stock.age.layer'].sudo().apply_moves(done_moves)
+        return moves
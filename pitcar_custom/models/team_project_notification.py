@@ -96,22 +96,120 @@ class TeamProjectNotification(models.Model):
 
     @api.model
     def create_notifications_batch(self, notifications_data):
-        """Create multiple notifications in batch for better performance"""
-        created_notifs = []
-        for data in notifications_data:
-            notif = self.create_project_notification(**data)
-            if notif:
-                created_notifs.append(notif.id)
-        return created_notifs
+        """
+        Create multiple notifications in batch for better performance.
+
+        Validasi employee dan cek duplikat dilakukan sekali untuk seluruh batch,
+        lalu notifikasi baru dibuat dengan satu panggilan create.
+        """
+        try:
+            vals_by_key = {}
+            for data in notifications_data:
+                vals = self._prepare_notification_vals(**data)
+                if vals:
+                    vals_by_key[self._notification_key(vals)] = vals
+            if not vals_by_key:
+                return []
+
+            employee_ids = {vals['recipient_id'] for vals in vals_by_key.values()}
+            employee_ids |= {vals['sender_id'] for vals in vals_by_key.values() if vals['sender_id']}
+            valid_employee_ids = set(self.env['hr.employee'].sudo().browse(list(employee_ids)).exists().ids)
+
+            vals_list = []
+            for vals in vals_by_key.values():
+                if vals['recipient_id'] not in valid_employee_ids:
+                    _logger.warning("Cannot create notification: Employee recipient %s does not exist", vals['recipient_id'])
+                    continue
+                if vals['sender_id'] and vals['sender_id'] not in valid_employee_ids:
+                    vals['sender_id'] = False
+                vals_list.append(vals)
+            if not vals_list:
+                return []
+
+            existing = self.search([
+                ('model', 'in', list({vals['model'] for vals in vals_list})),
+                ('res_id', 'in', list({vals['res_id'] for vals in vals_list})),
+                ('recipient_id', 'in', list({vals['recipient_id'] for vals in vals_list})),
+            ])
+            existing_by_key = {
+                (notif.model, notif.res_id, notif.type, notif.recipient_id.id, notif.notification_category): notif
+                for notif in existing
+            }
+
+            notif_ids = []
+            new_vals_list = []
+            for vals in vals_list:
+                notif = existing_by_key.get(self._notification_key(vals))
+                if notif:
+                    notif.write(vals)
+                    notif_ids.append(notif.id)
+                else:
+                    new_vals_list.append(vals)
+            if new_vals_list:
+                notif_ids.extend(self.create(new_vals_list).ids)
+
+            _logger.info("Created %s and updated %s notifications in batch",
+                         len(new_vals_list), len(vals_list) - len(new_vals_list))
+            return notif_ids
+
+        except Exception as e:
+            _logger.error(f"Error creating notification batch: {str(e)}", exc_info=True)
+            return []
+
+    @api.model
+    def _notification_key(self, vals):
+        """Kunci unik notifikasi (sesuai constraint unique_employee_notification)"""
+        return (vals['model'], vals['res_id'], vals['type'], vals['recipient_id'], vals['notification_category'])
+
+    @api.model
+    def _prepare_notification_vals(self, model, res_id, notif_type, title, message,
+                                   recipient_id, category=False, project_id=False, sender_id=False, **kwargs):
+        """Nilai create notifikasi; False jika parameter tidak lengkap atau notifikasi ke diri sendiri"""
+        # Validate required parameters
+        if not all([model, res_id, notif_type, title, message, recipient_id]):
+            _logger.warning("Missing required parameters for notification creation")
+            return False
+
+        # Skip self-notifications
+        if sender_id and sender_id == recipient_id:
+            _logger.debug("Skipping self-notification for employee %s", recipient_id)
+            return False
+
+        category = category or notif_type
+        if category not in dict(self._fields['notification_category'].selection):
+            _logger.warning("Invalid notification category %s, notification skipped", category)
+            return False
+
+        return {
+            'model': model,
+            'res_id': res_id,
+            'type': notif_type,
+            'title': title,
+            'message': message,
+            'recipient_id': recipient_id,
+            'sender_id': sender_id,
+            'notification_category': category,
+            'project_id': project_id,
+            'request_time': kwargs.get('request_time', fields.Datetime.now()),
+            'expiration': kwargs.get('expiration', False),
+            'is_actionable': kwargs.get('is_actionable', False),
+            'action_url': kwargs.get('action_url', False),
+            'priority': kwargs.get('priority', 'normal'),
+            'notification_channel': kwargs.get('channel', 'app'),
+            'data': json.dumps(kwargs.get('data', {})) if kwargs.get('data') else False,
+        }
     
     @api.model
     def create_project_notification(self, model, res_id, notif_type, title, message, 
                           recipient_id, category=False, project_id=False, sender_id=False, **kwargs):
         """Create a notification with improved employee-based targeting"""
         try:
-            # Validate required parameters
-            if not all([model, res_id, notif_type, title, message, recipient_id]):
-                _logger.warning("Missing required parameters for notification creation")
+            # Prepare notification values
+            vals = self._prepare_notification_vals(
+                model, res_id, notif_type, title, message, recipient_id,
+                category=category, project_id=project_id, sender_id=sender_id, **kwargs
+            )
+            if not vals:
                 return False
             
             # Validate recipient employee exists
@@ -120,37 +218,12 @@ class TeamProjectNotification(models.Model):
                 _logger.warning(f"Cannot create notification: Employee recipient {recipient_id} does not exist")
                 return False
                 
-            # Skip self-notifications
-            if sender_id and sender_id == recipient_id:
-                _logger.info(f"Skipping self-notification for employee {recipient_id}")
-                return False
-                
             # Validate sender employee if provided
             if sender_id:
                 sender = self.env['hr.employee'].sudo().browse(sender_id)
                 if not sender.exists():
                     _logger.warning(f"Invalid sender_id {sender_id}, using system as sender")
-                    sender_id = False
-                    
-            # Prepare notification values
-            vals = {
-                'model': model,
-                'res_id': res_id,
-                'type': notif_type,
-                'title': title,
-                'message': message,
-                'recipient_id': recipient_id,
-                'sender_id': sender_id,
-                'notification_category': category or notif_type,
-                'project_id': project_id,
-                'request_time': kwargs.get('request_time', fields.Datetime.now()),
-                'expiration': kwargs.get('expiration', False),
-                'is_actionable': kwargs.get('is_actionable', False),
-                'action_url': kwargs.get('action_url', False),
-                'priority': kwargs.get('priority', 'normal'),
-                'notification_channel': kwargs.get('channel', 'app'),
-                'data': json.dumps(kwargs.get('data', {})) if kwargs.get('data') else False,
-            }
+                    vals['sender_id'] = False
             
             # Check for duplicate
             domain = [
@@ -0,0 +1,191 @@
+"""
+Kalkulator jam kerja efektif bengkel.
+
+Semua perhitungan lead time (servis, job stop, jam produktif mekanik) memakai
+aturan yang sama: jam buka 08:00-17:00 dengan istirahat 12:00-13:00. Modul ini
+menghitungnya dalam O(1) per interval memakai fungsi kumulatif
+F(t) = jumlah detik kerja sejak awal kalender sampai t, sehingga
+durasi efektif = F(selesai) - F(mulai) tanpa loop per hari.
+"""
+from bisect import bisect_left
+from datetime import datetime
+import pytz
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+class WorkingCalendar(object):
+    """
+    Kalender kerja dengan jam buka/tutup, daftar istirahat harian, hari libur
+    dan hari off mingguan.
+
+    Args:
+        open_hour (float): jam buka, mis. 8.0
+        close_hour (float): jam tutup, mis. 17.0 (24.0 untuk 24 jam)
+        breaks (iterable): pasangan (mulai, selesai) dalam jam, mis. ((12.0, 13.0),)
+        holidays (iterable): tanggal (date) libur
+        weekend_days (iterable): weekday() yang libur (0 = Senin)
+        tz (str): timezone lokal untuk konversi dari datetime UTC Odoo
+    """
+
+    def __init__(self, open_hour=8.0, close_hour=17.0, breaks=((12.0, 13.0),),
+                 holidays=(), weekend_days=(), tz='Asia/Jakarta'):
+        self.open = int(open_hour * 3600)
+        self.close = int(close_hour * 3600)
+        clipped_breaks = (
+            (max(int(start * 3600), self.open), min(int(end * 3600), self.close))
+            for start, end in breaks
+        )
+        self.breaks = tuple((start, end) for start, end in clipped_breaks if end > start)
+        self.weekend_days = tuple(sorted(set(weekend_days)))
+        self.holidays = sorted({
+            day.toordinal() for day in holidays
+            if day.weekday() not in self.weekend_days
+        })
+        self.tz = pytz.timezone(tz)
+        self.seconds_per_day = self._worked_until(SECONDS_PER_DAY)
+
+    @property
+    def hours_per_day(self):
+        return self.seconds_per_day / 3600
+
+    def with_holidays(self, holidays):
+        """Salinan kalender ini dengan daftar hari libur yang berbeda"""
+        return WorkingCalendar(
+            open_hour=self.open / 3600,
+            close_hour=self.close / 3600,
+            breaks=[(start / 3600, end / 3600) for start, end in self.breaks],
+            holidays=holidays,
+            weekend_days=self.weekend_days,
+            tz=self.tz.zone,
+        )
+
+    # ------------------------------------------------------------------
+    # Primitive
+    # ------------------------------------------------------------------
+    def _worked_until(self, seconds):
+        """Detik kerja dalam satu hari dari 00:00 sampai `seconds`"""
+        clamped = min(max(seconds, self.open), self.close)
+        worked = clamped - self.open
+        for start, end in self.breaks:
+            worked -= min(max(clamped, start), end) - start
+        return worked
+
+    def _count_weekend_before(self, ordinal):
+        # date.fromordinal(1) adalah Senin, sehingga weekday(o) = (o - 1) % 7
+        days = ordinal - 1
+        return sum(max(0, (days - weekday + 6) // 7) for weekday in self.weekend_days)
+
+    def _workdays_before(self, ordinal):
+        """Jumlah hari kerja dengan ordinal < `ordinal`"""
+        return (ordinal - 1) - self._count_weekend_before(ordinal) - bisect_left(self.holidays, ordinal)
+
+    def _is_workday(self, ordinal):
+        if self.weekend_days and (ordinal - 1) % 7 in self.weekend_days:
+            return False
+        index = bisect_left(self.holidays, ordinal)
+        return not (index < len(self.holidays) and self.holidays[index] == ordinal)
+
+    @staticmethod
+    def _seconds_of_day(value):
+        return value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6
+
+    def _cumulative(self, value):
+        """F(t): total detik kerja dari awal kalender sampai datetime lokal naive `value`"""
+        ordinal = value.toordinal()
+        total = self._workdays_before(ordinal) * self.seconds_per_day
+        if self._is_workday(ordinal):
+            total += self._worked_until(self._seconds_of_day(value))
+        return total
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def to_local(self, value):
+        """Datetime UTC naive (format Odoo) -> datetime lokal naive"""
+        if isinstance(value, str):
+            value = datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S')
+        return pytz.utc.localize(value).astimezone(self.tz).replace(tzinfo=None)
+
+    def effective_seconds(self, start, end):
+        """Detik kerja efektif antara dua datetime lokal naive (dibatasi jam buka)"""
+        if not start or not end or end <= start:
+            return 0
+        return max(0, self._cumulative(end) - self._cumulative(start))
+
+    def effective_hours(self, start, end):
+        return self.effective_seconds(start, end) / 3600
+
+    def effective_hours_utc(self, start, end):
+        """Jam kerja efektif antara dua datetime UTC naive (nilai field Datetime Odoo)"""
+        if not start or not end:
+            return 0
+        return self.effective_hours(self.to_local(start), self.to_local(end))
+
+    def effective_hours_bulk(self, intervals):
+        """
+        Jam kerja efektif untuk banyak interval UTC sekaligus.
+
+        Args:
+            intervals (iterable): pasangan (start, end) datetime UTC naive; None/False diperbolehkan
+
+        Returns:
+            list: jam efektif per interval, urutan sama dengan input
+        """
+        return [self.effective_hours_utc(start, end) for start, end in intervals]
+
+    def _span_day_seconds(self, start, end):
+        """
+        Detik satu hari untuk span_hours_utc, sama dengan aritmetika loop harian
+        lama: istirahat hanya dikurangi jika interval tidak seluruhnya berada di
+        dalam istirahat, dan hasil negatif (end < start) tidak dipotong.
+        """
+        seconds = end - start
+        for break_start, break_end in self.breaks:
+            if break_start <= start and end <= break_end:
+                continue
+            seconds -= max(0, min(end, break_end) - max(start, break_start))
+        return seconds
+
+    def span_hours_utc(self, start, end):
+        """
+        Jam efektif versi calculate_effective_hours: hari pertama dihitung dari
+        `start` sampai jam tutup, hari terakhir dari jam buka sampai `end`, hari
+        di antaranya sebagai hari kerja penuh, istirahat dikurangi.
+
+        Hasilnya identik dengan loop harian lama, termasuk kontribusi negatif
+        jika `start` setelah jam tutup atau `end` sebelum jam buka (mis. mulai
+        18:00 dan selesai 07:00 besoknya = -2 jam), karena nilai tersimpan dan
+        laporan yang ada dibandingkan dengan angka lama.
+        """
+        if not start or not end:
+            return 0
+        start = self.to_local(start)
+        end = self.to_local(end)
+        if end <= start:
+            return 0
+
+        start_ordinal = start.toordinal()
+        end_ordinal = end.toordinal()
+        start_seconds = self._seconds_of_day(start)
+        end_seconds = self._seconds_of_day(end)
+
+        if start_ordinal == end_ordinal:
+            return self._span_day_seconds(start_seconds, end_seconds) / 3600
+
+        seconds = 0
+        if self._is_workday(start_ordinal):
+            seconds += self._span_day_seconds(start_seconds, self.close)
+        if self._is_workday(end_ordinal):
+            seconds += self._span_day_seconds(self.open, end_seconds)
+        full_days = self._workdays_before(end_ordinal) - self._workdays_before(start_ordinal + 1)
+        seconds += max(0, full_days) * self.seconds_per_day
+        return seconds / 3600
+
+
+# Jam operasional bengkel: 08:00-17:00, istirahat 12:00-13:00
+SHOP_CALENDAR = WorkingCalendar()
+
+# Durasi penuh 24 jam tanpa istirahat (dipakai untuk waktu tunggu / job stop non-servis)
+FULL_DAY_CALENDAR = WorkingCalendar(open_hour=0.0, close_hour=24.0, breaks=())
+
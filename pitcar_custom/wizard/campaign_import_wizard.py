@@ -2,13 +2,13 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
 import logging
-import csv
-import io
 import base64
-from datetime import datetime
 
 _logger = logging.getLogger(__name__)
 
+# File CSV di atas ukuran ini diproses di background oleh cron
+SYNC_IMPORT_MAX_BYTES = 1024 * 1024
+
 class CampaignImportWizard(models.TransientModel):
     _name = 'campaign.import.wizard'
     _description = 'Campaign Analytics Import Wizard'
@@ -38,6 +38,10 @@ class CampaignImportWizard(models.TransientModel):
     success_count = fields.Integer(string='Success Count', readonly=True)
     error_count = fields.Integer(string='Error Count', readonly=True)
     created_campaign_ids = fields.Many2many('campaign.analytics', string='Created Campaigns', readonly=True)
+    job_id = fields.Many2one('campaign.import.job', string='Import Job', readonly=True)
+    job_state = fields.Selection(related='job_id.state', string='Import Status')
+    job_progress = fields.Float(related='job_id.progress', string='Progress (%)')
+    job_processed_rows = fields.Integer(related='job_id.processed_rows', string='Processed Rows')
 
     # Manual entry fields
     campaign_name = fields.Char(string='Campaign Name')
@@ -76,126 +80,50 @@ class CampaignImportWizard(models.TransientModel):
         if not self.csv_file:
             raise ValidationError(_("Please upload a CSV file"))
         
-        try:
-            # Decode file content
-            file_content = base64.b64decode(self.csv_file).decode('utf-8')
-            return self._process_csv_content(file_content)
-        except Exception as e:
-            raise ValidationError(_("Error reading CSV file: %s") % str(e))
+        return self._process_csv_content(base64.b64decode(self.csv_file), self.csv_filename)
 
     def _import_from_text(self):
         """Import data from pasted CSV text"""
         if not self.csv_data:
             raise ValidationError(_("Please provide CSV data"))
         
-        return self._process_csv_content(self.csv_data)
+        return self._process_csv_content(self.csv_data.encode('utf-8'))
 
-    def _process_csv_content(self, csv_content):
-        """Process CSV content and create records"""
-        try:
-            # Parse CSV
-            csv_reader = csv.DictReader(io.StringIO(csv_content))
-            campaigns_data = []
-            errors = []
-
-            for row_num, row in enumerate(csv_reader, start=2):
-                try:
-                    campaign_values = self._parse_csv_row(row)
-                    campaigns_data.append(campaign_values)
-                except Exception as e:
-                    errors.append(f"Row {row_num}: {str(e)}")
-
-            if not campaigns_data:
-                raise ValidationError(_("No valid data found in CSV"))
-
-            # Create campaigns
-            created_campaigns = []
-            creation_errors = []
-
-            for i, values in enumerate(campaigns_data):
-                try:
-                    campaign = self.env['campaign.analytics'].create(values)
-                    created_campaigns.append(campaign)
-                except Exception as e:
-                    creation_errors.append(f"Record {i+1}: {str(e)}")
-
-            # Update wizard with results
-            result_text = f"Import completed!\n"
-            result_text += f"Successfully created: {len(created_campaigns)} records\n"
-            result_text += f"Errors: {len(errors) + len(creation_errors)}\n"
-            
-            if errors:
-                result_text += f"\nParsing Errors:\n" + "\n".join(errors[:5])
-            if creation_errors:
-                result_text += f"\nCreation Errors:\n" + "\n".join(creation_errors[:5])
+    def _process_csv_content(self, csv_content, filename=None):
+        """
+        Import CSV lewat campaign.import.job.
 
-            self.write({
-                'import_result': result_text,
-                'success_count': len(created_campaigns),
-                'error_count': len(errors) + len(creation_errors),
-                'created_campaign_ids': [(6, 0, [c.id for c in created_campaigns])]
-            })
+        File kecil diproses langsung dalam transaksi wizard; file besar
+        diproses di background oleh cron dan progresnya bisa di-refresh
+        dari wizard.
+        """
+        job = self.env['campaign.import.job'].create_from_content(csv_content, filename)
+        self.job_id = job
 
-            return self._return_wizard_action()
+        if len(csv_content) > SYNC_IMPORT_MAX_BYTES:
+            job.action_enqueue()
+            return self.action_refresh_progress()
 
+        try:
+            job._run()
         except Exception as e:
             raise ValidationError(_("Error processing CSV: %s") % str(e))
 
-    def _parse_csv_row(self, row):
-        """Parse a single CSV row into campaign values"""
-        # Field mapping from CSV headers to model fields
-        field_mapping = {
-            'campaign_name': 'campaign_name',
-            'adset_name': 'adset_name',
-            'ad_name': 'ad_name',
-            'spend': 'spend',
-            'reach': 'reach',
-            'impressions': 'impressions',
-            'frequency': 'frequency',
-            'cpm': 'cpm',
-            'date_start': 'date_start',
-            'date_stop': 'date_stop',
-            'onsite_conversion.messaging_conversation_started_7d': 'messaging_conversation_started_7d',
-            'cost_per_onsite_conversion.messaging_conversation_started_7d': 'cost_per_messaging_conversion',
-            'purchase': 'purchase',
-            'add_to_cart': 'add_to_cart',
-            'cost_per_purchase': 'cost_per_purchase',
-            'cost_per_add_to_cart': 'cost_per_add_to_cart',
-            'purchase_value': 'purchase_value'
-        }
+        if not (job.created_count or job.updated_count):
+            raise ValidationError(_("No valid data found in CSV") + "\n" + (job.error_log or ''))
 
-        values = {}
-        
-        for csv_field, model_field in field_mapping.items():
-            if csv_field in row and row[csv_field]:
-                raw_value = row[csv_field].strip()
-                
-                if model_field in ['date_start', 'date_stop']:
-                    values[model_field] = self._parse_date(raw_value)
-                elif model_field in ['reach', 'impressions', 'messaging_conversation_started_7d', 'purchase', 'add_to_cart']:
-                    values[model_field] = int(float(raw_value)) if raw_value else 0
-                elif model_field in ['spend', 'frequency', 'cpm', 'cost_per_messaging_conversion',
-                                   'cost_per_purchase', 'cost_per_add_to_cart', 'purchase_value']:
-                    values[model_field] = float(raw_value) if raw_value else 0.0
-                else:
-                    values[model_field] = raw_value
-
-        return values
-
-    def _parse_date(self, date_string):
-        """Parse date string to date object"""
-        if not date_string:
-            return fields.Date.today()
-            
-        date_formats = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d']
-        
-        for fmt in date_formats:
-            try:
-                return datetime.strptime(date_string, fmt).date()
-            except ValueError:
-                continue
-        
-        raise ValueError(f'Unable to parse date: {date_string}')
+        return self.action_refresh_progress()
+
+    def action_refresh_progress(self):
+        """Perbarui hasil import dari job"""
+        self.ensure_one()
+        if self.job_id:
+            self.write({
+                'import_result': self.job_id.get_summary(),
+                'success_count': self.job_id.created_count + self.job_id.updated_count,
+                'error_count': self.job_id.error_count,
+            })
+        return self._return_wizard_action()
 
     def _import_manual(self):
         """Import single record from manual input"""
@@ -328,7 +256,11 @@ class CampaignImportWizard(models.TransientModel):
 
     def action_view_created_campaigns(self):
         """View the created campaigns"""
-        if not self.created_campaign_ids:
+        if self.job_id:
+            domain = [('import_job_id', '=', self.job_id.id)]
+        elif self.created_campaign_ids:
+            domain = [('id', 'in', self.created_campaign_ids.ids)]
+        else:
             raise UserError(_("No campaigns were created"))
 
         return {
@@ -336,7 +268,7 @@ class CampaignImportWizard(models.TransientModel):
             'name': _('Created Campaigns'),
             'res_model': 'campaign.analytics',
             'view_mode': 'tree,form',
-            'domain': [('id', 'in', self.created_campaign_ids.ids)],
+            'domain': domain,
             'context': {'create': False}
         }
 